@@ -0,0 +1,154 @@
+# acquisition_benchmark.py
+#
+# sensor_script.py tarama döngüsünü simüle donanımla (scanner.sim_hardware) baştan sona
+# çalıştırır; nokta/s ve aşama başına (motor, sensör, kayıt, canlı metrik, LCD) süreleri raporlar.
+# Geçici bir SQLite veritabanı kullanır, projenin veritabanına dokunmaz.
+#
+# Kullanım:
+#   python acquisition_benchmark.py                       # hızlı mod: yalnızca yazılım yükü
+#   python acquisition_benchmark.py --timing real         # gerçek motor/yankı/I2C gecikmeleriyle
+#   python acquisition_benchmark.py --tilt_step 15 --samples_per_angle 5 --use_journal false
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+STAGES = ('move_motor_to_angle', 'read_distances', 'save_scan_point', 'write_live_metrics', 'set_servo_tilt')
+
+
+def setup_django(db_path):
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensordashboard.settings')
+    os.environ['SCANNER_HARDWARE_BACKEND'] = 'sim'
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def instrument(module, stage_times, stage_calls):
+    """Aşama fonksiyonlarını süre ölçen sarmalayıcılarla değiştirir (perform_sweep modül globali üzerinden çağırır)."""
+    for name in STAGES:
+        original = getattr(module, name)
+
+        def timed(*args, _original=original, _name=name, **kwargs):
+            started = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                stage_times[_name] += time.perf_counter() - started
+                stage_calls[_name] += 1
+
+        setattr(module, name, timed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simüle donanımla uçtan uca tarama karşılaştırması")
+    parser.add_argument("--timing", choices=['fast', 'real'], default='fast',
+                        help="fast: tüm gecikmeler sıfır (yazılım yükü), real: donanım gecikmeleri modellenir")
+    parser.add_argument("--scans", type=int, default=3)
+    parser.add_argument("--scan_angle", type=float, default=270.0)
+    parser.add_argument("--step_angle", type=float, default=2.0)
+    parser.add_argument("--samples_per_angle", type=int, default=1)
+    parser.add_argument("--servo_angle", type=float, default=0.0)
+    parser.add_argument("--tilt_start", type=float, default=0.0)
+    parser.add_argument("--tilt_end", type=float, default=30.0)
+    parser.add_argument("--tilt_step", type=float, default=0.0)
+    parser.add_argument("--use_journal", type=lambda x: str(x).lower() == 'true', default=True)
+    parser.add_argument("--room", type=str, default=None, help="Oda tanımı JSON dosyası (scanner.sim_hardware)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='acq_bench_')
+    setup_django(os.path.join(work_dir, 'bench.sqlite3'))
+
+    from scanner import sim_hardware
+    from scanner.geometry import IncrementalGeometry
+    from scanner.models import ScanPoint
+
+    room = sim_hardware.SimulatedRoom.from_file(args.room) if args.room else sim_hardware.default_room()
+    rig = sim_hardware.set_rig(sim_hardware.SimulatedRig(room=room, time_scale=1.0 if args.timing == 'real' else 0.0,
+                                                         seed=args.seed))
+
+    import sensor_script as ss
+
+    ss.SCAN_DURATION_ANGLE_PARAM, ss.SCAN_STEP_ANGLE = args.scan_angle, args.step_angle
+    ss.SAMPLES_PER_ANGLE = max(1, args.samples_per_angle)
+    ss.SERVO_ANGLE_PARAM = args.servo_angle
+    ss.TILT_START_ANGLE, ss.TILT_END_ANGLE, ss.TILT_STEP_ANGLE = args.tilt_start, args.tilt_end, args.tilt_step
+    ss.USE_JOURNAL, ss.JOURNAL_DIR = args.use_journal, os.path.join(work_dir, 'journal')
+    ss.DEG_PER_STEP = 360.0 / ss.STEPS_PER_REVOLUTION_OUTPUT_SHAFT
+    ss.LCD_COLS = 16
+
+    if not ss.init_hardware():
+        print("Simüle donanım başlatılamadı."); sys.exit(1)
+    if args.timing == 'fast':
+        ss.STEP_MOTOR_INTER_STEP_DELAY = ss.STEP_MOTOR_SETTLE_TIME = ss.LOOP_TARGET_INTERVAL_S = 0.0
+        ss.SERVO_SETTLE_TIME = ss.READ_INDICATOR_LED_TIME_S = ss.INTER_TRIGGER_GAP_MS = 0.0
+    ss.init_samplers()
+    if args.timing == 'fast':
+        for s in (ss.sampler, ss.sampler2):
+            if s: s.sample_interval_s = 0.0
+    ss.start_journal_ingest()
+
+    stage_times, stage_calls = defaultdict(float), defaultdict(int)
+    instrument(ss, stage_times, stage_calls)
+    tilt_layers = ss.build_tilt_layers()
+    area_tilt = ss.select_area_tilt(tilt_layers)
+
+    rig.reset()
+    ss.set_servo_tilt(tilt_layers[0])
+    ss.move_motor_to_angle(-args.scan_angle / 2.0)
+    reference_angle = ss.current_motor_angle_global
+    stage_times.clear(); stage_calls.clear()
+    lcd_busy_before = rig.lcd_busy_s
+
+    started = time.perf_counter()
+    for scan_number in range(args.scans):
+        ss.create_scan_entry(0.0, args.scan_angle, ss.SCAN_STEP_ANGLE, ss.BUZZER_DISTANCE_CM, False, tilt_layers)
+        geometry = IncrementalGeometry(flush_interval_s=ss.LIVE_METRICS_INTERVAL_S)
+        for tilt_angle in tilt_layers:
+            if len(tilt_layers) > 1: ss.set_servo_tilt(tilt_angle)
+            ss.move_motor_to_angle(reference_angle)
+            ss.perform_sweep(ss.current_scan_object_global, reference_angle, 0.0, args.scan_angle, tilt_angle,
+                             geometry if tilt_angle == area_tilt else None)
+        ss.finalize_scan(ss.current_scan_object_global, geometry)
+    acquisition_s = time.perf_counter() - started
+
+    ingest_started = time.perf_counter()
+    if ss.journal_writer: ss.journal_writer.close(finished=True)
+    if ss.journal_ingest_thread: ss.journal_ingest_thread.stop()
+    ingest_tail_s = time.perf_counter() - ingest_started
+    if ss.dual_scheduler: ss.dual_scheduler.close()
+
+    points = ScanPoint.objects.count()
+    reads = stage_calls['read_distances']
+    print(f"\n{args.scans} tarama, {len(tilt_layers)} katman, {reads} okuma, veritabanında {points} nokta "
+          f"({args.timing} zamanlama, günlük {'açık' if args.use_journal else 'kapalı'})")
+    print(f"Toplam: {acquisition_s:.2f} s -> {reads / acquisition_s:.1f} nokta/s; "
+          f"günlük aktarım kuyruğu {ingest_tail_s * 1000:.0f} ms")
+    print(f"{'Aşama':<22} {'çağrı':>7} {'toplam (s)':>11} {'ms/nokta':>9} {'pay':>7}")
+    measured = 0.0
+    for name in STAGES:
+        measured += stage_times[name]
+        print(f"{name:<22} {stage_calls[name]:>7} {stage_times[name]:>11.3f} "
+              f"{stage_times[name] / max(1, reads) * 1000:>9.3f} {stage_times[name] / acquisition_s * 100:>6.1f}%")
+    other = acquisition_s - measured
+    print(f"{'diğer (döngü, LCD...)':<22} {'':>7} {other:>11.3f} {other / max(1, reads) * 1000:>9.3f} "
+          f"{other / acquisition_s * 100:>6.1f}%")
+    print(f"LCD I2C modeli: {(rig.lcd_busy_s - lcd_busy_before) / max(1, reads) * 1000:.2f} ms/nokta, "
+          f"{rig.lcd_bytes} bayt")
+    print(f"Step motor: {rig.total_steps} adım, {rig.direction_changes} yön değişimi, "
+          f"{rig.invalid_transitions} geçersiz pin geçişi")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,23 @@ import subprocess
 import time
 import io
 import signal
+from datetime import timedelta
 import psutil
 import pandas as pd
 import numpy as np
 
-from scipy.spatial import ConvexHull
 from sklearn.cluster import DBSCAN
 from sklearn.linear_model import RANSACRegressor
+from scanner.analysis import MIN_SHAPE_POINTS, SHAPE_DESCRIPTIONS, classify_shape
+from scanner.heartbeat import DEFAULT_HEARTBEAT_PATH, read_heartbeat
+from scanner.live_channel import DEFAULT_CHANNEL_NAME, LiveChannelReader
 import google.generativeai as genai
 
 # Attempt to import Django models; handle cases where they might not be available
 try:
-    from django.db.models import Max
     from scanner.models import Scan, ScanPoint
+    from scanner.packed import scan_points_frame
+    from scanner.event_log import detection_heatmap
 
     DJANGO_MODELS_AVAILABLE = True
     print("Dashboard: Django modelleri başarıyla import edildi.")
@@ -32,7 +36,9 @@ except Exception as e:
     Scan, ScanPoint = None, None
 
 # Dash and Plotly Libraries
+from django.utils import timezone
 from django_plotly_dash import DjangoDash
+from dashboard_app.instrumentation import instrument_app
 from dash import html, dcc, Output, Input, State, no_update, dash_table
 import dash_bootstrap_components as dbc
 import plotly.graph_objects as go
@@ -60,6 +66,13 @@ FREE_MOVEMENT_SCRIPT_PATH = os.path.join(os.getcwd(), FREE_MOVEMENT_SCRIPT_FILEN
 
 SENSOR_SCRIPT_LOCK_FILE = '/tmp/sensor_scan_script.lock'
 SENSOR_SCRIPT_PID_FILE = '/tmp/sensor_scan_script.pid'
+SENSOR_SCRIPT_HEARTBEAT_FILE = DEFAULT_HEARTBEAT_PATH
+# Shared-memory ring both scripts publish their latest readings to (scanner/live_channel.py)
+LIVE_CHANNEL_NAME = DEFAULT_CHANNEL_NAME
+live_channel_reader = LiveChannelReader(LIVE_CHANNEL_NAME)
+# Free-movement detection heatmap window (scanner/event_log.py)
+DETECTION_HEATMAP_HOURS = 24
+DETECTION_HEATMAP_TIME_BINS = 48
 
 DEFAULT_UI_SCAN_DURATION_ANGLE = 270.0
 DEFAULT_UI_SCAN_STEP_ANGLE = 10.0
@@ -68,9 +81,20 @@ DEFAULT_UI_INVERT_MOTOR = False
 DEFAULT_UI_STEPS_PER_REVOLUTION = 4096
 # Define a default servo angle for the UI, matching sensor_script's default
 DEFAULT_UI_SERVO_ANGLE = 90
+# Repeated scans: 0 means continuous until stopped; serpentine measures on the way back too
+DEFAULT_UI_SCAN_REPEATS = 1
+DEFAULT_UI_SERPENTINE = False
+# Volumetric (multi-layer) scan over a servo tilt range in a single run
+DEFAULT_UI_VOLUMETRIC = False
+DEFAULT_UI_TILT_RANGE = [45, 135]
+DEFAULT_UI_TILT_STEP = 15
+# Minimum quality score for points filtered by the scanner's multi-sample mode
+MIN_POINT_QUALITY = 0.3
 
 
 app = DjangoDash('RealtimeSensorDashboard', external_stylesheets=[dbc.themes.BOOTSTRAP])
+# Wrap every callback below with timing/query/payload metrics (see instrumentation.py)
+instrument_app(app)
 
 # --- NAVBAR CREATION ---
 navbar = dbc.NavbarSimple(
@@ -156,6 +180,24 @@ control_panel = dbc.Card([
                             )], className="mb-2"),
             dbc.Checkbox(id="invert-motor-checkbox", label="Motor Yönünü Ters Çevir", value=DEFAULT_UI_INVERT_MOTOR,
                          className="mt-2 mb-2"),
+            dbc.InputGroup([dbc.InputGroupText("Tekrar (0=Sürekli)", style={"width": "150px"}),
+                            dbc.Input(id="scan-repeats-input", type="number", value=DEFAULT_UI_SCAN_REPEATS,
+                                      min=0, max=1000, step=1)], className="mb-2"),
+            dbc.Checkbox(id="serpentine-checkbox", label="Çift Yönlü (Serpantin) Tarama", value=DEFAULT_UI_SERPENTINE,
+                         className="mt-2 mb-2"),
+            dbc.Checkbox(id="volumetric-checkbox", label="Hacimsel (Çok Katmanlı) Tarama", value=DEFAULT_UI_VOLUMETRIC,
+                         className="mt-2 mb-2"),
+            dbc.InputGroup([dbc.InputGroupText("Dikey Aralık (°)", style={"width": "150px"}),
+                            dcc.RangeSlider(
+                                id='tilt-range-slider',
+                                min=0, max=180, step=1, value=DEFAULT_UI_TILT_RANGE,
+                                marks={0: '0°', 45: '45°', 90: '90°', 135: '135°', 180: '180°'},
+                                tooltip={"placement": "bottom", "always_visible": True},
+                                className="mt-2"
+                            )], className="mb-2"),
+            dbc.InputGroup([dbc.InputGroupText("Dikey Adım (°)", style={"width": "150px"}),
+                            dbc.Input(id="tilt-step-input", type="number", value=DEFAULT_UI_TILT_STEP, min=1,
+                                      max=90, step=1)], className="mb-2"),
         ])
     ])
 ])
@@ -166,7 +208,8 @@ stats_panel = dbc.Card([dbc.CardHeader("Anlık Sensör Değerleri", className="b
                className="text-center border-end"),
      dbc.Col(html.Div([html.H6("Mevcut Mesafe:"), html.H4(id='current-distance', children="-- cm")]),
                id='current-distance-col', width=3, className="text-center rounded border-end"),
-     dbc.Col(html.Div([html.H6("Anlık Hız:"), html.H4(id='current-speed', children="-- cm/s")]), width=3,
+     dbc.Col(html.Div([html.H6("Anlık Hız:"), html.H4(id='current-speed', children="-- cm/s"),
+                       html.Small(id='current-speed-note', className="text-muted")]), width=3,
                className="text-center border-end"),
      dbc.Col(html.Div([html.H6("Max. Algılanan Mesafe:"), html.H4(id='max-detected-distance', children="-- cm")]),
                width=3, className="text-center")]))], className="mb-3")
@@ -174,6 +217,11 @@ stats_panel = dbc.Card([dbc.CardHeader("Anlık Sensör Değerleri", className="b
 system_card = dbc.Card([dbc.CardHeader("Sistem Durumu", className="bg-secondary text-white"), dbc.CardBody(
     [dbc.Row([dbc.Col(html.Div([html.H6("Sensör Betiği Durumu:"), html.H5(id='script-status', children="Beklemede")]))],
              className="mb-2"),
+     dbc.Row([dbc.Col(html.Div([html.H6("Tarama İlerlemesi:"),
+                                 dbc.Progress(id='scan-progress', value=0, color="primary", style={"height": "20px"},
+                                              className="mb-1", label=""),
+                                 html.Small(id='scan-progress-detail', children="--", className="text-muted")]))],
+             className="mb-2"),
      dbc.Row([dbc.Col(html.Div([html.H6("Pi CPU Kullanımı:"),
                                  dbc.Progress(id='cpu-usage', value=0, color="success", style={"height": "20px"},
                                               className="mb-1", label="0%")])),
@@ -233,6 +281,7 @@ visualization_tabs = dbc.Tabs(
                                     {'label': 'Regresyon Analizi', 'value': 'regression'},
                                     {'label': 'Polar Grafik', 'value': 'polar'},
                                     {'label': 'Zaman Serisi (Mesafe)', 'value': 'time'},
+                                    {'label': 'Algılama Isı Haritası (Serbest Hareket)', 'value': 'detections'},
                                 ],
                                 value='3d_map', # Default to 3D map
                                 clearable=False,
@@ -253,6 +302,8 @@ visualization_tabs = dbc.Tabs(
                         html.Div(dcc.Graph(id='polar-graph', style={'height': '75vh'}), id='container-polar-graph'),
                         html.Div(dcc.Graph(id='time-series-graph', style={'height': '75vh'}),
                                  id='container-time-series-graph'),
+                        html.Div(dcc.Graph(id='detection-heatmap-graph', style={'height': '75vh'}),
+                                 id='container-detection-heatmap-graph'),
                     ]
                 )
             ],
@@ -342,6 +393,8 @@ app.layout = html.Div(
             centered=True
         ),
         dcc.Interval(id='interval-component-main', interval=2500, n_intervals=0),
+        # The real-time card reads shared memory, not SQLite, so it can refresh faster than the graphs
+        dcc.Interval(id='interval-component-live', interval=1000, n_intervals=0),
         dcc.Interval(id='interval-component-system', interval=3000, n_intervals=0),
     ]
 )
@@ -365,6 +418,63 @@ def get_latest_scan():
         print(f"DB Hatası (get_latest_scan): {e}");
         return None
 
+def get_live_values():
+    """
+    Returns the latest reading published by sensor_script or free_movement_script through the
+    shared-memory live channel, or None when no script is publishing (or the reading is stale).
+    """
+    try:
+        return live_channel_reader.latest()
+    except Exception as e:
+        logging.error(f"Anlık değer kanalı okunamadı: {e}")
+        live_channel_reader.close()
+        return None
+
+
+def get_latest_point_summary(scan):
+    """
+    Returns (latest point as a dict, max valid distance) for a scan, whichever point storage it uses.
+    Both come from the summary columns the scanner maintains on the Scan row (scanner/summary.py),
+    so no point rows or chunks are read.
+    """
+    if not scan.point_count: return None, None
+    point = {'derece': scan.last_angle_deg, 'mesafe_cm': scan.last_distance_cm, 'hiz_cm_s': scan.last_speed_cm_s}
+    return point, scan.max_distance_cm
+
+
+def filter_valid_points(df_pts):
+    """
+    Returns the points usable for analysis. Points carrying a quality score were already
+    median/MAD filtered by the scanner, so they are trusted as-is; older single-read points
+    fall back to the distance range check.
+    """
+    if df_pts.empty or 'mesafe_cm' not in df_pts.columns: return df_pts.copy()
+    in_range = (df_pts['mesafe_cm'] > 0.1) & (df_pts['mesafe_cm'] < 300.0)
+    if 'quality' not in df_pts.columns: return df_pts[in_range].copy()
+    has_quality = df_pts['quality'].notna()
+    trusted = has_quality & (df_pts['quality'] >= MIN_POINT_QUALITY)
+    return df_pts[trusted | (~has_quality & in_range)].copy()
+
+def apply_fused_distance(df_pts):
+    """
+    Points recorded with both sensors carry a fused distance; it replaces mesafe_cm for the
+    analyses. Points without one (single-sensor or legacy scans) keep their raw distance.
+    """
+    if 'mesafe_fused_cm' not in df_pts.columns or df_pts.empty: return df_pts
+    df_pts = df_pts.copy()
+    df_pts['mesafe_cm'] = df_pts['mesafe_fused_cm'].fillna(df_pts['mesafe_cm'])
+    return df_pts
+
+def select_horizontal_layer(df_val):
+    """
+    Volumetric scans hold several tilt layers; the 2D analyses only make sense on one of them,
+    so the layer closest to horizontal is used. Single-layer and legacy scans are returned unchanged.
+    """
+    if 'dikey_aci' not in df_val.columns or df_val['dikey_aci'].nunique() <= 1: return df_val
+    layers = df_val['dikey_aci'].dropna().unique()
+    flattest = layers[np.argmin(np.abs(layers))]
+    return df_val[df_val['dikey_aci'] == flattest].copy()
+
 def add_scan_rays(fig, df):
     if df.empty or not all(col in df.columns for col in ['x_cm', 'y_cm']): return
     x_lines, y_lines = [], []
@@ -484,7 +594,7 @@ def analyze_environment_shape(fig, df_valid_input):
     num_actual_clusters = len(unique_clusters - {-1, -2})
     desc = f"{num_actual_clusters} potansiyel nesne kümesi bulundu." if num_actual_clusters > 0 else "Belirgin bir nesne kümesi bulunamadı (DBSCAN)."
     cmap_len = num_actual_clusters
-    colors = plt.cm.get_cmap('viridis', cmap_len if cmap_len > 0 else 1)
+    colors = plt.get_cmap('viridis', cmap_len if cmap_len > 0 else 1)
     for k_label in unique_clusters:
         if k_label == -2: continue
         cluster_points_df = df_valid[df_valid['cluster'] == k_label]
@@ -503,26 +613,11 @@ def analyze_environment_shape(fig, df_valid_input):
     return desc, df_valid
 
 def estimate_geometric_shape(df_input):
-    df = df_input.copy()
-    if len(df) < 15 or not all(
-        col in df.columns for col in ['x_cm', 'y_cm']): return "Şekil tahmini için yetersiz nokta."
+    if len(df_input) < MIN_SHAPE_POINTS or not all(
+        col in df_input.columns for col in ['x_cm', 'y_cm']): return "Şekil tahmini için yetersiz nokta."
     try:
-        points = df[['x_cm', 'y_cm']].values
-        hull = ConvexHull(points)
-        hull_area = hull.area
-        min_x_val, max_x_val = df['x_cm'].min(), df['x_cm'].max()
-        min_y_val, max_y_val = df['y_cm'].min(), df['y_cm'].max()
-        width = max_y_val - min_y_val
-        depth = max_x_val
-        if width < 1 or depth < 1: return "Algılanan şekil çok küçük."
-        bbox_area = depth * width
-        fill_factor = hull_area / bbox_area if bbox_area > 0 else 0
-        if depth > 150 and width < 50 and fill_factor < 0.3: return "Tahmin: Dar ve derin bir boşluk (Koridor)."
-        if fill_factor > 0.7 and (
-            0.8 < (width / depth if depth > 0 else 0) < 1.2): return "Tahmin: Dolgun, kutu/dairesel bir nesne."
-        if fill_factor > 0.6 and width > depth * 2.5: return "Tahmin: Geniş bir yüzey (Duvar)."
-        if fill_factor < 0.4: return "Tahmin: İçbükey bir yapı veya dağınık nesneler."
-        return "Tahmin: Düzensiz veya karmaşık bir yapı."
+        shape, _ = classify_shape(df_input['x_cm'].to_numpy(), df_input['y_cm'].to_numpy())
+        return SHAPE_DESCRIPTIONS[shape]
     except Exception as e:
         print(f"Geometrik analiz hatası: {e}");
         return "Geometrik analiz hatası."
@@ -653,10 +748,13 @@ def toggle_parameter_visibility(selected_mode):
     [State('mode-selection-radios', 'value'),
      State('scan-duration-angle-input', 'value'), State('step-angle-input', 'value'),
      State('buzzer-distance-input', 'value'), State('invert-motor-checkbox', 'value'),
-     State('steps-per-rev-input', 'value'), State('servo-angle-slider', 'value')],  # NEW State
+     State('steps-per-rev-input', 'value'), State('servo-angle-slider', 'value'),  # NEW State
+     State('scan-repeats-input', 'value'), State('serpentine-checkbox', 'value'),
+     State('volumetric-checkbox', 'value'), State('tilt-range-slider', 'value'), State('tilt-step-input', 'value')],
     prevent_initial_call=True
 )
-def handle_start_scan_script(n_clicks, selected_mode, duration, step, buzzer_dist, invert, steps_rev, servo_angle):
+def handle_start_scan_script(n_clicks, selected_mode, duration, step, buzzer_dist, invert, steps_rev, servo_angle,
+                             repeats, serpentine, volumetric, tilt_range, tilt_step):
     """Handles starting the sensor script based on selected mode and parameters."""
     if n_clicks == 0:
         return no_update
@@ -685,13 +783,22 @@ def handle_start_scan_script(n_clicks, selected_mode, duration, step, buzzer_dis
             "Uyarı mesafesi 0-200 cm arasında olmalı!", color="danger", duration=4000)
         if not (isinstance(steps_rev, (int, float)) and 500 <= steps_rev <= 10000): return dbc.Alert(
             "Motor Adım/Tur 500-10000 arasında olmalı!", color="danger", duration=4000)
+        if not (isinstance(repeats, (int, float)) and 0 <= repeats <= 1000): return dbc.Alert(
+            "Tekrar sayısı 0-1000 arasında olmalı!", color="danger", duration=4000)
+        if volumetric and not (isinstance(tilt_step, (int, float)) and 1 <= tilt_step <= 90): return dbc.Alert(
+            "Dikey adım 1-90 derece arasında olmalı!", color="danger", duration=4000)
         cmd = [py_exec, SENSOR_SCRIPT_PATH,
                "--scan_duration_angle", str(duration),
                "--step_angle", str(step),
                "--buzzer_distance", str(buzzer_dist),
                "--invert_motor_direction", str(invert),
                "--steps_per_rev", str(steps_rev),
-               "--servo_angle", str(servo_angle)]  # NEW: Pass servo_angle
+               "--servo_angle", str(servo_angle),  # NEW: Pass servo_angle
+               "--scan_repeats", str(int(repeats)),
+               "--serpentine", str(bool(serpentine))]
+        if volumetric:
+            cmd += ["--tilt_start", str(tilt_range[0]), "--tilt_end", str(tilt_range[1]),
+                    "--tilt_step", str(tilt_step)]
     elif selected_mode == 'free_movement':
         cmd = [py_exec, FREE_MOVEMENT_SCRIPT_PATH]
     else:
@@ -762,13 +869,47 @@ def handle_stop_scan_script(n_clicks):
                 pass
     return dbc.Alert(message, color=color)
 
+def format_scan_progress(heartbeat):
+    """
+    Turns the scanner's heartbeat (scanner/heartbeat.py) into (percent, bar label, detail text):
+    current angle, points done/planned, points/s, ETA and the last error.
+    """
+    if not heartbeat:
+        return 0, "", "--"
+    planned = heartbeat.get('points_planned') or 0
+    done = heartbeat.get('points_done') or 0
+    percent = min(100.0, 100.0 * done / planned) if planned else 0
+    parts = [f"Tarama #{heartbeat.get('scan_id')}", f"{done}/{planned} nokta"]
+    if heartbeat.get('status') == 'running':
+        if heartbeat.get('angle_deg') is not None:
+            parts.append(f"açı {heartbeat['angle_deg']:.1f}°")
+        if heartbeat.get('rate_pps'):
+            parts.append(f"{heartbeat['rate_pps']:.2f} nokta/s")
+        if heartbeat.get('eta_s') is not None:
+            minutes, seconds = divmod(int(round(heartbeat['eta_s'])), 60)
+            parts.append(f"kalan ~{minutes}:{seconds:02d}")
+        if heartbeat.get('stale'):
+            parts.append(f"{heartbeat['age_s']:.0f} s'dir güncellenmedi")
+    else:
+        status = heartbeat.get('status')
+        parts.append(f"durum: {Scan.Status(status).label if status in Scan.Status.values else status}")
+    if heartbeat.get('scans_planned'):
+        parts.append(f"geçiş {min(heartbeat.get('scans_done', 0) + 1, heartbeat['scans_planned'])}/"
+                     f"{heartbeat['scans_planned']}")
+    error = heartbeat.get('last_error')
+    if error:
+        parts.append(f"son hata: {error.get('message')}")
+    return percent, f"{percent:.0f}%", " · ".join(parts)
+
+
 @app.callback(
     [Output('script-status', 'children'), Output('script-status', 'className'), Output('cpu-usage', 'value'),
-     Output('cpu-usage', 'label'), Output('ram-usage', 'value'), Output('ram-usage', 'label')],
+     Output('cpu-usage', 'label'), Output('ram-usage', 'value'), Output('ram-usage', 'label'),
+     Output('scan-progress', 'value'), Output('scan-progress', 'label'), Output('scan-progress-detail', 'children')],
     [Input('interval-component-system', 'n_intervals')]
 )
 def update_system_card(n):
-    """Updates system status (script, CPU, RAM usage) periodically."""
+    """Updates system status (script, CPU, RAM usage, scan progress) periodically, without database access."""
     status_text, status_class, pid_val = "Beklemede", "text-secondary", None
     if os.path.exists(SENSOR_SCRIPT_PID_FILE):
         try:
@@ -782,33 +923,46 @@ def update_system_card(n):
         status_text, status_class = "Çalışmıyor", "text-danger"
     cpu = psutil.cpu_percent(interval=0.1)
     ram = psutil.virtual_memory().percent
-    return status_text, status_class, cpu, f"{cpu:.1f}%", ram, f"{ram:.1f}%"
+    progress_value, progress_label, progress_detail = format_scan_progress(read_heartbeat(SENSOR_SCRIPT_HEARTBEAT_FILE))
+    return (status_text, status_class, cpu, f"{cpu:.1f}%", ram, f"{ram:.1f}%", progress_value, progress_label,
+            progress_detail)
 
 
 @app.callback(
     [Output('current-angle', 'children'), Output('current-distance', 'children'), Output('current-speed', 'children'),
-     Output('current-distance-col', 'style'), Output('max-detected-distance', 'children')],
-    [Input('interval-component-main', 'n_intervals')]
+     Output('current-distance-col', 'style'), Output('max-detected-distance', 'children'),
+     Output('current-speed-note', 'children')],
+    [Input('interval-component-live', 'n_intervals')]
 )
 def update_realtime_values(n):
-    """Updates real-time sensor values (angle, distance, speed, max distance) and applies buzzer styling."""
-    scan = get_latest_scan()
-    angle_s, dist_s, speed_s, max_dist_s = "--°", "-- cm", "-- cm/s", "-- cm"
+    """
+    Updates real-time sensor values (angle, distance, speed, max distance) and applies buzzer styling.
+    Reads the live channel first; the latest scan's summary columns are only queried when no script
+    is publishing. Speed needs a second reading at the same angle, so an unknown speed is explained
+    instead of left as a bare placeholder.
+    """
+    angle_s, dist_s, speed_s, max_dist_s, speed_note = "--°", "-- cm", "-- cm/s", "-- cm", ""
     dist_style = {'padding': '10px', 'transition': 'background-color 0.5s ease', 'borderRadius': '5px'}
-    if scan:
-        point = scan.points.order_by('-timestamp').first()
-        if point:
-            angle_s = f"{point.derece:.1f}°" if pd.notnull(point.derece) else "--°"
-            dist_s = f"{point.mesafe_cm:.1f} cm" if pd.notnull(point.mesafe_cm) else "-- cm"
-            speed_s = f"{point.hiz_cm_s:.1f} cm/s" if pd.notnull(point.hiz_cm_s) else "-- cm/s"
-            buzzer_threshold = scan.buzzer_distance_setting
-            if buzzer_threshold is not None and pd.notnull(point.mesafe_cm) and 0 < point.mesafe_cm <= buzzer_threshold:
-                dist_style.update({'backgroundColor': '#d9534f', 'color': 'white'})
-            max_dist_agg = scan.points.filter(mesafe_cm__lt=2500, mesafe_cm__gt=0).aggregate(
-                max_dist_val=Max('mesafe_cm'))
-            if max_dist_agg and max_dist_agg.get('max_dist_val') is not None:
-                max_dist_s = f"{max_dist_agg['max_dist_val']:.1f} cm"
-    return angle_s, dist_s, speed_s, dist_style, max_dist_s
+    point = get_live_values()
+    if point:
+        max_dist, buzzer_threshold = point['max_distance_cm'], point['buzzer_distance_cm']
+    else:
+        scan = get_latest_scan()
+        point, max_dist = get_latest_point_summary(scan) if scan else (None, None)
+        buzzer_threshold = scan.buzzer_distance_setting if scan else None
+    if point:
+        angle_s = f"{point['derece']:.1f}°" if pd.notnull(point['derece']) else "--°"
+        dist_s = f"{point['mesafe_cm']:.1f} cm" if pd.notnull(point['mesafe_cm']) else "-- cm"
+        if pd.notnull(point['hiz_cm_s']):
+            speed_s = f"{point['hiz_cm_s']:.1f} cm/s"
+        else:
+            speed_note = "Aynı açı tekrar ölçülünce hesaplanır (--scan_repeats > 1 ya da ardışık tarama)"
+        if (pd.notnull(buzzer_threshold) and pd.notnull(point['mesafe_cm'])
+                and 0 < point['mesafe_cm'] <= buzzer_threshold):
+            dist_style.update({'backgroundColor': '#d9534f', 'color': 'white'})
+        if pd.notnull(max_dist):
+            max_dist_s = f"{max_dist:.1f} cm"
+    return angle_s, dist_s, speed_s, dist_style, max_dist_s, speed_note
 
 
 @app.callback(
@@ -834,10 +988,9 @@ def export_csv_callback(n_clicks_csv):
     if not n_clicks_csv: return no_update
     scan = get_latest_scan()
     if not scan: return dcc.send_data_frame(pd.DataFrame().to_csv, "tarama_yok.csv", index=False)
-    points_qs = scan.points.all().values()
-    if not points_qs: return dcc.send_data_frame(pd.DataFrame().to_csv, f"tarama_id_{scan.id}_nokta_yok.csv",
-                                                 index=False)
-    df = pd.DataFrame(list(points_qs))
+    df = scan_points_frame(scan)
+    if df.empty: return dcc.send_data_frame(pd.DataFrame().to_csv, f"tarama_id_{scan.id}_nokta_yok.csv",
+                                            index=False)
     return dcc.send_data_frame(df.to_csv, f"tarama_id_{scan.id}_noktalar.csv", index=False)
 
 
@@ -850,7 +1003,7 @@ def export_excel_callback(n_clicks_excel):
     try:
         scan_info_data = Scan.objects.filter(id=scan.id).values().first()
         scan_info_df = pd.DataFrame([scan_info_data]) if scan_info_data else pd.DataFrame()
-        points_df = pd.DataFrame(list(scan.points.all().values()))
+        points_df = scan_points_frame(scan)
     except Exception as e_excel_data:
         print(f"Excel için veri çekme hatası: {e_excel_data}")
         return dcc.send_bytes(b"", f"veri_cekme_hatasi_{scan.id if scan else 'yok'}.xlsx")
@@ -875,9 +1028,9 @@ def render_and_update_data_table(active_tab, n):
     if active_tab != "tab-datatable": return None
     scan = get_latest_scan()
     if not scan: return html.P("Görüntülenecek tarama verisi yok.")
-    points_qs = scan.points.order_by('-id').values('id', 'derece', 'mesafe_cm', 'hiz_cm_s', 'x_cm', 'y_cm', 'timestamp')
-    if not points_qs: return html.P(f"Tarama ID {scan.id} için nokta verisi bulunamadı.")
-    df = pd.DataFrame(list(points_qs))
+    df = scan_points_frame(scan, ['id', 'derece', 'mesafe_cm', 'quality', 'hiz_cm_s', 'x_cm', 'y_cm', 'timestamp'],
+                           order_by='-id')
+    if df.empty: return html.P(f"Tarama ID {scan.id} için nokta verisi bulunamadı.")
     if 'timestamp' in df.columns: df['timestamp'] = pd.to_datetime(df['timestamp']).dt.strftime(
         '%Y-%m-%d %H:%M:%S.%f').str[:-3]
     return dash_table.DataTable(data=df.to_dict('records'),
@@ -911,9 +1064,6 @@ def update_all_graphs(n):
     """
     # --- DEBUGGING CODE START ---
     print("\n--- Grafik güncelleme tetiklendi ---")
-    # Local import for safety, though it's already imported globally
-    from scanner.models import Scan, ScanPoint
-
     scan = get_latest_scan()
     if not scan:
         print(">> DATA_DEBUG: get_latest_scan() fonksiyonu 'None' döndürdü. Veritabanında gösterilecek tarama yok.")
@@ -934,22 +1084,25 @@ def update_all_graphs(n):
     if scan:
         scan_id_for_revision = str(scan.id)
         # Fetch all necessary columns, including z_cm for 3D plot
-        points_qs = ScanPoint.objects.filter(scan=scan).values('x_cm', 'y_cm', 'z_cm', 'derece', 'mesafe_cm',
-                                                               'timestamp')
-        df_pts = pd.DataFrame(list(points_qs))
-        # Filter out invalid distance readings for analysis
-        df_val = df_pts[(df_pts['mesafe_cm'] > 0.1) & (df_pts['mesafe_cm'] < 300.0)].copy()
+        df_pts = apply_fused_distance(scan_points_frame(scan, ['x_cm', 'y_cm', 'z_cm', 'derece', 'dikey_aci', 'mesafe_cm',
+                                                               'mesafe_fused_cm', 'quality', 'timestamp']))
+        # Filter out invalid distance readings for analysis (quality-scored points are trusted)
+        df_val_3d = filter_valid_points(df_pts)
+        # The 3D map renders every tilt layer; the 2D analyses below use a single layer
+        df_val = select_horizontal_layer(df_val_3d)
 
         # --- NEW: 3D Scatter Plot (figs[0]) ---
-        if not df_val.empty and all(k in df_val for k in ['x_cm', 'y_cm', 'z_cm']):
+        if not df_val_3d.empty and all(k in df_val_3d for k in ['x_cm', 'y_cm', 'z_cm']):
             figs[0].add_trace(go.Scatter3d(
-                x=df_val['y_cm'],  # Use y_cm for Plotly's x-axis to match 2D map orientation (forward is positive X, right is positive Y)
-                y=df_val['x_cm'],  # Use x_cm for Plotly's y-axis
-                z=df_val['z_cm'],
+                x=df_val_3d['y_cm'],  # Use y_cm for Plotly's x-axis to match 2D map orientation (forward is positive X, right is positive Y)
+                y=df_val_3d['x_cm'],  # Use x_cm for Plotly's y-axis
+                z=df_val_3d['z_cm'],
+                customdata=df_val_3d['dikey_aci'],
+                hovertemplate='Y: %{x:.1f} cm<br>X: %{y:.1f} cm<br>Z: %{z:.1f} cm<br>Dikey: %{customdata}°<extra></extra>',
                 mode='markers',
                 marker=dict(
                     size=3,
-                    color=df_val['z_cm'],  # Color by height (Z-coordinate)
+                    color=df_val_3d['z_cm'],  # Color by height (Z-coordinate)
                     colorscale='Viridis',
                     showscale=True,
                     colorbar_title='Yükseklik (cm)'
@@ -966,12 +1119,12 @@ def update_all_graphs(n):
 
 
         # --- DEBUGGING CODE START ---
-        print(f">> DATA_DEBUG: Tarama #{scan.id} için {len(points_qs)} adet nokta bulundu.")
-        if not points_qs:
+        print(f">> DATA_DEBUG: Tarama #{scan.id} için {len(df_pts)} adet nokta bulundu.")
+        if df_pts.empty:
             print(">> DATA_DEBUG: UYARI! Tarama var ama ilişkili nokta (ScanPoint) yok.")
         # --- DEBUGGING CODE END ---
 
-        if not points_qs.empty: # Check if there are any points at all
+        if not df_pts.empty: # Check if there are any points at all
             if len(df_val) >= 5: # Enough valid points for meaningful analysis
                 # 2D Map (figs[1]) - Clustering, rays, and sector
                 # Pass figs[1] to analyze_environment_shape as it will add traces to it
@@ -1055,7 +1208,8 @@ def update_all_graphs(n):
      Output('container-map-graph', 'style'),
      Output('container-regression-graph', 'style'),
      Output('container-polar-graph', 'style'),
-     Output('container-time-series-graph', 'style')],
+     Output('container-time-series-graph', 'style'),
+     Output('container-detection-heatmap-graph', 'style')],
     Input('graph-selector-dropdown', 'value')
 )
 def update_graph_visibility(selected_graph):
@@ -1065,6 +1219,7 @@ def update_graph_visibility(selected_graph):
     style_regression = {'display': 'none'}
     style_polar = {'display': 'none'}
     style_time = {'display': 'none'}
+    style_detections = {'display': 'none'}
 
     if selected_graph == '3d_map': # Corresponds to the 'value' in the dropdown
         style_3d = {'display': 'block'}
@@ -1076,8 +1231,39 @@ def update_graph_visibility(selected_graph):
         style_polar = {'display': 'block'}
     elif selected_graph == 'time':
         style_time = {'display': 'block'}
+    elif selected_graph == 'detections':
+        style_detections = {'display': 'block'}
+
+    return style_3d, style_map, style_regression, style_polar, style_time, style_detections
+
 
-    return style_3d, style_map, style_regression, style_polar, style_time
+@app.callback(
+    Output('detection-heatmap-graph', 'figure'),
+    [Input('interval-component-main', 'n_intervals'), Input('graph-selector-dropdown', 'value')]
+)
+def update_detection_heatmap(n, selected_graph):
+    """
+    Heatmap of free-movement detection events over angle and time for the last DETECTION_HEATMAP_HOURS.
+    Only queried while the heatmap is the selected graph.
+    """
+    if selected_graph != 'detections':
+        return no_update
+    fig = go.Figure()
+    fig.update_layout(title_text=f'Algılama Olayları - Son {DETECTION_HEATMAP_HOURS} Saat', uirevision='detections',
+                      xaxis_title='Zaman', yaxis_title='Açı (Derece)', margin=dict(l=40, r=40, t=80, b=40))
+    if not DJANGO_MODELS_AVAILABLE:
+        return fig
+    until = timezone.now()
+    times, angles, counts = detection_heatmap(until - timedelta(hours=DETECTION_HEATMAP_HOURS), until,
+                                              time_bins=DETECTION_HEATMAP_TIME_BINS)
+    if not len(angles):
+        fig.add_annotation(text="Bu aralıkta algılama olayı yok.", showarrow=False, xref='paper', yref='paper',
+                           x=0.5, y=0.5)
+        return fig
+    fig.add_trace(go.Heatmap(x=times, y=angles, z=np.where(counts > 0, counts, np.nan), colorscale='Hot',
+                             reversescale=True, colorbar_title='Olay', hoverongaps=False,
+                             hovertemplate='%{x|%H:%M}<br>%{y:.1f}°<br>%{z} olay<extra></extra>'))
+    return fig
 
 
 @app.callback(
@@ -1138,10 +1324,9 @@ def yorumla_model_secimi(selected_model_value):
         commentary_component = dbc.Alert(
             dcc.Markdown(yorum_text_from_ai, dangerously_allow_html=True, link_target="_blank"), color="info")
     else:
-        points_qs = scan.points.all().values('derece', 'mesafe_cm')
-        if not points_qs:
+        df_data_for_ai = scan_points_frame(scan, ['derece', 'mesafe_cm'])
+        if df_data_for_ai.empty:
             return [dbc.Alert("Yorumlanacak tarama verisi bulunamadı.", color="warning"), no_update]
-        df_data_for_ai = pd.DataFrame(list(points_qs))
         if len(df_data_for_ai) > 500:
             df_data_for_ai = df_data_for_ai.sample(n=500, random_state=1)
 
@@ -1151,7 +1336,7 @@ def yorumla_model_secimi(selected_model_value):
                     dbc.Alert("Metin yorumu alınamadığı için resim oluşturulamadı.", color="warning")]
         try:
             scan.ai_commentary = yorum_text_from_ai
-            scan.save()
+            scan.save(update_fields=['ai_commentary'])
         except Exception as e_db_save:
             print(f"Veritabanına AI yorumu kaydedilemedi: {e_db_save}")
         commentary_component = dbc.Alert(
@@ -0,0 +1,347 @@
+# dashboard_app/instrumentation.py
+#
+# Dash uygulamasının geri çağrı başına ölçümü. Ölçülen bir uygulamanın `callback` dekoratörüyle
+# kaydedilen her fonksiyon sarılır; her çağrıda süre, veritabanı sorgu sayısı/süresi
+# (connection.execute_wrapper), yanıtın boyutu ve yükseltilen hatalar kaydedilir. Toplamlar birikimli
+# Prometheus histogramlarında, yüzdelikler için son çağrılar kayan bir pencerede tutulur. Eşikten
+# yavaş geri çağrılar günlüğe yazılır; çağrıların örneklenen bir kısmı cProfile altında çalışır,
+# böylece yavaş çağrı profiliyle birlikte günlüğe düşer.
+#
+# Ayarlar settings.DASH_CALLBACK_METRICS'ten gelir (bkz. DEFAULTS).
+
+import bisect
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    # Ana anahtar; False ise geri çağrılar sarılmadan kaydedilir
+    "enabled": True,
+    # Bu süreye (s) ulaşan çağrılar yavaş sayılıp günlüğe yazılır
+    "slow_callback_s": 1.0,
+    # cProfile altında çalıştırılan çağrıların oranı (0: profil alınmaz)
+    "profile_sample_rate": 0.05,
+    # Yavaş çağrı günlüğüne eklenen pstats satırı sayısı
+    "profile_lines": 25,
+    # Profili alınan yavaş çağrıların .prof dosyalarının dizini (None: yalnızca günlük)
+    "profile_dir": None,
+    # Yanıt boyutu için sonuç JSON'a çevrilir (fazladan bir kodlama maliyeti)
+    "measure_payload": True,
+    # Yönetim sayfasındaki yüzdeliklerin ve *_window göstergelerinin kayan penceresi
+    "window_s": 300,
+    "window_max_samples": 2000,
+    # /metrics/'in yönetici oturumları dışında kabul ettiği Bearer jetonu (None: yalnızca yöneticiler)
+    "metrics_token": None,
+}
+
+DURATION_BUCKETS_S = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+QUERY_TIME_BUCKETS_S = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+PAYLOAD_BUCKETS_BYTES = (1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 2e7)
+WINDOW_QUANTILES = (0.5, 0.95, 0.99)
+
+
+def get_config():
+    config = dict(DEFAULTS)
+    config.update(getattr(settings, 'DASH_CALLBACK_METRICS', {}))
+    return config
+
+
+class Histogram:
+    """Prometheus tarzı birikimli histogram (kova sayıları hiç azalmaz)."""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total, out = 0, []
+        for bound, n in zip(self.buckets + (float('inf'),), self.counts):
+            total += n
+            out.append((bound, total))
+        return out
+
+
+class CallbackStats:
+    """Tek bir geri çağrının metrikleri; kayıt defterinin kilidiyle korunur."""
+
+    def __init__(self, name, window_max_samples):
+        self.name = name
+        self.duration = Histogram(DURATION_BUCKETS_S)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.query_time = Histogram(QUERY_TIME_BUCKETS_S)
+        self.payload = Histogram(PAYLOAD_BUCKETS_BYTES)
+        self.exceptions = {}
+        self.slow_calls = 0
+        self.last_error = None
+        self.last_slow_profile = None
+        # (bitiş zamanı, süre_s, sorgu sayısı, sorgu_süresi_s, yanıt_bayt)
+        self.window = deque(maxlen=window_max_samples)
+
+    def window_samples(self, window_s, now=None):
+        cutoff = (now or time.time()) - window_s
+        while self.window and self.window[0][0] < cutoff:
+            self.window.popleft()
+        return list(self.window)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _get(self, name, config):
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = CallbackStats(name, config["window_max_samples"])
+        return stats
+
+    def record(self, name, duration_s, queries, query_time_s, payload_bytes, exception=None, profile_text=None,
+               config=None):
+        config = config or get_config()
+        with self._lock:
+            stats = self._get(name, config)
+            stats.duration.observe(duration_s)
+            stats.queries.observe(queries)
+            stats.query_time.observe(query_time_s)
+            if payload_bytes is not None:
+                stats.payload.observe(payload_bytes)
+            if exception is not None:
+                label = type(exception).__name__
+                stats.exceptions[label] = stats.exceptions.get(label, 0) + 1
+                stats.last_error = f"{label}: {exception}"
+            if duration_s >= config["slow_callback_s"]:
+                stats.slow_calls += 1
+                if profile_text:
+                    stats.last_slow_profile = profile_text
+            stats.window.append((time.time(), duration_s, queries, query_time_s, payload_bytes or 0))
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def snapshot(self, config=None):
+        """Geri çağrı başına özet satırları (kayan pencere yüzdelikleri ve toplamlar), en yavaş p95 önce."""
+        config = config or get_config()
+        rows = []
+        with self._lock:
+            for stats in self._stats.values():
+                samples = stats.window_samples(config["window_s"])
+                durations = sorted(s[1] for s in samples)
+                n = len(samples)
+                rows.append({
+                    'callback': stats.name,
+                    'calls': stats.duration.count,
+                    'errors': sum(stats.exceptions.values()),
+                    'slow_calls': stats.slow_calls,
+                    'window_calls': n,
+                    'p50_ms': _quantile(durations, 0.5) * 1000,
+                    'p95_ms': _quantile(durations, 0.95) * 1000,
+                    'max_ms': (durations[-1] if durations else 0.0) * 1000,
+                    'avg_queries': sum(s[2] for s in samples) / n if n else 0.0,
+                    'avg_query_ms': sum(s[3] for s in samples) / n * 1000 if n else 0.0,
+                    'avg_payload_kb': sum(s[4] for s in samples) / n / 1024 if n else 0.0,
+                    'last_error': stats.last_error,
+                    'last_slow_profile': stats.last_slow_profile,
+                })
+        return sorted(rows, key=lambda r: r['p95_ms'], reverse=True)
+
+    def render_prometheus(self, config=None):
+        """Metrikler Prometheus metin biçiminde (sürüm 0.0.4)."""
+        config = config or get_config()
+        lines = []
+        with self._lock:
+            stats_list = sorted(self._stats.values(), key=lambda s: s.name)
+            for metric, attr, help_text in (
+                    ('dash_callback_duration_seconds', 'duration', 'Dash geri çağrılarının süresi.'),
+                    ('dash_callback_db_queries', 'queries', 'Çağrı başına veritabanı sorgusu.'),
+                    ('dash_callback_db_query_seconds', 'query_time', 'Çağrı başına veritabanı süresi.'),
+                    ('dash_callback_payload_bytes', 'payload', 'Geri çağrı sonuçlarının JSON boyutu.')):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} histogram"]
+                for stats in stats_list:
+                    histogram = getattr(stats, attr)
+                    label = f'callback="{_escape(stats.name)}"'
+                    for bound, total in histogram.cumulative():
+                        le = '+Inf' if bound == float('inf') else _format(bound)
+                        lines.append(f'{metric}_bucket{{{label},le="{le}"}} {total}')
+                    lines.append(f"{metric}_sum{{{label}}} {_format(histogram.sum)}")
+                    lines.append(f"{metric}_count{{{label}}} {histogram.count}")
+
+            lines += ["# HELP dash_callback_exceptions_total Dash geri çağrılarının yükselttiği hatalar.",
+                      "# TYPE dash_callback_exceptions_total counter"]
+            for stats in stats_list:
+                for exc_name, count in sorted(stats.exceptions.items()):
+                    lines.append(f'dash_callback_exceptions_total{{callback="{_escape(stats.name)}",'
+                                 f'exception="{_escape(exc_name)}"}} {count}')
+
+            lines += ["# HELP dash_callback_slow_total Yavaş çağrı eşiğine ulaşan çağrılar.",
+                      "# TYPE dash_callback_slow_total counter"]
+            for stats in stats_list:
+                lines.append(f'dash_callback_slow_total{{callback="{_escape(stats.name)}"}} {stats.slow_calls}')
+
+            lines += [f"# HELP dash_callback_window_duration_seconds Son {config['window_s']} s içindeki "
+                      "süre yüzdelikleri.",
+                      "# TYPE dash_callback_window_duration_seconds gauge"]
+            for stats in stats_list:
+                durations = sorted(s[1] for s in stats.window_samples(config["window_s"]))
+                for q in WINDOW_QUANTILES:
+                    lines.append(f'dash_callback_window_duration_seconds{{callback="{_escape(stats.name)}",'
+                                 f'quantile="{q}"}} {_format(_quantile(durations, q))}')
+        return "\n".join(lines) + "\n"
+
+
+def _quantile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format(value):
+    return repr(float(value))
+
+
+REGISTRY = MetricsRegistry()
+
+
+class QueryTimer:
+    """Geçerli bağlantıdaki sorguları ve toplam sürelerini sayan execute_wrapper."""
+
+    def __init__(self):
+        self.count = 0
+        self.time_s = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.time_s += time.perf_counter() - started
+
+
+def payload_size(result):
+    """Dash'in `result` için gönderdiği JSON'un boyutu; burada kodlanamıyorsa None."""
+    from dash import no_update
+    from plotly.io.json import to_json_plotly
+
+    if result is no_update:
+        return 0
+    try:
+        return len(to_json_plotly(result))
+    except Exception:
+        return None
+
+
+def _profile_text(profiler, lines):
+    out = io.StringIO()
+    pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(lines)
+    return out.getvalue()
+
+
+def instrument_callback(func, registry=REGISTRY):
+    """Bir Dash geri çağrısını sarar; django_plotly_dash imzayı incelediğinden imza korunur."""
+    from dash.exceptions import PreventUpdate
+
+    name = func.__name__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        config = get_config()
+        timer = QueryTimer()
+        profiler = None
+        if config["profile_sample_rate"] > 0 and random.random() < config["profile_sample_rate"]:
+            profiler = cProfile.Profile()
+        error, finished = None, False
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(timer):
+                if profiler is not None:
+                    try:
+                        profiler.enable()
+                    except ValueError:
+                        # Bu iş parçacığında başka bir profil alıcı zaten çalışıyor
+                        profiler = None
+                try:
+                    result = func(*args, **kwargs)
+                    finished = True
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        except PreventUpdate:
+            raise
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            duration_s = time.perf_counter() - started
+            payload = None
+            if finished and config["measure_payload"]:
+                payload = payload_size(result)
+            profile_text = None
+            if duration_s >= config["slow_callback_s"]:
+                if profiler is not None:
+                    profile_text = _profile_text(profiler, config["profile_lines"])
+                    _dump_profile(profiler, name, config["profile_dir"])
+                logger.warning("Yavaş Dash geri çağrısı %s: %.0f ms, %d sorgu (%.0f ms DB), yanıt %s bayt%s",
+                               name, duration_s * 1000, timer.count, timer.time_s * 1000,
+                               payload if payload is not None else '?',
+                               f"\n{profile_text}" if profile_text else " (profil alınmadı)")
+            registry.record(name, duration_s, timer.count, timer.time_s, payload, exception=error,
+                            profile_text=profile_text, config=config)
+        return result
+
+    return wrapper
+
+
+def _dump_profile(profiler, name, profile_dir):
+    if not profile_dir:
+        return
+    try:
+        os.makedirs(profile_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(profile_dir, f"{name}_{time.strftime('%Y%m%d_%H%M%S')}.prof"))
+    except OSError as e:
+        logger.warning("%s için profil yazılamadı: %s", name, e)
+
+
+def instrument_app(app, registry=REGISTRY):
+    """
+    `app.callback`'in bundan sonra kaydedilen her fonksiyonu instrument_callback ile sarmasını sağlar.
+    @app.callback dekoratörleri çalışmadan önce çağrılmalıdır.
+    """
+    if not get_config()["enabled"]:
+        return app
+    register = app.callback
+
+    def callback(*args, **kwargs):
+        decorator = register(*args, **kwargs)
+
+        def wrap(func):
+            return decorator(instrument_callback(func, registry))
+        return wrap
+
+    app.callback = callback
+    app.expanded_callback = callback
+    return app
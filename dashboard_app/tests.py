@@ -1,3 +1,67 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from dashboard_app.instrumentation import DURATION_BUCKETS_S, Histogram, MetricsRegistry
+
+
+class HistogramTests(SimpleTestCase):
+    """Kovalar birikimli üst sınırlardır (le): sınıra eşit değer o kovaya düşer."""
+
+    def test_buckets(self):
+        histogram = Histogram((0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 1.0, 3.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [2, 2, 1])
+        self.assertEqual(histogram.cumulative(), [(0.1, 2), (1.0, 4), (float('inf'), 5)])
+        self.assertEqual((histogram.count, histogram.sum), (5, 4.65))
+
+
+class PrometheusRenderTests(SimpleTestCase):
+    def test_render(self):
+        registry = MetricsRegistry()
+        config = {"window_max_samples": 10, "window_s": 300, "slow_callback_s": 1.0}
+        registry.record('update "graphs"', 0.2, 3, 0.01, 2048, config=config)
+        registry.record('update "graphs"', 2.0, 5, 0.5, None, exception=ValueError("x"), config=config)
+        text = registry.render_prometheus(config)
+        lines = text.splitlines()
+        label = 'callback="update \\"graphs\\""'
+        self.assertIn("# TYPE dash_callback_duration_seconds histogram", lines)
+        self.assertIn(f'dash_callback_duration_seconds_bucket{{{label},le="0.25"}} 1', lines)
+        self.assertIn(f'dash_callback_duration_seconds_bucket{{{label},le="+Inf"}} 2', lines)
+        self.assertIn(f"dash_callback_duration_seconds_count{{{label}}} 2", lines)
+        self.assertIn(f"dash_callback_duration_seconds_sum{{{label}}} 2.2", lines)
+        # Yanıt boyutu yalnızca sonucu ölçülebilen çağrı için kaydedilir
+        self.assertIn(f"dash_callback_payload_bytes_count{{{label}}} 1", lines)
+        self.assertIn(f'dash_callback_exceptions_total{{{label},exception="ValueError"}} 1', lines)
+        self.assertIn(f"dash_callback_slow_total{{{label}}} 1", lines)
+        self.assertIn(f'dash_callback_window_duration_seconds{{{label},quantile="0.5"}} 2.0', lines)
+        buckets = [line for line in lines if line.startswith('dash_callback_duration_seconds_bucket')]
+        self.assertEqual(len(buckets), len(DURATION_BUCKETS_S) + 1)
+        self.assertTrue(text.endswith("\n"))
+
+
+class MetricsAccessTests(TestCase):
+    """Uç nokta REMOTE_ADDR'e bakmaz (yerel ters vekil arkasında her istemci 127.0.0.1 görünür)."""
+
+    def setUp(self):
+        self.url = reverse('dashboard_app:callback_metrics')
+
+    def test_anonymous_loopback_forbidden(self):
+        self.assertEqual(self.client.get(self.url, REMOTE_ADDR='127.0.0.1').status_code, 403)
+
+    def test_staff_allowed(self):
+        self.client.force_login(User.objects.create_user('staff', is_staff=True))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+
+    def test_non_staff_forbidden(self):
+        self.client.force_login(User.objects.create_user('user'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    @override_settings(DASH_CALLBACK_METRICS={"metrics_token": "s3cret"})
+    def test_bearer_token(self):
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer wrong').status_code, 403)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
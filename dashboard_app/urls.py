@@ -5,4 +5,6 @@ app_name = 'dashboard_app' # Namespace için
 
 urlpatterns = [
     path('', views.dashboard_display_view, name='realtime_dashboard'),
-]
\ No newline at end of file
+    path('metrics/', views.callback_metrics_view, name='callback_metrics'),
+    path('callback-metrics/', views.callback_metrics_admin_view, name='callback_metrics_admin'),
+]
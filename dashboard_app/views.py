@@ -1,7 +1,41 @@
+import hmac
+
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import render
 
+from dashboard_app.instrumentation import REGISTRY, get_config
+
+# Prometheus'un metin biçimi için içerik türü
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+BEARER_PREFIX = 'Bearer '
+
 def dashboard_display_view(request):
     # Dash uygulamasının adı dash_apps.py'de tanımladığımız isim olacak
     # Örnek: app = DjangoDash('RealtimeSensorDashboard', ...)
     context = {'dash_app_name': "RealtimeSensorDashboard"}
-    return render(request, 'dashboard_app/dashboard_display.html', context)
\ No newline at end of file
+    return render(request, 'dashboard_app/dashboard_display.html', context)
+
+def metrics_access_allowed(request):
+    # REMOTE_ADDR'e bakılmaz: yerel ters vekil (nginx/gunicorn) arkasında her istemci 127.0.0.1 görünür
+    if request.user.is_authenticated and request.user.is_staff:
+        return True
+    token = get_config()["metrics_token"]
+    header = request.META.get('HTTP_AUTHORIZATION', '')
+    return bool(token) and header.startswith(BEARER_PREFIX) and \
+        hmac.compare_digest(header[len(BEARER_PREFIX):].encode(), str(token).encode())
+
+def callback_metrics_view(request):
+    # Callback metrikleri Prometheus metin biçiminde; yöneticiler ya da metrics_token gönderen toplayıcı görebilir
+    if not metrics_access_allowed(request):
+        return HttpResponseForbidden("Metrikler için yönetici oturumu ya da geçerli bir erişim anahtarı gerekir.")
+    return HttpResponse(REGISTRY.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@staff_member_required
+def callback_metrics_admin_view(request):
+    # Son pencere içindeki callback süreleri, sorgu sayıları ve yavaş çağrı profilleri
+    config = get_config()
+    if request.method == 'POST' and 'reset' in request.POST:
+        REGISTRY.reset()
+    context = {'rows': REGISTRY.snapshot(config), 'config': config, 'title': "Dash callback metrikleri"}
+    return render(request, 'dashboard_app/callback_metrics.html', context)
@@ -0,0 +1,184 @@
+# dashboard_benchmark.py
+#
+# dashboard_app/dash_apps.py analiz ve grafik fonksiyonlarını artan boyutlu sentetik
+# taramalar (scanner.synthetic) üzerinde ölçer: süre (medyan), tepe bellek (tracemalloc)
+# ve JSON'a çevrilmiş figür boyutu. Sonuçlar bir taban çizgisi dosyasına kaydedilip
+# sonraki çalıştırmalar onunla karşılaştırılabilir; eşik aşılırsa çıkış kodu 1 olur.
+# Geçici bir SQLite veritabanı kullanır, projenin veritabanına dokunmaz.
+#
+# Kullanım:
+#   python dashboard_benchmark.py --sizes 100 1000 10000 --save-baseline bench_baseline.json
+#   python dashboard_benchmark.py --sizes 100 1000 10000 --compare bench_baseline.json --threshold 0.25
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Zaman ölçümleri gürültülü olduğundan çok küçük değerlerde gerileme kontrolü yapılmaz
+MIN_COMPARABLE_TIME_MS = 1.0
+MIN_COMPARABLE_PEAK_KB = 64.0
+
+
+def setup_django(db_path):
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensordashboard.settings')
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def payload_bytes(result):
+    """Tarayıcıya gidecek çıktının JSON boyutu (figürler plotly.io.to_json ile)."""
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
+    if isinstance(result, go.Figure):
+        return len(pio.to_json(result, validate=False))
+    if isinstance(result, (tuple, list)):
+        return sum(payload_bytes(item) for item in result)
+    if isinstance(result, str):
+        return len(result)
+    if result is None:
+        return 0
+    if hasattr(result, 'to_plotly_json'):
+        return len(json.dumps(result.to_plotly_json(), default=str))
+    return len(json.dumps(result, default=str))
+
+
+def build_cases(da, go):
+    """(ad, fonksiyon(df) -> ölçülecek çıktı) listesi; figüre ekleyen fonksiyonlar için figür döndürülür."""
+
+    def with_figure(fn):
+        def run(df):
+            fig = go.Figure()
+            fn(fig, df)
+            return fig
+        return run
+
+    def environment_shape(df):
+        fig = go.Figure()
+        _, df_clustered = da.analyze_environment_shape(fig, df)
+        # Panel kümelenmiş veriyi de dcc.Store'a JSON olarak gönderir
+        return fig, df_clustered.to_json(orient='split')
+
+    return [
+        ('analyze_environment_shape', environment_shape),
+        ('analyze_polar_regression', lambda df: da.analyze_polar_regression(df)[1]),
+        ('estimate_geometric_shape', da.estimate_geometric_shape),
+        ('find_clearest_path', da.find_clearest_path),
+        ('add_scan_rays', with_figure(da.add_scan_rays)),
+        ('add_sector_area', with_figure(da.add_sector_area)),
+        ('update_time_series_graph', with_figure(da.update_time_series_graph)),
+        ('update_all_graphs', lambda df: da.update_all_graphs(0)),
+    ]
+
+
+def measure(fn, df, repeat):
+    """(medyan_ms, tepe_kb, çıktı_bayt) ya da hata mesajı döndürür; çıktıları susturur."""
+    sink = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(sink):
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                result = fn(df)
+                timings.append((time.perf_counter() - started) * 1000)
+            tracemalloc.start()
+            fn(df)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    except Exception as e:
+        if tracemalloc.is_tracing(): tracemalloc.stop()
+        return {'error': f"{type(e).__name__}: {e}"}
+    return {'time_ms': statistics.median(timings), 'peak_kb': peak / 1024, 'payload_kb': payload_bytes(result) / 1024}
+
+
+def compare(results, baseline, threshold):
+    """Taban çizgisine göre `threshold` oranından fazla kötüleşen ölçümleri listeler."""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base or 'error' in current or 'error' in base: continue
+        for metric, floor in (('time_ms', MIN_COMPARABLE_TIME_MS), ('peak_kb', MIN_COMPARABLE_PEAK_KB),
+                              ('payload_kb', 0.0)):
+            if base[metric] < floor and current[metric] < floor: continue
+            if current[metric] > base[metric] * (1 + threshold) and current[metric] - base[metric] > 1e-6:
+                regressions.append(f"{key} {metric}: {base[metric]:.2f} -> {current[metric]:.2f} "
+                                   f"(+{(current[metric] / max(base[metric], 1e-9) - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Panel analiz/grafik fonksiyonları karşılaştırması")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[100, 1000, 10000], help="Tarama başına nokta")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--cases", nargs='*', default=None, help="Yalnızca bu fonksiyonları ölç")
+    parser.add_argument("--kind", default='objects', help="scanner.synthetic sahne türü")
+    parser.add_argument("--save-baseline", default=None, help="Sonuçları bu JSON dosyasına yaz")
+    parser.add_argument("--compare", default=None, help="Bu taban çizgisiyle karşılaştır")
+    parser.add_argument("--threshold", type=float, default=0.25, help="İzin verilen kötüleşme oranı")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django(os.path.join(tempfile.mkdtemp(prefix='dash_bench_'), 'bench.sqlite3'))
+
+    import numpy as np
+    import pandas as pd
+    import plotly.graph_objects as go
+    from django.utils import timezone
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        from dashboard_app import dash_apps as da
+    from scanner.models import ScanPoint
+    from scanner.synthetic import generate_scan
+
+    cases = [c for c in build_cases(da, go) if not args.cases or c[0] in args.cases]
+    rng = np.random.default_rng(args.seed)
+    results = {}
+    print(f"{'Fonksiyon':<28} {'nokta':>7} {'ms (medyan)':>12} {'tepe KB':>10} {'çıktı KB':>10}")
+    for size in args.sizes:
+        # Her boyut en yeni tarama olur; update_all_graphs onu okur
+        scan = generate_scan(args.kind, size, rng, start_time=timezone.now())
+        points = ScanPoint.objects.filter(scan=scan).values('x_cm', 'y_cm', 'z_cm', 'derece', 'dikey_aci',
+                                                            'mesafe_cm', 'mesafe_fused_cm', 'quality', 'timestamp')
+        df_val = da.select_horizontal_layer(da.filter_valid_points(da.apply_fused_distance(
+            pd.DataFrame(list(points)))))
+        for name, fn in cases:
+            key = f"{name}@{size}"
+            results[key] = measure(fn, df_val, args.repeat)
+            r = results[key]
+            if 'error' in r:
+                print(f"{name:<28} {size:>7} HATA: {r['error']}")
+            else:
+                print(f"{name:<28} {size:>7} {r['time_ms']:>12.2f} {r['peak_kb']:>10.0f} {r['payload_kb']:>10.1f}")
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Taban çizgisi kaydedildi: {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\nGERİLEME (eşik %{args.threshold * 100:.0f}):")
+            for line in regressions: print(f"  {line}")
+            sys.exit(1)
+        print(f"\nGerileme yok (eşik %{args.threshold * 100:.0f}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,429 @@
+# dashboard_loadtest.py
+#
+# Panelin birden fazla ekranda açık olduğu durumu simüle eder: N istemci, tarayıcının
+# interval-component-main / interval-component-system tetiklediği Dash geri çağrı
+# POST'larını (_dash-update-component) birebir tekrarlar. Bu sırada sentetik bir tarama
+# canlı olarak veritabanına nokta ekler. Gecikme yüzdelikleri, verim, sunucu tarafı
+# sorgu sayısı/süresi ve sunucu CPU kullanımı raporlanır.
+#
+# Varsayılan olarak betik kendi sunucusunu geçici bir SQLite veritabanıyla ayrı bir
+# süreçte başlatır (--serve modu). --url ile çalışan bir sunucu hedeflenebilir; bu
+# durumda sorgu sayıları alınamaz, CPU için --server_pid verilebilir (psutil gerekir).
+# --url ile canlı tarama besleyicisi yalnızca sunucunun okuduğu veritabanı --db (ya da
+# LOADTEST_DB) ile açıkça verilirse çalışır; sentetik taramalar yanlışlıkla projenin
+# veritabanına ya da sunucunun hiç okumadığı bir dosyaya yazılmaz.
+#
+# Kullanım:
+#   python dashboard_loadtest.py --clients 8 --duration 60
+#   python dashboard_loadtest.py --clients 4 --speedup 5 --scan_rate 5 --history_points 20000
+#   python dashboard_loadtest.py --url http://raspberrypi.local:8000 --server_pid 1234 --no_feeder
+#   python dashboard_loadtest.py --url http://127.0.0.1:8000 --db /srv/sensor/db.sqlite3
+
+import argparse
+import json
+import logging
+import math
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+APP_NAME = 'RealtimeSensorDashboard'
+APP_PATH = f"/app/{APP_NAME}"
+STATS_PATH = '/__loadtest__/stats'
+INTERVAL_IDS = ('interval-component-main', 'interval-component-system')
+BROWSER_CONNECTIONS_PER_HOST = 6
+
+
+# ==============================================================================
+# --- Sunucu (--serve) ---
+# ==============================================================================
+def setup_django(db_path):
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensordashboard.settings')
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+
+    django.setup()
+
+
+class QueryCounter:
+    """Her yeni veritabanı bağlantısına execute_wrapper ekleyerek tüm sorguları sayar."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.time_s = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.count += 1
+                self.time_s += elapsed
+
+    def install(self):
+        from django.db.backends.signals import connection_created
+
+        def attach(sender, connection, **kwargs):
+            if self not in connection.execute_wrappers:
+                connection.execute_wrappers.append(self)
+
+        connection_created.connect(attach, weak=False)
+
+
+def serve(port, db_path):
+    setup_django(db_path)
+    from django.core.management import call_command
+    from django.core.servers.basehttp import run
+    from django.core.wsgi import get_wsgi_application
+
+    call_command('migrate', verbosity=0)
+    counter = QueryCounter()
+    counter.install()
+    django_app = get_wsgi_application()
+    requests_served = [0]
+
+    def application(environ, start_response):
+        if environ.get('PATH_INFO') == STATS_PATH:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            with counter.lock:
+                body = json.dumps({'queries': counter.count, 'query_time_s': counter.time_s,
+                                   'cpu_s': usage.ru_utime + usage.ru_stime, 'max_rss_kb': usage.ru_maxrss,
+                                   'requests': requests_served[0]}).encode()
+            start_response('200 OK', [('Content-Type', 'application/json'), ('Content-Length', str(len(body)))])
+            return [body]
+        requests_served[0] += 1
+        return django_app(environ, start_response)
+
+    # Dash geri çağrılarının çıktısı ve başarılı istek günlükleri sessize alınır (hatalar görünür kalır)
+    sys.stdout = open(os.devnull, 'w')
+    logging.getLogger('django.server').setLevel(logging.WARNING)
+    run('127.0.0.1', port, application, threading=True)
+
+
+# ==============================================================================
+# --- Canlı tarama besleyici ---
+# ==============================================================================
+class LiveScanFeeder(threading.Thread):
+    """
+    Gerçek tarayıcı gibi RUNNING durumda bir tarama açar ve `rate` nokta/s hızla simüle odadan
+    nokta ekler; özet sütunları (record_points) her noktada, alan/çevre metrikleri tarayıcıdaki gibi
+    seyreltilerek güncellenir. Panelin anlık değer kartı yalnızca bu özet sütunlarını okur.
+    """
+
+    def __init__(self, rate, scan_angle=270.0, step_angle=1.0, seed=0):
+        super().__init__(name='live-scan-feeder', daemon=True)
+        self.interval_s = 1.0 / max(rate, 1e-3)
+        self.scan_angle, self.step_angle = scan_angle, step_angle
+        self.seed = seed
+        self.points_written = 0
+        self.scan_ids = []
+        self._stop_event = threading.Event()
+
+    def run(self):
+        import numpy as np
+        from django.db import connection
+        from django.utils import timezone
+        from scanner.fusion import polar_to_cartesian
+        from scanner.geometry import IncrementalGeometry
+        from scanner.hardware import SENSOR_MAX_VALID_CM
+        from scanner.models import Scan, ScanPoint
+        from scanner.summary import record_points
+        from scanner.synthetic import build_room
+
+        rng = np.random.default_rng(self.seed)
+        room = build_room('objects', rng)
+        try:
+            while not self._stop_event.is_set():
+                scan = Scan.objects.create(start_angle_setting=0.0, end_angle_setting=self.scan_angle,
+                                           step_angle_setting=self.step_angle, status=Scan.Status.RUNNING)
+                self.scan_ids.append(scan.id)
+                geometry = IncrementalGeometry()
+                angle = 0.0
+                while angle <= self.scan_angle and not self._stop_event.wait(self.interval_s):
+                    distance = float(min(250.0, rng.normal(room.ray_distance_cm(angle, 0.0), 0.5)))
+                    x, y, z = (float(v) for v in polar_to_cartesian(distance, angle, 0.0))
+                    point = ScanPoint.objects.create(scan=scan, derece=angle, mesafe_cm=distance,
+                                                     mesafe_cm_2=distance, x_cm=x, y_cm=y, z_cm=z, dikey_aci=0.0,
+                                                     timestamp=timezone.now())
+                    record_points(scan.id, [point.derece], [point.mesafe_cm], [point.hiz_cm_s], point.timestamp,
+                                  point.id)
+                    self.points_written += 1
+                    if distance < SENSOR_MAX_VALID_CM:
+                        geometry.add_point(x, y)
+                        if geometry.should_flush():
+                            Scan.objects.filter(id=scan.id).update(**geometry.metrics())
+                    angle += self.step_angle
+                Scan.objects.filter(id=scan.id).update(status=Scan.Status.COMPLETED, end_time=timezone.now(),
+                                                       **(geometry.metrics() or {}))
+        finally:
+            connection.close()
+
+    def stop(self):
+        self._stop_event.set()
+        self.join(10)
+
+    def summarized_points(self):
+        """Beslenen taramaların özet sütunlarındaki (Scan.point_count) toplam nokta sayısı."""
+        from django.db.models import Sum
+        from scanner.models import Scan
+
+        return Scan.objects.filter(id__in=self.scan_ids).aggregate(total=Sum('point_count'))['total'] or 0
+
+
+# ==============================================================================
+# --- İstemciler ---
+# ==============================================================================
+def parse_output_spec(output):
+    """Dash çıktı dizgesini ("..a.figure...b.data.." ya da "a.figure") {id, property} yapısına çevirir."""
+    def one(spec):
+        component_id, prop = spec.rsplit('.', 1)
+        return {'id': component_id, 'property': prop}
+
+    if output.startswith('..') and output.endswith('..'):
+        return [one(part) for part in output[2:-2].split('...')]
+    return one(output)
+
+
+def collect_layout_values(node, values):
+    """Yerleşim JSON ağacındaki id'li bileşenlerin başlangıç prop değerlerini toplar."""
+    if isinstance(node, dict):
+        props = node.get('props')
+        if isinstance(props, dict):
+            if isinstance(props.get('id'), str):
+                values[props['id']] = props
+            for value in props.values():
+                collect_layout_values(value, values)
+    elif isinstance(node, list):
+        for item in node:
+            collect_layout_values(item, values)
+    return values
+
+
+class CallbackPlan:
+    """Sunucunun _dash-dependencies/_dash-layout yanıtlarından, aralık bileşenlerince tetiklenen geri çağrıları çıkarır."""
+
+    def __init__(self, base_url, session):
+        dependencies = session.get(base_url + APP_PATH + '/_dash-dependencies', timeout=30).json()
+        layout = session.get(base_url + APP_PATH + '/_dash-layout', timeout=30).json()
+        self.layout_values = collect_layout_values(layout, {})
+        self.intervals_ms = {i: self.layout_values.get(i, {}).get('interval', 1000) for i in INTERVAL_IDS}
+        self.callbacks = defaultdict(list)  # aralık id -> [(ad, bağımlılık)]
+        for dep in dependencies:
+            for trigger in dep['inputs']:
+                if trigger['id'] in INTERVAL_IDS and trigger['property'] == 'n_intervals':
+                    outputs = parse_output_spec(dep['output'])
+                    name = outputs[0]['id'] if isinstance(outputs, list) else outputs['id']
+                    self.callbacks[trigger['id']].append((name, dep))
+
+    def body(self, dep, interval_id, n_intervals):
+        def with_value(item):
+            value = n_intervals if item['id'] == interval_id and item['property'] == 'n_intervals' else \
+                self.layout_values.get(item['id'], {}).get(item['property'])
+            return {'id': item['id'], 'property': item['property'], 'value': value}
+
+        return {'output': dep['output'], 'outputs': parse_output_spec(dep['output']),
+                'inputs': [with_value(i) for i in dep['inputs']], 'state': [with_value(s) for s in dep['state']],
+                'changedPropIds': [f"{interval_id}.n_intervals"]}
+
+
+class SimulatedViewer(threading.Thread):
+    """Bir tarayıcı sekmesi: her aralık kendi periyoduyla tetiklenir, geri çağrılar paralel gönderilir."""
+
+    def __init__(self, index, base_url, plan, deadline, speedup, results):
+        super().__init__(name=f"viewer-{index}", daemon=True)
+        self.base_url, self.plan, self.deadline = base_url, plan, deadline
+        self.speedup, self.results = speedup, results
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=BROWSER_CONNECTIONS_PER_HOST)
+        self.session.mount('http://', adapter)
+        self.offset_s = index * 0.37  # sekmeler aynı anda açılmaz
+
+    def post(self, name, body):
+        started = time.perf_counter()
+        try:
+            response = self.session.post(self.base_url + APP_PATH + '/_dash-update-component', json=body, timeout=60)
+            ok = response.status_code in (200, 204)
+            size = len(response.content)
+        except requests.RequestException:
+            ok, size = False, 0
+        self.results.record(name, time.perf_counter() - started, ok, size)
+
+    def run(self):
+        next_fire = {i: time.monotonic() + self.offset_s for i in INTERVAL_IDS}
+        counts = dict.fromkeys(INTERVAL_IDS, 0)
+        with ThreadPoolExecutor(max_workers=BROWSER_CONNECTIONS_PER_HOST) as pool:
+            while time.monotonic() < self.deadline:
+                interval_id = min(next_fire, key=next_fire.get)
+                wait = next_fire[interval_id] - time.monotonic()
+                if wait > 0: time.sleep(wait)
+                if time.monotonic() >= self.deadline: break
+                counts[interval_id] += 1
+                futures = [pool.submit(self.post, name, self.plan.body(dep, interval_id, counts[interval_id]))
+                           for name, dep in self.plan.callbacks[interval_id]]
+                for future in futures: future.result()
+                next_fire[interval_id] += self.plan.intervals_ms[interval_id] / 1000.0 / self.speedup
+
+
+class Results:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.bytes = defaultdict(int)
+
+    def record(self, name, latency_s, ok, size):
+        with self.lock:
+            self.latencies[name].append(latency_s)
+            self.bytes[name] += size
+            if not ok: self.errors[name] += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(pct / 100.0 * len(ordered)) - 1))]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def read_server_stats(base_url, server_pid):
+    try:
+        return requests.get(base_url + STATS_PATH, timeout=10).json()
+    except (requests.RequestException, ValueError):
+        pass
+    if server_pid:
+        try:
+            import psutil
+
+            times = psutil.Process(server_pid).cpu_times()
+            return {'cpu_s': times.user + times.system}
+        except Exception:
+            pass
+    return {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Panel için eşzamanlı izleyici yük testi")
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=30.0, help="Ölçüm süresi (s)")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Aralık periyotlarını bu oranda hızlandır")
+    parser.add_argument("--url", default=None, help="Çalışan sunucu (verilmezse geçici sunucu başlatılır)")
+    parser.add_argument("--server_pid", type=int, default=None, help="--url ile CPU ölçümü için sunucu PID'i")
+    parser.add_argument("--scan_rate", type=float, default=1.7, help="Canlı taramanın nokta/s hızı")
+    parser.add_argument("--history_points", type=int, default=0, help="Önceden yüklenecek geçmiş tarama noktası")
+    parser.add_argument("--no_feeder", action='store_true', help="Canlı tarama besleyicisini çalıştırma")
+    parser.add_argument("--serve", action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--db", default=os.environ.get('LOADTEST_DB'),
+                        help="--url ile besleyicinin yazacağı, sunucunun kullandığı veritabanı (LOADTEST_DB)")
+    args = parser.parse_args()
+    if args.url and not args.no_feeder and not args.db:
+        parser.error("--url ile canlı tarama besleyicisi sunucunun veritabanını bilmeli: --db (ya da LOADTEST_DB) "
+                     "verin veya --no_feeder kullanın")
+
+    if args.serve:
+        serve(args.port, args.db)
+        return
+
+    server = None
+    if args.url:
+        base_url = args.url.rstrip('/')
+        if not args.no_feeder:
+            setup_django(args.db)
+    else:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='dash_load_'), 'load.sqlite3')
+        port = free_port()
+        base_url = f"http://127.0.0.1:{port}"
+        server = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port),
+                                   '--db', db_path], cwd=os.path.dirname(os.path.abspath(__file__)))
+        for _ in range(120):
+            if read_server_stats(base_url, None): break
+            time.sleep(0.5)
+        else:
+            server.kill()
+            print("Sunucu başlatılamadı."); sys.exit(1)
+        setup_django(db_path)
+
+    try:
+        if args.history_points and not args.url:
+            from scanner.synthetic import generate_dataset
+
+            generate_dataset(1, args.history_points, kind='room')
+        feeder = None
+        if not args.no_feeder:
+            feeder = LiveScanFeeder(args.scan_rate)
+            feeder.start()
+            time.sleep(2.0)
+
+        plan = CallbackPlan(base_url, requests.Session())
+        print(f"{args.clients} istemci, {args.duration:.0f} s, aralıklar "
+              f"{', '.join(f'{k}={v}ms' for k, v in plan.intervals_ms.items())}, hızlandırma x{args.speedup:g}")
+        for interval_id, callbacks in plan.callbacks.items():
+            print(f"  {interval_id}: {', '.join(name for name, _ in callbacks)}")
+
+        results = Results()
+        stats_before = read_server_stats(base_url, args.server_pid or (server.pid if server else None))
+        started = time.perf_counter()
+        deadline = time.monotonic() + args.duration
+        viewers = [SimulatedViewer(i, base_url, plan, deadline, args.speedup, results) for i in range(args.clients)]
+        for viewer in viewers: viewer.start()
+        for viewer in viewers: viewer.join()
+        elapsed = time.perf_counter() - started
+        stats_after = read_server_stats(base_url, args.server_pid or (server.pid if server else None))
+        if feeder: feeder.stop()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(10)
+
+    total = sum(len(v) for v in results.latencies.values())
+    print(f"\n{'Geri çağrı':<32} {'istek':>6} {'hata':>5} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'KB/istek':>9}")
+    for name in sorted(results.latencies):
+        lat = results.latencies[name]
+        print(f"{name:<32} {len(lat):>6} {results.errors[name]:>5} {percentile(lat, 50) * 1000:>8.1f} "
+              f"{percentile(lat, 90) * 1000:>8.1f} {percentile(lat, 99) * 1000:>8.1f} "
+              f"{results.bytes[name] / len(lat) / 1024:>9.1f}")
+    all_latencies = [x for v in results.latencies.values() for x in v]
+    if all_latencies:
+        print(f"{'TOPLAM':<32} {total:>6} {sum(results.errors.values()):>5} "
+              f"{percentile(all_latencies, 50) * 1000:>8.1f} {percentile(all_latencies, 90) * 1000:>8.1f} "
+              f"{percentile(all_latencies, 99) * 1000:>8.1f}")
+    print(f"\nVerim: {total / elapsed:.1f} istek/s ({elapsed:.1f} s)")
+    if 'cpu_s' in stats_before and 'cpu_s' in stats_after:
+        print(f"Sunucu CPU: %{(stats_after['cpu_s'] - stats_before['cpu_s']) / elapsed * 100:.0f} (tek çekirdek = %100)")
+    if 'queries' in stats_before and 'queries' in stats_after:
+        queries = stats_after['queries'] - stats_before['queries']
+        query_time = stats_after['query_time_s'] - stats_before['query_time_s']
+        print(f"Sorgular: {queries} ({queries / max(1, total):.1f}/istek), toplam {query_time:.2f} s "
+              f"({query_time / max(1, total) * 1000:.1f} ms/istek)")
+        print(f"Sunucu bellek (maks. RSS): {stats_after['max_rss_kb'] / 1024:.0f} MB")
+    if feeder:
+        summarized = feeder.summarized_points()
+        print(f"Canlı tarama: {feeder.points_written} nokta yazıldı, özet sütunlarında {summarized}")
+        if summarized != feeder.points_written:
+            print("UYARI: Scan.point_count canlı taramayla birlikte artmadı; anlık değer kartı boş kalır.")
+    if all_latencies:
+        print(f"Ortalama gecikme: {statistics.mean(all_latencies) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# dual_sensor_benchmark.py
+#
+# İki HC-SR04 sensörünün sıralı ve eşzamanlı (DualSensorScheduler) okunmasını
+# yankı süresini modelleyen simüle sensörlerle karşılaştırır. Donanım gerektirmez.
+#
+# Kullanım: python dual_sensor_benchmark.py --points 200 --gaps 0 5 15
+
+import argparse
+import random
+import threading
+import time
+
+from scanner.hardware import SENSOR_MAX_DISTANCE_M, SENSOR_MAX_VALID_CM
+from scanner.sampling import DualSensorScheduler, MedianMadSampler
+
+SPEED_OF_SOUND_M_S = 343.0
+TRIGGER_OVERHEAD_S = 0.0002  # 10 µs tetik darbesi + GPIO gecikmesi
+MAX_DISTANCE_M = SENSOR_MAX_DISTANCE_M
+NO_ECHO_TIMEOUT_S = 0.038  # HC-SR04 yankı gelmezse ECHO pinini ~38 ms yüksek tutar
+
+
+class SimulatedUltrasonicBus:
+    """Sensörlerin tetiklenme anlarını paylaşır; çapraz karışma modellemesi için kullanılır."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_trigger = {}
+
+    def trigger(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            self._last_trigger[name] = now
+        return now
+
+    def other_triggers(self, name):
+        with self._lock:
+            return [t for n, t in self._last_trigger.items() if n != name]
+
+
+class SimulatedEchoSensor:
+    """
+    scanner.hcsr04.TriggeredDistanceSensor benzeri `distance` (metre) özelliği sunar: her okuma bir
+    darbe gönderir ve yankı dönene kadar (ya da hedef menzil dışındaysa zaman aşımına kadar) bloklar. Diğer sensörün darbesi
+    hâlâ havadayken (dinleme penceresiyle çakışıyorsa) belirli olasılıkla sahte bir yankı döner.
+    """
+
+    def __init__(self, name, bus, distance_profile_m, max_distance=MAX_DISTANCE_M, noise_m=0.005,
+                 crosstalk_probability=0.6):
+        self.name = name
+        self.bus = bus
+        self.distance_profile_m = distance_profile_m
+        self.max_distance = max_distance
+        self.noise_m = noise_m
+        self.crosstalk_probability = crosstalk_probability
+        self.ghost_count = 0
+        self.read_count = 0
+
+    @property
+    def distance(self):
+        self.read_count += 1
+        triggered_at = self.bus.trigger(self.name)
+        target = self.distance_profile_m()
+        echo_window = 2 * self.max_distance / SPEED_OF_SOUND_M_S
+        listen_time = NO_ECHO_TIMEOUT_S if target >= self.max_distance else 2 * target / SPEED_OF_SOUND_M_S
+        time.sleep(TRIGGER_OVERHEAD_S + listen_time)
+        # Diğer darbe dinleme penceresi boyunca yankı mesafesi içindeyse yanlış yankı alınabilir
+        for other in self.bus.other_triggers(self.name):
+            if triggered_at - echo_window < other < triggered_at + listen_time and \
+                    random.random() < self.crosstalk_probability:
+                self.ghost_count += 1
+                return random.uniform(0.05, min(target, self.max_distance))
+        if target >= self.max_distance:
+            return self.max_distance
+        return max(0.0, min(self.max_distance, random.gauss(target, self.noise_m)))
+
+
+def run_case(label, concurrent, gap_s, points, samples_per_angle):
+    bus = SimulatedUltrasonicBus()
+    # Oda profili: çoğu nokta 0.5-2.3 m, %15'i menzil dışı (en kötü durum zaman aşımı)
+    profile = lambda: MAX_DISTANCE_M if random.random() < 0.15 else random.uniform(0.5, 2.3)
+    sensor = SimulatedEchoSensor('s1', bus, profile)
+    sensor2 = SimulatedEchoSensor('s2', bus, profile)
+    if samples_per_angle > 1:
+        sampler = MedianMadSampler(max_samples=samples_per_angle, valid_max_cm=SENSOR_MAX_VALID_CM,
+                                   sample_interval_s=0)
+        sampler2 = MedianMadSampler(max_samples=samples_per_angle, valid_max_cm=SENSOR_MAX_VALID_CM,
+                                    sample_interval_s=0)
+        read_1 = lambda: sampler.sample(lambda: sensor.distance * 100)
+        read_2 = lambda: sampler2.sample(lambda: sensor2.distance * 100)
+    else:
+        read_1 = lambda: sensor.distance * 100
+        read_2 = lambda: sensor2.distance * 100
+
+    scheduler = DualSensorScheduler(read_1, read_2, inter_trigger_gap_s=gap_s, concurrent=concurrent)
+    skews = []
+    started = time.perf_counter()
+    for _ in range(points):
+        _, time_1, _, time_2 = scheduler.sample()
+        skews.append(abs(time_2 - time_1))
+    elapsed = time.perf_counter() - started
+    scheduler.close()
+
+    reads = sensor.read_count + sensor2.read_count
+    ghosts = sensor.ghost_count + sensor2.ghost_count
+    print(f"{label:<28} {points / elapsed:>9.1f} {elapsed / points * 1000:>10.2f} "
+          f"{sum(skews) / len(skews) * 1000:>10.2f} {ghosts / reads * 100:>8.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çift sensör örnekleme karşılaştırması (simülasyon)")
+    parser.add_argument("--points", type=int, default=200)
+    parser.add_argument("--gaps", type=float, nargs='+', default=[0.0, 5.0, 15.0], help="Tetikleme aralıkları (ms)")
+    parser.add_argument("--samples_per_angle", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    print(f"{args.points} nokta, açı başına {args.samples_per_angle} örnek")
+    print(f"{'Mod':<28} {'nokta/s':>9} {'ms/nokta':>10} {'fark (ms)':>10} {'sahte':>9}")
+    for gap_ms in args.gaps:
+        run_case(f"Sıralı (aralık {gap_ms:g} ms)", False, gap_ms / 1000.0, args.points, args.samples_per_angle)
+        run_case(f"Eşzamanlı (aralık {gap_ms:g} ms)", True, gap_ms / 1000.0, args.points, args.samples_per_angle)
+
+
+if __name__ == "__main__":
+    main()
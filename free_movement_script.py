@@ -29,10 +29,20 @@ def remove_pid_and_lock_files():
                 os.remove(f)
             except OSError:
                 pass
-# Gerekli GPIO kütüphanelerini import et
+# Gerekli GPIO kütüphanelerini import et (SCANNER_HARDWARE_BACKEND=sim ile simüle donanım)
 try:
-    from gpiozero import DistanceSensor, Buzzer, OutputDevice, LED
-    from RPLCD.i2c import CharLCD
+    sys.path.append(os.getcwd())
+    from scanner.hardware import SENSOR_MAX_DISTANCE_M, SENSOR_MAX_VALID_CM, load_backend
+
+    from scanner.live_channel import DEFAULT_CHANNEL_NAME, LiveChannelWriter, SOURCE_FREE_MOVEMENT
+    from scanner.velocity import VelocityEstimator
+    from scanner.detection import DetectionThread, EVENT_ENTER, EVENT_EXIT
+    from scanner.event_log import DetectionEventTracker, EventLogWriter, TelemetryAggregator
+
+    hardware_backend = load_backend()
+    DistanceSensor, Buzzer, OutputDevice, LED, CharLCD = (hardware_backend.DistanceSensor, hardware_backend.Buzzer,
+                                                          hardware_backend.OutputDevice, hardware_backend.LED,
+                                                          hardware_backend.CharLCD)
 except ImportError:
     print("HATA: Gerekli kütüphaneler (gpiozero, RPLCD) bulunamadı. Lütfen yükleyin.")
     sys.exit(1)
@@ -69,6 +79,21 @@ BUZZER_BIP_SURESI = 0.03
 LED_BLINK_ON_SURESI = 0.5
 LED_BLINK_OFF_SURESI = 0.5
 LCD_TIME_UPDATE_INTERVAL = 1.0
+# Panelin anlık değer kartı bu moddaki okumaları paylaşımlı bellek kanalından izler (scanner/live_channel.py)
+LIVE_CHANNEL_NAME = DEFAULT_CHANNEL_NAME
+# Radyal hız yalnızca motor dururken (nesne duraklatması, tur sonu beklemesi) aynı açıdaki ölçümlerden
+# tahmin edilir; hareket sırasında aynı açı hücresine milisaniyeler arayla düşen okumalar hız vermez
+VELOCITY_BIN_DEG = 2.0
+VELOCITY_MAX_GAP_S = 1.0
+# Sensör motor döngüsünden bağımsız bir iş parçacığında bu aralıkla okunur (scanner/detection.py);
+# uyarı mesafe eşik + histerezis üstüne çıkınca biter
+SENSOR_SAMPLE_INTERVAL_S = 0.06
+ALGILAMA_HISTEREZIS_CM = 2.0
+# Algılama olayları (DetectionEvent) ve ham mesafenin dönem/açı özetleri (TelemetryRollup) veritabanına
+# arka planda partiler halinde yazılır (scanner/event_log.py); Django kurulamazsa kayıt tutulmaz
+EVENT_LOG_ENABLED = True
+TELEMETRY_ROLLUP_PERIOD_S = 60
+TELEMETRY_ROLLUP_BIN_DEG = 5.0
 # ==============================================================================
 
 # --- Global Değişkenler ---
@@ -91,6 +116,13 @@ object_alert_active = False
 
 motor_movement_paused = False  # EKLENDİ: Motorun hareketinin duraklatılıp duraklatılmadığını takip eder
 motor_pause_end_time = 0  # EKLENDİ: Motor duraklatmasının ne zaman biteceğini tutar
+live_channel = None
+velocity_estimator = VelocityEstimator(bin_deg=VELOCITY_BIN_DEG, max_gap_s=VELOCITY_MAX_GAP_S)
+detection_thread = None
+motor_dwelling = False  # Motor duruyor mu (algılama iş parçacığı hız tahmininde kullanır)
+event_log = None
+event_tracker = DetectionEventTracker()
+telemetry_rollup = TelemetryAggregator(TELEMETRY_ROLLUP_PERIOD_S, TELEMETRY_ROLLUP_BIN_DEG, SENSOR_MAX_VALID_CM)
 
 
 # ==============================================================================
@@ -107,7 +139,7 @@ def init_hardware():
     try:
         in1_dev, in2_dev, in3_dev, in4_dev = OutputDevice(IN1_GPIO_PIN), OutputDevice(IN2_GPIO_PIN), OutputDevice(
             IN3_GPIO_PIN), OutputDevice(IN4_GPIO_PIN)
-        sensor = DistanceSensor(echo=ECHO_PIN, trigger=TRIG_PIN, max_distance=2.5, queue_len=5)
+        sensor = DistanceSensor(echo=ECHO_PIN, trigger=TRIG_PIN, max_distance=SENSOR_MAX_DISTANCE_M, queue_len=5)
         buzzer = Buzzer(BUZZER_PIN);
         buzzer.off()
         status_led = LED(STATUS_LED_PIN)
@@ -135,6 +167,15 @@ def init_hardware():
 def release_resources_on_exit():
     print("\nProgram sonlandırılıyor, kaynaklar serbest bırakılıyor...")
     _set_step_pins(0, 0, 0, 0)
+    if detection_thread: detection_thread.stop()
+    if event_log:
+        # Süren olay ve yarım dönem de kaydedilir
+        event_log.submit_event(event_tracker.close())
+        event_log.submit_rollups(telemetry_rollup.flush())
+        event_log.stop()
+        print(f"Algılama kaydı: {event_log.written['event']} olay, {event_log.written['rollup']} özet yazıldı"
+              + (f", {event_log.dropped} kayıt atıldı" if event_log.dropped else "") + ".")
+    if live_channel: live_channel.close()
     if lcd:
         try:
             lcd.clear()
@@ -201,6 +242,30 @@ def move_motor_to_absolute_angle(target_angle_deg, speed_factor=1.0):
     time.sleep(STEP_MOTOR_SETTLE_TIME / speed_factor)
 
 
+def open_event_log():
+    global event_log
+    if not EVENT_LOG_ENABLED: return
+    try:
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensordashboard.settings')
+        import django
+
+        django.setup()
+    except Exception as e:
+        print(f"UYARI: Django kurulamadı, algılama olayları kaydedilmeyecek: {e}")
+        return
+    event_log = EventLogWriter()
+    event_log.start()
+
+
+def open_live_channel():
+    global live_channel
+    try:
+        live_channel = LiveChannelWriter(LIVE_CHANNEL_NAME, source=SOURCE_FREE_MOVEMENT)
+    except Exception as e:
+        print(f"UYARI: Anlık değer kanalı açılamadı: {e}")
+        live_channel = None
+
+
 def kisa_uyari_bip(bip_suresi):
     if buzzer:
         buzzer.on();
@@ -240,42 +305,74 @@ def update_lcd_display(message_type):
         current_lcd_message_type = "error"
 
 
-# EKLENDİ: Sürekli ölçüm ve reaksiyon için merkezi fonksiyon
-def perform_measurement_and_react():
-    global object_alert_active, led_is_blinking, motor_movement_paused, motor_pause_end_time
+def handle_sample(sample_time, angle, mesafe, in_range):
+    """Algılama iş parçacığında her örnekte çalışır: canlı kanal, (motor dururken) hız tahmini ve kayıt kuyruğu."""
+    hiz = velocity_estimator.update(angle, 0.0, mesafe, sample_time) if motor_dwelling else float('nan')
+    if live_channel:
+        live_channel.publish(angle, mesafe, hiz_cm_s=hiz, buzzer_distance_cm=ALGILAMA_ESIGI_CM, alert=in_range,
+                             timestamp=sample_time)
+    if event_log:
+        event_log.submit_event(event_tracker.feed(sample_time, angle, mesafe, in_range))
+        event_log.submit_rollups(telemetry_rollup.add(sample_time, angle, mesafe))
 
-    mesafe = sensor.distance * 100
-    is_object_currently_close = (mesafe < ALGILAMA_ESIGI_CM)
 
-    newly_detected_for_pause = False
+def start_detection_thread():
+    global detection_thread
+    detection_thread = DetectionThread(sensor, ALGILAMA_ESIGI_CM, lambda: current_motor_angle_global,
+                                       interval_s=SENSOR_SAMPLE_INTERVAL_S, hysteresis_cm=ALGILAMA_HISTEREZIS_CM,
+                                       on_sample=handle_sample)
+    detection_thread.start()
 
-    if is_object_currently_close:
-        if not object_alert_active:
-            print(f"   >>> UYARI: Nesne {mesafe:.1f} cm! <<<")
-            kisa_uyari_bip(BUZZER_BIP_SURESI)
-            update_lcd_display("alert_greeting")
-            if status_led:
-                if led_is_blinking:
-                    status_led.off(); time.sleep(0.01); status_led.on()
-                elif not status_led.is_lit:
-                    status_led.on()
-            led_is_blinking = False
-            object_alert_active = True
+
+def _alert_started(mesafe):
+    global object_alert_active, led_is_blinking
+    print(f"   >>> UYARI: Nesne {mesafe:.1f} cm! <<<")
+    kisa_uyari_bip(BUZZER_BIP_SURESI)
+    update_lcd_display("alert_greeting")
+    if status_led:
+        if led_is_blinking:
+            status_led.off(); time.sleep(0.01); status_led.on()
+        elif not status_led.is_lit:
+            status_led.on()
+    led_is_blinking = False
+    object_alert_active = True
+
+
+def _alert_ended():
+    global object_alert_active, led_is_blinking
+    print("   <<< UYARI SONA ERDİ. >>>")
+    update_lcd_display("normal_time")
+    if status_led:
+        if not led_is_blinking: status_led.blink(on_time=LED_BLINK_ON_SURESI, off_time=LED_BLINK_OFF_SURESI,
+                                                 background=True)
+    led_is_blinking = True
+    object_alert_active = False
+
+
+# Sensörü okumaz: algılama iş parçacığının biriktirdiği eşik geçişlerine bloklamadan tepki verir
+def react_to_detections(dwell=False):
+    """`dwell`: motor duruyor (hız tahmini yalnızca bu durumda yapılır). (yakın_nesne, yeni_uyarı) döndürür."""
+    global motor_dwelling, led_is_blinking
+    motor_dwelling = dwell
+    newly_detected_for_pause = False
+    events = detection_thread.poll() if detection_thread else []
+    for event in events:
+        if event.kind == EVENT_ENTER and not object_alert_active:
+            _alert_started(event.distance_cm)
             newly_detected_for_pause = True  # Motor duraklatmasını tetiklemek için işaretle
-    else:
-        if object_alert_active:
-            print("   <<< UYARI SONA ERDİ. >>>")
-            update_lcd_display("normal_time")
-            if status_led:
-                if not led_is_blinking: status_led.blink(on_time=LED_BLINK_ON_SURESI, off_time=LED_BLINK_OFF_SURESI,
-                                                         background=True)
+        elif event.kind == EVENT_EXIT and object_alert_active:
+            _alert_ended()
+    is_object_currently_close = bool(detection_thread and detection_thread.in_range)
+    if not events and is_object_currently_close and not object_alert_active:
+        # Uyarı durumu tur sonunda sıfırlandı ama nesne hâlâ yakında
+        latest = detection_thread.latest()
+        _alert_started(latest[2] if latest else ALGILAMA_ESIGI_CM)
+        newly_detected_for_pause = True
+    if not object_alert_active:
+        update_lcd_display("normal_time")
+        if status_led and not led_is_blinking:
+            status_led.blink(on_time=LED_BLINK_ON_SURESI, off_time=LED_BLINK_OFF_SURESI, background=True)
             led_is_blinking = True
-            object_alert_active = False
-        else:
-            update_lcd_display("normal_time")
-            if status_led and not led_is_blinking:
-                status_led.blink(on_time=LED_BLINK_ON_SURESI, off_time=LED_BLINK_OFF_SURESI, background=True)
-                led_is_blinking = True
 
     return is_object_currently_close, newly_detected_for_pause
 
@@ -295,6 +392,9 @@ if __name__ == "__main__":
     atexit.register(release_resources_on_exit)
     if not init_hardware():
         sys.exit(1)
+    open_live_channel()
+    open_event_log()
+    start_detection_thread()
 
     print("\n>>> Serbest Tarama Modu V6 Başlatıldı (Sürekli Ölçümlü Duraklatma) <<<")
     print(f"Tarama Açıları: -{SWEEP_TARGET_ANGLE}° ile +{SWEEP_TARGET_ANGLE}° arası")
@@ -316,7 +416,7 @@ if __name__ == "__main__":
                 if motor_movement_paused and time.time() < motor_pause_end_time:
                     # Halen duraklatma süresi içindeyiz, sadece ölçüm yap ve bekle
                     while time.time() < motor_pause_end_time:
-                        perform_measurement_and_react()
+                        react_to_detections(dwell=True)
                         time.sleep(0.05)  # Duraklama sırasında daha sık ölçüm
                     motor_movement_paused = False  # Duraklatma bitti
                     print("   Duraklatma bitti, harekete devam ediliyor...")
@@ -344,8 +444,8 @@ if __name__ == "__main__":
                     if not motor_movement_paused:
                         _single_step_motor(direction_is_positive_etap)
 
-                    # Her durumda (motor hareket etse de etmese de) ölçüm ve reaksiyon
-                    is_close, new_alert = perform_measurement_and_react()
+                    # Her durumda (motor hareket etse de etmese de) algılama olaylarına tepki; sensör beklenmez
+                    is_close, new_alert = react_to_detections(dwell=motor_movement_paused)
 
                     if new_alert and not motor_movement_paused:  # Yeni bir uyarı tetiklendi ve motor zaten duraklatılmamış
                         print(f"   Motor {MOTOR_PAUSE_ON_DETECTION_S} saniye duraklatılıyor (tarama sırasında)...")
@@ -360,7 +460,7 @@ if __name__ == "__main__":
                     if motor_movement_paused:
                         time.sleep(
                             0.05)  # Motor duraklatılmışsa, CPU'yu yormamak için kısa bekleme ama ölçüm devam eder
-                        # Bu sleep, perform_measurement_and_react'in daha sık çağrılmasına izin verir.
+                        # Algılama iş parçacığı bu sırada da örneklemeye devam eder.
 
                 print(f"   Etap '{etap_adi}' tamamlandı. Mevcut Açı: {current_motor_angle_global:.1f}°")
 
@@ -370,12 +470,12 @@ if __name__ == "__main__":
 
             # Başlangıçtaki LCD/LED durumunu ayarla
             object_alert_active = False  # Tur sonunda uyarı durumunu sıfırla
-            perform_measurement_and_react()  # Son bir kez normal durumu ayarla (saat vs.)
+            react_to_detections(dwell=True)  # Son bir kez normal durumu ayarla (saat vs.)
 
             pause_start_time_cycle_end = time.time()
             while time.time() - pause_start_time_cycle_end < CYCLE_END_PAUSE_S:
                 # Tur sonu beklemesinde de sürekli ölçüm ve reaksiyon
-                is_close_cycle_pause, new_alert_cycle_pause = perform_measurement_and_react()
+                is_close_cycle_pause, new_alert_cycle_pause = react_to_detections(dwell=True)
 
                 if new_alert_cycle_pause and not motor_movement_paused:  # Yeni bir uyarı tetiklendi ve motor zaten duraklatılmamış
                     print(f"   Motor {MOTOR_PAUSE_ON_DETECTION_S} saniye duraklatılıyor (tur sonu beklemede)...")
@@ -395,7 +495,7 @@ if __name__ == "__main__":
                     # ve sürekli ölçüm yapılır.
                     temp_pause_start = time.time()
                     while time.time() < motor_pause_end_time:
-                        perform_measurement_and_react()
+                        react_to_detections(dwell=True)
                         time.sleep(0.05)
                     motor_movement_paused = False  # 3 saniyelik duraklatma bitti
                     # 5 saniyelik ana döngüye geri dön, kalan süreyi tamamla
@@ -0,0 +1,97 @@
+# packed_storage_benchmark.py
+#
+# ScanPoint satır biçimi ile ScanPointChunk blok biçimini (scanner/packed.py) karşılaştırır:
+# nokta başına disk boyutu (VACUUM sonrası dosya büyüklüğü farkı) ve bir taramanın okunma süresi
+# (panelin kullandığı scan_points_frame ile, blok biçiminde ayrıca ham load_scan_arrays ile).
+# Geçici SQLite veritabanları kullanır, projenin veritabanına dokunmaz.
+#
+# Kullanım:
+#   python packed_storage_benchmark.py --sizes 1000 10000 100000
+
+import argparse
+import contextlib
+import io
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+FRAME_FIELDS = ['x_cm', 'y_cm', 'z_cm', 'derece', 'dikey_aci', 'mesafe_cm', 'mesafe_fused_cm', 'quality', 'timestamp']
+
+
+def setup_django(db_path):
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sensordashboard.settings')
+    from django.conf import settings
+
+    settings.DATABASES['default']['NAME'] = db_path
+    import django
+
+    django.setup()
+    from django.core.management import call_command
+
+    call_command('migrate', verbosity=0)
+
+
+def vacuumed_size(path):
+    from django.db import connection
+
+    connection.close()
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("VACUUM")
+    conn.close()
+    return os.path.getsize(path)
+
+
+def median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Satır ve blok nokta saklama biçimi karşılaştırması")
+    parser.add_argument("--sizes", type=int, nargs='+', default=[1000, 10000, 100000], help="Tarama başına nokta")
+    parser.add_argument("--codec", default='zlib', choices=('raw', 'zlib'))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='packed_bench_'), 'bench.sqlite3')
+    setup_django(db_path)
+
+    import numpy as np
+    from scanner.models import Scan, ScanPoint
+    from scanner.packed import load_scan_arrays, pack_scan_rows, scan_points_frame
+    from scanner.synthetic import generate_scan
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'nokta':>7} {'satır B/nokta':>14} {'blok B/nokta':>13} {'oran':>6} "
+          f"{'satır oku ms':>13} {'blok oku ms':>12} {'dizi oku ms':>12} {'oran':>6}")
+    for size in args.sizes:
+        ScanPoint.objects.all().delete()
+        Scan.objects.all().delete()
+        empty_size = vacuumed_size(db_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            scan = generate_scan('objects', size, rng)
+        rows_size = vacuumed_size(db_path) - empty_size
+        rows_ms = median_ms(lambda: scan_points_frame(scan, FRAME_FIELDS), args.repeat)
+
+        pack_scan_rows(scan, delete_rows=True, codec=args.codec)
+        packed_size = vacuumed_size(db_path) - empty_size
+        packed_ms = median_ms(lambda: scan_points_frame(scan, FRAME_FIELDS), args.repeat)
+        arrays_ms = median_ms(lambda: load_scan_arrays(scan, FRAME_FIELDS), args.repeat)
+
+        print(f"{size:>7} {rows_size / size:>14.1f} {packed_size / size:>13.1f} "
+              f"{rows_size / max(packed_size, 1):>5.1f}x {rows_ms:>13.2f} {packed_ms:>12.2f} {arrays_ms:>12.2f} "
+              f"{rows_ms / max(packed_ms, 1e-9):>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
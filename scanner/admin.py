@@ -1,17 +1,22 @@
 # scanner/admin.py
 
 from django.contrib import admin
-from scanner.models import Scan, ScanPoint
+from django.db.models import Count, IntegerField, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.html import format_html
+from scanner.models import Scan, ScanPoint, ScanPointChunk
 
-class ScanPointInline(admin.TabularInline):
-    """Scan detay sayfasında ilişkili noktaları göstermek için kullanılır."""
-    model = ScanPoint
-    extra = 0  # Yeni nokta ekleme alanı gösterme
-    readonly_fields = ('derece', 'mesafe_cm', 'hiz_cm_s', 'timestamp', 'x_cm', 'y_cm') # Noktalar değiştirilemez olmalı
-    can_delete = False # Admin'den nokta silmeyi engelle
+# Nokta filtresinde listelenen en yeni tarama sayısı; daha eskileri için arama ya da Scan sayfasındaki bağlantı
+RECENT_SCAN_FILTER_LIMIT = 20
+
+
+def _chunk_point_count():
+    """Blok biçimindeki taramaların nokta sayısı (tarama başına tek, dizinli alt sorgu)."""
+    chunks = (ScanPointChunk.objects.filter(scan=OuterRef('pk')).values('scan')
+              .annotate(total=Sum('point_count')).values('total'))
+    return Coalesce(Subquery(chunks, output_field=IntegerField()), 0)
 
-    def has_add_permission(self, request, obj=None):
-        return False # Yeni nokta ekleme butonunu kaldır
 
 @admin.register(Scan)
 class ScanAdmin(admin.ModelAdmin):
@@ -23,33 +28,96 @@ class ScanAdmin(admin.ModelAdmin):
     # Detay sayfasında alanları gruplama ve salt okunur yapma
     fieldsets = (
         ('Genel Bilgiler', {
-            'fields': ('id', 'start_time', 'status')
+            'fields': ('id', 'start_time', 'status', 'point_storage')
         }),
         ('Tarama Ayarları', {
             'classes': ('collapse',), # Gizlenebilir bölüm
             'fields': ('start_angle_setting', 'end_angle_setting', 'step_angle_setting', 'buzzer_distance_setting', 'invert_motor_direction_setting')
         }),
+        ('Noktalar', {
+            'fields': ('point_summary',)
+        }),
         ('Analiz Sonuçları', {
-            'fields': ('calculated_area_cm2', 'perimeter_cm', 'max_width_cm', 'max_depth_cm')
+            'fields': ('calculated_area_cm2', 'perimeter_cm', 'max_width_cm', 'max_depth_cm', 'cluster_count',
+                       'shape_class', 'analyzed_at')
         }),
         ('Yapay Zeka Analizi', {
             'fields': ('ai_commentary',)
         }),
     )
-    readonly_fields = ('id', 'start_time')
+    readonly_fields = ('id', 'start_time', 'point_storage', 'point_summary', 'cluster_count', 'shape_class',
+                       'analyzed_at')
 
-    # Tarama noktalarını aynı sayfada göstermek için inline ekle
-    inlines = [ScanPointInline]
+    def get_queryset(self, request):
+        # Nokta sayısı listede satır başına ayrı sorgu yerine tek sorguda hesaplanır
+        return super().get_queryset(request).annotate(
+            point_count_value=Count('points') + _chunk_point_count())
 
     def point_count(self, obj):
         # Listede her taramanın kaç noktası olduğunu gösteren özel bir alan
-        return obj.points.count()
+        return obj.point_count_value
     point_count.short_description = "Nokta Sayısı"
+    point_count.admin_order_field = 'point_count_value'
+
+    def point_summary(self, obj):
+        """
+        Satır içi nokta listesi yerine özet: sayı, mesafe aralığı ve süre (dizinli tek toplama sorgusu)
+        ile noktaların sayfalanmış, salt okunur listesine bağlantı.
+        """
+        if obj.pk is None:
+            return "-"
+        if obj.point_storage == Scan.PointStorage.ARCHIVED:
+            return "Arşivlenmiş tarama; yalnızca açı dilimi özetleri tutuluyor."
+        if obj.point_storage == Scan.PointStorage.PACKED:
+            stats = obj.chunks.aggregate(count=Sum('point_count'), chunks=Count('id'))
+            return f"Blok biçiminde {stats['count'] or 0} nokta ({stats['chunks']} blok)."
+        stats = obj.points.aggregate(count=Count('id'), min_cm=Min('mesafe_cm'), max_cm=Max('mesafe_cm'),
+                                     first=Min('timestamp'), last=Max('timestamp'))
+        if not stats['count']:
+            return "Nokta yok."
+        url = reverse('admin:scanner_scanpoint_changelist') + f"?{ScanFilter.parameter_name}={obj.pk}"
+        return format_html(
+            "{} nokta, mesafe {} – {} cm, süre {} s. <a href='{}'>Noktaları görüntüle</a>",
+            stats['count'], f"{stats['min_cm']:.1f}", f"{stats['max_cm']:.1f}",
+            f"{(stats['last'] - stats['first']).total_seconds():.1f}", url)
+    point_summary.short_description = "Özet"
+
+
+class ScanFilter(admin.SimpleListFilter):
+    """Yalnızca en yeni taramaları listeler; tüm taramaları listelemek büyük veritabanında sayfayı kilitler."""
+    title = "tarama"
+    parameter_name = 'scan_id'
+
+    def lookups(self, request, model_admin):
+        recent = Scan.objects.order_by('-start_time').only('id', 'start_time', 'status')[:RECENT_SCAN_FILTER_LIMIT]
+        lookups = [(str(scan.id), str(scan)) for scan in recent]
+        # Bağlantıyla gelinen eski bir tarama da seçili görünsün
+        if self.value() and self.value() not in dict(lookups):
+            lookups.append((self.value(), f"Scan {self.value()}"))
+        return lookups
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(scan_id=self.value())
+        return queryset
 
 
 @admin.register(ScanPoint)
 class ScanPointAdmin(admin.ModelAdmin):
-    """ScanPoint'leri ayrıca görüntülemek için (isteğe bağlı)."""
-    list_display = ('scan', 'timestamp', 'derece', 'mesafe_cm')
-    list_filter = ('scan',)
-    search_fields = ('scan__id',)
\ No newline at end of file
+    """ScanPoint'lerin sayfalanmış, salt okunur listesi (Scan sayfasındaki özetten bağlantı verilir)."""
+    list_display = ('scan', 'timestamp', 'derece', 'dikey_aci', 'mesafe_cm', 'quality')
+    list_filter = (ScanFilter,)
+    list_select_related = ('scan',)
+    search_fields = ('=scan__id',)
+    list_per_page = 200
+    # Sayfalama filtresiz tüm tabloyu saymasın
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
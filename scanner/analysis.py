@@ -0,0 +1,238 @@
+# scanner/analysis.py
+#
+# Panelin 2B analizlerinin (DBSCAN kümeleme, açıya göre RANSAC regresyonu, dışbükey örtü ile şekil
+# tahmini, en açık yol) Django ve Dash'ten bağımsız, dizi tabanlı karşılıkları. manage.py
+# reanalyze_scans bu fonksiyonları alt süreçlerde çalıştırıp sonuçları Scan satırlarına yazar;
+# panel de şekil tahmininde aynı sınıflandırmayı kullanır. Nokta seçimi paneldekiyle aynıdır:
+# birleşik mesafe varsa o kullanılır, kalite skoru olan noktalar skora, olmayanlar menzile göre
+# süzülür ve hacimsel taramalarda en yatay katman alınır.
+#
+# reanalyze_scans sürücüsü noktaları ana süreçte sütunlar halinde (load_point_arrays) okur, analizi
+# bir ProcessPoolExecutor'a dağıtır ve sonuçları partiler halinde bulk_update ile yazar. Yazılan
+# taramalar analysis_version ile işaretlendiğinden yarıda kesilen bir çalışma kaldığı yerden sürer.
+# İşçiler 'spawn' ile başlatılır ve veritabanına dokunmaz: havuz işçileri ilk submit'te oluşturduğundan
+# fork, _load_job'un az önce açtığı SQLite bağlantısını alt süreçlere kopyalardı.
+
+import multiprocessing
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+# Sonuçları etkileyen bir değişiklikte artırılır; reanalyze_scans eski sürümle analiz edilmiş taramaları yeniden işler
+ANALYSIS_VERSION = 1
+
+MIN_POINT_QUALITY = 0.3
+DBSCAN_EPS_CM = 15.0
+DBSCAN_MIN_SAMPLES = 3
+MIN_CLUSTER_POINTS = 10
+MIN_REGRESSION_POINTS = 5
+MIN_SHAPE_POINTS = 15
+
+ANALYSIS_FIELDS = ('derece', 'dikey_aci', 'mesafe_cm', 'mesafe_fused_cm', 'fusion_confidence', 'quality',
+                   'x_cm', 'y_cm')
+
+SHAPE_CORRIDOR, SHAPE_BOX, SHAPE_WALL, SHAPE_CONCAVE, SHAPE_IRREGULAR, SHAPE_SMALL = (
+    'COR', 'BOX', 'WAL', 'CCV', 'IRR', 'SML')
+SHAPE_CHOICES = [
+    (SHAPE_CORRIDOR, 'Corridor'),
+    (SHAPE_BOX, 'Box / round object'),
+    (SHAPE_WALL, 'Wall'),
+    (SHAPE_CONCAVE, 'Concave / scattered'),
+    (SHAPE_IRREGULAR, 'Irregular'),
+    (SHAPE_SMALL, 'Too small'),
+]
+SHAPE_DESCRIPTIONS = {
+    SHAPE_CORRIDOR: "Tahmin: Dar ve derin bir boşluk (Koridor).",
+    SHAPE_BOX: "Tahmin: Dolgun, kutu/dairesel bir nesne.",
+    SHAPE_WALL: "Tahmin: Geniş bir yüzey (Duvar).",
+    SHAPE_CONCAVE: "Tahmin: İçbükey bir yapı veya dağınık nesneler.",
+    SHAPE_IRREGULAR: "Tahmin: Düzensiz veya karmaşık bir yapı.",
+    SHAPE_SMALL: "Algılanan şekil çok küçük.",
+}
+
+
+def select_analysis_points(arrays):
+    """Paneldeki filter_valid_points + apply_fused_distance + select_horizontal_layer: {alan: dizi} döndürür."""
+    size = len(arrays.get('derece', ()))
+    column = lambda name: np.asarray(arrays.get(name, np.full(size, np.nan)), dtype=np.float64)
+    dist, fused, quality, tilt = column('mesafe_cm'), column('mesafe_fused_cm'), column('quality'), column('dikey_aci')
+    dist = np.where(np.isnan(fused), dist, fused)
+    has_quality = ~np.isnan(quality)
+    valid = np.where(has_quality, quality >= MIN_POINT_QUALITY, (dist > 0.1) & (dist < 300.0))
+    layers = np.unique(tilt[valid & ~np.isnan(tilt)])
+    if len(layers) > 1:
+        valid &= tilt == layers[np.argmin(np.abs(layers))]
+    return {'derece': column('derece')[valid], 'mesafe_cm': dist[valid], 'x_cm': column('x_cm')[valid],
+            'y_cm': column('y_cm')[valid]}
+
+
+def cluster_points(x, y):
+    """DBSCAN etiketleri (-1 gürültü); yetersiz noktada None."""
+    from sklearn.cluster import DBSCAN
+
+    if len(x) < MIN_CLUSTER_POINTS:
+        return None
+    return DBSCAN(eps=DBSCAN_EPS_CM, min_samples=DBSCAN_MIN_SAMPLES).fit(np.column_stack([y, x])).labels_
+
+
+def regression_slope(angle_deg, dist_cm):
+    """Mesafenin açıya göre RANSAC eğimi (cm/derece); yetersiz noktada None."""
+    from sklearn.linear_model import RANSACRegressor
+
+    if len(angle_deg) < MIN_REGRESSION_POINTS:
+        return None
+    ransac = RANSACRegressor(random_state=42)
+    ransac.fit(np.asarray(angle_deg).reshape(-1, 1), dist_cm)
+    return float(ransac.estimator_.coef_[0])
+
+
+def classify_shape(x, y):
+    """
+    Dışbükey örtüye göre şekil sınıfı: (sınıf, örtü alanı cm²). Yetersiz noktada (None, None).
+    Doluluk oranı panelin önceki sonuçlarıyla aynı kalsın diye ConvexHull.area (2B'de örtünün çevresi)
+    ile hesaplanır; kaydedilen örtü alanı ConvexHull.volume'dür (2B'de alan).
+    """
+    from scipy.spatial import ConvexHull
+
+    if len(x) < MIN_SHAPE_POINTS:
+        return None, None
+    hull = ConvexHull(np.column_stack([x, y]))
+    width, depth = float(np.max(y) - np.min(y)), float(np.max(x))
+    if width < 1 or depth < 1:
+        return SHAPE_SMALL, float(hull.volume)
+    fill_factor = hull.area / (depth * width)
+    if depth > 150 and width < 50 and fill_factor < 0.3:
+        shape = SHAPE_CORRIDOR
+    elif fill_factor > 0.7 and 0.8 < width / depth < 1.2:
+        shape = SHAPE_BOX
+    elif fill_factor > 0.6 and width > depth * 2.5:
+        shape = SHAPE_WALL
+    elif fill_factor < 0.4:
+        shape = SHAPE_CONCAVE
+    else:
+        shape = SHAPE_IRREGULAR
+    return shape, float(hull.volume)
+
+
+def analyze_arrays(arrays, include_geometry=True, max_valid_cm=SENSOR_MAX_VALID_CM):
+    """
+    Bir taramanın tüm analiz aşamalarını çalıştırır ve Scan alan adlarıyla bir sözlük döndürür.
+    Saf fonksiyondur (veritabanı erişimi yok); reanalyze_scans bunu alt süreçlerde çağırır.
+    """
+    from scanner.geometry import geometry_from_arrays
+
+    result = {}
+    if include_geometry:
+        result.update(geometry_from_arrays(arrays, max_valid_cm) or dict.fromkeys(
+            ('calculated_area_cm2', 'perimeter_cm', 'max_width_cm', 'max_depth_cm')))
+    points = select_analysis_points(arrays)
+    x, y, angle, dist = points['x_cm'], points['y_cm'], points['derece'], points['mesafe_cm']
+
+    labels = cluster_points(x, y)
+    result['cluster_count'] = None if labels is None else len(set(labels.tolist()) - {-1})
+    result['noise_point_count'] = None if labels is None else int((labels == -1).sum())
+    result['regression_slope'] = regression_slope(angle, dist)
+    shape, hull_area = classify_shape(x, y)
+    result['shape_class'], result['hull_area_cm2'] = shape or '', hull_area
+    positive = dist > 0
+    if positive.any():
+        best = np.argmax(np.where(positive, dist, -np.inf))
+        result['clear_path_angle_deg'], result['clear_path_cm'] = float(angle[best]), float(dist[best])
+    else:
+        result['clear_path_angle_deg'] = result['clear_path_cm'] = None
+    result['analysis_version'] = ANALYSIS_VERSION
+    return result
+
+
+def scans_to_reanalyze(scan_ids=None, force=False):
+    """Analizi eksik ya da eski sürümle yapılmış (force ile tüm) bitmiş taramaların ID'leri."""
+    from scanner.models import Scan
+
+    queryset = Scan.objects.exclude(status=Scan.Status.RUNNING)
+    if scan_ids:
+        queryset = queryset.filter(id__in=scan_ids)
+    if not force:
+        queryset = queryset.exclude(analysis_version=ANALYSIS_VERSION)
+    return list(queryset.order_by('id').values_list('id', flat=True))
+
+
+def _analyze_job(job):
+    scan_id, arrays, include_geometry, max_valid_cm = job
+    return scan_id, analyze_arrays(arrays, include_geometry, max_valid_cm)
+
+
+def _load_job(scan_id, max_valid_cm):
+    from scanner.geometry import GEOMETRY_FIELDS
+    from scanner.models import Scan
+    from scanner.packed import load_point_arrays
+
+    scan = Scan.objects.filter(id=scan_id).only('id', 'point_storage').first()
+    if scan is None:
+        return None
+    fields = tuple(dict.fromkeys(ANALYSIS_FIELDS + GEOMETRY_FIELDS))
+    # Arşivlenmiş taramanın metrikleri tam çözünürlükle hesaplanmıştı; özetlerden yalnızca küme/şekil çıkarılır
+    include_geometry = scan.point_storage != Scan.PointStorage.ARCHIVED
+    return scan_id, load_point_arrays(scan, fields), include_geometry, max_valid_cm
+
+
+def _write_results(results):
+    """{tarama_id: sonuç} sözlüğünü, aynı alanları taşıyan gruplar halinde bulk_update ile yazar."""
+    from django.utils import timezone
+    from scanner.models import Scan
+
+    now = timezone.now()
+    groups = {}
+    for scan_id, values in results.items():
+        groups.setdefault(tuple(sorted(values)), []).append(Scan(id=scan_id, analyzed_at=now, **values))
+    for fields, objects in groups.items():
+        Scan.objects.bulk_update(objects, list(fields) + ['analyzed_at'])
+
+
+def reanalyze_scans(scan_ids, workers=None, batch_size=20, max_valid_cm=SENSOR_MAX_VALID_CM, progress=None):
+    """
+    Taramaları `workers` süreçli bir havuzda analiz eder; sonuçlar `batch_size` taramada bir yazılır.
+    Bellek sınırlı kalsın diye havuzda en fazla 2 x işçi sayısı tarama bekler. Her tamamlanan
+    taramada progress(bitmiş, toplam, tarama_id, sonuç_ya_da_hata) çağrılır. (başarılı, hatalı) döndürür.
+    """
+    total, done, failed = len(scan_ids), 0, 0
+    pending_ids = iter(scan_ids)
+    results = {}
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        max_in_flight = 2 * workers
+        in_flight = {}
+
+        def submit_more():
+            while len(in_flight) < max_in_flight:
+                scan_id = next(pending_ids, None)
+                if scan_id is None:
+                    return
+                job = _load_job(scan_id, max_valid_cm)
+                if job is not None:
+                    in_flight[pool.submit(_analyze_job, job)] = scan_id
+
+        submit_more()
+        while in_flight:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                scan_id = in_flight.pop(future)
+                done += 1
+                try:
+                    _, result = future.result()
+                except Exception as e:
+                    failed += 1
+                    result = e
+                else:
+                    results[scan_id] = result
+                if progress:
+                    progress(done, total, scan_id, result)
+            if len(results) >= batch_size:
+                _write_results(results)
+                results = {}
+            submit_more()
+    if results:
+        _write_results(results)
+    return done - failed, failed
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class ScannerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'scanner'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from scanner.sqlite_tuning import on_connection_created
+
+        # Her yeni SQLite bağlantısına WAL/busy_timeout ayarlarını uygula
+        connection_created.connect(on_connection_created, dispatch_uid='scanner_sqlite_tuning')
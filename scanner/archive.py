@@ -0,0 +1,201 @@
+# scanner/archive.py
+#
+# Arşiv katmanı: eşikten eski taramaların noktaları (dikey açı, yatay açı dilimi) hücrelerine
+# indirgenir ve her hücre için bir ScanSummaryBin satırı tutulur (en küçük / medyan / en büyük
+# mesafe, geçersiz okuma sayısı, ortalama kalite). Tam çözünürlüklü noktalar isteğe bağlı olarak
+# diskte sıkıştırılmış bir .npz dosyasına taşınır ve veritabanından partiler halinde silinir.
+#
+# Arşivlenmiş bir tarama Scan.PointStorage.ARCHIVED olarak işaretlenir; scanner/packed.py'deki
+# load_point_arrays / scan_points_frame bu taramalarda dilimleri nokta gibi döndürür (mesafe_cm =
+# medyan), böylece panel ve dışa aktarma kodu değişmeden çalışır. Alan, geometri metrikleri Scan
+# satırında tam çözünürlükle hesaplandığı haliyle kalır.
+#
+# Kullanım: manage.py archive_scans --older-than-days 30 (geri almak için --restore).
+
+import os
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+DEFAULT_BIN_DEG = 2.0
+DEFAULT_ARCHIVE_AFTER_DAYS = 30
+
+# Arşivlenmiş taramadan okunabilen alanlar (scan_points_frame bunların dışındakileri vermez)
+SUMMARY_FIELDS = ('derece', 'dikey_aci', 'mesafe_cm', 'mesafe_min_cm', 'mesafe_max_cm', 'quality',
+                  'x_cm', 'y_cm', 'z_cm', 'timestamp', 'point_count', 'invalid_count')
+# ScanSummaryBin sütunu -> nokta alanı
+_BIN_COLUMNS = {'angle_deg': 'derece', 'dikey_aci': 'dikey_aci', 'median_cm': 'mesafe_cm',
+                'min_cm': 'mesafe_min_cm', 'max_cm': 'mesafe_max_cm', 'quality': 'quality', 'x_cm': 'x_cm',
+                'y_cm': 'y_cm', 'z_cm': 'z_cm', 'timestamp': 'timestamp', 'point_count': 'point_count',
+                'invalid_count': 'invalid_count'}
+
+
+def default_archive_dir():
+    from django.conf import settings
+
+    return str(getattr(settings, 'SCAN_ARCHIVE_DIR', os.path.join(os.getcwd(), 'scan_archive')))
+
+
+def summarize_arrays(arrays, bin_deg=DEFAULT_BIN_DEG, max_valid_cm=SENSOR_MAX_VALID_CM):
+    """
+    load_point_arrays biçimindeki noktaları (dikey açı, açı dilimi) hücrelerine indirger; her hücre
+    için ScanSummaryBin alanlarını içeren bir DataFrame döndürür. Birleşik mesafe varsa o kullanılır;
+    menzil dışı ya da birleştirmenin reddettiği okumalar yalnızca invalid_count'a sayılır.
+    """
+    import pandas as pd
+    from scanner.fusion import polar_to_cartesian
+
+    pan = np.asarray(arrays.get('derece', ()), dtype=np.float64)
+    if pan.size == 0:
+        return pd.DataFrame()
+    nan = np.full(pan.size, np.nan)
+    tilt = np.nan_to_num(np.asarray(arrays.get('dikey_aci', nan), dtype=np.float64), nan=0.0)
+    dist = np.asarray(arrays.get('mesafe_cm', nan), dtype=np.float64)
+    fused = np.asarray(arrays.get('mesafe_fused_cm', nan), dtype=np.float64)
+    dist = np.where(np.isnan(fused), dist, fused)
+    confidence = np.asarray(arrays.get('fusion_confidence', nan), dtype=np.float64)
+    valid = (dist > 0) & (dist < max_valid_cm) & (confidence != 0.0)
+
+    frame = pd.DataFrame({
+        'dikey_aci': tilt,
+        'bin': np.floor(pan / bin_deg).astype(np.int64),
+        'dist': np.where(valid, dist, np.nan),
+        'quality': np.where(valid, np.asarray(arrays.get('quality', nan), dtype=np.float64), np.nan),
+        'invalid': ~valid,
+        'timestamp': np.asarray(arrays.get('timestamp', nan), dtype=np.float64),
+    })
+    bins = frame.groupby(['dikey_aci', 'bin'], sort=True).agg(
+        point_count=('dist', 'size'), invalid_count=('invalid', 'sum'), min_cm=('dist', 'min'),
+        median_cm=('dist', 'median'), max_cm=('dist', 'max'), quality=('quality', 'mean'),
+        timestamp=('timestamp', 'min')).reset_index()
+    bins['angle_deg'] = (bins.pop('bin') + 0.5) * bin_deg
+    bins['x_cm'], bins['y_cm'], bins['z_cm'] = polar_to_cartesian(bins['median_cm'], bins['angle_deg'],
+                                                                  bins['dikey_aci'])
+    return bins
+
+
+def load_summary_arrays(scan, fields=None):
+    """Arşivlenmiş taramanın dilimlerini load_scan_arrays biçiminde döndürür ('index' dilimin sırasıdır)."""
+    from scanner.models import ScanSummaryBin
+
+    scan_id = getattr(scan, 'id', scan)
+    wanted = [name for name in (fields or SUMMARY_FIELDS) if name in SUMMARY_FIELDS]
+    columns = [column for column, name in _BIN_COLUMNS.items() if name in wanted]
+    rows = list(ScanSummaryBin.objects.filter(scan_id=scan_id).order_by('timestamp', 'id').values_list(*columns))
+    if not rows:
+        return {}
+    values = list(zip(*rows))
+    arrays = {}
+    for column, column_values in zip(columns, values):
+        if column == 'timestamp':
+            arrays['timestamp'] = np.array([v.timestamp() for v in column_values], dtype=np.float64)
+        else:
+            arrays[_BIN_COLUMNS[column]] = np.array([np.nan if v is None else v for v in column_values],
+                                                    dtype=np.float64)
+    arrays['index'] = np.arange(len(rows))
+    return arrays
+
+
+def export_points_file(scan_id, arrays, archive_dir):
+    """Tam çözünürlüklü nokta dizilerini sıkıştırılmış .npz olarak yazar (önce geçici dosyaya); yolu döndürür."""
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"scan_{scan_id}.npz")
+    temp_path = path + '.tmp'
+    with open(temp_path, 'wb') as handle:
+        np.savez_compressed(handle, **arrays)
+    os.replace(temp_path, path)
+    return path
+
+
+def select_scans_to_archive(older_than_days=DEFAULT_ARCHIVE_AFTER_DAYS, now=None):
+    """Arşivlenecek (eşikten eski, bitmiş, henüz arşivlenmemiş) taramaların ID'leri, en eskiden yeniye."""
+    from django.utils import timezone
+    from scanner.models import Scan
+
+    cutoff = (now or timezone.now()) - timedelta(days=older_than_days)
+    return list(Scan.objects.filter(start_time__lt=cutoff).exclude(status=Scan.Status.RUNNING)
+                .exclude(point_storage=Scan.PointStorage.ARCHIVED).order_by('start_time', 'id')
+                .values_list('id', flat=True))
+
+
+def archive_scan(scan, bin_deg=DEFAULT_BIN_DEG, archive_dir=None, batch_size=None, pause_s=None):
+    """
+    Taramayı özet dilimlerine indirger. `archive_dir` verilirse tam çözünürlüklü noktalar önce oraya
+    yazılır. Özetler ve saklama biçimi tek işlemde kaydedilir; noktalar/bloklar ardından partiler
+    halinde silinir (yarıda kalırsa yeniden çalıştırmak kalanları siler). Yazılan dilim sayısını döndürür.
+    """
+    from django.db import transaction
+    from scanner.models import Scan, ScanPoint, ScanPointChunk, ScanSummaryBin
+    from scanner.packed import PACKED_FIELDS, load_point_arrays
+    from scanner.retention import DEFAULT_BATCH_SIZE, DEFAULT_PAUSE_S, delete_in_batches
+
+    batch_size = batch_size or DEFAULT_BATCH_SIZE
+    pause_s = DEFAULT_PAUSE_S if pause_s is None else pause_s
+    written = 0
+    if scan.point_storage != Scan.PointStorage.ARCHIVED:
+        arrays = load_point_arrays(scan, PACKED_FIELDS)
+        bins = summarize_arrays(arrays, bin_deg)
+        path = export_points_file(scan.id, arrays, archive_dir) if archive_dir and arrays else ''
+        objects = [
+            ScanSummaryBin(scan_id=scan.id, dikey_aci=row.dikey_aci, angle_deg=row.angle_deg,
+                           point_count=int(row.point_count), invalid_count=int(row.invalid_count),
+                           timestamp=datetime.fromtimestamp(row.timestamp, tz=dt_timezone.utc),
+                           **{name: (None if np.isnan(getattr(row, name)) else float(getattr(row, name)))
+                              for name in ('min_cm', 'median_cm', 'max_cm', 'quality', 'x_cm', 'y_cm', 'z_cm')})
+            for row in bins.itertuples(index=False)
+        ]
+        with transaction.atomic():
+            ScanSummaryBin.objects.filter(scan_id=scan.id).delete()
+            ScanSummaryBin.objects.bulk_create(objects, batch_size=500)
+            Scan.objects.filter(id=scan.id).update(point_storage=Scan.PointStorage.ARCHIVED, archive_file=path)
+        scan.point_storage, scan.archive_file = Scan.PointStorage.ARCHIVED, path
+        written = len(objects)
+    delete_in_batches(ScanPoint.objects.filter(scan_id=scan.id), batch_size, pause_s)
+    delete_in_batches(ScanPointChunk.objects.filter(scan_id=scan.id), max(1, batch_size // 100), pause_s)
+    return written
+
+
+def restore_scan(scan, chunk_points=None, codec=None):
+    """
+    Arşiv dosyası olan bir taramanın noktalarını blok biçiminde geri yükler ve özetleri siler.
+    Geri yüklenen nokta sayısını döndürür; dosya yoksa ValueError.
+    """
+    from django.db import transaction
+    from scanner.models import Scan, ScanPointChunk, ScanSummaryBin
+    from scanner.packed import DEFAULT_CHUNK_POINTS, DEFAULT_CODEC, PACKED_FIELDS, write_chunk
+    from scanner.summary import rebuild_scan_summary
+
+    if not scan.archive_file or not os.path.exists(scan.archive_file):
+        raise ValueError(f"Tarama #{scan.id} için arşiv dosyası yok: {scan.archive_file or '-'}")
+    chunk_points, codec = chunk_points or DEFAULT_CHUNK_POINTS, codec or DEFAULT_CODEC
+    with np.load(scan.archive_file) as archive:
+        arrays = {name: archive[name] for name in PACKED_FIELDS if name in archive.files}
+    count = len(arrays['derece']) if 'derece' in arrays else 0
+    with transaction.atomic():
+        ScanPointChunk.objects.filter(scan_id=scan.id).delete()
+        for start in range(0, count, chunk_points):
+            write_chunk(scan.id, start, {name: values[start:start + chunk_points] for name, values in arrays.items()},
+                        codec)
+        ScanSummaryBin.objects.filter(scan_id=scan.id).delete()
+        Scan.objects.filter(id=scan.id).update(point_storage=Scan.PointStorage.PACKED, archive_file='')
+    os.remove(scan.archive_file)
+    scan.point_storage, scan.archive_file = Scan.PointStorage.PACKED, ''
+    rebuild_scan_summary(scan)
+    return count
+
+
+def angle_trend(angle_deg, dikey_aci=0.0, since=None, bin_deg=DEFAULT_BIN_DEG):
+    """
+    Bir açının arşivlenmiş taramalardaki medyan mesafesinin zaman serisi: [(zaman, tarama_id, medyan_cm)].
+    Açıyı içeren dilim, dilimin orta açısına en yakın kayıttır; sorgu (angle_deg, dikey_aci, timestamp)
+    dizinini kullanır.
+    """
+    from scanner.models import ScanSummaryBin
+
+    queryset = ScanSummaryBin.objects.filter(dikey_aci=dikey_aci, angle_deg__gt=angle_deg - bin_deg / 2,
+                                             angle_deg__lte=angle_deg + bin_deg / 2)
+    if since is not None:
+        queryset = queryset.filter(timestamp__gte=since)
+    return list(queryset.order_by('timestamp').values_list('timestamp', 'scan_id', 'median_cm'))
@@ -0,0 +1,122 @@
+# scanner/detection.py
+#
+# Serbest hareket modunun algılama iş parçacığı: mesafe sensörü kendi hızında (HC-SR04 için
+# önerilen ~60 ms aralıkla) okunur, örnekler önceden ayrılmış bir halka tampona (zaman, açı,
+# mesafe) yazılır ve eşik geçişleri bir kuyruğa olay olarak bırakılır. Motor döngüsü sensörü hiç
+# beklemez; her adımda kuyruğu bloklamadan boşaltıp olaylara tepki verir.
+#
+# Eşik histerezislidir: mesafe eşiğin altına inince ENTER, eşik + histerezis üstüne çıkınca EXIT.
+# gpiozero'nun when_in_range geri çağrıları da kendi iş parçacığında çalışır ama örnekleri
+# saklamaz ve simüle donanımda yoktur; bu sınıf iki arka uçta da aynı çalışır.
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+DEFAULT_SAMPLE_INTERVAL_S = 0.06
+DEFAULT_HYSTERESIS_CM = 2.0
+DEFAULT_RING_SIZE = 512
+
+EVENT_ENTER, EVENT_EXIT = 'enter', 'exit'
+
+
+@dataclass
+class ThresholdCrossing:
+    """Eşik geçişi: kind EVENT_ENTER / EVENT_EXIT, time epoch saniye."""
+    kind: str
+    time: float
+    angle_deg: float
+    distance_cm: float
+
+
+class DetectionThread(threading.Thread):
+    """
+    Sensörü `interval_s` aralıkla okuyan arka plan iş parçacığı. `angle_source()` o anki motor açısını
+    döndürür; `on_sample(zaman, açı, mesafe_cm, eşik_içinde)` her örnekte bu iş parçacığında çağrılır
+    (canlı kanal, hız tahmini). Geri çağrıdaki hata örneklemeyi durdurmaz, last_error'a yazılır.
+    """
+
+    def __init__(self, sensor, threshold_cm, angle_source, interval_s=DEFAULT_SAMPLE_INTERVAL_S,
+                 hysteresis_cm=DEFAULT_HYSTERESIS_CM, ring_size=DEFAULT_RING_SIZE, on_sample=None):
+        super().__init__(name='detection', daemon=True)
+        self.sensor = sensor
+        self.threshold_cm = float(threshold_cm)
+        self.hysteresis_cm = float(hysteresis_cm)
+        self.angle_source = angle_source
+        self.interval_s = float(interval_s)
+        self.on_sample = on_sample
+        self.times = np.zeros(ring_size, dtype=np.float64)
+        self.angles = np.zeros(ring_size, dtype=np.float64)
+        self.distances = np.zeros(ring_size, dtype=np.float64)
+        self.written = 0
+        self.in_range = False
+        self.last_error = None
+        self._events = queue.SimpleQueue()
+        self._stop_event = threading.Event()
+
+    def sample_once(self):
+        distance_cm = self.sensor.distance * 100
+        now, angle = time.time(), float(self.angle_source())
+        slot = self.written % len(self.times)
+        self.times[slot], self.angles[slot], self.distances[slot] = now, angle, distance_cm
+        # Okuyucular yalnızca 'written'dan önceki (tamamlanmış) örnekleri görür
+        self.written += 1
+        if not self.in_range and distance_cm < self.threshold_cm:
+            self.in_range = True
+            self._events.put(ThresholdCrossing(EVENT_ENTER, now, angle, distance_cm))
+        elif self.in_range and distance_cm >= self.threshold_cm + self.hysteresis_cm:
+            self.in_range = False
+            self._events.put(ThresholdCrossing(EVENT_EXIT, now, angle, distance_cm))
+        if self.on_sample:
+            try:
+                self.on_sample(now, angle, distance_cm, self.in_range)
+            except Exception as e:
+                self.last_error = e
+        return distance_cm
+
+    def run(self):
+        next_sample = time.monotonic()
+        while not self._stop_event.is_set():
+            try:
+                self.sample_once()
+            except Exception as e:
+                self.last_error = e
+            next_sample += self.interval_s
+            wait_s = next_sample - time.monotonic()
+            if wait_s < 0:
+                # Sensör zaman aşımı gibi uzun bir okumadan sonra birikmiş örnekleri telafi etme
+                next_sample = time.monotonic()
+            elif self._stop_event.wait(wait_s):
+                break
+
+    def poll(self):
+        """Biriken eşik geçişlerini bloklamadan döndürür (eskiden yeniye)."""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def latest(self):
+        """Son örnek (zaman, açı, mesafe_cm) ya da henüz örnek yoksa None."""
+        written = self.written
+        if written == 0:
+            return None
+        slot = (written - 1) % len(self.times)
+        return float(self.times[slot]), float(self.angles[slot]), float(self.distances[slot])
+
+    def recent(self, count=None):
+        """Halka tampondaki son `count` örnek: eskiden yeniye (zaman, açı, mesafe) dizileri."""
+        written = self.written
+        count = min(written, len(self.times), count or len(self.times))
+        indices = np.arange(written - count, written) % len(self.times)
+        return self.times[indices], self.angles[indices], self.distances[indices]
+
+    def stop(self, timeout=2.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
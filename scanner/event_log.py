@@ -0,0 +1,256 @@
+# scanner/event_log.py
+#
+# Serbest hareket modunun kalıcı kaydı. Algılama iş parçacığı (scanner/detection.py) her örneği
+# iki küçük toplayıcıya verir:
+#   - DetectionEventTracker: eşiğe girişten çıkışa kadar süren bir algılamayı tek bir DetectionEvent
+#     satırına indirger (en yakın okumanın açısı/mesafesi, süre, örnek sayısı).
+#   - TelemetryAggregator: sürekli ham mesafeyi DEFAULT_ROLLUP_PERIOD_S'lik dönemlerde açı dilimi başına
+#     (adet, geçersiz, en küçük/ortalama/en büyük) özetler; saatlerce süren bir çalışmada bile satır
+#     sayısı dönem × dilim ile sınırlıdır.
+# Biten olaylar ve dönem özetleri EventLogWriter'ın sınırlı kuyruğuna bloklamadan bırakılır; yazıcı
+# iş parçacığı bunları partiler halinde bulk_create ile yazar. Kuyruk doluysa (veritabanı uzun süre
+# kilitli) yeni kayıtlar atılır ve sayılır: tarama döngüsü hiçbir koşulda veritabanını beklemez.
+
+import math
+import queue
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+from scanner.summary import VALID_MIN_CM
+
+DEFAULT_ROLLUP_PERIOD_S = 60
+DEFAULT_ROLLUP_BIN_DEG = 5.0
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_FLUSH_INTERVAL_S = 2.0
+DEFAULT_QUEUE_SIZE = 5000
+# Yazılamayan parti bu kadar denemeden sonra atılır
+MAX_WRITE_ATTEMPTS = 3
+
+KIND_EVENT, KIND_ROLLUP = 'event', 'rollup'
+
+
+def _as_datetime(epoch_s):
+    return datetime.fromtimestamp(epoch_s, tz=dt_timezone.utc)
+
+
+class DetectionEventTracker:
+    """feed() her örnekte çağrılır; eşikten çıkışta biten olayı sözlük olarak döndürür, yoksa None."""
+
+    def __init__(self):
+        self.current = None
+
+    def feed(self, sample_time, angle_deg, distance_cm, in_range):
+        event = self.current
+        if in_range:
+            if event is None:
+                self.current = {'start_time': sample_time, 'end_time': sample_time, 'angle_deg': angle_deg,
+                                'min_distance_cm': distance_cm, 'sample_count': 1}
+            else:
+                event['end_time'] = sample_time
+                event['sample_count'] += 1
+                if distance_cm < event['min_distance_cm']:
+                    event['angle_deg'], event['min_distance_cm'] = angle_deg, distance_cm
+            return None
+        if event is None:
+            return None
+        # Çıkış örneği olayın bitiş anıdır ama mesafesi olaya sayılmaz
+        event['end_time'] = sample_time
+        return self.close()
+
+    def close(self):
+        """Süren olayı (program kapanırken) son örnekte bitirip döndürür."""
+        event, self.current = self.current, None
+        if event is not None:
+            event['duration_s'] = event['end_time'] - event['start_time']
+        return event
+
+
+class TelemetryAggregator:
+    """
+    Ham mesafeleri dönem ve açı dilimi başına toplar. add() tek bir skaler güncellemedir; dönem sınırı
+    geçildiğinde biten dönemin dolu dilimlerini satır sözlükleri listesi olarak döndürür.
+    """
+
+    def __init__(self, period_s=DEFAULT_ROLLUP_PERIOD_S, bin_deg=DEFAULT_ROLLUP_BIN_DEG,
+                 max_valid_cm=SENSOR_MAX_VALID_CM):
+        self.period_s = int(period_s)
+        self.bin_deg = float(bin_deg)
+        self.max_valid_cm = float(max_valid_cm)
+        bin_count = int(math.ceil(360.0 / self.bin_deg))
+        self.count = np.zeros(bin_count, dtype=np.int64)
+        self.invalid = np.zeros(bin_count, dtype=np.int64)
+        self.total = np.zeros(bin_count, dtype=np.float64)
+        self.min_cm = np.full(bin_count, np.inf)
+        self.max_cm = np.full(bin_count, -np.inf)
+        self.period_start = None
+
+    def add(self, sample_time, angle_deg, distance_cm):
+        rows = []
+        period_start = math.floor(sample_time / self.period_s) * self.period_s
+        if self.period_start is not None and period_start != self.period_start:
+            rows = self.flush()
+        self.period_start = period_start
+        # Dilim -180°'den başlar; serbest hareket açıları merkezin iki yanındadır
+        index = int((angle_deg + 180.0) // self.bin_deg) % len(self.count)
+        self.count[index] += 1
+        if VALID_MIN_CM < distance_cm < self.max_valid_cm:
+            self.total[index] += distance_cm
+            if distance_cm < self.min_cm[index]: self.min_cm[index] = distance_cm
+            if distance_cm > self.max_cm[index]: self.max_cm[index] = distance_cm
+        else:
+            self.invalid[index] += 1
+        return rows
+
+    def flush(self):
+        """Süren dönemin dolu dilimlerini döndürür ve sayaçları sıfırlar."""
+        if self.period_start is None:
+            return []
+        rows = []
+        for index in np.flatnonzero(self.count):
+            valid = int(self.count[index] - self.invalid[index])
+            rows.append({
+                'period_start': self.period_start, 'period_s': self.period_s,
+                'angle_deg': -180.0 + (index + 0.5) * self.bin_deg, 'sample_count': int(self.count[index]),
+                'invalid_count': int(self.invalid[index]),
+                'min_cm': float(self.min_cm[index]) if valid else None,
+                'mean_cm': float(self.total[index] / valid) if valid else None,
+                'max_cm': float(self.max_cm[index]) if valid else None,
+            })
+        self.count[:] = self.invalid[:] = 0
+        self.total[:] = 0.0
+        self.min_cm[:], self.max_cm[:] = np.inf, -np.inf
+        self.period_start = None
+        return rows
+
+
+def _to_objects(kind, rows):
+    from scanner.models import DetectionEvent, TelemetryRollup
+
+    if kind == KIND_EVENT:
+        return DetectionEvent, [DetectionEvent(start_time=_as_datetime(row['start_time']),
+                                               end_time=_as_datetime(row['end_time']), duration_s=row['duration_s'],
+                                               angle_deg=row['angle_deg'], min_distance_cm=row['min_distance_cm'],
+                                               sample_count=row['sample_count']) for row in rows]
+    return TelemetryRollup, [TelemetryRollup(**dict(row, period_start=_as_datetime(row['period_start'])))
+                             for row in rows]
+
+
+class EventLogWriter(threading.Thread):
+    """
+    Olayları ve dönem özetlerini arka planda partiler halinde yazar. submit() hiçbir zaman bloklamaz:
+    kuyruk doluysa kayıt atılır ve `dropped` artar. Parti `batch_size` kayda ulaşınca ya da en eski kayıt
+    `flush_interval_s` beklediğinde yazılır; veritabanı kilitliyse parti sonraki turda yeniden denenir.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, flush_interval_s=DEFAULT_FLUSH_INTERVAL_S,
+                 queue_size=DEFAULT_QUEUE_SIZE):
+        super().__init__(name='event-log', daemon=True)
+        self.batch_size = int(batch_size)
+        self.flush_interval_s = float(flush_interval_s)
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = threading.Event()
+        self._pending = {KIND_EVENT: [], KIND_ROLLUP: []}
+        self._attempts = 0
+        self.written = {KIND_EVENT: 0, KIND_ROLLUP: 0}
+        self.dropped = 0
+        self.last_error = None
+
+    def submit(self, kind, row):
+        try:
+            self._queue.put_nowait((kind, row))
+        except queue.Full:
+            self.dropped += 1
+
+    def submit_event(self, event):
+        if event is not None: self.submit(KIND_EVENT, event)
+
+    def submit_rollups(self, rows):
+        for row in rows: self.submit(KIND_ROLLUP, row)
+
+    def pending_count(self):
+        return sum(len(rows) for rows in self._pending.values())
+
+    def _drain(self, deadline):
+        """Parti dolana ya da `deadline`'a (monotonic) kadar kuyruktan kayıt alır."""
+        while self.pending_count() < self.batch_size:
+            try:
+                kind, row = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                return
+            self._pending[kind].append(row)
+
+    def flush(self):
+        from django.db import transaction
+
+        if not any(self._pending.values()):
+            return
+        try:
+            with transaction.atomic():
+                for kind, rows in self._pending.items():
+                    if rows:
+                        model, objects = _to_objects(kind, rows)
+                        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        except Exception as e:
+            self.last_error = e
+            self._attempts += 1
+            if self._attempts < MAX_WRITE_ATTEMPTS:
+                return
+            self.dropped += self.pending_count()
+        else:
+            for kind, rows in self._pending.items():
+                self.written[kind] += len(rows)
+        self._attempts = 0
+        self._pending = {KIND_EVENT: [], KIND_ROLLUP: []}
+
+    def run(self):
+        from django.db import connection
+
+        try:
+            while not self._stop_event.is_set():
+                # İlk kayıt gelince en geç flush_interval_s sonra yazılır
+                try:
+                    kind, row = self._queue.get(timeout=self.flush_interval_s)
+                    self._pending[kind].append(row)
+                except queue.Empty:
+                    pass
+                self._drain(time.monotonic() + self.flush_interval_s)
+                self.flush()
+            # Kapanışta kuyrukta kalanlar da yazılır
+            self._attempts = 0
+            self._drain(time.monotonic())
+            while self.pending_count():
+                self.flush()
+                self._drain(time.monotonic())
+        finally:
+            connection.close()
+
+    def stop(self, timeout=10.0):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join(timeout)
+
+
+def detection_heatmap(since, until, bin_deg=DEFAULT_ROLLUP_BIN_DEG, time_bins=48):
+    """
+    [since, until) aralığında başlayan olayları (açı dilimi × zaman dilimi) sayı matrisine çevirir.
+    (zaman dilimi başlangıçları, dilim orta açıları, sayılar[açı, zaman]) döndürür; açılar yalnızca olay
+    görülen aralığı kapsar, olay yoksa boştur.
+    """
+    from scanner.models import DetectionEvent
+
+    events = list(DetectionEvent.objects.filter(start_time__gte=since, start_time__lt=until)
+                  .values_list('angle_deg', 'start_time'))
+    time_edges = since.timestamp() + np.linspace(0.0, max((until - since).total_seconds(), 1.0), time_bins + 1)
+    time_starts = [_as_datetime(edge) for edge in time_edges[:-1]]
+    if not events:
+        return time_starts, np.zeros(0), np.zeros((0, time_bins), dtype=np.int64)
+    angles = np.array([angle for angle, _ in events], dtype=np.float64)
+    times = np.array([start.timestamp() for _, start in events])
+    first, last = np.floor(angles.min() / bin_deg), np.floor(angles.max() / bin_deg) + 1
+    angle_edges = np.arange(first, last + 1) * bin_deg
+    counts, _, _ = np.histogram2d(angles, times, bins=[angle_edges, time_edges])
+    return time_starts, angle_edges[:-1] + bin_deg / 2, counts.astype(np.int64)
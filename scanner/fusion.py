@@ -0,0 +1,105 @@
+# scanner/fusion.py
+
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+
+@dataclass
+class MountingModel:
+    """
+    İkinci sensörün birinci sensöre göre montaj konumu.
+    range_offset_cm: bakış yönü boyunca öne (+) / geriye (-) kayma,
+    lateral_offset_cm: yana (sol +) kayma, angle_offset_deg: yatay açı farkı.
+    sigma_*: sensörlerin tahmini ölçüm gürültüsü (cm), ağırlıklandırmada kullanılır.
+    """
+    range_offset_cm: float = 0.0
+    lateral_offset_cm: float = 0.0
+    angle_offset_deg: float = 0.0
+    sigma_1_cm: float = 1.0
+    sigma_2_cm: float = 1.0
+    agreement_tolerance_cm: float = 5.0
+    max_valid_cm: float = SENSOR_MAX_VALID_CM
+
+
+DEFAULT_MOUNTING_MODEL = MountingModel()
+
+
+def sensor2_to_sensor1_range(dist_2, model=DEFAULT_MOUNTING_MODEL):
+    """İkinci sensörün mesafesini birinci sensörün orijinine göre menzile çevirir (vektörel)."""
+    dist_2 = np.asarray(dist_2, dtype=np.float64)
+    angle = math.radians(model.angle_offset_deg)
+    hit_x = model.range_offset_cm + dist_2 * math.cos(angle)
+    hit_y = model.lateral_offset_cm + dist_2 * math.sin(angle)
+    return np.hypot(hit_x, hit_y)
+
+
+def fuse_distances(dist_1, dist_2, model=DEFAULT_MOUNTING_MODEL):
+    """
+    Tüm tarama için (birleşik_mesafe_cm, güven) dizilerini döndürür.
+
+    - İki okuma tolerans içinde uyuşuyorsa ters-varyans ağırlıklı ortalama, güven 0.5-1.0
+    - Uyuşmuyorsa yakın olan (çoklu yol yansıması genelde uzun okuma üretir), güven < 0.3
+    - Yalnızca biri geçerliyse o okuma, güven 0.4; hiçbiri geçerli değilse ham okuma, güven 0
+    """
+    d1 = np.asarray(dist_1, dtype=np.float64)
+    d2 = sensor2_to_sensor1_range(np.nan_to_num(np.asarray(dist_2, dtype=np.float64)), model)
+    valid_1 = (d1 > 0) & (d1 < model.max_valid_cm)
+    valid_2 = (d2 > 0) & (d2 < model.max_valid_cm) & (np.asarray(dist_2, dtype=np.float64) > 0)
+
+    w1, w2 = 1.0 / model.sigma_1_cm ** 2, 1.0 / model.sigma_2_cm ** 2
+    diff = np.abs(d1 - d2)
+    both = valid_1 & valid_2
+    agree = both & (diff <= model.agreement_tolerance_cm)
+    disagree = both & ~agree
+
+    fused = np.where(valid_1, d1, np.where(valid_2, d2, d1))
+    confidence = np.where(valid_1 ^ valid_2, 0.4, 0.0)
+
+    fused = np.where(agree, (w1 * d1 + w2 * d2) / (w1 + w2), fused)
+    confidence = np.where(agree, 1.0 - 0.5 * diff / model.agreement_tolerance_cm, confidence)
+
+    fused = np.where(disagree, np.minimum(d1, d2), fused)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        confidence = np.where(disagree, 0.3 * model.agreement_tolerance_cm / diff, confidence)
+    return fused, np.round(confidence, 3)
+
+
+def polar_to_cartesian(dist_cm, pan_deg, tilt_deg):
+    """sensor_script ile aynı dönüşüm: (x, y, z) dizileri."""
+    dist_cm = np.asarray(dist_cm, dtype=np.float64)
+    pan = np.radians(np.asarray(pan_deg, dtype=np.float64))
+    tilt = np.radians(np.asarray(tilt_deg, dtype=np.float64))
+    horizontal_radius = dist_cm * np.cos(tilt)
+    return horizontal_radius * np.cos(pan), horizontal_radius * np.sin(pan), dist_cm * np.sin(tilt)
+
+
+def refuse_scan_points(scan, model=DEFAULT_MOUNTING_MODEL, batch_size=2000):
+    """
+    Geçmiş bir taramanın tüm noktalarını tek seferde (vektörel) yeniden birleştirir, x/y/z'yi
+    birleşik mesafeden yeniden hesaplar ve toplu günceller. Güncellenen nokta sayısını döndürür.
+    dikey_aci alanı olmayan eski noktalarda dikey açı mevcut x/y/z'den geri hesaplanır.
+    """
+    from scanner.models import ScanPoint
+
+    rows = list(scan.points.order_by('id').values_list('id', 'derece', 'dikey_aci', 'mesafe_cm', 'mesafe_cm_2',
+                                                       'x_cm', 'y_cm', 'z_cm'))
+    if not rows:
+        return 0
+    data = np.array([(r[0], r[1], np.nan if r[2] is None else r[2], r[3], r[4] or 0.0, r[5], r[6], r[7])
+                     for r in rows], dtype=np.float64)
+    ids, pan, tilt, dist_1, dist_2, x_old, y_old, z_old = data.T
+    missing_tilt = np.isnan(tilt)
+    tilt[missing_tilt] = np.degrees(np.arctan2(z_old[missing_tilt], np.hypot(x_old[missing_tilt],
+                                                                             y_old[missing_tilt])))
+    fused, confidence = fuse_distances(dist_1, dist_2, model)
+    x, y, z = polar_to_cartesian(fused, pan, tilt)
+
+    points = [ScanPoint(id=int(ids[i]), mesafe_fused_cm=float(fused[i]), fusion_confidence=float(confidence[i]),
+                        x_cm=float(x[i]), y_cm=float(y[i]), z_cm=float(z[i])) for i in range(len(rows))]
+    ScanPoint.objects.bulk_update(points, ['mesafe_fused_cm', 'fusion_confidence', 'x_cm', 'y_cm', 'z_cm'],
+                                  batch_size=batch_size)
+    return len(points)
@@ -0,0 +1,123 @@
+# scanner/geometry.py
+
+import math
+import time
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+
+class IncrementalGeometry:
+    """
+    Tarama sırasında gelen (x, y) noktalarından alan/çevre/genişlik/derinlik değerlerini
+    nokta başına O(1) işlemle günceller. Çokgen sensör orijininden (0, 0) başlayıp noktaları
+    sırayla izler ve orijine geri döner; sonuçlar sensor_script'teki eski
+    shoelace_formula/calculate_perimeter hesaplarıyla aynıdır.
+    """
+
+    def __init__(self, flush_interval_s=1.0):
+        self.flush_interval_s = float(flush_interval_s)
+        self.count = 0
+        self._cross_sum = 0.0  # ardışık noktaların çapraz çarpımları toplamı (orijin kenarları 0 katkı verir)
+        self._path_length = 0.0  # ilk noktadan son noktaya kadar olan yol uzunluğu
+        self._first = self._last = None
+        self.min_x = self.max_x = self.min_y = self.max_y = None
+        self._last_flush_time = 0.0
+        self._last_flush_count = 0
+
+    def add_point(self, x, y):
+        if self._last is None:
+            self._first = (x, y)
+            self.min_x = self.max_x = x
+            self.min_y = self.max_y = y
+        else:
+            last_x, last_y = self._last
+            self._cross_sum += last_x * y - x * last_y
+            self._path_length += math.hypot(x - last_x, y - last_y)
+            if x < self.min_x: self.min_x = x
+            if x > self.max_x: self.max_x = x
+            if y < self.min_y: self.min_y = y
+            if y > self.max_y: self.max_y = y
+        self._last = (x, y)
+        self.count += 1
+
+    @property
+    def area(self):
+        return 0.5 * abs(self._cross_sum)
+
+    @property
+    def perimeter(self):
+        if self._first is None: return 0.0
+        return math.hypot(*self._first) + self._path_length + math.hypot(*self._last)
+
+    def metrics(self):
+        """Scan modelindeki alan adlarıyla sonuç sözlüğü; en az 3 nokta yoksa None."""
+        if self.count < 3: return None
+        return {
+            'calculated_area_cm2': self.area,
+            'perimeter_cm': self.perimeter,
+            'max_width_cm': self.max_y - self.min_y,
+            'max_depth_cm': self.max_x,
+        }
+
+    def should_flush(self, now=None):
+        """Son yazımdan bu yana yeni nokta geldiyse ve aralık dolduysa True (veritabanı yazımlarını seyreltir)."""
+        now = time.monotonic() if now is None else now
+        if self.count < 3 or self.count == self._last_flush_count: return False
+        if now - self._last_flush_time < self.flush_interval_s: return False
+        self._last_flush_time, self._last_flush_count = now, self.count
+        return True
+
+
+def compute_geometry(x, y):
+    """
+    IncrementalGeometry'nin vektörel karşılığı: sıralı x/y dizilerinden aynı sonuç sözlüğünü
+    tek seferde hesaplar. En az 3 nokta yoksa None döner.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if x.size < 3: return None
+    cross_sum = np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1])
+    path_length = np.hypot(np.diff(x), np.diff(y)).sum()
+    return {
+        'calculated_area_cm2': float(0.5 * abs(cross_sum)),
+        'perimeter_cm': float(math.hypot(x[0], y[0]) + path_length + math.hypot(x[-1], y[-1])),
+        'max_width_cm': float(y.max() - y.min()),
+        'max_depth_cm': float(x.max()),
+    }
+
+
+GEOMETRY_FIELDS = ('x_cm', 'y_cm', 'dikey_aci', 'mesafe_cm', 'mesafe_fused_cm', 'fusion_confidence')
+
+
+def geometry_from_arrays(arrays, max_valid_cm=SENSOR_MAX_VALID_CM):
+    """
+    load_point_arrays biçimindeki (sıralı) noktalardan metrikleri hesaplar. Hacimsel taramalarda
+    tarayıcı gibi en yatay katman kullanılır; birleşik mesafe varsa geçerlilik kontrolü ondan yapılır.
+    """
+    size = len(arrays.get('x_cm', ()))
+    x, y, tilt, dist, fused, confidence = (np.asarray(arrays.get(name, np.full(size, np.nan)), dtype=np.float64)
+                                           for name in GEOMETRY_FIELDS)
+    dist = np.where(np.isnan(fused), dist, fused)
+    valid = (dist > 0) & (dist < max_valid_cm) & (confidence != 0.0)
+    if not np.isnan(tilt).all():
+        layers = np.unique(tilt[~np.isnan(tilt)])
+        valid &= tilt == layers[np.argmin(np.abs(layers))]
+    return compute_geometry(x[valid], y[valid])
+
+
+def recompute_scan_geometry(scan, max_valid_cm=SENSOR_MAX_VALID_CM):
+    """
+    Geçmiş bir taramanın metriklerini kayıtlı noktalarından (geometry_from_arrays) yeniden
+    hesaplar ve Scan satırına yazar. Hesaplanan sözlüğü (ya da None) döndürür.
+    """
+    from scanner.models import Scan
+    from scanner.packed import load_point_arrays
+
+    if scan.point_storage == Scan.PointStorage.ARCHIVED:
+        return None  # Metrikler arşivlemeden önce tam çözünürlükle hesaplanmıştı; özetten yeniden hesaplanmaz
+    metrics = geometry_from_arrays(load_point_arrays(scan, GEOMETRY_FIELDS), max_valid_cm)
+    Scan.objects.filter(id=scan.id).update(**(metrics or dict.fromkeys(
+        ('calculated_area_cm2', 'perimeter_cm', 'max_width_cm', 'max_depth_cm'))))
+    return metrics
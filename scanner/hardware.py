@@ -0,0 +1,33 @@
+# scanner/hardware.py
+
+import os
+from types import SimpleNamespace
+
+# Betiklerin kullandığı donanım sınıfları; her arka uç bu adların hepsini sağlar
+# TriggeredDistanceSensor okuma başına tek darbe gönderir (scanner/hcsr04.py); tetikleme anı çağırana aittir
+DEVICE_NAMES = ('DistanceSensor', 'TriggeredDistanceSensor', 'LED', 'Buzzer', 'OutputDevice', 'Servo', 'CharLCD')
+HARDWARE_BACKEND_ENV = 'SCANNER_HARDWARE_BACKEND'
+# Mesafe sensörlerinin menzili; yankı gelmeyen okuma tam menzili (250 cm) döndürür. Menzilin 1 cm
+# altı geçerli ölçümün üst sınırıdır: geometri, hız, arşiv, özet sütunları ve canlı kanal aynı sınırı
+# kullanır.
+SENSOR_MAX_DISTANCE_M = 2.5
+SENSOR_MAX_VALID_CM = SENSOR_MAX_DISTANCE_M * 100 - 1
+
+
+def load_backend(name=None):
+    """
+    Donanım arka ucunu yükler: 'gpio' (varsayılan) gerçek gpiozero/RPLCD sınıflarını, 'sim'
+    scanner.sim_hardware içindeki simüle sınıfları döndürür. Ad verilmezse
+    SCANNER_HARDWARE_BACKEND ortam değişkeni kullanılır. Kütüphane eksikse ImportError yükselir.
+    """
+    name = (name or os.environ.get(HARDWARE_BACKEND_ENV) or 'gpio').lower()
+    if name == 'sim':
+        from scanner import sim_hardware as module
+        return SimpleNamespace(name=name, **{attr: getattr(module, attr) for attr in DEVICE_NAMES})
+    if name == 'gpio':
+        from gpiozero import DistanceSensor, LED, Buzzer, OutputDevice, Servo
+        from RPLCD.i2c import CharLCD
+        from scanner.hcsr04 import TriggeredDistanceSensor
+        return SimpleNamespace(name=name, DistanceSensor=DistanceSensor, TriggeredDistanceSensor=TriggeredDistanceSensor,
+                               LED=LED, Buzzer=Buzzer, OutputDevice=OutputDevice, Servo=Servo, CharLCD=CharLCD)
+    raise ValueError(f"Bilinmeyen donanım arka ucu: {name}")
@@ -0,0 +1,76 @@
+# scanner/hcsr04.py
+#
+# Okuma başına tek darbe gönderen HC-SR04 sürücüsü. gpiozero.DistanceSensor kendi arka plan
+# iş parçacığında sürekli tetik darbesi gönderir; `.distance` yalnızca kuyruktaki ortalamayı
+# döndürür, darbe göndermez ve yankıyı beklemez. İki sensörün ne zaman tetikleneceğine bu yüzden
+# karışılamaz ve DualSensorScheduler'ın tetikleme aralığı gerçek donanımda etkisiz kalır.
+#
+# TriggeredDistanceSensor TRIG pinini bir OutputDevice ile yalnızca `.distance` okunduğunda sürer
+# (10 µs darbe), ECHO'nun yükselen ve düşen kenarlarının zamanını pin fabrikasının tick sayacından
+# alır (gpiozero.DistanceSensor'ün yaptığı gibi) ve yankıyı ya da zaman aşımını bekler. Böylece
+# tetikleme anını çağıran belirler; simüle arka uçtaki DistanceSensor da aynı şekilde çalışır.
+
+import threading
+import time
+
+SPEED_OF_SOUND_M_S = 343.0
+TRIGGER_PULSE_S = 10e-6
+# Yankı gelmezse HC-SR04 ECHO'yu ~38 ms yüksek tutar; biraz pay bırakılır
+ECHO_TIMEOUT_S = 0.04
+
+
+class TriggeredDistanceSensor:
+    """
+    gpiozero.DistanceSensor ile aynı `distance` (metre) ve `max_distance` arayüzü; her okuma bir darbe
+    gönderip yankıyı bekler (en fazla ECHO_TIMEOUT_S). Yankı yoksa `max_distance` döner.
+    """
+
+    def __init__(self, echo=None, trigger=None, max_distance=1.0, pin_factory=None, **kwargs):
+        from gpiozero import DigitalInputDevice, OutputDevice
+
+        self.max_distance = float(max_distance)
+        self._trigger = OutputDevice(trigger, pin_factory=pin_factory)
+        self._echo = DigitalInputDevice(echo, pull_up=False, pin_factory=pin_factory)
+        self._factory = self._echo.pin_factory
+        self._lock = threading.Lock()
+        self._echo_done = threading.Event()
+        self._rise_ticks = None
+        self._echo_s = None
+        # Kenar zamanları geri çağrının çalıştığı andan değil pin fabrikasının tick'inden alınır
+        self._echo.pin.edges = 'both'
+        self._echo.pin.bounce = None
+        self._echo.pin.when_changed = self._echo_changed
+
+    def _echo_changed(self, ticks, state):
+        if state:
+            self._rise_ticks = ticks
+        elif self._rise_ticks is not None:
+            self._echo_s = self._factory.ticks_diff(ticks, self._rise_ticks)
+            self._rise_ticks = None
+            self._echo_done.set()
+
+    def _pulse(self):
+        pin = self._trigger.pin
+        pin.state = True
+        # time.sleep 10 µs için fazla kaba; kısa meşgul bekleme
+        end = time.perf_counter() + TRIGGER_PULSE_S
+        while time.perf_counter() < end:
+            pass
+        pin.state = False
+
+    @property
+    def distance(self):
+        with self._lock:
+            self._echo_done.clear()
+            self._rise_ticks = self._echo_s = None
+            self._pulse()
+            if not self._echo_done.wait(ECHO_TIMEOUT_S):
+                return self.max_distance
+            return min(self.max_distance, self._echo_s * SPEED_OF_SOUND_M_S / 2.0)
+
+    def close(self):
+        for device in (self._trigger, self._echo):
+            try:
+                device.close()
+            except Exception:
+                pass
@@ -0,0 +1,93 @@
+# scanner/heartbeat.py
+#
+# Tarayıcının ilerleme kaydı: her noktada küçük bir JSON dosyası (geçici dosyaya yazılıp os.replace
+# ile atomik olarak değiştirilir, okuyucu hiçbir zaman yarım dosya görmez). Panelin sistem kartı bu
+# dosyayı veritabanına dokunmadan okur: mevcut mantıksal açı, yapılan/planlanan nokta, ölçülen
+# nokta/s, kalan süre tahmini ve son hata.
+#
+# Hız, son RATE_WINDOW noktanın zamanlarından hesaplanır; böylece dönüş/servo beklemeleri gibi
+# duraklamalar tahmini uzun süre bozmaz.
+
+import json
+import math
+import os
+import time
+from collections import deque
+
+DEFAULT_HEARTBEAT_PATH = '/tmp/sensor_scan_script.status.json'
+RATE_WINDOW = 20
+# Bu süreden eski bir kayıt (betik takılmış/çökmüş olabilir) panelde eski olarak işaretlenir
+STALE_AFTER_S = 15.0
+
+
+def planned_points_per_sweep(duration_deg, step_deg):
+    """perform_sweep'in bir geçişte ölçtüğü açı sayısı (başlangıç ve bitiş dahil, son adım kırpılır)."""
+    if step_deg <= 0: return 1
+    return int(math.ceil(abs(duration_deg) / step_deg - 1e-9)) + 1
+
+
+class HeartbeatWriter:
+    """Tarama ilerlemesini `path`'e yazar. start() her yeni taramada sayaçları sıfırlar."""
+
+    def __init__(self, path=DEFAULT_HEARTBEAT_PATH, scans_planned=None):
+        self.path = path
+        self.scans_planned = scans_planned or None  # 0/None: sürekli tarama
+        self.scans_done = 0
+        self.state = {}
+        self._times = deque(maxlen=RATE_WINDOW)
+
+    def start(self, scan_id, points_planned, layer_count=1):
+        self._times.clear()
+        self.state = {
+            'pid': os.getpid(), 'status': 'running', 'scan_id': scan_id, 'angle_deg': None, 'tilt_deg': None,
+            'points_done': 0, 'points_planned': int(points_planned), 'layer_count': int(layer_count),
+            'scans_done': self.scans_done, 'scans_planned': self.scans_planned, 'rate_pps': None, 'eta_s': None,
+            'started_at': time.time(), 'last_error': self.state.get('last_error'),
+        }
+        self._write()
+
+    def beat(self, angle_deg, tilt_deg=None):
+        """Bir nokta ölçüldü."""
+        now = time.monotonic()
+        self._times.append(now)
+        state = self.state
+        state['points_done'] += 1
+        state['angle_deg'], state['tilt_deg'] = float(angle_deg), None if tilt_deg is None else float(tilt_deg)
+        if len(self._times) >= 2 and self._times[-1] > self._times[0]:
+            state['rate_pps'] = (len(self._times) - 1) / (self._times[-1] - self._times[0])
+            remaining = max(0, state['points_planned'] - state['points_done'])
+            state['eta_s'] = remaining / state['rate_pps']
+        self._write()
+
+    def error(self, message):
+        self.state['last_error'] = {'message': str(message), 'at': time.time()}
+        self._write()
+
+    def finish(self, status):
+        """Tarama bitti; `status` Scan.Status değeri ya da 'exited' gibi bir betik durumu."""
+        self.scans_done += 1
+        self.state.update(status=str(status), scans_done=self.scans_done, eta_s=0.0)
+        self._write()
+
+    def _write(self):
+        if not self.state: return
+        self.state['updated_at'] = time.time()
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'w') as handle:
+                json.dump(self.state, handle)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"UYARI: İlerleme dosyası yazılamadı: {e}")
+
+
+def read_heartbeat(path=DEFAULT_HEARTBEAT_PATH, now=None):
+    """Son ilerleme kaydını döndürür ('age_s' ve 'stale' eklenir); dosya yoksa ya da okunamıyorsa None."""
+    try:
+        with open(path) as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    state['age_s'] = max(0.0, (now or time.time()) - state.get('updated_at', 0))
+    state['stale'] = state.get('status') == 'running' and state['age_s'] > STALE_AFTER_S
+    return state
@@ -0,0 +1,306 @@
+# scanner/journal.py
+
+import glob
+import os
+import struct
+import threading
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+
+# Dosya HEADER_STRUCT başlığıyla (sihirli sayı, sürüm, kayıt boyu, alan sayısı) başlar; ardından her
+# ölçüm sabit uzunlukta bir kayıttır: tarama ID'si + 13 adet float64 (None -> NaN).
+# Yarım yazılmış son kayıt (çökme/elektrik kesintisi) okunurken yok sayılır. Başlığı bu sürümün kayıt
+# düzeniyle uyuşmayan dosya (alan eklenmiş/çıkarılmış eski bir günlük) ayrıştırılmaz: kayıt sınırları
+# kayar ve çöp noktalar yazılırdı.
+RECORD_FIELDS = ('derece', 'dikey_aci', 'mesafe_cm', 'mesafe_cm_2', 'quality', 'mesafe_fused_cm',
+                 'fusion_confidence', 'x_cm', 'y_cm', 'z_cm', 'timestamp', 'timestamp_2', 'hiz_cm_s')
+RECORD_STRUCT = struct.Struct('<I' + 'd' * len(RECORD_FIELDS))
+RECORD_DTYPE = np.dtype([('scan_id', '<u4')] + [(name, '<f8') for name in RECORD_FIELDS])
+NULLABLE_FIELDS = ('dikey_aci', 'mesafe_cm_2', 'quality', 'mesafe_fused_cm', 'fusion_confidence', 'timestamp_2',
+                   'hiz_cm_s')
+TIMESTAMP_FIELDS = ('timestamp', 'timestamp_2')
+MAGIC = 0x4C4E524A  # 'JRNL'
+VERSION = 1
+HEADER_STRUCT = struct.Struct('<IIII')
+
+JOURNAL_SUFFIX = '.jrnl'
+OFFSET_SUFFIX = '.offset'  # veritabanına aktarılmış kayıt sayısı
+END_SUFFIX = '.end'  # tarayıcı taramayı düzgün kapattı
+ORPHAN_SUFFIX = '.orphan'  # taraması silinmiş ya da biçimi tanınmayan günlük; elle incelenmek üzere saklanır
+
+# Betiğin başlatıldığı dizinden bağımsız: her çalıştırma önceki çalıştırmanın günlüklerini bulur
+DEFAULT_JOURNAL_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scan_journal')
+
+
+def default_journal_dir():
+    from django.conf import settings
+
+    return str(getattr(settings, 'SCAN_JOURNAL_DIR', DEFAULT_JOURNAL_DIR))
+
+
+class JournalFormatError(ValueError):
+    """Günlüğün başlığı, boyu ya da aktarım ilerlemesi bu sürümün kayıt düzenine uymuyor."""
+
+
+def journal_path(journal_dir, scan_id):
+    return os.path.join(journal_dir, f"scan_{scan_id}{JOURNAL_SUFFIX}")
+
+
+def journal_scan_id(path):
+    return int(os.path.basename(path)[len('scan_'):-len(JOURNAL_SUFFIX)])
+
+
+def quarantine_journal(path):
+    """Aktarılamayan günlüğü ve yan dosyalarını `.orphan` ekiyle yeniden adlandırır; bir daha aktarılmaz."""
+    for suffix in ('', OFFSET_SUFFIX, END_SUFFIX):
+        if os.path.exists(path + suffix):
+            os.replace(path + suffix, path + suffix + ORPHAN_SUFFIX)
+
+
+class ScanJournalWriter:
+    """
+    Bir taramanın ham ölçümlerini yalnızca-ekleme yapılan ikili dosyaya yazar. Her kayıt tek bir
+    write() çağrısıdır; veritabanı kilidi beklenmez. `fsync_every` > 0 ise bu kadar kayıtta bir
+    diske zorla yazılır (SD kartta elektrik kesintisine karşı).
+    """
+
+    def __init__(self, journal_dir, scan_id, fsync_every=0):
+        os.makedirs(journal_dir, exist_ok=True)
+        self.scan_id = int(scan_id)
+        self.path = journal_path(journal_dir, scan_id)
+        self.fsync_every = int(fsync_every)
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._unsynced = 0
+        if os.fstat(self._fd).st_size == 0:
+            os.write(self._fd, HEADER_STRUCT.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize, len(RECORD_FIELDS)))
+        else:
+            try:
+                record_count(self.path)
+            except JournalFormatError:
+                self.close(finished=False)
+                raise
+
+    def append(self, **values):
+        def as_float(name):
+            value = values.get(name)
+            if value is None: return float('nan')
+            if isinstance(value, datetime): return value.timestamp()
+            return float(value)
+
+        os.write(self._fd, RECORD_STRUCT.pack(self.scan_id, *(as_float(name) for name in RECORD_FIELDS)))
+        if self.fsync_every > 0:
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every:
+                os.fsync(self._fd)
+                self._unsynced = 0
+
+    def close(self, finished=True):
+        """Dosyayı kapatır; `finished` ise tarama bitti işareti bırakılır (aktarımdan sonra dosyalar silinir)."""
+        if self._fd is None: return
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._fd = None
+        if finished:
+            open(self.path + END_SUFFIX, 'w').close()
+
+
+def record_count(path):
+    """
+    Başlığı doğrulayıp dosyadaki tam kayıt sayısını döndürür. Başlık henüz yazılmamışsa (boş dosya) 0;
+    başlık yarımsa ya da sihirli sayı, sürüm, kayıt boyu veya alan sayısı uymuyorsa JournalFormatError.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return 0
+    if size < HEADER_STRUCT.size:
+        raise JournalFormatError(f"{path}: başlık yarım ({size} bayt)")
+    with open(path, 'rb') as f:
+        magic, version, record_size, field_count = HEADER_STRUCT.unpack(f.read(HEADER_STRUCT.size))
+    if magic != MAGIC or version != VERSION:
+        raise JournalFormatError(f"{path}: tanınmayan günlük (sihirli sayı {magic:#x}, sürüm {version})")
+    if record_size != RECORD_DTYPE.itemsize or field_count != len(RECORD_FIELDS):
+        raise JournalFormatError(f"{path}: kayıt boyu {record_size} bayt / {field_count} alan, "
+                                 f"beklenen {RECORD_DTYPE.itemsize} bayt / {len(RECORD_FIELDS)} alan")
+    return (size - HEADER_STRUCT.size) // RECORD_DTYPE.itemsize
+
+
+def read_records(path, start_record=0):
+    """
+    `start_record`'dan itibaren tüm tam kayıtları yapılandırılmış NumPy dizisi olarak okur.
+    `start_record` dosyadaki kayıt sayısını aşıyorsa ilerleme başka bir dosyaya aittir: JournalFormatError.
+    """
+    complete = record_count(path)
+    if start_record > complete:
+        raise JournalFormatError(f"{path}: aktarım ilerlemesi {start_record}, dosyada {complete} kayıt var")
+    if complete == start_record:
+        return np.empty(0, dtype=RECORD_DTYPE)
+    return np.fromfile(path, dtype=RECORD_DTYPE, count=complete - start_record,
+                       offset=HEADER_STRUCT.size + start_record * RECORD_DTYPE.itemsize)
+
+
+def _read_offset(path):
+    try:
+        with open(path + OFFSET_SUFFIX) as f:
+            return int(f.read().strip() or 0)
+    except (OSError, ValueError):
+        return 0
+
+
+def _write_offset(path, count):
+    tmp_path = path + OFFSET_SUFFIX + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(str(count))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path + OFFSET_SUFFIX)
+
+
+def _records_to_points(records, existing_timestamps):
+    from scanner.models import ScanPoint
+
+    points = []
+    for record in records.tolist():
+        values = dict(zip(RECORD_DTYPE.names, record))
+        if round(values['timestamp'], 6) in existing_timestamps: continue
+        for name in NULLABLE_FIELDS:
+            if values[name] != values[name]: values[name] = None  # NaN -> None
+        for name in TIMESTAMP_FIELDS:
+            if values[name] is not None:
+                values[name] = datetime.fromtimestamp(values[name], tz=dt_timezone.utc)
+        values['scan_id'] = int(values['scan_id'])
+        points.append(ScanPoint(**values))
+    return points
+
+
+def ingest_journal(path, batch_size=500):
+    """
+    Günlüğün henüz aktarılmamış kayıtlarını bulk_create ile veritabanına yazar ve aktarılan
+    kayıt sayısını döndürür. İlerleme `.offset` dosyasında tutulur; bir önceki aktarım veritabanına
+    yazıp ilerlemeyi kaydedemeden kesildiyse aynı zaman damgalı noktalar tekrar eklenmez.
+    Tarama bitmiş ve her şey aktarılmışsa günlük dosyaları silinir.
+    Blok biçimindeki (Scan.PointStorage.PACKED) taramalarda her parti bir ScanPointChunk olur;
+    bloğun start_index'i günlükteki kayıt sırası olduğundan tekrar aktarım aynı bloğu yeniden yazmaz.
+    Taraması silinmiş günlük karantinaya alınır (quarantine_journal) ve 0 döner; biçimi uymayan günlük
+    de karantinaya alınır ama JournalFormatError yükseltilir.
+    """
+    from django.db import transaction
+    from scanner.models import Scan, ScanPoint, ScanPointChunk
+    from scanner.packed import compact_scan_chunks, write_chunk
+    from scanner.summary import record_points
+
+    if not os.path.exists(path): return 0
+    if not Scan.objects.filter(id=journal_scan_id(path)).exists():
+        quarantine_journal(path)
+        return 0
+    offset = _read_offset(path)
+    try:
+        records = read_records(path, offset)
+    except JournalFormatError:
+        quarantine_journal(path)
+        raise
+    ingested = 0
+    packed_scan_id = None
+    if len(records):
+        scan_id = int(records['scan_id'][0])
+        if Scan.objects.filter(id=scan_id, point_storage=Scan.PointStorage.PACKED).exists():
+            packed_scan_id = scan_id
+    for start in range(0, len(records), batch_size):
+        batch = records[start:start + batch_size]
+        if packed_scan_id is not None:
+            with transaction.atomic():
+                # Kesilen bir önceki aktarımın yazdığı blok özetlere ikinci kez eklenmesin
+                if not ScanPointChunk.objects.filter(scan_id=packed_scan_id, start_index=offset + start).exists():
+                    write_chunk(packed_scan_id, offset + start, {name: batch[name] for name in RECORD_FIELDS})
+                    record_points(packed_scan_id, batch['derece'], batch['mesafe_cm'], batch['hiz_cm_s'],
+                                  float(batch['timestamp'][-1]), offset + start + len(batch))
+            ingested += len(batch)
+            _write_offset(path, offset + ingested)
+            continue
+        first_time = datetime.fromtimestamp(float(batch['timestamp'].min()), tz=dt_timezone.utc)
+        existing = {round(t.timestamp(), 6) for t in ScanPoint.objects.filter(
+            scan_id=int(batch['scan_id'][0]), timestamp__gte=first_time).values_list('timestamp', flat=True)}
+        with transaction.atomic():
+            points = ScanPoint.objects.bulk_create(_records_to_points(batch, existing))
+            if points:
+                record_points(points[-1].scan_id, [p.derece for p in points], [p.mesafe_cm for p in points],
+                              [p.hiz_cm_s for p in points], points[-1].timestamp, points[-1].pk)
+        ingested += len(batch)
+        _write_offset(path, offset + ingested)
+
+    if os.path.exists(path + END_SUFFIX) and offset + ingested == record_count(path):
+        if packed_scan_id is not None:
+            compact_scan_chunks(packed_scan_id)
+        for leftover in (path, path + OFFSET_SUFFIX, path + END_SUFFIX):
+            try:
+                os.remove(leftover)
+            except OSError:
+                pass
+    return ingested
+
+
+def pending_journals(journal_dir):
+    return sorted(glob.glob(os.path.join(journal_dir, f"scan_*{JOURNAL_SUFFIX}")))
+
+
+def replay_pending_journals(journal_dir, interrupted_status=None):
+    """
+    Önceki çalıştırmalardan kalan günlükleri aktarır. Kapatılmamış (yarıda kalmış) bir taramanın
+    durumu hâlâ 'çalışıyor' ise `interrupted_status` olarak işaretlenir. {tarama_id: kayıt} döndürür;
+    biçimi uymayan günlükler karantinaya alınıp atlanır.
+    """
+    from scanner.models import Scan
+
+    replayed = {}
+    for path in pending_journals(journal_dir):
+        scan_id = journal_scan_id(path)
+        if not Scan.objects.filter(id=scan_id).exists():
+            quarantine_journal(path)
+            continue
+        if not os.path.exists(path + END_SUFFIX):
+            if interrupted_status:
+                Scan.objects.filter(id=scan_id, status=Scan.Status.RUNNING).update(status=interrupted_status)
+            # Bu dosyaya artık yazılmayacak; aktarım bitince temizlenebilmesi için kapatılmış say
+            open(path + END_SUFFIX, 'w').close()
+        try:
+            replayed[scan_id] = ingest_journal(path)
+        except JournalFormatError as e:
+            print(f"UYARI: Günlük aktarılmadı, karantinaya alındı: {e}")
+    return replayed
+
+
+class JournalIngestThread(threading.Thread):
+    """
+    Tarama sürerken günlüğü arka planda belirli aralıklarla veritabanına aktarır. Veritabanı
+    kilitliyse (ör. panel okurken) hata yutulur ve bir sonraki turda tekrar denenir; tarama
+    döngüsü bundan etkilenmez.
+    """
+
+    def __init__(self, journal_dir, interval_s=1.0):
+        super().__init__(name='journal-ingest', daemon=True)
+        self.journal_dir = journal_dir
+        self.interval_s = float(interval_s)
+        self._stop_event = threading.Event()
+        self.last_error = None
+
+    def ingest_once(self):
+        for path in pending_journals(self.journal_dir):
+            try:
+                ingest_journal(path)
+                self.last_error = None
+            except Exception as e:
+                self.last_error = e
+
+    def run(self):
+        from django.db import connection
+
+        try:
+            while not self._stop_event.wait(self.interval_s):
+                self.ingest_once()
+            self.ingest_once()
+        finally:
+            connection.close()
+
+    def stop(self, timeout=10.0):
+        self._stop_event.set()
+        self.join(timeout)
@@ -0,0 +1,181 @@
+# scanner/live_channel.py
+#
+# Anlık değer kanalı: sensor_script.py ve free_movement_script.py son okumalarını
+# multiprocessing.shared_memory üzerindeki sabit boyutlu kayıtlardan oluşan bir halkaya yazar; panelin
+# "Anlık Sensör Değerleri" kartı bu halkayı SQLite'a gitmeden okur. Serbest hareket modu veritabanına
+# hiçbir şey yazmadığından canlı görünüm ancak bu kanalla mümkündür.
+#
+# Yerleşim: HEADER_DTYPE başlığı (sihirli sayı, sürüm, kapasite, yazılan kayıt sayısı) ve ardından
+# RECORD_DTYPE kayıtları. Tek yazıcı, çok okuyucu; kilit yoktur. Her kayıt bir seqlock ile korunur:
+# yazıcı kaydın 'seq' sayacını tek sayıya çeker, alanları yazar, çift sayıya çeker ve ancak sonra
+# başlıktaki 'written' sayacını artırır. Okuyucu kaydı kopyalar; kopyadan önce ve sonra okunan 'seq'
+# aynı ve çiftse kopya tutarlıdır, değilse yeniden dener.
+#
+# Yazıcı süreci çıkarken bölümü siler (unlink). Okuyucu kayıt eskiyince (betik yeniden başlamış ve yeni
+# bir bölüm açmış olabilir) bağlantıyı kapatıp bir sonraki okumada yeniden bağlanır.
+
+import os
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+from scanner.summary import VALID_MIN_CM
+
+DEFAULT_CHANNEL_NAME = 'sensor_live_values'
+DEFAULT_CAPACITY = 64
+MAGIC = 0x4C495645  # 'LIVE'
+VERSION = 1
+# Bu süreden eski kayıt canlı sayılmaz; panel veritabanındaki özet sütunlarına döner
+DEFAULT_MAX_AGE_S = 5.0
+READ_RETRIES = 8
+
+SOURCE_SCAN, SOURCE_FREE_MOVEMENT = 1, 2
+FLAG_ALERT = 1
+
+HEADER_DTYPE = np.dtype([('magic', '<u4'), ('version', '<u4'), ('capacity', '<u4'), ('writer_pid', '<u4'),
+                         ('written', '<u8')])
+RECORD_DTYPE = np.dtype([
+    ('seq', '<u8'), ('timestamp', '<f8'), ('scan_id', '<i8'), ('source', '<u4'), ('flags', '<u4'),
+    ('derece', '<f8'), ('dikey_aci', '<f8'), ('mesafe_cm', '<f8'), ('mesafe_cm_2', '<f8'), ('hiz_cm_s', '<f8'),
+    ('max_distance_cm', '<f8'), ('buzzer_distance_cm', '<f8'),
+])
+# Okuyucuya dönen alanlar (seq hariç)
+RECORD_FIELDS = RECORD_DTYPE.names[1:]
+
+
+def _segment_size(capacity):
+    return HEADER_DTYPE.itemsize + capacity * RECORD_DTYPE.itemsize
+
+
+def _views(shm, capacity):
+    header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf)
+    ring = np.ndarray((capacity,), dtype=RECORD_DTYPE, buffer=shm.buf, offset=HEADER_DTYPE.itemsize)
+    return header, ring
+
+
+class LiveChannelWriter:
+    """Tek yazıcı. publish() her okumada çağrılır; max_distance_cm geçerli okumaların yürüyen en büyüğüdür."""
+
+    def __init__(self, name=DEFAULT_CHANNEL_NAME, capacity=DEFAULT_CAPACITY, source=SOURCE_SCAN,
+                 max_valid_cm=SENSOR_MAX_VALID_CM):
+        self.name, self.capacity, self.source, self.max_valid_cm = name, capacity, source, max_valid_cm
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        except FileExistsError:
+            # Çöken bir yazıcıdan kalan bölüm: silinip yeniden oluşturulur ki eski bağlantılı okuyucular eskimiş
+            # kayıt görüp yeniden bağlansın
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        self.header, self.ring = _views(self.shm, capacity)
+        self.ring[:] = np.zeros(capacity, dtype=RECORD_DTYPE)
+        self.header['capacity'], self.header['writer_pid'], self.header['written'] = capacity, os.getpid(), 0
+        self.header['version'], self.header['magic'] = VERSION, MAGIC
+        self.scan_id, self.max_distance_cm = -1, np.nan
+
+    def start_scan(self, scan_id):
+        """Yeni tarama: en büyük mesafe sıfırlanır."""
+        self.scan_id, self.max_distance_cm = int(scan_id), np.nan
+
+    def publish(self, derece, mesafe_cm, dikey_aci=np.nan, mesafe_cm_2=np.nan, hiz_cm_s=np.nan,
+                buzzer_distance_cm=np.nan, alert=False, timestamp=None):
+        if VALID_MIN_CM < mesafe_cm < self.max_valid_cm and (np.isnan(self.max_distance_cm)
+                                                             or mesafe_cm > self.max_distance_cm):
+            self.max_distance_cm = float(mesafe_cm)
+        written = int(self.header['written'])
+        slot = self.ring[written % self.capacity]
+        seq = int(slot['seq'])
+        slot['seq'] = seq + 1
+        slot['timestamp'] = time.time() if timestamp is None else timestamp
+        slot['scan_id'], slot['source'], slot['flags'] = self.scan_id, self.source, FLAG_ALERT if alert else 0
+        slot['derece'], slot['dikey_aci'], slot['mesafe_cm'], slot['mesafe_cm_2'] = (
+            derece, np.nan if dikey_aci is None else dikey_aci, mesafe_cm, np.nan if mesafe_cm_2 is None else mesafe_cm_2)
+        slot['hiz_cm_s'] = np.nan if hiz_cm_s is None else hiz_cm_s
+        slot['max_distance_cm'], slot['buzzer_distance_cm'] = self.max_distance_cm, buzzer_distance_cm
+        slot['seq'] = seq + 2
+        self.header['written'] = written + 1
+
+    def close(self, unlink=True):
+        if self.shm is None: return
+        self.header = self.ring = None
+        self.shm.close()
+        if unlink:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+        self.shm = None
+
+
+class LiveChannelReader:
+    """Kilitsiz okuyucu; bölüm yoksa ya da başlık tanınmıyorsa latest() None döndürür."""
+
+    def __init__(self, name=DEFAULT_CHANNEL_NAME):
+        self.name = name
+        self.shm = self.header = self.ring = None
+
+    def _attach(self):
+        try:
+            shm = shared_memory.SharedMemory(name=self.name)
+        except (FileNotFoundError, OSError):
+            return False
+        header = np.ndarray((), dtype=HEADER_DTYPE, buffer=shm.buf) if shm.size >= HEADER_DTYPE.itemsize else None
+        valid = header is not None and header['magic'] == MAGIC and header['version'] == VERSION and \
+            shm.size >= _segment_size(int(header['capacity']))
+        # Python < 3.13 okuyucunun bağlandığı bölümü de kaydeder ve çıkışta siler; bölüm yazıcınındır
+        if header is None or header['writer_pid'] != os.getpid():
+            try:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+            except Exception:
+                pass
+        if not valid:
+            del header
+            shm.close()
+            return False
+        self.shm = shm
+        self.header, self.ring = _views(shm, int(header['capacity']))
+        return True
+
+    def close(self):
+        if self.shm is None: return
+        self.header = self.ring = None
+        self.shm.close()
+        self.shm = None
+
+    def latest(self, max_age_s=DEFAULT_MAX_AGE_S, now=None):
+        """En son tutarlı kaydı sözlük olarak döndürür ('age_s' eklenir); kayıt yoksa ya da eskiyse None."""
+        if self.shm is None and not self._attach():
+            return None
+        for _ in range(READ_RETRIES):
+            written = int(self.header['written'])
+            if written == 0:
+                return None
+            slot = self.ring[(written - 1) % len(self.ring)]
+            seq_before = int(slot['seq'])
+            record = slot.copy()
+            if seq_before % 2 == 0 and int(slot['seq']) == seq_before and int(record['seq']) == seq_before:
+                break
+        else:
+            return None
+        values = {name: record[name].item() for name in RECORD_FIELDS}
+        values['age_s'] = max(0.0, (now or time.time()) - values['timestamp'])
+        if max_age_s is not None and values['age_s'] > max_age_s:
+            # Yazıcı durmuş ya da yeni bir bölüm açmış olabilir; bir sonraki okumada yeniden bağlanılır
+            self.close()
+            return None
+        return values
+
+    def recent(self, count=None):
+        """Halkadaki son `count` tutarlı kaydı eskiden yeniye bir yapılandırılmış dizi olarak döndürür."""
+        if self.shm is None and not self._attach():
+            return np.zeros(0, dtype=RECORD_DTYPE)
+        capacity = len(self.ring)
+        written = int(self.header['written'])
+        count = min(written, capacity, count or capacity)
+        indices = np.arange(written - count, written) % capacity
+        records = self.ring[indices]  # kopya
+        stable = (records['seq'] % 2 == 0) & (self.ring['seq'][indices] == records['seq'])
+        return records[stable]
@@ -0,0 +1,61 @@
+# scanner/management/commands/archive_scans.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.archive import (DEFAULT_ARCHIVE_AFTER_DAYS, DEFAULT_BIN_DEG, archive_scan, default_archive_dir,
+                             restore_scan, select_scans_to_archive)
+from scanner.models import Scan
+from scanner.retention import DEFAULT_BATCH_SIZE, DEFAULT_PAUSE_S
+
+
+class Command(BaseCommand):
+    help = ("Eski taramaları açı dilimi özetlerine (ScanSummaryBin) indirger; tam çözünürlüklü noktalar isteğe bağlı "
+            "olarak diskte sıkıştırılmış dosyalara taşınır (--restore ile geri yüklenir).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('scan_ids', nargs='*', type=int, help="İşlenecek tarama ID'leri (yaş eşiği yerine)")
+        parser.add_argument('--older-than-days', type=float, default=DEFAULT_ARCHIVE_AFTER_DAYS,
+                            help="Bundan eski taramaları arşivle")
+        parser.add_argument('--bin-deg', type=float, default=DEFAULT_BIN_DEG, help="Yatay açı dilimi genişliği")
+        parser.add_argument('--archive-dir', default=None,
+                            help="Nokta dosyalarının dizini (varsayılan: SCAN_ARCHIVE_DIR)")
+        parser.add_argument('--no-export', action='store_true', help="Tam çözünürlüklü noktaları dosyaya yazma")
+        parser.add_argument('--restore', action='store_true', help="Verilen taramaları arşiv dosyasından geri yükle")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="İşlem başına silinen satır")
+        parser.add_argument('--pause-ms', type=float, default=DEFAULT_PAUSE_S * 1000, help="Partiler arası bekleme")
+        parser.add_argument('--dry-run', action='store_true', help="Yalnızca arşivlenecek taramaları listele")
+
+    def handle(self, *args, **options):
+        if options['restore']:
+            if not options['scan_ids']:
+                raise CommandError("--restore için tarama ID'si verin.")
+            for scan in Scan.objects.filter(id__in=options['scan_ids']).order_by('id'):
+                if scan.point_storage != Scan.PointStorage.ARCHIVED: continue
+                try:
+                    count = restore_scan(scan)
+                except ValueError as e:
+                    raise CommandError(str(e))
+                self.stdout.write(f"Tarama #{scan.id}: {count} nokta blok biçiminde geri yüklendi.")
+            return
+
+        if options['bin_deg'] <= 0:
+            raise CommandError("--bin-deg pozitif olmalı.")
+        scan_ids = options['scan_ids'] or select_scans_to_archive(options['older_than_days'])
+        if not scan_ids:
+            self.stdout.write("Arşivlenecek tarama yok.")
+            return
+        if options['dry_run']:
+            self.stdout.write(f"Arşivlenecek {len(scan_ids)} tarama: {', '.join(map(str, scan_ids))}")
+            return
+
+        archive_dir = None if options['no_export'] else (options['archive_dir'] or default_archive_dir())
+        total_bins = 0
+        for scan in Scan.objects.filter(id__in=scan_ids).order_by('start_time', 'id'):
+            if scan.status == Scan.Status.RUNNING:
+                self.stdout.write(f"Tarama #{scan.id}: hâlâ çalışıyor, atlandı.")
+                continue
+            bins = archive_scan(scan, options['bin_deg'], archive_dir, options['batch_size'], options['pause_ms'] / 1000)
+            total_bins += bins
+            where = f", noktalar: {scan.archive_file}" if scan.archive_file else ""
+            self.stdout.write(f"Tarama #{scan.id}: {bins} dilime indirgendi{where}.")
+        self.stdout.write(self.style.SUCCESS(f"Toplam {total_bins} özet dilimi yazıldı."))
@@ -0,0 +1,44 @@
+# scanner/management/commands/estimate_velocities.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.velocity import (DEFAULT_ALPHA, DEFAULT_BIN_DEG, DEFAULT_GATE_CM, DEFAULT_MAX_GAP_S,
+                              VelocityEstimator, estimate_scan_velocities, scans_for_velocity)
+
+
+class Command(BaseCommand):
+    help = ("Kayıtlı taramaların noktalarına radyal hız (hiz_cm_s) yazar: aynı açıdaki ardışık ölçümler "
+            "eskiden yeniye, taramalar arasında taşınan bir alfa-beta süzgecinden geçirilir.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('scan_ids', nargs='*', type=int, help="İşlenecek tarama ID'leri (varsayılan: tümü)")
+        parser.add_argument('--last', type=int, default=None, help="Yalnızca en yeni N taramayı işle")
+        parser.add_argument('--bin-deg', type=float, default=DEFAULT_BIN_DEG, help="Açı hücresi genişliği (derece)")
+        parser.add_argument('--alpha', type=float, default=DEFAULT_ALPHA, help="Süzgecin mesafe kazancı (0-1)")
+        parser.add_argument('--max-gap-s', type=float, default=DEFAULT_MAX_GAP_S,
+                            help="Aynı açıdaki iki ölçüm arasında süzgecin sürdüğü en uzun ara (saniye)")
+        parser.add_argument('--gate-cm', type=float, default=DEFAULT_GATE_CM,
+                            help="Tahminden bu kadar sapan ölçümde süzgeç yeniden başlar")
+
+    def handle(self, *args, **options):
+        if not 0 < options['alpha'] < 1:
+            raise CommandError("--alpha 0 ile 1 arasında olmalı.")
+        if options['bin_deg'] <= 0:
+            raise CommandError("--bin-deg pozitif olmalı.")
+        scans = scans_for_velocity(options['scan_ids'], last=options['last'])
+        if not scans:
+            self.stdout.write("İşlenecek tarama yok.")
+            return
+        estimator = VelocityEstimator(bin_deg=options['bin_deg'], alpha=options['alpha'],
+                                      max_gap_s=options['max_gap_s'], gate_cm=options['gate_cm'])
+        started = time.perf_counter()
+
+        def progress(scan, known, total):
+            self.stdout.write(f"Tarama #{scan.id}: {known}/{total} noktanın hızı hesaplandı.")
+
+        known, total = estimate_scan_velocities(scans, estimator, progress=progress)
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(scans)} tarama, {total} nokta {time.perf_counter() - started:.1f} s'de işlendi "
+            f"({known} noktanın hızı bilinir)."))
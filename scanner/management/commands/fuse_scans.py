@@ -0,0 +1,43 @@
+# scanner/management/commands/fuse_scans.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.fusion import MountingModel, refuse_scan_points
+from scanner.models import Scan
+
+
+class Command(BaseCommand):
+    help = "Geçmiş taramalardaki iki sensör okumasını birleşik mesafeye dönüştürür ve x/y/z'yi yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument('scan_ids', nargs='*', type=int, help="İşlenecek tarama ID'leri")
+        parser.add_argument('--all', action='store_true', help="Tüm taramaları işle")
+        parser.add_argument('--range-offset-cm', type=float, default=0.0)
+        parser.add_argument('--lateral-offset-cm', type=float, default=0.0)
+        parser.add_argument('--angle-offset-deg', type=float, default=0.0)
+        parser.add_argument('--tolerance-cm', type=float, default=5.0, help="İki okumanın uyuştuğu kabul edilen fark")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            scans = Scan.objects.order_by('id')
+        elif options['scan_ids']:
+            scans = Scan.objects.filter(id__in=options['scan_ids']).order_by('id')
+        else:
+            raise CommandError("Tarama ID'si verin ya da --all kullanın.")
+
+        model = MountingModel(range_offset_cm=options['range_offset_cm'],
+                              lateral_offset_cm=options['lateral_offset_cm'],
+                              angle_offset_deg=options['angle_offset_deg'],
+                              agreement_tolerance_cm=options['tolerance_cm'])
+        total = 0
+        for scan in scans:
+            if scan.point_storage == Scan.PointStorage.PACKED:
+                self.stdout.write(f"Tarama #{scan.id}: blok biçiminde, atlandı (önce pack_scans --unpack).")
+                continue
+            if scan.point_storage == Scan.PointStorage.ARCHIVED:
+                self.stdout.write(f"Tarama #{scan.id}: arşivlenmiş, atlandı (önce archive_scans --restore).")
+                continue
+            count = refuse_scan_points(scan, model)
+            total += count
+            self.stdout.write(f"Tarama #{scan.id}: {count} nokta birleştirildi.")
+        self.stdout.write(self.style.SUCCESS(f"Toplam {total} nokta güncellendi."))
@@ -0,0 +1,26 @@
+# scanner/management/commands/ingest_journals.py
+
+from django.core.management.base import BaseCommand
+
+from scanner.journal import default_journal_dir, ingest_journal, pending_journals, replay_pending_journals
+from scanner.models import Scan
+
+
+class Command(BaseCommand):
+    help = "Tarayıcının ham ölçüm günlüklerini veritabanına toplu olarak aktarır."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--journal-dir', default=default_journal_dir(),
+                            help="Günlük dizini (varsayılan: SCAN_JOURNAL_DIR)")
+        parser.add_argument('--replay', action='store_true',
+                            help="Yarıda kalmış taramaları kapat ve 'kesildi' olarak işaretle (tarayıcı çalışmıyorken)")
+
+    def handle(self, *args, **options):
+        journal_dir = options['journal_dir']
+        if options['replay']:
+            results = replay_pending_journals(journal_dir, Scan.Status.INTERRUPTED)
+        else:
+            results = {path: ingest_journal(path) for path in pending_journals(journal_dir)}
+        for key, count in results.items():
+            self.stdout.write(f"{key}: {count} nokta aktarıldı.")
+        self.stdout.write(self.style.SUCCESS(f"Toplam {sum(results.values())} nokta aktarıldı."))
@@ -0,0 +1,49 @@
+# scanner/management/commands/pack_scans.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.models import Scan
+from scanner.packed import CODECS, DEFAULT_CHUNK_POINTS, DEFAULT_CODEC, pack_scan_rows, unpack_scan_rows
+
+
+class Command(BaseCommand):
+    help = ("Taramaların noktalarını ScanPoint satırlarından paketlenmiş ScanPointChunk bloklarına çevirir "
+            "(--unpack ile tersi).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('scan_ids', nargs='*', type=int, help="İşlenecek tarama ID'leri")
+        parser.add_argument('--all', action='store_true', help="Tüm taramaları işle")
+        parser.add_argument('--unpack', action='store_true', help="Blokları ScanPoint satırlarına aç")
+        parser.add_argument('--keep', action='store_true',
+                            help="Kaynağı silme (paketlemede satırları, açmada blokları tut)")
+        parser.add_argument('--codec', choices=CODECS, default=DEFAULT_CODEC)
+        parser.add_argument('--chunk-points', type=int, default=DEFAULT_CHUNK_POINTS)
+
+    def handle(self, *args, **options):
+        if options['all']:
+            scans = Scan.objects.order_by('id')
+        elif options['scan_ids']:
+            scans = Scan.objects.filter(id__in=options['scan_ids']).order_by('id')
+        else:
+            raise CommandError("Tarama ID'si verin ya da --all kullanın.")
+
+        packed = Scan.PointStorage.PACKED
+        total = 0
+        for scan in scans:
+            if scan.status == Scan.Status.RUNNING:
+                self.stdout.write(f"Tarama #{scan.id}: hâlâ çalışıyor, atlandı.")
+                continue
+            if scan.point_storage == Scan.PointStorage.ARCHIVED:
+                self.stdout.write(f"Tarama #{scan.id}: arşivlenmiş, atlandı.")
+                continue
+            if options['unpack']:
+                if scan.point_storage != packed: continue
+                count = unpack_scan_rows(scan, delete_chunks=not options['keep'])
+                self.stdout.write(f"Tarama #{scan.id}: {count} nokta satırlara açıldı.")
+            else:
+                if scan.point_storage == packed: continue
+                count = pack_scan_rows(scan, delete_rows=not options['keep'], chunk_points=options['chunk_points'],
+                                       codec=options['codec'])
+                self.stdout.write(f"Tarama #{scan.id}: {count} nokta paketlendi.")
+            total += count
+        self.stdout.write(self.style.SUCCESS(f"Toplam {total} nokta işlendi."))
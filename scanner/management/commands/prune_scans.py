@@ -0,0 +1,79 @@
+# scanner/management/commands/prune_scans.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from scanner.retention import (DEFAULT_BATCH_SIZE, DEFAULT_PAUSE_S, DEFAULT_VACUUM_STEP_PAGES, database_space,
+                               delete_scan, enable_incremental_auto_vacuum, incremental_vacuum,
+                               select_scans_to_prune)
+from scanner.sqlite_tuning import checkpoint
+
+
+def _mb(value):
+    return value / 1024 / 1024
+
+
+class Command(BaseCommand):
+    help = ("Eski taramaları sayı, yaş ve boyut kurallarına göre sınırlı partiler halinde siler ve boşalan alanı "
+            "incremental_vacuum ile geri kazanır.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-last', type=int, default=None, help="En yeni N taramayı her durumda sakla")
+        parser.add_argument('--max-age-days', type=float, default=None, help="Bundan eski taramaları sil")
+        parser.add_argument('--max-size-mb', type=float, default=None,
+                            help="Kullanılan alan bu sınırın altına inene kadar en eski taramaları sil")
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="İşlem başına silinen satır")
+        parser.add_argument('--pause-ms', type=float, default=DEFAULT_PAUSE_S * 1000, help="Partiler arası bekleme")
+        parser.add_argument('--vacuum-step-pages', type=int, default=DEFAULT_VACUUM_STEP_PAGES)
+        parser.add_argument('--no-vacuum', action='store_true', help="Silme sonrası alanı geri kazanma")
+        parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                            help="auto_vacuum=INCREMENTAL'a bir kerelik tam VACUUM ile geç (DB bu sürede kilitlenir)")
+        parser.add_argument('--dry-run', action='store_true', help="Yalnızca silinecek taramaları listele")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Bu komut yalnızca SQLite veritabanı için yazılmıştır.")
+        if options['keep_last'] is None and options['max_age_days'] is None and options['max_size_mb'] is None:
+            raise CommandError("En az bir saklama kuralı verin: --keep-last, --max-age-days ya da --max-size-mb.")
+
+        before = database_space()
+        self.stdout.write(f"Başlangıç: dosya {_mb(before['file_bytes']):.2f} MB, kullanılan "
+                          f"{_mb(before['used_bytes']):.2f} MB, boş {_mb(before['free_bytes']):.2f} MB, "
+                          f"auto_vacuum={before['auto_vacuum']}")
+
+        max_size = options['max_size_mb'] * 1024 * 1024 if options['max_size_mb'] is not None else None
+        scan_ids = select_scans_to_prune(options['keep_last'], options['max_age_days'], max_size)
+        if not scan_ids:
+            self.stdout.write("Kurallara göre silinecek tarama yok.")
+        elif options['dry_run']:
+            self.stdout.write(f"Silinecek {len(scan_ids)} tarama: {', '.join(map(str, scan_ids))}")
+            return
+
+        pause_s = options['pause_ms'] / 1000
+        started = time.perf_counter()
+        for scan_id in scan_ids:
+            points = delete_scan(scan_id, options['batch_size'], pause_s)
+            self.stdout.write(f"Tarama #{scan_id} silindi ({points} nokta).")
+
+        if options['enable_incremental_vacuum'] and before['auto_vacuum'] != 'INCREMENTAL':
+            self.stdout.write("auto_vacuum=INCREMENTAL için tam VACUUM çalışıyor...")
+            enable_incremental_auto_vacuum()
+        if not options['no_vacuum']:
+            released = incremental_vacuum(options['vacuum_step_pages'], pause_s)
+            if database_space()['auto_vacuum'] != 'INCREMENTAL':
+                self.stdout.write(self.style.WARNING(
+                    "auto_vacuum INCREMENTAL değil: boşalan sayfalar yeniden kullanılır ama dosya küçülmez "
+                    "(--enable-incremental-vacuum)."))
+            else:
+                self.stdout.write(f"incremental_vacuum: {released} sayfa dosyadan çıkarıldı.")
+        checkpoint(mode='TRUNCATE')
+
+        after = database_space()
+        reclaimed = before['file_bytes'] + before['wal_bytes'] - after['file_bytes'] - after['wal_bytes']
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(scan_ids)} tarama {time.perf_counter() - started:.1f} s'de silindi. Dosya "
+            f"{_mb(before['file_bytes']):.2f} -> {_mb(after['file_bytes']):.2f} MB (geri kazanılan "
+            f"{_mb(reclaimed):.2f} MB), kullanılan {_mb(before['used_bytes']):.2f} -> "
+            f"{_mb(after['used_bytes']):.2f} MB, boş {_mb(after['free_bytes']):.2f} MB."))
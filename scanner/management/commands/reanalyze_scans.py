@@ -0,0 +1,53 @@
+# scanner/management/commands/reanalyze_scans.py
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.analysis import SHAPE_DESCRIPTIONS, reanalyze_scans, scans_to_reanalyze
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+
+class Command(BaseCommand):
+    help = ("Geçmiş taramaların geometri, DBSCAN kümeleme, regresyon ve şekil analizlerini bir süreç havuzunda "
+            "yeniden çalıştırıp Scan satırlarına yazar. Yarıda kesilirse yeniden çalıştırmak kalanlardan devam eder.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('scan_ids', nargs='*', type=int,
+                            help="İşlenecek tarama ID'leri (varsayılan: analizi eksik olanlar)")
+        parser.add_argument('--force', action='store_true', help="Güncel sürümle analiz edilmiş taramaları da işle")
+        parser.add_argument('--workers', type=int, default=None, help="Süreç sayısı (varsayılan: CPU sayısı)")
+        parser.add_argument('--batch-size', type=int, default=20, help="Kaç taramada bir sonuçların yazılacağı")
+        parser.add_argument('--max-valid-cm', type=float, default=SENSOR_MAX_VALID_CM,
+                            help="Geometri için geçerli en büyük mesafe")
+        parser.add_argument('--limit', type=int, default=None, help="En fazla bu kadar tarama işle")
+
+    def handle(self, *args, **options):
+        if options['workers'] is not None and options['workers'] < 1:
+            raise CommandError("--workers en az 1 olmalı.")
+        scan_ids = scans_to_reanalyze(options['scan_ids'], force=options['force'])[:options['limit']]
+        if not scan_ids:
+            self.stdout.write("Analiz edilecek tarama yok.")
+            return
+        self.stdout.write(f"{len(scan_ids)} tarama analiz edilecek.")
+        started = time.perf_counter()
+
+        def progress(done, total, scan_id, result):
+            elapsed = time.perf_counter() - started
+            eta = elapsed / done * (total - done)
+            prefix = f"[{done}/{total}] Tarama #{scan_id}"
+            if isinstance(result, Exception):
+                self.stderr.write(f"{prefix}: HATA: {result}")
+                return
+            shape = SHAPE_DESCRIPTIONS.get(result['shape_class'], "şekil yok")
+            clusters = result['cluster_count'] if result['cluster_count'] is not None else '-'
+            self.stdout.write(f"{prefix}: {clusters} küme, {shape} ({done / elapsed:.1f} tarama/s, "
+                              f"kalan ~{eta:.0f} s)")
+
+        succeeded, failed = reanalyze_scans(scan_ids, workers=options['workers'], batch_size=options['batch_size'],
+                                            max_valid_cm=options['max_valid_cm'], progress=progress)
+        message = f"{succeeded} tarama {time.perf_counter() - started:.1f} s'de analiz edildi."
+        if failed:
+            self.stdout.write(self.style.WARNING(f"{message} {failed} tarama hatalı (yeniden çalıştırınca denenir)."))
+        else:
+            self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,34 @@
+# scanner/management/commands/recompute_geometry.py
+
+from django.core.management.base import BaseCommand, CommandError
+
+from scanner.geometry import recompute_scan_geometry
+from scanner.hardware import SENSOR_MAX_VALID_CM
+from scanner.models import Scan
+
+
+class Command(BaseCommand):
+    help = "Geçmiş taramaların alan/çevre/genişlik/derinlik değerlerini kayıtlı noktalardan yeniden hesaplar."
+
+    def add_arguments(self, parser):
+        parser.add_argument('scan_ids', nargs='*', type=int, help="İşlenecek tarama ID'leri")
+        parser.add_argument('--all', action='store_true', help="Tüm taramaları işle")
+        parser.add_argument('--max-valid-cm', type=float, default=SENSOR_MAX_VALID_CM,
+                            help="Geçerli kabul edilen en büyük mesafe")
+
+    def handle(self, *args, **options):
+        if options['all']:
+            scans = Scan.objects.order_by('id')
+        elif options['scan_ids']:
+            scans = Scan.objects.filter(id__in=options['scan_ids']).order_by('id')
+        else:
+            raise CommandError("Tarama ID'si verin ya da --all kullanın.")
+
+        for scan in scans:
+            metrics = recompute_scan_geometry(scan, max_valid_cm=options['max_valid_cm'])
+            if metrics:
+                self.stdout.write(f"Tarama #{scan.id}: alan {metrics['calculated_area_cm2']:.1f} cm², "
+                                  f"çevre {metrics['perimeter_cm']:.1f} cm")
+            else:
+                self.stdout.write(f"Tarama #{scan.id}: yetersiz nokta.")
+        self.stdout.write(self.style.SUCCESS("Tamamlandı."))
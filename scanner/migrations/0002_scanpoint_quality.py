@@ -0,0 +1,139 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:14
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='scan',
+            options={},
+        ),
+        migrations.AlterModelOptions(
+            name='scanpoint',
+            options={},
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='end_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanpoint',
+            name='mesafe_cm_2',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanpoint',
+            name='quality',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanpoint',
+            name='z_cm',
+            field=models.FloatField(default=0.0),
+            preserve_default=False,
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='ai_commentary',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='buzzer_distance_setting',
+            field=models.IntegerField(default=10),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='calculated_area_cm2',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='end_angle_setting',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='invert_motor_direction_setting',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='max_depth_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='max_width_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='perimeter_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='start_angle_setting',
+            field=models.FloatField(default=0.0),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='start_time',
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='status',
+            field=models.CharField(choices=[('RUN', 'Running'), ('CMP', 'Completed'), ('INT', 'Interrupted'), ('ERR', 'Error'), ('ISP', 'Insufficient Points')], default='RUN', max_length=3),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='step_angle_setting',
+            field=models.FloatField(default=10.0),
+        ),
+        migrations.AlterField(
+            model_name='scanpoint',
+            name='derece',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='scanpoint',
+            name='hiz_cm_s',
+            field=models.FloatField(blank=True, default=0.0, null=True),
+        ),
+        migrations.AlterField(
+            model_name='scanpoint',
+            name='mesafe_cm',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='scanpoint',
+            name='scan',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='points', to='scanner.scan'),
+        ),
+        migrations.AlterField(
+            model_name='scanpoint',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AlterField(
+            model_name='scanpoint',
+            name='x_cm',
+            field=models.FloatField(),
+        ),
+        migrations.AlterField(
+            model_name='scanpoint',
+            name='y_cm',
+            field=models.FloatField(),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0002_scanpoint_quality'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='tilt_end_angle_setting',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='tilt_layer_count',
+            field=models.IntegerField(default=1),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='tilt_start_angle_setting',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanpoint',
+            name='dikey_aci',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0003_volumetric_tilt'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanpoint',
+            name='timestamp_2',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0004_scanpoint_timestamp_2'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanpoint',
+            name='fusion_confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanpoint',
+            name='mesafe_fused_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
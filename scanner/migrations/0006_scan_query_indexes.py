@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0005_scanpoint_fusion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scan',
+            index=models.Index(fields=['status', 'start_time'], name='scan_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scan',
+            index=models.Index(fields=['start_time'], name='scan_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scanpoint',
+            index=models.Index(fields=['scan', 'timestamp'], name='scanpoint_scan_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scanpoint',
+            index=models.Index(fields=['scan', 'id'], name='scanpoint_scan_id_idx'),
+        ),
+    ]
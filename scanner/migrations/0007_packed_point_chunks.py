@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0006_scan_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='point_storage',
+            field=models.CharField(choices=[('ROW', 'Rows'), ('PKD', 'Packed chunks')], default='ROW', max_length=3),
+        ),
+        migrations.CreateModel(
+            name='ScanPointChunk',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_index', models.PositiveIntegerField()),
+                ('point_count', models.PositiveIntegerField()),
+                ('t0', models.FloatField()),
+                ('fields', models.CharField(max_length=255)),
+                ('codec', models.CharField(default='raw', max_length=8)),
+                ('data', models.BinaryField()),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='scanner.scan')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('scan', 'start_index'), name='scanpointchunk_scan_start_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0007_packed_point_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='archive_file',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='scan',
+            name='point_storage',
+            field=models.CharField(choices=[('ROW', 'Rows'), ('PKD', 'Packed chunks'), ('ARC', 'Archived summary')], default='ROW', max_length=3),
+        ),
+        migrations.CreateModel(
+            name='ScanSummaryBin',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dikey_aci', models.FloatField()),
+                ('angle_deg', models.FloatField()),
+                ('point_count', models.PositiveIntegerField()),
+                ('invalid_count', models.PositiveIntegerField(default=0)),
+                ('min_cm', models.FloatField(blank=True, null=True)),
+                ('median_cm', models.FloatField(blank=True, null=True)),
+                ('max_cm', models.FloatField(blank=True, null=True)),
+                ('quality', models.FloatField(blank=True, null=True)),
+                ('x_cm', models.FloatField(blank=True, null=True)),
+                ('y_cm', models.FloatField(blank=True, null=True)),
+                ('z_cm', models.FloatField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField()),
+                ('scan', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summary_bins', to='scanner.scan')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['angle_deg', 'dikey_aci', 'timestamp'], name='summarybin_trend_idx')],
+                'constraints': [models.UniqueConstraint(fields=('scan', 'dikey_aci', 'angle_deg'), name='summarybin_scan_cell_uniq')],
+            },
+        ),
+    ]
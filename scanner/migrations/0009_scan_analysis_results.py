@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0008_archive_summaries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='analysis_version',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='analyzed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='clear_path_angle_deg',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='clear_path_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='cluster_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='hull_area_cm2',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='noise_point_count',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='regression_slope',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='shape_class',
+            field=models.CharField(blank=True, choices=[('COR', 'Corridor'), ('BOX', 'Box / round object'), ('WAL', 'Wall'), ('CCV', 'Concave / scattered'), ('IRR', 'Irregular'), ('SML', 'Too small')], default='', max_length=3),
+        ),
+    ]
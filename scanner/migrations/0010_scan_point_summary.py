@@ -0,0 +1,110 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:56
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Q, Sum
+
+VALID_MIN_CM, VALID_MAX_CM = 0.0, 2500.0
+
+
+def backfill_point_summaries(apps, schema_editor):
+    """Mevcut taramaların özet sütunlarını kayıtlı noktalarından (satır, blok ya da arşiv özeti) doldurur."""
+    import numpy as np
+    from scanner.packed import unpack_chunk
+
+    Scan = apps.get_model('scanner', 'Scan')
+    ScanPoint = apps.get_model('scanner', 'ScanPoint')
+    ScanPointChunk = apps.get_model('scanner', 'ScanPointChunk')
+    ScanSummaryBin = apps.get_model('scanner', 'ScanSummaryBin')
+    valid = Q(mesafe_cm__gt=VALID_MIN_CM, mesafe_cm__lt=VALID_MAX_CM)
+
+    for scan in Scan.objects.only('id', 'point_storage').iterator():
+        values = {}
+        if scan.point_storage == 'PKD':
+            parts = [(start, unpack_chunk(t0, fields, codec, data, count)) for start, count, t0, fields, codec, data in
+                     ScanPointChunk.objects.filter(scan_id=scan.id).order_by('start_index').values_list(
+                         'start_index', 'point_count', 't0', 'fields', 'codec', 'data')]
+            if parts:
+                dist = np.concatenate([chunk['mesafe_cm'] for _, chunk in parts]).astype(np.float64)
+                in_range = dist[(dist > VALID_MIN_CM) & (dist < VALID_MAX_CM)]
+                start, last = parts[-1]
+                values = {
+                    'point_count': int(dist.size),
+                    'min_distance_cm': float(in_range.min()) if in_range.size else None,
+                    'max_distance_cm': float(in_range.max()) if in_range.size else None,
+                    'last_point_id': start + len(last['mesafe_cm']),
+                    'last_angle_deg': float(last['derece'][-1]),
+                    'last_distance_cm': float(last['mesafe_cm'][-1]),
+                    'last_speed_cm_s': None if np.isnan(last['hiz_cm_s'][-1]) else float(last['hiz_cm_s'][-1]),
+                    'last_point_time': datetime.fromtimestamp(float(last['timestamp'][-1]), tz=dt_timezone.utc),
+                }
+        elif scan.point_storage == 'ARC':
+            stats = ScanSummaryBin.objects.filter(scan_id=scan.id).aggregate(
+                count=Sum('point_count'), min=Min('min_cm'), max=Max('max_cm'))
+            values = {'point_count': stats['count'] or 0, 'min_distance_cm': stats['min'],
+                      'max_distance_cm': stats['max']}
+        else:
+            points = ScanPoint.objects.filter(scan_id=scan.id)
+            stats = points.aggregate(count=Count('id'), min=Min('mesafe_cm', filter=valid),
+                                     max=Max('mesafe_cm', filter=valid))
+            last = points.order_by('-timestamp', '-id').values('id', 'timestamp', 'derece', 'mesafe_cm',
+                                                               'hiz_cm_s').first()
+            values = {'point_count': stats['count'], 'min_distance_cm': stats['min'], 'max_distance_cm': stats['max']}
+            if last:
+                values.update(last_point_id=last['id'], last_point_time=last['timestamp'],
+                              last_angle_deg=last['derece'], last_distance_cm=last['mesafe_cm'],
+                              last_speed_cm_s=last['hiz_cm_s'])
+        if values:
+            Scan.objects.filter(id=scan.id).update(**values)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0009_scan_analysis_results'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scan',
+            name='last_angle_deg',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='last_distance_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='last_point_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='last_point_time',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='last_speed_cm_s',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='max_distance_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='min_distance_cm',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scan',
+            name='point_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_point_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('scanner', '0010_scan_point_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetectionEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.DateTimeField()),
+                ('end_time', models.DateTimeField()),
+                ('duration_s', models.FloatField()),
+                ('angle_deg', models.FloatField()),
+                ('min_distance_cm', models.FloatField()),
+                ('sample_count', models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['start_time'], name='detectionevent_start_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TelemetryRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period_start', models.DateTimeField()),
+                ('period_s', models.PositiveIntegerField()),
+                ('angle_deg', models.FloatField()),
+                ('sample_count', models.PositiveIntegerField()),
+                ('invalid_count', models.PositiveIntegerField(default=0)),
+                ('min_cm', models.FloatField(blank=True, null=True)),
+                ('mean_cm', models.FloatField(blank=True, null=True)),
+                ('max_cm', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period_start'], name='telemetryrollup_period_idx')],
+            },
+        ),
+    ]
@@ -3,6 +3,8 @@
 from django.db import models
 from django.utils import timezone
 
+from scanner.analysis import SHAPE_CHOICES
+
 
 class Scan(models.Model): # <-- THIS CLASS MUST EXIST!
     # Your fields for the Scan model
@@ -18,6 +20,10 @@ class Scan(models.Model): # <-- THIS CLASS MUST EXIST!
     max_width_cm = models.FloatField(null=True, blank=True)
     max_depth_cm = models.FloatField(null=True, blank=True)
     ai_commentary = models.TextField(blank=True, null=True)
+    # Hacimsel (çok katmanlı) tarama ayarları; tek katmanlı taramada başlangıç ve bitiş aynıdır
+    tilt_start_angle_setting = models.FloatField(null=True, blank=True)
+    tilt_end_angle_setting = models.FloatField(null=True, blank=True)
+    tilt_layer_count = models.IntegerField(default=1)
 
     class Status(models.TextChoices):
         RUNNING = 'RUN', 'Running'
@@ -28,6 +34,46 @@ class Scan(models.Model): # <-- THIS CLASS MUST EXIST!
 
     status = models.CharField(max_length=3, choices=Status.choices, default=Status.RUNNING)
 
+    class PointStorage(models.TextChoices):
+        ROWS = 'ROW', 'Rows'
+        PACKED = 'PKD', 'Packed chunks'
+        ARCHIVED = 'ARC', 'Archived summary'
+
+    # Noktalar ScanPoint satırları, ScanPointChunk blokları ya da (arşivlenmiş taramada) yalnızca
+    # ScanSummaryBin açı dilimi özetleri olarak tutulur (scanner/packed.py, scanner/archive.py)
+    point_storage = models.CharField(max_length=3, choices=PointStorage.choices, default=PointStorage.ROWS)
+    # Arşivlenmiş taramanın tam çözünürlüklü noktalarının sıkıştırılmış dosyası (yoksa boş)
+    archive_file = models.CharField(max_length=255, blank=True, default='')
+
+    # Panel analizlerinin kalıcı sonuçları (scanner/analysis.py, manage.py reanalyze_scans)
+    cluster_count = models.IntegerField(null=True, blank=True)
+    noise_point_count = models.IntegerField(null=True, blank=True)
+    regression_slope = models.FloatField(null=True, blank=True)  # cm/derece
+    hull_area_cm2 = models.FloatField(null=True, blank=True)
+    shape_class = models.CharField(max_length=3, choices=SHAPE_CHOICES, blank=True, default='')
+    clear_path_angle_deg = models.FloatField(null=True, blank=True)
+    clear_path_cm = models.FloatField(null=True, blank=True)
+    analysis_version = models.PositiveSmallIntegerField(null=True, blank=True)
+    analyzed_at = models.DateTimeField(null=True, blank=True)
+
+    # Yazıcının her partide artımlı güncellediği özet sütunları (scanner/summary.py); panelin anlık
+    # değer kartı nokta tablosunu toplamak yerine bunları okur
+    point_count = models.PositiveIntegerField(default=0)
+    last_point_id = models.BigIntegerField(null=True, blank=True)  # Blok biçiminde noktanın sırası + 1
+    last_point_time = models.DateTimeField(null=True, blank=True)
+    last_angle_deg = models.FloatField(null=True, blank=True)
+    last_distance_cm = models.FloatField(null=True, blank=True)
+    last_speed_cm_s = models.FloatField(null=True, blank=True)
+    min_distance_cm = models.FloatField(null=True, blank=True)  # Geçerli okumalar (0 < mesafe < SENSOR_MAX_VALID_CM)
+    max_distance_cm = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Panelin "çalışan ya da en son tarama" sorgusu: filter(status=...).order_by('-start_time')
+            models.Index(fields=['status', 'start_time'], name='scan_status_start_idx'),
+            # Çalışan tarama yoksa kullanılan order_by('-start_time').first() için
+            models.Index(fields=['start_time'], name='scan_start_idx'),
+        ]
 
     def __str__(self):
         return f"Scan {self.id} ({self.status}) - {self.start_time.strftime('%Y-%m-%d %H:%M')}"
@@ -41,10 +87,120 @@ class ScanPoint(models.Model):
     x_cm = models.FloatField()
     y_cm = models.FloatField()
     z_cm = models.FloatField()
+    dikey_aci = models.FloatField(null=True, blank=True) # Noktanın alındığı gerçek servo (dikey) açısı
     timestamp = models.DateTimeField(default=timezone.now)
+    timestamp_2 = models.DateTimeField(null=True, blank=True) # İkinci sensörün okuma anı
     # Add other fields like hiz_cm_s, mesafe_cm_2 if they are in your database schema
     hiz_cm_s = models.FloatField(null=True, blank=True, default=0.0) # Example: add default
     mesafe_cm_2 = models.FloatField(null=True, blank=True, default=0.0) # Example: add default
+    # Açı başına çoklu örneklemede medyan/MAD filtresinin güven skoru (0-1). Tek okumada boş kalır.
+    quality = models.FloatField(null=True, blank=True)
+    # İki sensörün montaj modeline göre birleştirilmiş mesafesi ve güveni (0-1); x/y/z bu mesafeden hesaplanır
+    mesafe_fused_cm = models.FloatField(null=True, blank=True)
+    fusion_confidence = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Son nokta (order_by('-timestamp').first()) ve tablo sıralaması (order_by('-id')) tarama içinde
+            # sıralama yapmadan indeksten okunur
+            models.Index(fields=['scan', 'timestamp'], name='scanpoint_scan_time_idx'),
+            models.Index(fields=['scan', 'id'], name='scanpoint_scan_id_idx'),
+        ]
+
+    def __str__(self):
+        return f"ScanPoint {self.id} (Scan {self.scan.id}) - {self.derece}° {self.mesafe_cm}cm"
+
+
+class ScanPointChunk(models.Model):
+    """
+    Bir taramanın ardışık noktalarının sütun sütun paketlenmiş float32 dizileri (biçim: scanner/packed.py).
+    `start_index` bloğun ilk noktasının taramadaki sırasıdır; aynı blok iki kez yazılamaz.
+    """
+    scan = models.ForeignKey(Scan, on_delete=models.CASCADE, related_name='chunks')
+    start_index = models.PositiveIntegerField()
+    point_count = models.PositiveIntegerField()
+    # Zaman damgaları bu andan (epoch saniye) itibaren float32 saniye farkı olarak saklanır
+    t0 = models.FloatField()
+    fields = models.CharField(max_length=255)
+    codec = models.CharField(max_length=8, default='raw')
+    data = models.BinaryField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scan', 'start_index'], name='scanpointchunk_scan_start_uniq'),
+        ]
+
+    def __str__(self):
+        return f"ScanPointChunk (Scan {self.scan_id}) #{self.start_index}+{self.point_count}"
+
+
+class ScanSummaryBin(models.Model):
+    """Arşivlenmiş bir taramanın tek bir (dikey açı, yatay açı dilimi) hücresinin özeti."""
+    scan = models.ForeignKey(Scan, on_delete=models.CASCADE, related_name='summary_bins')
+    dikey_aci = models.FloatField()
+    angle_deg = models.FloatField()  # Dilimin orta açısı
+    point_count = models.PositiveIntegerField()
+    invalid_count = models.PositiveIntegerField(default=0)  # Yankısız/menzil dışı okumalar
+    min_cm = models.FloatField(null=True, blank=True)
+    median_cm = models.FloatField(null=True, blank=True)
+    max_cm = models.FloatField(null=True, blank=True)
+    quality = models.FloatField(null=True, blank=True)  # Geçerli okumaların ortalama kalite skoru
+    # Medyan mesafenin dilim ortasındaki konumu
+    x_cm = models.FloatField(null=True, blank=True)
+    y_cm = models.FloatField(null=True, blank=True)
+    z_cm = models.FloatField(null=True, blank=True)
+    timestamp = models.DateTimeField()  # Dilimdeki ilk okuma
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['scan', 'dikey_aci', 'angle_deg'], name='summarybin_scan_cell_uniq'),
+        ]
+        indexes = [
+            # Taramalar arası eğilim sorguları: aynı açının zaman içindeki medyan mesafesi
+            models.Index(fields=['angle_deg', 'dikey_aci', 'timestamp'], name='summarybin_trend_idx'),
+        ]
+
+    def __str__(self):
+        return f"ScanSummaryBin (Scan {self.scan_id}) {self.dikey_aci}°/{self.angle_deg}° {self.median_cm}cm"
+
+
+class DetectionEvent(models.Model):
+    """
+    Serbest hareket modunda eşiğin altına giren bir nesne: eşiğe girişten çıkışa kadar (scanner/event_log.py).
+    Açı ve mesafe olay boyunca ölçülen en yakın okumanındır.
+    """
+    start_time = models.DateTimeField()
+    end_time = models.DateTimeField()
+    duration_s = models.FloatField()
+    angle_deg = models.FloatField()
+    min_distance_cm = models.FloatField()
+    sample_count = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        indexes = [
+            # Panelin ısı haritası son N saatin olaylarını zaman aralığıyla okur
+            models.Index(fields=['start_time'], name='detectionevent_start_idx'),
+        ]
+
+    def __str__(self):
+        return f"DetectionEvent {self.id} - {self.angle_deg:.0f}° {self.min_distance_cm:.1f}cm {self.duration_s:.1f}s"
+
+
+class TelemetryRollup(models.Model):
+    """Serbest hareket modunun ham mesafe okumalarının bir (dönem, yatay açı dilimi) hücresi için özeti."""
+    period_start = models.DateTimeField()
+    period_s = models.PositiveIntegerField()
+    angle_deg = models.FloatField()  # Dilimin orta açısı
+    sample_count = models.PositiveIntegerField()
+    invalid_count = models.PositiveIntegerField(default=0)  # Yankısız/menzil dışı okumalar
+    min_cm = models.FloatField(null=True, blank=True)
+    mean_cm = models.FloatField(null=True, blank=True)
+    max_cm = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['period_start'], name='telemetryrollup_period_idx'),
+        ]
 
     def __str__(self):
-        return f"ScanPoint {self.id} (Scan {self.scan.id}) - {self.derece}° {self.mesafe_cm}cm"
\ No newline at end of file
+        return f"TelemetryRollup {self.period_start:%Y-%m-%d %H:%M} {self.angle_deg}° ({self.sample_count})"
@@ -0,0 +1,318 @@
+# scanner/packed.py
+#
+# Noktaların ScanPoint satırları yerine ScanPointChunk bloklarında tutulduğu saklama biçimi.
+# Bir blok, ardışık noktaların her alanı için bir float32 sütunu içerir (sütun sırası blokta
+# `fields` olarak kayıtlıdır). Zaman damgaları blok başlangıcına (t0) göre saniye farkıdır; boş
+# değerler NaN'dır. 'zlib' kodlamasında float32 baytları düzlemlere ayrılıp (byte shuffle)
+# sıkıştırılır; aynı büyüklükteki ölçümlerde üst baytlar tekrar ettiğinden oran belirgin artar.
+#
+# Okuma API'si (load_scan_arrays) blokları doğrudan NumPy dizilerine çözer; nokta başına Python
+# nesnesi oluşturulmaz. ScanPoint tablosu bu biçimde isteğe bağlı bir görünümdür:
+# manage.py pack_scans satırları bloklara, --unpack blokları satırlara çevirir.
+
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+
+PACKED_FIELDS = ('derece', 'dikey_aci', 'mesafe_cm', 'mesafe_cm_2', 'mesafe_fused_cm', 'fusion_confidence',
+                 'quality', 'x_cm', 'y_cm', 'z_cm', 'hiz_cm_s', 'timestamp', 'timestamp_2')
+TIMESTAMP_FIELDS = ('timestamp', 'timestamp_2')
+PACKED_DTYPE = np.dtype('<f4')
+
+CODEC_RAW, CODEC_ZLIB = 'raw', 'zlib'
+CODECS = (CODEC_RAW, CODEC_ZLIB)
+DEFAULT_CODEC = CODEC_ZLIB
+DEFAULT_CHUNK_POINTS = 4096
+ZLIB_LEVEL = 6
+
+
+def encode(matrix, codec=DEFAULT_CODEC):
+    raw = np.ascontiguousarray(matrix, dtype=PACKED_DTYPE).tobytes()
+    if codec == CODEC_RAW:
+        return raw
+    if codec == CODEC_ZLIB:
+        shuffled = np.frombuffer(raw, dtype=np.uint8).reshape(-1, PACKED_DTYPE.itemsize).T.tobytes()
+        return zlib.compress(shuffled, ZLIB_LEVEL)
+    raise ValueError(f"Bilinmeyen kodlama: {codec}")
+
+
+def decode(data, codec, field_count, point_count):
+    """Blok verisini (alan_sayısı, nokta_sayısı) boyutlu float32 matrise çevirir."""
+    if codec == CODEC_RAW:
+        flat = np.frombuffer(data, dtype=PACKED_DTYPE)
+    elif codec == CODEC_ZLIB:
+        planes = np.frombuffer(zlib.decompress(data), dtype=np.uint8).reshape(PACKED_DTYPE.itemsize, -1)
+        flat = np.ascontiguousarray(planes.T).view(PACKED_DTYPE).ravel()
+    else:
+        raise ValueError(f"Bilinmeyen kodlama: {codec}")
+    return flat.reshape(field_count, point_count)
+
+
+def pack_arrays(arrays, codec=DEFAULT_CODEC):
+    """
+    {alan: dizi} sözlüğünü (zaman damgaları epoch saniye) paketler; (t0, veri, nokta_sayısı) döndürür.
+    Sözlükte olmayan alanlar NaN yazılır.
+    """
+    point_count = len(arrays['timestamp'])
+    timestamps = np.asarray(arrays['timestamp'], dtype=np.float64)
+    t0 = float(np.nanmin(timestamps)) if point_count and not np.all(np.isnan(timestamps)) else 0.0
+    matrix = np.full((len(PACKED_FIELDS), point_count), np.nan, dtype=PACKED_DTYPE)
+    for row, name in enumerate(PACKED_FIELDS):
+        values = arrays.get(name)
+        if values is None: continue
+        values = np.asarray(values, dtype=np.float64)
+        matrix[row] = values - t0 if name in TIMESTAMP_FIELDS else values
+    return t0, encode(matrix, codec), point_count
+
+
+def unpack_chunk(t0, fields, codec, data, point_count):
+    """Bir bloğu {alan: dizi} olarak çözer; zaman damgaları float64 epoch saniye olur."""
+    names = fields.split(',')
+    matrix = decode(data, codec, len(names), point_count)
+    arrays = {}
+    for row, name in enumerate(names):
+        arrays[name] = matrix[row].astype(np.float64) + t0 if name in TIMESTAMP_FIELDS else matrix[row]
+    return arrays
+
+
+def write_chunk(scan_id, start_index, arrays, codec=DEFAULT_CODEC):
+    """Bir blok yazar. Aynı (tarama, start_index) bloğu zaten varsa yeniden yazılmaz (tekrar aktarım güvenli)."""
+    from scanner.models import ScanPointChunk
+
+    t0, data, point_count = pack_arrays(arrays, codec)
+    if point_count == 0: return 0
+    ScanPointChunk.objects.bulk_create([ScanPointChunk(scan_id=scan_id, start_index=start_index,
+                                                       point_count=point_count, t0=t0,
+                                                       fields=','.join(PACKED_FIELDS), codec=codec, data=data)],
+                                       ignore_conflicts=True)
+    return point_count
+
+
+def load_scan_arrays(scan, fields=None):
+    """
+    Taramanın tüm bloklarını sırayla çözüp {alan: dizi} döndürür; 'index' noktanın taramadaki sırasıdır.
+    Blok yoksa boş sözlük döner. Float alanlar float32, zaman damgaları float64 epoch saniyedir.
+    """
+    from scanner.models import ScanPointChunk
+
+    scan_id = getattr(scan, 'id', scan)
+    wanted = tuple(fields) if fields else PACKED_FIELDS
+    rows = ScanPointChunk.objects.filter(scan_id=scan_id).order_by('start_index').values_list(
+        'start_index', 'point_count', 't0', 'fields', 'codec', 'data')
+    parts = {name: [] for name in wanted}
+    indexes = []
+    for start_index, point_count, t0, chunk_fields, codec, data in rows:
+        chunk = unpack_chunk(t0, chunk_fields, codec, data, point_count)
+        for name in wanted:
+            parts[name].append(chunk[name] if name in chunk else np.full(point_count, np.nan, dtype=PACKED_DTYPE))
+        indexes.append(np.arange(start_index, start_index + point_count))
+    if not indexes:
+        return {}
+    arrays = {name: np.concatenate(values) for name, values in parts.items()}
+    arrays['index'] = np.concatenate(indexes)
+    return arrays
+
+
+def load_row_arrays(scan, fields=None):
+    """Satır biçimindeki bir taramanın noktalarını (zaman sırasıyla) load_scan_arrays biçiminde okur."""
+    wanted = tuple(fields) if fields else PACKED_FIELDS
+    rows = list(scan.points.order_by('timestamp', 'id').values_list(*wanted))
+    columns = list(zip(*rows)) if rows else [()] * len(wanted)
+    arrays = {name: np.array([_point_values(v) for v in column], dtype=np.float64)
+              for name, column in zip(wanted, columns)}
+    arrays['index'] = np.arange(len(rows))
+    return arrays
+
+
+def load_point_arrays(scan, fields=None):
+    """Taramanın noktalarını saklama biçiminden (satır, blok ya da arşiv özeti) bağımsız olarak dizilere okur."""
+    from scanner.models import Scan
+
+    if scan.point_storage == Scan.PointStorage.PACKED:
+        return load_scan_arrays(scan, fields)
+    if scan.point_storage == Scan.PointStorage.ARCHIVED:
+        from scanner.archive import load_summary_arrays
+        return load_summary_arrays(scan, fields)
+    return load_row_arrays(scan, fields)
+
+
+def scan_points_frame(scan, fields=None, order_by=None):
+    """
+    Taramanın noktalarını, saklama biçiminden bağımsız olarak bir DataFrame'e okur. Satır biçiminde
+    ScanPoint.values() kullanılır; blok ve arşiv biçiminde 'id' noktanın (ya da açı diliminin) sırasıdır
+    ve zaman damgaları UTC'dir. Arşivlenmiş taramada her satır bir açı dilimidir (mesafe_cm medyan).
+    `order_by` tek bir alan adıdır ('-' önekiyle azalan).
+    """
+    import pandas as pd
+    from scanner.models import Scan
+
+    if scan.point_storage == Scan.PointStorage.ROWS:
+        queryset = scan.points.all()
+        if order_by: queryset = queryset.order_by(order_by)
+        return pd.DataFrame(list(queryset.values(*(fields or ()))))
+
+    if scan.point_storage == Scan.PointStorage.ARCHIVED:
+        from scanner.archive import SUMMARY_FIELDS
+        available = SUMMARY_FIELDS
+    else:
+        available = PACKED_FIELDS
+    wanted = [name for name in (fields or available) if name in available]
+    arrays = load_point_arrays(scan, wanted)
+    if not arrays:
+        return pd.DataFrame()
+    columns = {}
+    for name in (fields or ('id', 'scan_id') + available):
+        if name == 'id':
+            columns[name] = arrays['index'] + 1
+        elif name == 'scan_id':
+            columns[name] = np.full(len(arrays['index']), scan.id)
+        elif name in TIMESTAMP_FIELDS:
+            columns[name] = pd.to_datetime(np.round(arrays[name] * 1e6), unit='us', utc=True)
+        elif name in arrays:
+            columns[name] = arrays[name]
+    df = pd.DataFrame(columns)
+    if order_by:
+        key = order_by.lstrip('-')
+        df = df.sort_values(key, ascending=not order_by.startswith('-'), kind='stable').reset_index(drop=True)
+    return df
+
+
+def compact_scan_chunks(scan_id, chunk_points=DEFAULT_CHUNK_POINTS, codec=DEFAULT_CODEC):
+    """
+    Canlı yazımda oluşan küçük blokları `chunk_points` büyüklüğündeki bloklarda birleştirir.
+    Yazılan blok sayısını döndürür; zaten yeterince büyükse dokunmaz.
+    """
+    from django.db import transaction
+    from scanner.models import ScanPointChunk
+
+    counts = list(ScanPointChunk.objects.filter(scan_id=scan_id).values_list('point_count', flat=True))
+    total = sum(counts)
+    target = -(-total // chunk_points)
+    if len(counts) <= max(1, target):
+        return len(counts)
+    with transaction.atomic():
+        arrays = load_scan_arrays(scan_id)
+        ScanPointChunk.objects.filter(scan_id=scan_id).delete()
+        for start in range(0, total, chunk_points):
+            write_chunk(scan_id, start, {name: values[start:start + chunk_points] for name, values in arrays.items()
+                                         if name in PACKED_FIELDS}, codec)
+    return target
+
+
+def rewrite_chunk_field(scan_id, name, values):
+    """
+    Taramanın bloklarında tek bir sütunu `values` ile değiştirir (dizi load_scan_arrays sırasındadır);
+    blok sınırları ve diğer sütunlar aynen kalır. Sütunu olmayan eski bloklara sütun eklenir.
+    """
+    from scanner.models import ScanPointChunk
+
+    values = np.asarray(values, dtype=np.float64)
+    chunks = list(ScanPointChunk.objects.filter(scan_id=scan_id).order_by('start_index'))
+    position = 0
+    for chunk in chunks:
+        arrays = unpack_chunk(chunk.t0, chunk.fields, chunk.codec, chunk.data, chunk.point_count)
+        arrays[name] = values[position:position + chunk.point_count]
+        position += chunk.point_count
+        chunk.t0, chunk.data, _ = pack_arrays(arrays, chunk.codec)
+        chunk.fields = ','.join(PACKED_FIELDS)
+    if position != len(values):
+        raise ValueError(f"Tarama #{scan_id}: {len(values)} değer, bloklarda {position} nokta var.")
+    ScanPointChunk.objects.bulk_update(chunks, ['t0', 'data', 'fields'], batch_size=50)
+    return len(chunks)
+
+
+def _point_values(value):
+    if value is None: return float('nan')
+    if isinstance(value, datetime): return value.timestamp()
+    return float(value)
+
+
+class ChunkWriter:
+    """
+    Canlı taramada noktaları bellekte toplar ve `flush_points` noktada bir blok olarak yazar (panel
+    en fazla bu kadar nokta geriden görür). close() kalanları yazar ve blokları birleştirir.
+    """
+
+    def __init__(self, scan_id, flush_points=32, codec=DEFAULT_CODEC, start_index=0):
+        self.scan_id = int(scan_id)
+        self.flush_points = max(1, int(flush_points))
+        self.codec = codec
+        self.start_index = int(start_index)
+        self._buffer = {name: [] for name in PACKED_FIELDS}
+        self._pending = 0
+
+    def append(self, **values):
+        for name in PACKED_FIELDS:
+            self._buffer[name].append(_point_values(values.get(name)))
+        self._pending += 1
+        if self._pending >= self.flush_points:
+            self.flush()
+
+    def flush(self):
+        from django.db import transaction
+        from scanner.summary import record_points
+
+        if not self._pending: return
+        with transaction.atomic():
+            write_chunk(self.scan_id, self.start_index, self._buffer, self.codec)
+            record_points(self.scan_id, self._buffer['derece'], self._buffer['mesafe_cm'], self._buffer['hiz_cm_s'],
+                          self._buffer['timestamp'][-1], self.start_index + self._pending)
+        self.start_index += self._pending
+        self._buffer = {name: [] for name in PACKED_FIELDS}
+        self._pending = 0
+
+    def close(self):
+        self.flush()
+        compact_scan_chunks(self.scan_id, codec=self.codec)
+
+
+def pack_scan_rows(scan, delete_rows=False, chunk_points=DEFAULT_CHUNK_POINTS, codec=DEFAULT_CODEC):
+    """Satır biçimindeki bir taramayı bloklara çevirir; yazılan nokta sayısını döndürür."""
+    from django.db import transaction
+    from scanner.models import Scan, ScanPointChunk
+    from scanner.summary import rebuild_scan_summary
+
+    arrays = load_row_arrays(scan)
+    count = len(arrays['index'])
+    with transaction.atomic():
+        ScanPointChunk.objects.filter(scan=scan).delete()
+        for start in range(0, count, chunk_points):
+            write_chunk(scan.id, start, {name: arrays[name][start:start + chunk_points] for name in PACKED_FIELDS},
+                        codec)
+        Scan.objects.filter(id=scan.id).update(point_storage=Scan.PointStorage.PACKED)
+        if delete_rows:
+            scan.points.all().delete()
+    scan.point_storage = Scan.PointStorage.PACKED
+    rebuild_scan_summary(scan)  # last_point_id artık satır kimliği değil sıra
+    return count
+
+
+def unpack_scan_rows(scan, delete_chunks=False, batch_size=2000):
+    """Blokları ScanPoint satırlarına açar (satır görünümü); `delete_chunks` ise tarama satır biçimine döner."""
+    from django.db import transaction
+    from scanner.models import Scan, ScanPoint, ScanPointChunk
+    from scanner.summary import rebuild_scan_summary
+
+    arrays = load_scan_arrays(scan)
+    count = len(arrays.get('index', ()))
+
+    def value(name, i):
+        v = float(arrays[name][i])
+        if v != v: return None
+        if name in TIMESTAMP_FIELDS: return datetime.fromtimestamp(v, tz=dt_timezone.utc)
+        return v
+
+    with transaction.atomic():
+        scan.points.all().delete()
+        for start in range(0, count, batch_size):
+            ScanPoint.objects.bulk_create([
+                ScanPoint(scan_id=scan.id, **{name: value(name, i) for name in PACKED_FIELDS})
+                for i in range(start, min(count, start + batch_size))])
+        if delete_chunks:
+            ScanPointChunk.objects.filter(scan=scan).delete()
+            Scan.objects.filter(id=scan.id).update(point_storage=Scan.PointStorage.ROWS)
+            scan.point_storage = Scan.PointStorage.ROWS
+    if delete_chunks:
+        rebuild_scan_summary(scan)
+    return count
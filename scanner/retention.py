@@ -0,0 +1,156 @@
+# scanner/retention.py
+#
+# Eski taramaların silinmesi ve boşalan alanın geri kazanılması (manage.py prune_scans).
+# Silme, tarayıcının yazma kilidini uzun süre tutmamak için sınırlı partiler halinde ve her
+# parti ayrı işlemde yapılır; partiler arasında kısa bir bekleme bırakılır. Alan, tek seferlik
+# tam VACUUM yerine auto_vacuum=INCREMENTAL ile küçük incremental_vacuum adımlarıyla geri alınır.
+
+import os
+import time
+from datetime import timedelta
+
+DEFAULT_BATCH_SIZE = 2000
+DEFAULT_PAUSE_S = 0.05
+DEFAULT_VACUUM_STEP_PAGES = 512
+
+
+def database_space():
+    """Veritabanı dosyasının sayfa bilgilerini bayt olarak döndürür (yalnızca SQLite)."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        values = {}
+        for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum'):
+            cursor.execute(f"PRAGMA {pragma}")
+            values[pragma] = cursor.fetchone()[0]
+    path = str(connection.settings_dict['NAME'])
+    wal_path = path + '-wal'
+    return {
+        'file_bytes': os.path.getsize(path) if os.path.exists(path) else 0,
+        'wal_bytes': os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+        'used_bytes': (values['page_count'] - values['freelist_count']) * values['page_size'],
+        'free_bytes': values['freelist_count'] * values['page_size'],
+        'page_size': values['page_size'],
+        'freelist_pages': values['freelist_count'],
+        # 0: NONE, 1: FULL, 2: INCREMENTAL
+        'auto_vacuum': {0: 'NONE', 1: 'FULL', 2: 'INCREMENTAL'}.get(values['auto_vacuum'], values['auto_vacuum']),
+    }
+
+
+def estimate_scan_sizes():
+    """
+    {tarama_id: tahmini_bayt}. Satır biçiminde nokta başına ortalama maliyet (dizinler dahil),
+    blok biçiminde blok verisinin boyutu kullanılır.
+    """
+    from django.db.models import Count, Sum
+    from django.db.models.functions import Length
+    from scanner.models import Scan, ScanPoint, ScanPointChunk
+
+    point_counts = dict(ScanPoint.objects.values('scan_id').annotate(n=Count('id')).values_list('scan_id', 'n'))
+    chunk_bytes = dict(ScanPointChunk.objects.values('scan_id').annotate(b=Sum(Length('data')))
+                       .values_list('scan_id', 'b'))
+    space = database_space()
+    total_points = sum(point_counts.values())
+    row_bytes = max(0, space['used_bytes'] - sum(chunk_bytes.values())) / max(1, total_points)
+    return {scan_id: point_counts.get(scan_id, 0) * row_bytes + (chunk_bytes.get(scan_id) or 0)
+            for scan_id in Scan.objects.values_list('id', flat=True)}
+
+
+def select_scans_to_prune(keep_last=None, max_age_days=None, max_size_bytes=None, now=None):
+    """
+    Saklama kurallarına göre silinecek tarama ID'lerini (en eskiden yeniye) döndürür. Çalışan
+    taramalar ve en yeni `keep_last` tarama hiçbir kuralla silinmez.
+    - max_age_days: bundan eski taramalar silinir
+    - max_size_bytes: tahmini kullanılan alan bu sınırın altına inene kadar en eskiler silinir
+    """
+    from django.utils import timezone
+    from scanner.models import Scan
+
+    newest_first = list(Scan.objects.exclude(status=Scan.Status.RUNNING).order_by('-start_time', '-id')
+                        .values_list('id', 'start_time'))
+    protected = {scan_id for scan_id, _ in newest_first[:keep_last or 0]}
+    candidates = [(scan_id, start) for scan_id, start in reversed(newest_first) if scan_id not in protected]
+    if max_age_days is None and max_size_bytes is None:
+        return [scan_id for scan_id, _ in candidates] if keep_last is not None else []
+
+    selected = []
+    if max_age_days is not None:
+        cutoff = (now or timezone.now()) - timedelta(days=max_age_days)
+        selected = [scan_id for scan_id, start in candidates if start < cutoff]
+    if max_size_bytes is not None:
+        sizes = estimate_scan_sizes()
+        remaining = database_space()['used_bytes'] - sum(sizes.get(scan_id, 0) for scan_id in selected)
+        for scan_id, _ in candidates:
+            if remaining <= max_size_bytes: break
+            if scan_id in selected: continue
+            selected.append(scan_id)
+            remaining -= sizes.get(scan_id, 0)
+    order = {scan_id: i for i, (scan_id, _) in enumerate(candidates)}
+    return sorted(selected, key=order.get)
+
+
+def delete_in_batches(queryset, batch_size=DEFAULT_BATCH_SIZE, pause_s=DEFAULT_PAUSE_S):
+    """Sorgu kümesini id sırasıyla `batch_size`'lık ayrı işlemlerde siler; silinen satır sayısını döndürür."""
+    deleted = 0
+    while True:
+        ids = list(queryset.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        queryset.model.objects.filter(id__in=ids).delete()
+        deleted += len(ids)
+        if pause_s: time.sleep(pause_s)
+
+
+def delete_scan(scan_id, batch_size=DEFAULT_BATCH_SIZE, pause_s=DEFAULT_PAUSE_S):
+    """
+    Bir taramanın noktalarını/bloklarını partiler halinde, ardından taramanın kendisini (özet dilimleri
+    CASCADE ile) ve varsa arşiv dosyasını siler.
+    """
+    from scanner.models import Scan, ScanPoint, ScanPointChunk
+
+    points = delete_in_batches(ScanPoint.objects.filter(scan_id=scan_id), batch_size, pause_s)
+    # Bloklar nokta başına değil blok başına satır olduğundan daha küçük partiler yeter
+    delete_in_batches(ScanPointChunk.objects.filter(scan_id=scan_id), max(1, batch_size // 100), pause_s)
+    archive_file = Scan.objects.filter(id=scan_id).values_list('archive_file', flat=True).first()
+    Scan.objects.filter(id=scan_id).delete()
+    if archive_file and os.path.exists(archive_file):
+        os.remove(archive_file)
+    return points
+
+
+def enable_incremental_auto_vacuum():
+    """
+    auto_vacuum kipini INCREMENTAL yapar. Mevcut bir veritabanında bu ancak bir kez tam VACUUM ile
+    etkinleşir (veritabanı bu sürede kilitlenir); bu yüzden yalnızca açıkça istendiğinde çağrılır.
+    """
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        cursor.execute("VACUUM")
+
+
+def incremental_vacuum(step_pages=DEFAULT_VACUUM_STEP_PAGES, pause_s=DEFAULT_PAUSE_S, max_steps=None):
+    """
+    Boş sayfaları `step_pages`'lik adımlarla dosyadan çıkarır; geri verilen sayfa sayısını döndürür.
+    auto_vacuum INCREMENTAL değilse hiçbir şey yapmaz (boş sayfalar yine de yeni yazımlarda kullanılır).
+    """
+    from django.db import connection
+
+    if database_space()['auto_vacuum'] != 'INCREMENTAL':
+        return 0
+    released, steps = 0, 0
+    with connection.cursor() as cursor:
+        while max_steps is None or steps < max_steps:
+            cursor.execute("PRAGMA freelist_count")
+            before = cursor.fetchone()[0]
+            if before == 0: break
+            cursor.execute(f"PRAGMA incremental_vacuum({int(step_pages)})")
+            cursor.fetchall()
+            cursor.execute("PRAGMA freelist_count")
+            after = cursor.fetchone()[0]
+            if after >= before: break
+            released += before - after
+            steps += 1
+            if pause_s: time.sleep(pause_s)
+    return released
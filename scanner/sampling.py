@@ -0,0 +1,144 @@
+# scanner/sampling.py
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+# MAD -> standart sapma dönüşüm katsayısı (normal dağılım varsayımı)
+MAD_TO_SIGMA = 1.4826
+
+
+class MedianMadSampler:
+    """
+    Bir açı için en fazla K okuma alır, medyan/MAD kararlı hale geldiğinde erken çıkar.
+
+    Tüm okumalar önceden ayrılmış NumPy dizilerinde tutulur; örnek başına liste
+    ya da yeni dizi oluşturulmaz. Aynı nesne tüm tarama boyunca tekrar kullanılır.
+    """
+
+    def __init__(self, max_samples=5, min_samples=3, tolerance_cm=1.5, outlier_sigma=3.0,
+                 valid_min_cm=0.0, valid_max_cm=SENSOR_MAX_VALID_CM, sample_interval_s=0.06):
+        self.max_samples = max(1, int(max_samples))
+        self.min_samples = max(1, min(int(min_samples), self.max_samples))
+        self.tolerance_cm = float(tolerance_cm)
+        self.outlier_sigma = float(outlier_sigma)
+        self.valid_min_cm = float(valid_min_cm)
+        self.valid_max_cm = float(valid_max_cm)
+        self.sample_interval_s = float(sample_interval_s)
+        self._samples = np.zeros(self.max_samples, dtype=np.float64)
+        self._scratch = np.zeros(self.max_samples, dtype=np.float64)
+        self.last_sample_count = 0
+
+    def _median(self, src, n):
+        # np.median kopya oluşturur; bunun yerine scratch dizisi üzerinde yerinde partition
+        work = self._scratch[:n]
+        np.copyto(work, src[:n])
+        half = n // 2
+        work.partition(half)
+        if n % 2:
+            return float(work[half])
+        return 0.5 * (float(work[half]) + float(work[:half].max()))
+
+    def _median_and_mad(self, n):
+        med = self._median(self._samples, n)
+        np.subtract(self._samples[:n], med, out=self._scratch[:n])
+        np.abs(self._scratch[:n], out=self._scratch[:n])
+        mad = self._median(self._scratch, n)
+        return med, mad
+
+    def sample(self, read_distance_cm):
+        """
+        `read_distance_cm` çağrılabilirini tekrar tekrar okuyarak (filtrelenmiş_mesafe_cm, kalite)
+        döndürür. Kalite 0.0 (güvenilmez) ile 1.0 (tutarlı okumalar) arasındadır.
+        Geçerli okuma yoksa son ham okuma ve 0.0 kalite döner.
+        """
+        n, attempts, last_raw = 0, 0, 0.0
+        med, mad = 0.0, 0.0
+        while attempts < self.max_samples:
+            if attempts > 0 and self.sample_interval_s > 0:
+                time.sleep(self.sample_interval_s)
+            last_raw = float(read_distance_cm())
+            attempts += 1
+            if not (self.valid_min_cm < last_raw < self.valid_max_cm):
+                continue
+            self._samples[n] = last_raw
+            n += 1
+            if n < self.min_samples:
+                continue
+            med, mad = self._median_and_mad(n)
+            if mad <= self.tolerance_cm:
+                break
+
+        self.last_sample_count = attempts
+        if n == 0:
+            return last_raw, 0.0
+        if n < self.min_samples:
+            med, mad = self._median_and_mad(n)
+
+        sigma = MAD_TO_SIGMA * mad
+        limit = max(self.outlier_sigma * sigma, self.tolerance_cm)
+        np.subtract(self._samples[:n], med, out=self._scratch[:n])
+        np.abs(self._scratch[:n], out=self._scratch[:n])
+        inliers = int(np.count_nonzero(self._scratch[:n] <= limit))
+        # Geçerli okuma oranı x tutarlı okuma oranı, yayılım arttıkça düşer
+        quality = (n / attempts) * (inliers / n) / (1.0 + sigma / self.tolerance_cm)
+        if n < self.min_samples:
+            quality *= n / self.min_samples
+        return med, round(float(quality), 3)
+
+
+class DualSensorScheduler:
+    """
+    İki HC-SR04 okumasını eşzamanlı toplar. İkinci sensör, çapraz karışmayı (crosstalk)
+    önlemek için birincinin tetiklenmesinden `inter_trigger_gap_s` saniye sonra tetiklenir;
+    her iki yankı da paralel beklenir. Bir sonraki çağrıdaki ilk tetikleme de ikincisinden
+    en az aynı süre sonra yapılır. `concurrent=False` eski sıralı okumayı uygular.
+
+    `read_1` / `read_2` herhangi bir değer döndüren çağrılabilirlerdir (ham mesafe ya da
+    MedianMadSampler sonucu). Aralık yalnızca okuma sensörü o anda tetikliyorsa anlamlıdır
+    (scanner.hcsr04.TriggeredDistanceSensor); gpiozero.DistanceSensor kendi iş parçacığında sürekli
+    tetiklenir ve `.distance` yalnızca kuyruğunu okur, bu durumda çapraz karışma önlenmez. `sample()` -> (sonuç_1, zaman_1, sonuç_2, zaman_2); zamanlar
+    her okumanın tamamlandığı andaki epoch saniyesidir.
+    """
+
+    def __init__(self, read_1, read_2, inter_trigger_gap_s=0.015, concurrent=True):
+        self.read_1 = read_1
+        self.read_2 = read_2
+        self.inter_trigger_gap_s = max(0.0, float(inter_trigger_gap_s))
+        self.concurrent = bool(concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sensor') if self.concurrent else None
+        self._last_trigger_2 = 0.0
+
+    @staticmethod
+    def _timed(read_fn):
+        result = read_fn()
+        return result, time.time()
+
+    def _wait_gap_after(self, trigger_time):
+        remaining = trigger_time + self.inter_trigger_gap_s - time.perf_counter()
+        if remaining > 0:
+            time.sleep(remaining)
+
+    def sample(self):
+        self._wait_gap_after(self._last_trigger_2)
+        trigger_1 = time.perf_counter()
+        if not self.concurrent:
+            result_1, time_1 = self._timed(self.read_1)
+            self._wait_gap_after(trigger_1)
+            self._last_trigger_2 = time.perf_counter()
+            result_2, time_2 = self._timed(self.read_2)
+            return result_1, time_1, result_2, time_2
+        future_1 = self._executor.submit(self._timed, self.read_1)
+        self._wait_gap_after(trigger_1)
+        self._last_trigger_2 = time.perf_counter()
+        future_2 = self._executor.submit(self._timed, self.read_2)
+        (result_1, time_1), (result_2, time_2) = future_1.result(), future_2.result()
+        return result_1, time_1, result_2, time_2
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
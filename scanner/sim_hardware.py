@@ -0,0 +1,358 @@
+# scanner/sim_hardware.py
+#
+# gpiozero / RPLCD sınıflarının simüle karşılıkları. Betikler donanım katmanını
+# scanner.hardware.load_backend('sim') ile yüklediğinde bu sınıfları kullanır;
+# Raspberry Pi olmadan tarama döngüsü çalıştırılabilir, ölçülebilir ve test edilebilir.
+#
+# Tüm cihazlar ortak bir SimulatedRig üzerinden haberleşir: step motor pinlerine yazılan
+# yarım adım dizisi çözülerek yatay açı, servo değerinden dikey açı bulunur; mesafe
+# sensörü bu poz ile odadaki duvarlara ışın gönderir.
+
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+SPEED_OF_SOUND_M_S = 343.0
+TRIGGER_OVERHEAD_S = 0.0002  # 10 µs tetik darbesi + GPIO gecikmesi
+NO_ECHO_TIMEOUT_S = 0.038  # HC-SR04 yankı gelmezse ECHO pinini ~38 ms yüksek tutar
+I2C_BYTE_TIME_S = 9 / 100000.0  # 100 kHz I2C, 8 bit + ACK
+LCD_BYTES_PER_NIBBLE = 2  # PCF8574 4-bit modda her yarım bayt EN=1 ve EN=0 ile iki kez yazılır
+LCD_CLEAR_TIME_S = 0.00164  # HD44780 clear/home komutu yürütme süresi
+
+HALF_STEP_SEQUENCE = [(1, 0, 0, 0), (1, 1, 0, 0), (0, 1, 0, 0), (0, 1, 1, 0), (0, 0, 1, 0), (0, 0, 1, 1),
+                      (0, 0, 0, 1), (1, 0, 0, 1)]
+
+
+class SimulatedRoom:
+    """
+    Sensör orijinli (cm) 2D duvar parçaları; `floor_z` / `ceiling_z` verilirse zemin ve tavan
+    düzlemleriyle 3D oda olur. Duvarlar dikey ve sonsuz yüksek kabul edilir.
+    """
+
+    def __init__(self, walls, floor_z=None, ceiling_z=None):
+        segments = np.asarray(walls, dtype=np.float64).reshape(-1, 4)
+        self.walls = [tuple(map(float, s)) for s in segments]
+        self._start = segments[:, :2]
+        self._delta = segments[:, 2:] - segments[:, :2]
+        self.floor_z = floor_z
+        self.ceiling_z = ceiling_z
+
+    @classmethod
+    def rectangle(cls, width_cm=400.0, depth_cm=300.0, sensor_x_cm=None, sensor_y_cm=None, boxes=(),
+                  floor_z=None, ceiling_z=None):
+        """Dikdörtgen oda; `boxes` (merkez_x, merkez_y, genişlik, derinlik) kutu engelleri ekler."""
+        sx = depth_cm / 2.0 if sensor_x_cm is None else sensor_x_cm
+        sy = width_cm / 2.0 if sensor_y_cm is None else sensor_y_cm
+
+        def rect(x0, y0, x1, y1):
+            corners = [(x0, y0), (x1, y0), (x1, y1), (x0, y1)]
+            return [(a[0] - sx, a[1] - sy, b[0] - sx, b[1] - sy) for a, b in zip(corners, corners[1:] + corners[:1])]
+
+        walls = rect(0.0, 0.0, depth_cm, width_cm)
+        for cx, cy, w, d in boxes:
+            walls += rect(cx - d / 2.0, cy - w / 2.0, cx + d / 2.0, cy + w / 2.0)
+        return cls(walls, floor_z=floor_z, ceiling_z=ceiling_z)
+
+    @classmethod
+    def from_file(cls, path):
+        """{"walls": [[x1, y1, x2, y2], ...], "floor_z": ..., "ceiling_z": ...} biçimli JSON dosyası."""
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data['walls'], floor_z=data.get('floor_z'), ceiling_z=data.get('ceiling_z'))
+
+    def ray_distance_cm(self, pan_deg, elevation_deg):
+        """Sensör orijininden verilen yönde en yakın yüzeye olan eğik mesafe (yüzey yoksa inf)."""
+        return float(self.ray_distances_cm(np.array([pan_deg]), np.array([elevation_deg]))[0])
+
+    def ray_distances_cm(self, pan_deg, elevation_deg):
+        """ray_distance_cm'in vektörel hali: açı dizileri (yayınlanabilir) için mesafe dizisi."""
+        pan, elevation = np.broadcast_arrays(np.radians(np.asarray(pan_deg, dtype=np.float64)),
+                                             np.radians(np.asarray(elevation_deg, dtype=np.float64)))
+        cos_e, sin_e = np.cos(elevation), np.sin(elevation)
+        best = np.full(pan.shape, np.inf)
+        if len(self.walls):
+            dx, dy = np.cos(pan)[:, None], np.sin(pan)[:, None]
+            ex, ey = self._delta[:, 0], self._delta[:, 1]
+            sx, sy = self._start[:, 0], self._start[:, 1]
+            denom = dx * ey - dy * ex
+            with np.errstate(divide='ignore', invalid='ignore'):
+                t = (sx * ey - sy * ex) / denom  # ışın boyunca yatay mesafe
+                u = (sx * dy - sy * dx) / denom  # parça üzerindeki konum (0-1)
+                t = np.where((np.abs(denom) > 1e-12) & (t > 0) & (u >= 0) & (u <= 1), t, np.inf)
+                horizontal = t.min(axis=1)
+                best = np.where(np.abs(cos_e) > 1e-9, horizontal / np.abs(cos_e), np.inf)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if self.ceiling_z is not None:
+                best = np.where(sin_e > 1e-9, np.minimum(best, self.ceiling_z / sin_e), best)
+            if self.floor_z is not None:
+                best = np.where(sin_e < -1e-9, np.minimum(best, self.floor_z / sin_e), best)
+        return best
+
+
+def default_room():
+    """SCANNER_SIM_ROOM ortam değişkeni bir JSON dosyasını gösteriyorsa o oda, yoksa 4x3 m kutulu oda."""
+    path = os.environ.get('SCANNER_SIM_ROOM')
+    if path:
+        return SimulatedRoom.from_file(path)
+    return SimulatedRoom.rectangle(boxes=[(220.0, 80.0, 40.0, 60.0)], floor_z=-30.0, ceiling_z=220.0)
+
+
+class SimulatedRig:
+    """
+    Simüle cihazların ortak durumu: oda, step motor pin geçmişi, servo açısı ve zamanlama.
+    `time_scale` tüm simüle gecikmeleri ölçekler (0 = beklemesiz, deterministik ve hızlı).
+    `servo_level_deg`, dikey açının 0 kabul edildiği servo açısıdır; varsayılan 0 tarayıcının
+    x/y/z dönüşümüyle (dikey açı = servo açısı) aynıdır.
+    """
+
+    def __init__(self, room=None, steps_per_rev=4096, stepper_pins=(6, 13, 19, 26), gear_backlash_deg=0.0,
+                 servo_level_deg=0.0, time_scale=1.0, seed=0, pin_history_limit=100000):
+        self.room = room or default_room()
+        self.steps_per_rev = steps_per_rev
+        self.stepper_pins = tuple(stepper_pins)
+        self.gear_backlash_deg = gear_backlash_deg
+        self.servo_level_deg = servo_level_deg
+        self.time_scale = time_scale
+        self.random = random.Random(seed)
+        self.pin_history_limit = pin_history_limit
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.pin_states = dict.fromkeys(self.stepper_pins, 0)
+        self.pin_history = []  # (monotonic_zaman, (in1, in2, in3, in4))
+        self.sequence_index = None
+        self.motor_steps = 0  # net adım (pozitif yön +)
+        self.total_steps = 0
+        self.invalid_transitions = 0  # yarım adım dizisinde komşu olmayan geçişler (adım kaçırma)
+        self.direction_changes = 0
+        self._last_direction = 0
+        self._backlash_remaining_deg = 0.0
+        self.shaft_angle_deg = 0.0
+        self.servo_angle_deg = 90.0
+        self.trigger_times = {}
+        self.lcd_busy_s = 0.0
+        self.lcd_bytes = 0
+
+    def sleep(self, seconds):
+        if self.time_scale > 0 and seconds > 0:
+            time.sleep(seconds * self.time_scale)
+
+    # --- Step motor ---
+    def set_pin(self, pin, value):
+        if pin not in self.pin_states: return
+        with self._lock:
+            self.pin_states[pin] = 1 if value else 0
+            state = tuple(self.pin_states[p] for p in self.stepper_pins)
+            if len(self.pin_history) < self.pin_history_limit:
+                self.pin_history.append((time.monotonic(), state))
+            if state not in HALF_STEP_SEQUENCE:
+                return  # bobinler serbest ya da pinler tek tek güncellenirken ara durum
+            index = HALF_STEP_SEQUENCE.index(state)
+            if self.sequence_index is None or index == self.sequence_index:
+                self.sequence_index = index
+                return
+            delta = (index - self.sequence_index) % len(HALF_STEP_SEQUENCE)
+            self.sequence_index = index
+            if delta == 1:
+                self._advance(1)
+            elif delta == len(HALF_STEP_SEQUENCE) - 1:
+                self._advance(-1)
+            else:
+                self.invalid_transitions += 1
+
+    def _advance(self, direction):
+        self.motor_steps += direction
+        self.total_steps += 1
+        if self._last_direction and direction != self._last_direction:
+            self.direction_changes += 1
+            self._backlash_remaining_deg = self.gear_backlash_deg
+        self._last_direction = direction
+        step_deg = 360.0 / self.steps_per_rev
+        # Yön değişiminden sonraki ilk adımlar dişli boşluğunu alır, mil dönmez
+        if self._backlash_remaining_deg > 0:
+            self._backlash_remaining_deg -= step_deg
+            return
+        self.shaft_angle_deg += direction * step_deg
+
+    # --- Servo / sensör ---
+    @property
+    def elevation_deg(self):
+        return self.servo_angle_deg - self.servo_level_deg
+
+    def trigger(self, name):
+        now = time.perf_counter()
+        with self._lock:
+            self.trigger_times[name] = now
+        return now
+
+
+_rig = None
+
+
+def get_rig():
+    global _rig
+    if _rig is None:
+        _rig = SimulatedRig(time_scale=float(os.environ.get('SCANNER_SIM_TIME_SCALE', '1.0')),
+                            seed=int(os.environ.get('SCANNER_SIM_SEED', '0')))
+    return _rig
+
+
+def set_rig(rig):
+    """Sonraki oluşturulacak simüle cihazların kullanacağı düzeneği ayarlar."""
+    global _rig
+    _rig = rig
+    return rig
+
+
+class _SimDevice:
+    def __init__(self, *args, **kwargs):
+        self.rig = get_rig()
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class DistanceSensor(_SimDevice):
+    """
+    gpiozero.DistanceSensor benzeri; `distance` metre döndürür ve yankı süresi kadar bloklar.
+    Gürültü mesafeyle artar; menzil dışında zaman aşımı kadar bekleyip `max_distance` döner.
+    Gerçek gpiozero sensörü arka planda sürekli tetiklenir ve okuma beklemez; okuma başına tek
+    darbe davranışı yalnızca scanner.hcsr04.TriggeredDistanceSensor'e karşılık gelir.
+    """
+
+    def __init__(self, echo=None, trigger=None, max_distance=1.0, queue_len=30, noise_cm=0.3, noise_ratio=0.005,
+                 **kwargs):
+        super().__init__()
+        self.name = f"hcsr04_{trigger}_{echo}"
+        self.max_distance = max_distance
+        self.queue_len = queue_len
+        self.noise_cm = noise_cm
+        self.noise_ratio = noise_ratio
+        self.read_count = 0
+
+    @property
+    def distance(self):
+        rig = self.rig
+        self.read_count += 1
+        rig.trigger(self.name)
+        true_cm = rig.room.ray_distance_cm(rig.shaft_angle_deg, rig.elevation_deg)
+        max_cm = self.max_distance * 100.0
+        if true_cm >= max_cm:
+            rig.sleep(TRIGGER_OVERHEAD_S + NO_ECHO_TIMEOUT_S)
+            return self.max_distance
+        rig.sleep(TRIGGER_OVERHEAD_S + 2 * true_cm / 100.0 / SPEED_OF_SOUND_M_S)
+        measured_cm = rig.random.gauss(true_cm, self.noise_cm + self.noise_ratio * true_cm)
+        return max(0.0, min(max_cm, measured_cm)) / 100.0
+
+
+class TriggeredDistanceSensor(DistanceSensor):
+    """scanner.hcsr04.TriggeredDistanceSensor karşılığı: her okuma bir darbe gönderip yankıyı bekler."""
+
+    def __init__(self, echo=None, trigger=None, max_distance=1.0, **kwargs):
+        kwargs.pop('pin_factory', None)
+        super().__init__(echo=echo, trigger=trigger, max_distance=max_distance, **kwargs)
+
+
+class OutputDevice(_SimDevice):
+    def __init__(self, pin=None, *args, **kwargs):
+        super().__init__()
+        self.pin = pin
+        self._value = 0
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = 1 if value else 0
+        self.rig.set_pin(self.pin, self._value)
+
+    def on(self):
+        self.value = 1
+
+    def off(self):
+        self.value = 0
+
+    @property
+    def is_active(self):
+        return bool(self._value)
+
+
+class LED(OutputDevice):
+    def blink(self, on_time=1, off_time=1, n=None, background=True):
+        self._value = 1
+
+    @property
+    def is_lit(self):
+        return bool(self._value)
+
+
+class Buzzer(OutputDevice):
+    def beep(self, on_time=1, off_time=1, n=None, background=True):
+        self._value = 1
+
+
+class Servo(_SimDevice):
+    """Değer (-1..1) servo açısına (0..180°) çevrilir ve düzeneğin dikey açısı olur."""
+
+    def __init__(self, pin=None, *args, **kwargs):
+        super().__init__()
+        self.pin = pin
+        self._value = 0.0
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, value):
+        self._value = max(-1.0, min(1.0, float(value)))
+        self.rig.servo_angle_deg = (self._value + 1.0) * 90.0
+
+
+class CharLCD(_SimDevice):
+    """
+    RPLCD.i2c.CharLCD benzeri; PCF8574 üzerinden 4-bit HD44780 yazma maliyetini (karakter başına
+    2 yarım bayt x 2 I2C baytı) modeller ve toplam meşgul süreyi düzeneğe işler.
+    """
+
+    def __init__(self, i2c_expander='PCF8574', address=0x27, port=1, cols=16, rows=2, *args, **kwargs):
+        super().__init__()
+        self.cols, self.rows = cols, rows
+        self.lines = [' ' * cols for _ in range(rows)]
+        self._cursor = (0, 0)
+
+    def _transfer(self, byte_count, extra_s=0.0):
+        cost = byte_count * 2 * LCD_BYTES_PER_NIBBLE * I2C_BYTE_TIME_S + extra_s
+        self.rig.lcd_bytes += byte_count
+        self.rig.lcd_busy_s += cost
+        self.rig.sleep(cost)
+
+    def clear(self):
+        self._transfer(1, LCD_CLEAR_TIME_S)
+        self.lines = [' ' * self.cols for _ in range(self.rows)]
+        self._cursor = (0, 0)
+
+    @property
+    def cursor_pos(self):
+        return self._cursor
+
+    @cursor_pos.setter
+    def cursor_pos(self, value):
+        self._transfer(1)
+        self._cursor = tuple(value)
+
+    def write_string(self, text):
+        self._transfer(len(text))
+        row, col = self._cursor
+        if 0 <= row < self.rows:
+            line = self.lines[row]
+            self.lines[row] = (line[:col] + text + line[col + len(text):])[:self.cols]
+        self._cursor = (row, min(self.cols, col + len(text)))
@@ -0,0 +1,120 @@
+# scanner/sqlite_tuning.py
+#
+# Tarayıcı süreci veritabanına yazarken panel her istemci için birkaç saniyede bir okur.
+# Varsayılan (rollback journal) kipte okuyucu ile yazıcı birbirini kilitler; bu modül her yeni
+# SQLite bağlantısında WAL ve ilgili PRAGMA ayarlarını uygular. Ayarlar settings.SQLITE_TUNING'den
+# gelir. Django bağlantılarına connection_created sinyaliyle (ScannerConfig.ready), ham sqlite3
+# kullanan betiklere connect() ile uygulanır.
+#
+# Kontrol noktası (checkpoint) politikası: WAL dosyası wal_autocheckpoint sayfayı geçince SQLite
+# commit sırasında PASSIVE kontrol noktası yapar; bu, okuyucular varken WAL'ı tamamen boşaltamaz.
+# Bu yüzden yazıcı boşta kaldığında (tarama bitince) checkpoint() ile TRUNCATE kontrol noktası
+# yapılır; journal_size_limit de bırakılan WAL dosyasının diskte kaplayacağı boyutu sınırlar.
+
+import sqlite3
+
+DEFAULTS = {
+    # Yalnızca tablolar oluşturulmadan önce (yeni veritabanı) ya da bir VACUUM'dan sonra etkinleşir;
+    # silinen taramaların alanı prune_scans'te incremental_vacuum ile geri alınır
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',     # WAL'da güvenli; commit başına fsync yerine kontrol noktasında fsync
+    'busy_timeout_ms': 5000,     # Kilit varsa hata vermeden önce bekleme süresi
+    'mmap_size': 64 * 1024 * 1024,
+    'cache_size_kb': 8192,       # Bağlantı başına sayfa önbelleği (negatif cache_size = KiB)
+    'wal_autocheckpoint': 1000,  # Sayfa; SQLite varsayılanı
+    'journal_size_limit': 16 * 1024 * 1024,
+    'checkpoint_mode': 'TRUNCATE',
+}
+
+CHECKPOINT_MODES = ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE')
+
+
+def get_tuning():
+    """Varsayılanların üzerine settings.SQLITE_TUNING'i yazar; Django ayarlanmamışsa varsayılanlar döner."""
+    config = dict(DEFAULTS)
+    try:
+        from django.conf import settings
+        if settings.configured:
+            config.update(getattr(settings, 'SQLITE_TUNING', {}) or {})
+    except ImportError:
+        pass
+    return config
+
+
+def pragma_statements(config=None):
+    config = config or get_tuning()
+    statements = []
+    if config.get('auto_vacuum'):
+        statements.append(f"PRAGMA auto_vacuum={config['auto_vacuum']}")
+    if config.get('journal_mode'):
+        statements.append(f"PRAGMA journal_mode={config['journal_mode']}")
+    if config.get('synchronous'):
+        statements.append(f"PRAGMA synchronous={config['synchronous']}")
+    if config.get('busy_timeout_ms') is not None:
+        statements.append(f"PRAGMA busy_timeout={int(config['busy_timeout_ms'])}")
+    if config.get('mmap_size') is not None:
+        statements.append(f"PRAGMA mmap_size={int(config['mmap_size'])}")
+    if config.get('cache_size_kb') is not None:
+        statements.append(f"PRAGMA cache_size={-int(config['cache_size_kb'])}")
+    if config.get('wal_autocheckpoint') is not None:
+        statements.append(f"PRAGMA wal_autocheckpoint={int(config['wal_autocheckpoint'])}")
+    if config.get('journal_size_limit') is not None:
+        statements.append(f"PRAGMA journal_size_limit={int(config['journal_size_limit'])}")
+    return statements
+
+
+def apply_pragmas(conn, config=None):
+    """
+    PRAGMA'ları bir sqlite3 bağlantısına ya da Django bağlantısına uygular. journal_mode=WAL kalıcıdır
+    (dosyaya yazılır); diğerleri bağlantıya özeldir. Dönüş: etkin journal kipi.
+    """
+    cursor = conn.cursor()
+    journal_mode = None
+    try:
+        for statement in pragma_statements(config):
+            cursor.execute(statement)
+            if statement.startswith("PRAGMA journal_mode"):
+                row = cursor.fetchone()
+                journal_mode = row[0] if row else None
+    finally:
+        cursor.close()
+    return journal_mode
+
+
+def connect(path, config=None, **kwargs):
+    """Ayarlanmış bir ham sqlite3 bağlantısı açar (Django dışı betikler için)."""
+    config = config or get_tuning()
+    kwargs.setdefault('timeout', config.get('busy_timeout_ms', 5000) / 1000)
+    conn = sqlite3.connect(path, **kwargs)
+    apply_pragmas(conn, config)
+    return conn
+
+
+def checkpoint(conn=None, mode=None):
+    """
+    WAL kontrol noktası çalıştırır; (meşgul, wal_sayfası, aktarılan_sayfa) döndürür.
+    `conn` verilmezse Django'nun varsayılan bağlantısı kullanılır; WAL kipinde değilse None döner.
+    """
+    mode = (mode or get_tuning().get('checkpoint_mode') or 'PASSIVE').upper()
+    if mode not in CHECKPOINT_MODES:
+        raise ValueError(f"Geçersiz kontrol noktası kipi: {mode}")
+    if conn is None:
+        from django.db import connection as conn
+        if conn.vendor != 'sqlite':
+            return None
+    cursor = conn.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode")
+        if str(cursor.fetchone()[0]).lower() != 'wal':
+            return None
+        cursor.execute(f"PRAGMA wal_checkpoint({mode})")
+        return tuple(cursor.fetchone())
+    finally:
+        cursor.close()
+
+
+def on_connection_created(sender, connection, **kwargs):
+    """django.db.backends.signals.connection_created alıcısı."""
+    if connection.vendor == 'sqlite':
+        apply_pragmas(connection.connection)
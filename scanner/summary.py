@@ -0,0 +1,119 @@
+# scanner/summary.py
+#
+# Scan satırındaki özet sütunları: nokta sayısı, son noktanın kimliği/zamanı/açısı/mesafesi/hızı ve
+# geçerli (0 < mesafe < SENSOR_MAX_VALID_CM) okumaların en küçük/en büyük mesafesi. Yazıcı her nokta
+# ya da parti yazdığında record_points() tek bir UPDATE ile bu sütunları artımlı olarak günceller;
+# panelin anlık değer kartı böylece nokta tablosunu taramadan yalnızca Scan satırını okur.
+#
+# Yazma yolları: sensor_script.save_scan_point (doğrudan satır), journal.ingest_journal (günlük
+# partileri) ve packed.ChunkWriter (canlı blok yazımı). Toplu oluşturulan taramalar (synthetic) ve
+# eski veriler için rebuild_scan_summary() özetleri baştan hesaplar.
+
+from datetime import datetime, timezone as dt_timezone
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+# Yankısız okuma (tam menzil) geçersizdir; panelin "en büyük mesafe" kartı bu özetten okunur
+VALID_MIN_CM = 0.0
+
+SUMMARY_FIELDS = ('point_count', 'last_point_id', 'last_point_time', 'last_angle_deg', 'last_distance_cm',
+                  'last_speed_cm_s', 'min_distance_cm', 'max_distance_cm')
+
+
+def _as_datetime(value):
+    if value is None or isinstance(value, datetime): return value
+    if value != value: return None  # NaN
+    return datetime.fromtimestamp(float(value), tz=dt_timezone.utc)
+
+
+def _optional(value):
+    return None if value is None or value != value else float(value)
+
+
+def summarize_batch(derece, mesafe_cm, hiz_cm_s, last_time, last_point_id):
+    """
+    Yazma sırasıyla gelen bir partinin özet değişikliğini döndürür: sayı, partideki geçerli en küçük/en
+    büyük mesafe ve son noktanın alanları. Boş partide None.
+    """
+    distances = np.asarray([np.nan if v is None else v for v in mesafe_cm], dtype=np.float64)
+    if distances.size == 0:
+        return None
+    valid = distances[(distances > VALID_MIN_CM) & (distances < SENSOR_MAX_VALID_CM)]
+    return {
+        'count': int(distances.size),
+        'min': float(valid.min()) if valid.size else None,
+        'max': float(valid.max()) if valid.size else None,
+        'last_point_id': int(last_point_id),
+        'last_point_time': _as_datetime(last_time),
+        'last_angle_deg': _optional(derece[-1]),
+        'last_distance_cm': _optional(mesafe_cm[-1]),
+        'last_speed_cm_s': _optional(hiz_cm_s[-1]) if len(hiz_cm_s) else None,
+    }
+
+
+def record_points(scan_id, derece, mesafe_cm, hiz_cm_s, last_time, last_point_id):
+    """
+    Yazılan bir partiyi taramanın özet sütunlarına tek bir UPDATE ile ekler. Diziler yazma sırasındadır;
+    `last_point_id` son noktanın satır kimliği (blok biçiminde taramadaki sırası + 1). Eklenen sayıyı döndürür.
+    """
+    from django.db.models import F, Value
+    from django.db.models.functions import Coalesce, Greatest, Least
+    from scanner.models import Scan
+
+    delta = summarize_batch(derece, mesafe_cm, hiz_cm_s, last_time, last_point_id)
+    if delta is None:
+        return 0
+    updates = {
+        'point_count': F('point_count') + delta['count'],
+        **{name: delta[name] for name in ('last_point_id', 'last_point_time', 'last_angle_deg', 'last_distance_cm',
+                                          'last_speed_cm_s')},
+    }
+    # SQLite'ın MIN/MAX'ı NULL'la NULL döndürdüğünden ilk değer Coalesce ile tamamlanır
+    if delta['min'] is not None:
+        updates['min_distance_cm'] = Least(Coalesce(F('min_distance_cm'), Value(delta['min'])), Value(delta['min']))
+        updates['max_distance_cm'] = Greatest(Coalesce(F('max_distance_cm'), Value(delta['max'])), Value(delta['max']))
+    Scan.objects.filter(id=scan_id).update(**updates)
+    return delta['count']
+
+
+def rebuild_scan_summary(scan):
+    """
+    Özet sütunlarını taramanın kayıtlı noktalarından baştan hesaplayıp yazar (satır ya da blok biçimi).
+    Arşivlenmiş taramaların özetleri arşivlemeden önceki haliyle kalır. Yazılan değerleri döndürür.
+    """
+    from scanner.models import Scan
+    from scanner.packed import load_point_arrays
+
+    if scan.point_storage == Scan.PointStorage.ARCHIVED:
+        return None
+    values = dict.fromkeys(SUMMARY_FIELDS)
+    values['point_count'] = 0
+    if scan.point_storage == Scan.PointStorage.ROWS:
+        aggregates = _row_aggregates(scan.points.all())
+        last = scan.points.order_by('-timestamp', '-id').values('id', 'timestamp', 'derece', 'mesafe_cm',
+                                                                 'hiz_cm_s').first()
+        values['point_count'] = aggregates['count']
+        values['min_distance_cm'], values['max_distance_cm'] = aggregates['min'], aggregates['max']
+        if last:
+            values.update(last_point_id=last['id'], last_point_time=last['timestamp'], last_angle_deg=last['derece'],
+                          last_distance_cm=last['mesafe_cm'], last_speed_cm_s=last['hiz_cm_s'])
+    else:
+        arrays = load_point_arrays(scan, ('derece', 'mesafe_cm', 'hiz_cm_s', 'timestamp'))
+        if arrays:
+            order = np.argsort(arrays['timestamp'], kind='stable')
+            delta = summarize_batch(arrays['derece'][order], arrays['mesafe_cm'][order], arrays['hiz_cm_s'][order],
+                                    arrays['timestamp'][order][-1], arrays['index'][order][-1] + 1)
+            values.update({name: delta[name] for name in delta if name in values},
+                          point_count=delta['count'], min_distance_cm=delta['min'], max_distance_cm=delta['max'])
+    Scan.objects.filter(id=scan.id).update(**values)
+    for name, value in values.items(): setattr(scan, name, value)
+    return values
+
+
+def _row_aggregates(queryset):
+    from django.db.models import Count, Max, Min, Q
+
+    valid = Q(mesafe_cm__gt=VALID_MIN_CM, mesafe_cm__lt=SENSOR_MAX_VALID_CM)
+    return queryset.aggregate(count=Count('id'), min=Min('mesafe_cm', filter=valid), max=Max('mesafe_cm', filter=valid))
@@ -0,0 +1,130 @@
+# scanner/synthetic.py
+#
+# Parametrik oda/koridor/nesne sahnelerinden sentetik Scan/ScanPoint verisi üretir.
+# Panel, analiz ve dışa aktarma karşılaştırmalarının standart veri kaynağıdır
+# (manage.py generate_synthetic_scans). Noktalar parça parça üretilip bulk_create ile
+# yazıldığından milyonlarca nokta bellekte tutulmadan oluşturulabilir.
+
+from datetime import timedelta
+
+import numpy as np
+
+from scanner.fusion import MountingModel, fuse_distances, polar_to_cartesian
+from scanner.geometry import compute_geometry
+from scanner.hardware import SENSOR_MAX_DISTANCE_M
+from scanner.summary import rebuild_scan_summary
+from scanner.sim_hardware import SimulatedRoom
+
+ROOM_KINDS = ('room', 'corridor', 'objects')
+SENSOR_MAX_CM = SENSOR_MAX_DISTANCE_M * 100
+POINT_INTERVAL_S = 0.6  # sensor_script LOOP_TARGET_INTERVAL_S ile aynı nokta aralığı
+
+
+def build_room(kind, rng):
+    """Türüne göre boyutları rastgele değişen bir SimulatedRoom döndürür."""
+    if kind == 'room':
+        width, depth = rng.uniform(250, 450), rng.uniform(200, 400)
+        boxes = [(rng.uniform(0.6, 0.9) * depth, rng.uniform(0.1, 0.4) * width, rng.uniform(30, 60),
+                  rng.uniform(30, 60))]
+        return SimulatedRoom.rectangle(width, depth, boxes=boxes, floor_z=-rng.uniform(20, 40),
+                                       ceiling_z=rng.uniform(180, 240))
+    if kind == 'corridor':
+        width, depth = rng.uniform(100, 180), rng.uniform(600, 1500)
+        return SimulatedRoom.rectangle(width, depth, sensor_x_cm=depth * rng.uniform(0.3, 0.7), floor_z=-30.0,
+                                       ceiling_z=rng.uniform(200, 260))
+    if kind == 'objects':
+        width, depth = rng.uniform(300, 500), rng.uniform(300, 500)
+        boxes = []
+        for _ in range(int(rng.integers(3, 9))):
+            cx, cy = rng.uniform(0.1, 0.9) * depth, rng.uniform(0.1, 0.9) * width
+            # Sensörün bulunduğu merkezin üstüne kutu koyma
+            if abs(cx - depth / 2) < 50 and abs(cy - width / 2) < 50: continue
+            boxes.append((cx, cy, rng.uniform(15, 70), rng.uniform(15, 70)))
+        return SimulatedRoom.rectangle(width, depth, boxes=boxes, floor_z=-30.0, ceiling_z=220.0)
+    raise ValueError(f"Bilinmeyen sahne türü: {kind}")
+
+
+def generate_scan(kind, point_count, rng, layers=1, scan_angle=270.0, tilt_range=(0.0, 30.0), noise_cm=0.5,
+                  noise_ratio=0.005, dropout=0.02, start_time=None, batch_size=5000, model=None):
+    """
+    Bir sahne için `point_count` noktalı tamamlanmış bir tarama oluşturur ve Scan nesnesini döndürür.
+    Noktalar katman katman, her katmanda `scan_angle` aralığına eşit dağıtılır; iki sensör
+    bağımsız gürültüyle okunur, `dropout` oranında okuma yankısız (menzil dışı) döner.
+    Mesafe birleştirme ve x/y/z dönüşümü tarayıcıdakiyle aynı fonksiyonlarla yapılır.
+    """
+    from django.db import transaction
+    from django.utils import timezone
+    from scanner.models import Scan, ScanPoint
+
+    model = model or MountingModel(max_valid_cm=SENSOR_MAX_CM - 1)
+    room = build_room(kind, rng)
+    layers = max(1, int(layers))
+    per_layer = max(1, point_count // layers)
+    tilts = np.linspace(tilt_range[0], tilt_range[1], layers) if layers > 1 else np.array([tilt_range[0]])
+    area_tilt = tilts[np.argmin(np.abs(tilts))]
+    start_time = start_time or timezone.now()
+    total = per_layer * layers
+
+    scan = Scan.objects.create(start_angle_setting=0.0, end_angle_setting=scan_angle,
+                               step_angle_setting=scan_angle / max(1, per_layer - 1),
+                               tilt_start_angle_setting=float(tilts[0]), tilt_end_angle_setting=float(tilts[-1]),
+                               tilt_layer_count=layers, status=Scan.Status.RUNNING)
+    area_x, area_y = [], []
+    with transaction.atomic():
+        for offset in range(0, total, batch_size):
+            index = np.arange(offset, min(total, offset + batch_size))
+            layer_index, angle_index = np.divmod(index, per_layer)
+            pan = angle_index * (scan_angle / max(1, per_layer - 1))
+            tilt = tilts[layer_index]
+
+            true_cm = room.ray_distances_cm(pan, tilt)
+            readings = []
+            for _ in range(2):
+                noisy = rng.normal(true_cm, noise_cm + noise_ratio * np.minimum(true_cm, SENSOR_MAX_CM))
+                noisy = np.where((true_cm >= SENSOR_MAX_CM) | (rng.random(index.size) < dropout), SENSOR_MAX_CM,
+                                 np.clip(noisy, 0.0, SENSOR_MAX_CM))
+                readings.append(noisy)
+            dist_1, dist_2 = readings
+            fused, confidence = fuse_distances(dist_1, dist_2, model)
+            x, y, z = polar_to_cartesian(fused, pan, tilt)
+            quality = np.round(np.clip(1.0 - np.abs(dist_1 - true_cm) / 10.0, 0.0, 1.0), 3)
+            times = [start_time + timedelta(seconds=float(i) * POINT_INTERVAL_S) for i in index]
+
+            in_area = (tilt == area_tilt) & (fused > 0) & (fused < model.max_valid_cm) & (confidence != 0.0)
+            area_x.append(x[in_area])
+            area_y.append(y[in_area])
+
+            ScanPoint.objects.bulk_create([
+                ScanPoint(scan=scan, derece=float(pan[i]), dikey_aci=float(tilt[i]), mesafe_cm=float(dist_1[i]),
+                          mesafe_cm_2=float(dist_2[i]), mesafe_fused_cm=float(fused[i]),
+                          fusion_confidence=float(confidence[i]), quality=float(quality[i]), x_cm=float(x[i]),
+                          y_cm=float(y[i]), z_cm=float(z[i]), hiz_cm_s=0.0, timestamp=times[i],
+                          timestamp_2=times[i] + timedelta(milliseconds=15))
+                for i in range(index.size)], batch_size=batch_size)
+
+    metrics = compute_geometry(np.concatenate(area_x), np.concatenate(area_y))
+    for field, value in (metrics or {}).items(): setattr(scan, field, value)
+    scan.status = Scan.Status.COMPLETED if metrics else Scan.Status.INSUFFICIENT_POINTS
+    scan.end_time = start_time + timedelta(seconds=total * POINT_INTERVAL_S)
+    scan.save()
+    # start_time auto_now_add olduğundan ancak kayıttan sonra değiştirilebilir
+    Scan.objects.filter(id=scan.id).update(start_time=start_time)
+    rebuild_scan_summary(scan)
+    return scan
+
+
+def generate_dataset(scan_count, points_per_scan, kind='mixed', seed=0, spacing=timedelta(hours=1), **kwargs):
+    """
+    `scan_count` tarama üretir; 'mixed' türünde sahneler sırayla değişir. Taramalar geçmişe doğru
+    `spacing` aralıklarla zaman damgası alır (en yenisi şimdi). Oluşturulan Scan listesini döndürür.
+    """
+    from django.utils import timezone
+
+    rng = np.random.default_rng(seed)
+    now = timezone.now()
+    scans = []
+    for i in range(scan_count):
+        scan_kind = ROOM_KINDS[i % len(ROOM_KINDS)] if kind == 'mixed' else kind
+        start = now - spacing * (scan_count - i) - timedelta(seconds=points_per_scan * POINT_INTERVAL_S)
+        scans.append(generate_scan(scan_kind, points_per_scan, rng, start_time=start, **kwargs))
+    return scans
@@ -1,3 +1,700 @@
-from django.test import TestCase
+import contextlib
+import io
+import math
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+from datetime import timedelta
 
-# Create your tests here.
+import numpy as np
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from dashboard_loadtest import LiveScanFeeder
+from scanner.analysis import _load_job, reanalyze_scans, scans_to_reanalyze
+from scanner.archive import archive_scan, restore_scan, select_scans_to_archive
+from scanner.detection import EVENT_ENTER, EVENT_EXIT, DetectionThread
+from scanner.event_log import DetectionEventTracker, EventLogWriter, TelemetryAggregator, detection_heatmap
+from scanner.fusion import MountingModel, fuse_distances
+from scanner.geometry import IncrementalGeometry, compute_geometry
+from scanner.hardware import SENSOR_MAX_DISTANCE_M
+from scanner.heartbeat import HeartbeatWriter, planned_points_per_sweep, read_heartbeat
+from scanner.journal import (HEADER_STRUCT, MAGIC, OFFSET_SUFFIX, RECORD_DTYPE, VERSION, JournalFormatError,
+                             JournalIngestThread, ScanJournalWriter, ingest_journal, pending_journals, read_records,
+                             replay_pending_journals)
+from scanner.live_channel import LiveChannelReader, LiveChannelWriter
+from scanner.models import DetectionEvent, Scan, ScanPoint, ScanPointChunk, ScanSummaryBin, TelemetryRollup
+from scanner.packed import ChunkWriter, load_scan_arrays, pack_scan_rows, scan_points_frame, unpack_scan_rows
+from scanner.retention import delete_in_batches, delete_scan, select_scans_to_prune
+from scanner.sampling import MedianMadSampler
+from scanner.summary import SUMMARY_FIELDS, record_points, rebuild_scan_summary
+from scanner.velocity import VelocityEstimator, estimate_scan_velocities, scans_for_velocity, seed_from_latest_scan
+
+
+def make_scan(status, point_count, start_time, layers=(0.0,)):
+    """Tilt katmanlarına eşit dağıtılmış `point_count` noktalı bir tarama oluşturur."""
+    scan = Scan.objects.create(status=status, buzzer_distance_setting=20, tilt_layer_count=len(layers))
+    Scan.objects.filter(id=scan.id).update(start_time=start_time)
+    per_layer = max(1, point_count // len(layers))
+    points = []
+    for tilt in layers:
+        for i in range(per_layer):
+            pan = 270.0 * i / max(1, per_layer - 1)
+            dist = 100.0 + 40.0 * math.sin(math.radians(pan * 3))
+            t, p = math.radians(tilt), math.radians(pan)
+            points.append(ScanPoint(scan=scan, derece=pan, dikey_aci=tilt, mesafe_cm=dist, quality=0.9,
+                                    x_cm=dist * math.cos(t) * math.cos(p), y_cm=dist * math.cos(t) * math.sin(p),
+                                    z_cm=dist * math.sin(t),
+                                    timestamp=start_time + timedelta(seconds=0.6 * len(points))))
+    ScanPoint.objects.bulk_create(points)
+    rebuild_scan_summary(scan)
+    return scan
+
+
+class ScanQueryIndexTests(TestCase):
+    """Panelin sık çalışan sorgularının 0006 göçündeki indeksleri kullandığını EXPLAIN QUERY PLAN ile doğrular."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        make_scan(Scan.Status.COMPLETED, 50, now - timedelta(hours=1))
+        cls.scan = make_scan(Scan.Status.RUNNING, 50, now)
+
+    def assertUsesIndex(self, queryset, index_name):
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index_name}", plan)
+        self.assertNotIn("TEMP B-TREE", plan)
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Plan metni SQLite'a özgü")
+    def test_latest_point_uses_scan_timestamp_index(self):
+        self.assertUsesIndex(self.scan.points.order_by('-timestamp')[:1], 'scanpoint_scan_time_idx')
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Plan metni SQLite'a özgü")
+    def test_point_table_order_uses_scan_id_index(self):
+        self.assertUsesIndex(self.scan.points.order_by('-id')[:1], 'scanpoint_scan_id_idx')
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Plan metni SQLite'a özgü")
+    def test_running_scan_lookup_uses_status_start_index(self):
+        self.assertUsesIndex(Scan.objects.filter(status=Scan.Status.RUNNING).order_by('-start_time')[:1],
+                             'scan_status_start_idx')
+
+    @unittest.skipUnless(connection.vendor == 'sqlite', "Plan metni SQLite'a özgü")
+    def test_latest_scan_fallback_uses_start_index(self):
+        self.assertUsesIndex(Scan.objects.order_by('-start_time')[:1], 'scan_start_idx')
+
+
+class DashboardCallbackQueryBudgetTests(TestCase):
+    """
+    Her panel callback'inin sorgu bütçesini sabitler. Bütçeler nokta sayısından bağımsız olmalıdır;
+    aynı testler küçük ve büyük taramayla çalıştırılarak N+1 kalıpları yakalanır.
+    Süreç başlatan/durduran ve Gemini'ye bağlanan callback'ler kapsam dışıdır.
+    """
+
+    POINT_COUNTS = (12, 300)
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with contextlib.redirect_stdout(io.StringIO()):
+            from dashboard_app import dash_apps
+        cls.da = dash_apps
+
+    def call(self, budget, fn, *args):
+        with contextlib.redirect_stdout(io.StringIO()), self.assertNumQueries(budget):
+            return fn(*args)
+
+    def populate(self, point_count, running=True):
+        now = timezone.now()
+        make_scan(Scan.Status.COMPLETED, point_count, now - timedelta(hours=1), layers=(0.0, 20.0))
+        return make_scan(Scan.Status.RUNNING if running else Scan.Status.COMPLETED, point_count, now,
+                         layers=(0.0, 20.0, 40.0))
+
+    def for_each_size(self, check, running=True):
+        for count in self.POINT_COUNTS:
+            with self.subTest(points=count, running=running):
+                ScanPoint.objects.all().delete()
+                Scan.objects.all().delete()
+                check(self.populate(count, running=running))
+
+    def test_latest_scan_lookup(self):
+        # Çalışan tarama varsa tek sorgu, yoksa en son taramaya bir sorgu daha
+        self.for_each_size(lambda scan: self.assertEqual(self.call(1, self.da.get_latest_scan), scan))
+        self.for_each_size(lambda scan: self.assertEqual(self.call(2, self.da.get_latest_scan), scan), running=False)
+
+    def test_realtime_values(self):
+        self.for_each_size(lambda scan: self.call(1, self.da.update_realtime_values, 1))
+
+    def test_analysis_panel(self):
+        self.for_each_size(lambda scan: self.call(1, self.da.update_analysis_panel, 1))
+
+    def test_all_graphs(self):
+        self.for_each_size(lambda scan: self.call(2, self.da.update_all_graphs, 1))
+
+    def test_data_table(self):
+        self.for_each_size(lambda scan: self.call(2, self.da.render_and_update_data_table, "tab-datatable", 1))
+        self.call(0, self.da.render_and_update_data_table, "tab-graphs", 1)
+
+    def test_exports(self):
+        self.for_each_size(lambda scan: self.call(2, self.da.export_csv_callback, 1))
+        self.for_each_size(lambda scan: self.call(3, self.da.export_excel_callback, 1))
+
+    def test_callbacks_without_database_access(self):
+        self.populate(12)
+        self.call(0, self.da.toggle_parameter_visibility, 'scan_and_map')
+        self.call(0, self.da.update_graph_visibility, 'map')
+        self.call(0, self.da.update_detection_heatmap, 1, 'map')
+        self.call(0, self.da.update_system_card, 1)
+        self.call(0, self.da.display_cluster_info, None, None)
+
+    def test_packed_scan(self):
+        # Blok biçiminde noktalar tek sorguda okunur
+        def check(scan):
+            pack_scan_rows(scan, delete_rows=True)
+            self.call(1, self.da.update_realtime_values, 1)
+            self.call(2, self.da.update_all_graphs, 1)
+            self.call(2, self.da.render_and_update_data_table, "tab-datatable", 1)
+        self.for_each_size(check)
+
+    def test_live_channel(self):
+        # Betik paylaşımlı belleğe yazarken anlık değer kartı veritabanına hiç gitmez
+        self.populate(12)
+        name = f"sensor_live_test_{id(self)}"
+        writer, reader = LiveChannelWriter(name, capacity=4), LiveChannelReader(name)
+        original, self.da.live_channel_reader = self.da.live_channel_reader, reader
+        try:
+            for angle in range(6):
+                writer.publish(angle * 10.0, 120.0 - angle * 10, 0.0, buzzer_distance_cm=10.0)
+            angle_s, dist_s, speed_s, style, max_s, speed_note = self.call(0, self.da.update_realtime_values, 1)
+            self.assertEqual((angle_s, dist_s, speed_s, max_s), ("50.0°", "70.0 cm", "-- cm/s", "120.0 cm"))
+            self.assertIn("tekrar ölçülünce", speed_note)
+            writer.publish(60.0, 8.0, 0.0, buzzer_distance_cm=10.0)
+            self.assertEqual(self.call(0, self.da.update_realtime_values, 1)[3].get('backgroundColor'), '#d9534f')
+            self.assertEqual(list(reader.recent()['derece']), [30.0, 40.0, 50.0, 60.0])
+            writer.close()
+            reader.close()
+            # Kanal kapanınca taramanın özet sütunlarına dönülür
+            self.call(1, self.da.update_realtime_values, 1)
+        finally:
+            self.da.live_channel_reader = original
+            writer.close()
+            reader.close()
+
+    def test_empty_database(self):
+        self.call(2, self.da.update_realtime_values, 1)
+        self.call(2, self.da.update_all_graphs, 1)
+        self.call(2, self.da.render_and_update_data_table, "tab-datatable", 1)
+
+
+class PackedStorageTests(TestCase):
+
+    def test_round_trip(self):
+        scan = make_scan(Scan.Status.COMPLETED, 90, timezone.now(), layers=(0.0, 30.0))
+        rows = list(scan.points.order_by('timestamp', 'id').values_list('derece', 'x_cm', 'dikey_aci', 'timestamp'))
+        self.assertEqual(pack_scan_rows(scan, delete_rows=True, chunk_points=32), 90)
+        self.assertEqual(ScanPointChunk.objects.filter(scan=scan).count(), 3)
+        self.assertFalse(scan.points.exists())
+
+        arrays = load_scan_arrays(scan)
+        self.assertEqual(list(arrays['index']), list(range(90)))
+        for i, (derece, x_cm, tilt, timestamp) in enumerate(rows):
+            self.assertAlmostEqual(float(arrays['derece'][i]), derece, places=4)
+            self.assertAlmostEqual(float(arrays['x_cm'][i]), x_cm, places=3)
+            self.assertEqual(float(arrays['dikey_aci'][i]), tilt)
+            self.assertAlmostEqual(float(arrays['timestamp'][i]), timestamp.timestamp(), places=3)
+        self.assertTrue(all(math.isnan(v) for v in arrays['timestamp_2']))
+
+        self.assertEqual(unpack_scan_rows(scan, delete_chunks=True), 90)
+        scan.refresh_from_db()
+        self.assertEqual(scan.point_storage, Scan.PointStorage.ROWS)
+        self.assertEqual(scan.points.count(), 90)
+
+
+class ArchiveTests(TestCase):
+
+    def test_archive_and_restore(self):
+        old = make_scan(Scan.Status.COMPLETED, 90, timezone.now() - timedelta(days=40), layers=(0.0, 30.0))
+        make_scan(Scan.Status.COMPLETED, 30, timezone.now())
+        self.assertEqual(select_scans_to_archive(30), [old.id])
+        distances = list(old.points.filter(dikey_aci=0.0).order_by('derece').values_list('mesafe_cm', flat=True))
+
+        with tempfile.TemporaryDirectory() as archive_dir:
+            bins = archive_scan(old, bin_deg=10.0, archive_dir=archive_dir, pause_s=0)
+            old.refresh_from_db()
+            self.assertEqual(old.point_storage, Scan.PointStorage.ARCHIVED)
+            self.assertFalse(old.points.exists())
+            self.assertEqual(ScanSummaryBin.objects.filter(scan=old).count(), bins)
+            self.assertEqual(sum(ScanSummaryBin.objects.filter(scan=old).values_list('point_count', flat=True)), 90)
+
+            df = scan_points_frame(old, ['derece', 'dikey_aci', 'mesafe_cm', 'mesafe_min_cm', 'mesafe_max_cm'])
+            self.assertEqual(len(df), bins)
+            self.assertAlmostEqual(df[df['dikey_aci'] == 0.0]['mesafe_min_cm'].min(), min(distances), places=4)
+            self.assertAlmostEqual(df[df['dikey_aci'] == 0.0]['mesafe_max_cm'].max(), max(distances), places=4)
+
+            self.assertEqual(restore_scan(old), 90)
+            old.refresh_from_db()
+            self.assertEqual(old.point_storage, Scan.PointStorage.PACKED)
+            self.assertFalse(ScanSummaryBin.objects.filter(scan=old).exists())
+            self.assertEqual(len(scan_points_frame(old, ['mesafe_cm'])), 90)
+
+
+class AdminQueryBudgetTests(TestCase):
+    """Yönetim sayfalarının sorgu sayısı tarama sayısından ve tarama büyüklüğünden bağımsız olmalıdır."""
+
+    def setUp(self):
+        from django.contrib.auth.models import User
+
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'pw'))
+
+    def query_count(self, url):
+        from django.test.utils import CaptureQueriesContext
+
+        self.client.get(url)  # İlk istekteki önbelleğe alınan sorgular (ContentType vb.) sayılmasın
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_pages_are_constant(self):
+        counts = []
+        for scans, points in ((2, 10), (6, 200)):
+            ScanPoint.objects.all().delete()
+            Scan.objects.all().delete()
+            created = [make_scan(Scan.Status.COMPLETED, points, timezone.now() - timedelta(hours=i))
+                       for i in range(scans)]
+            counts.append((self.query_count('/admin/scanner/scan/'),
+                           self.query_count(f'/admin/scanner/scan/{created[0].id}/change/'),
+                           self.query_count(f'/admin/scanner/scanpoint/?scan_id={created[0].id}')))
+        self.assertEqual(counts[0], counts[1])
+
+
+class PointSummaryTests(TestCase):
+    """Yazıcıların artımlı güncellediği özet sütunları baştan hesaplanan değerlerle aynı olmalıdır."""
+
+    def summary(self, scan):
+        return Scan.objects.filter(id=scan.id).values(*SUMMARY_FIELDS).get()
+
+    def test_incremental_rows_match_rebuild(self):
+        source = make_scan(Scan.Status.COMPLETED, 40, timezone.now())
+        scan = Scan.objects.create(status=Scan.Status.RUNNING)
+        for point in source.points.order_by('timestamp').values('derece', 'mesafe_cm', 'hiz_cm_s', 'timestamp'):
+            created = ScanPoint.objects.create(scan=scan, x_cm=0, y_cm=0, z_cm=0, **point)
+            record_points(scan.id, [point['derece']], [point['mesafe_cm']], [point['hiz_cm_s']], point['timestamp'],
+                          created.id)
+        incremental = self.summary(scan)
+        rebuild_scan_summary(scan)
+        self.assertEqual(incremental, self.summary(scan))
+        self.assertEqual(incremental['point_count'], 40)
+
+    def test_chunk_writer_matches_rebuild(self):
+        source = make_scan(Scan.Status.COMPLETED, 50, timezone.now())
+        scan = Scan.objects.create(status=Scan.Status.RUNNING, point_storage=Scan.PointStorage.PACKED)
+        writer = ChunkWriter(scan.id, flush_points=8)
+        for point in source.points.order_by('timestamp').values('derece', 'mesafe_cm', 'hiz_cm_s', 'timestamp'):
+            writer.append(**point)
+        writer.close()
+        incremental = self.summary(scan)
+        rebuild_scan_summary(scan)
+        rebuilt = self.summary(scan)
+        self.assertEqual((incremental['point_count'], incremental['last_point_id']), (50, 50))
+        for name in ('min_distance_cm', 'max_distance_cm', 'last_angle_deg', 'last_distance_cm'):
+            self.assertAlmostEqual(incremental[name], rebuilt[name], places=4)
+
+    def test_no_echo_reading_is_invalid(self):
+        # Yankısız okuma (tam menzil) geometri ve hızdaki gibi özet en büyük mesafeye de sayılmaz
+        scan = Scan.objects.create(status=Scan.Status.RUNNING)
+        now = timezone.now()
+        for i, distance in enumerate((120.0, SENSOR_MAX_DISTANCE_M * 100, 80.0)):
+            created = ScanPoint.objects.create(scan=scan, derece=i, mesafe_cm=distance, x_cm=0, y_cm=0, z_cm=0,
+                                               timestamp=now)
+            record_points(scan.id, [i], [distance], [created.hiz_cm_s], now, created.id)
+        incremental = self.summary(scan)
+        self.assertEqual((incremental['min_distance_cm'], incremental['max_distance_cm']), (80.0, 120.0))
+        rebuild_scan_summary(scan)
+        self.assertEqual(incremental, self.summary(scan))
+
+
+class HeartbeatTests(unittest.TestCase):
+    """İlerleme dosyası atomik yazılır ve veritabanı olmadan okunur."""
+
+    def test_progress_and_eta(self):
+        self.assertEqual(planned_points_per_sweep(90, 10), 10)
+        self.assertEqual(planned_points_per_sweep(-95, 10), 11)
+        with tempfile.TemporaryDirectory() as directory:
+            path = f"{directory}/status.json"
+            self.assertIsNone(read_heartbeat(path))
+            writer = HeartbeatWriter(path, scans_planned=2)
+            writer.start(7, points_planned=10)
+            for angle in range(4):
+                writer.beat(angle * 10.0, 0.0)
+            writer.error("sensör zaman aşımı")
+            state = read_heartbeat(path)
+            self.assertEqual((state['scan_id'], state['points_done'], state['angle_deg']), (7, 4, 30.0))
+            self.assertGreater(state['rate_pps'], 0)
+            self.assertAlmostEqual(state['eta_s'], 6 / state['rate_pps'])
+            self.assertEqual(state['last_error']['message'], "sensör zaman aşımı")
+            self.assertFalse(state['stale'])
+            self.assertTrue(read_heartbeat(path, now=state['updated_at'] + 60)['stale'])
+            writer.finish('COM')
+            state = read_heartbeat(path)
+            self.assertEqual((state['status'], state['scans_done'], state['eta_s']), ('COM', 1, 0.0))
+
+
+class VelocityTests(TestCase):
+    """Akış ve toplu hız tahmini aynı sonucu verir; toplu iş taramalar arasında durumu taşır."""
+
+    def test_streaming_matches_batch(self):
+        rng = np.random.default_rng(1)
+        pan = np.tile(np.arange(0.0, 100.0, 10.0), 6)
+        t = np.arange(pan.size) * 0.6
+        dist = 150.0 - np.where(pan == 30.0, 4.0 * t, 0.0) + rng.normal(0, 0.5, pan.size)
+        dist[[33, 48]] = 0.0, 40.0  # geçersiz okuma ve sıçrama
+        streaming = VelocityEstimator()
+        expected = np.array([streaming.update(p, 0.0, d, tt) for p, d, tt in zip(pan, dist, t)])
+        batch = VelocityEstimator()
+        result = np.r_[batch.update_batch(pan[:25], np.zeros(25), dist[:25], t[:25]),
+                       batch.update_batch(pan[25:], np.zeros(35), dist[25:], t[25:])]
+        np.testing.assert_allclose(result, expected, equal_nan=True)
+        self.assertAlmostEqual(expected[53], -4.0, delta=0.5)
+        self.assertTrue(np.isnan(expected[:10]).all())
+
+    def test_scans_in_sequence(self):
+        now = timezone.now()
+        first = make_scan(Scan.Status.COMPLETED, 30, now - timedelta(seconds=40))
+        second = make_scan(Scan.Status.COMPLETED, 30, now - timedelta(seconds=20))
+        pack_scan_rows(second, delete_rows=True)
+        self.assertEqual([scan.id for scan in scans_for_velocity()], [first.id, second.id])
+        known, total = estimate_scan_velocities(scans_for_velocity())
+        # İlk taramada her açının ilk ölçümü; ikincide aynı açılar 20 s sonra tekrar ölçüldü
+        self.assertEqual((known, total), (30, 60))
+        self.assertFalse(first.points.filter(hiz_cm_s__isnull=False).exists())
+        speeds = load_scan_arrays(second, ['hiz_cm_s'])['hiz_cm_s']
+        np.testing.assert_allclose(speeds, 0.0, atol=1e-3)
+        second.refresh_from_db()
+        self.assertAlmostEqual(second.last_speed_cm_s, 0.0, places=3)
+
+    def test_seed_from_latest_scan(self):
+        # Tek geçişli taramada hız önceki taramanın aynı açıdaki ölçümünden gelir
+        now = timezone.now()
+        previous = make_scan(Scan.Status.COMPLETED, 30, now - timedelta(seconds=20))
+        Scan.objects.filter(id=previous.id).update(end_time=now - timedelta(seconds=10))
+        make_scan(Scan.Status.RUNNING, 30, now)
+        estimator = VelocityEstimator()
+        self.assertEqual(seed_from_latest_scan(estimator, now=now), 30)
+        point = previous.points.order_by('id').first()
+        speed = estimator.update(point.derece, point.dikey_aci, point.mesafe_cm, now.timestamp())
+        self.assertAlmostEqual(speed, 0.0, places=3)
+        # max_gap_s'den önce biten tarama okunmaz
+        self.assertEqual(seed_from_latest_scan(VelocityEstimator(max_gap_s=5.0), now=now), 0)
+
+
+class DetectionThreadTests(unittest.TestCase):
+    """Eşik geçişleri histerezisli olay olarak kuyruğa düşer; örnekler halka tampondadır."""
+
+    def test_crossings_and_ring(self):
+        readings = iter([0.50, 0.25, 0.19, 0.21, 0.18, 0.225, 0.40])  # metre; eşik 20 cm, histerezis 2 cm
+        sensor = type('Sensor', (), {'distance': property(lambda self: next(readings))})()
+        seen = []
+        detector = DetectionThread(sensor, 20.0, lambda: 12.5, ring_size=4,
+                                   on_sample=lambda t, a, d, in_range: seen.append(in_range))
+        for _ in range(7):
+            detector.sample_once()
+        events = detector.poll()
+        self.assertEqual([(e.kind, round(e.distance_cm, 1)) for e in events], [(EVENT_ENTER, 19.0), (EVENT_EXIT, 22.5)])
+        self.assertEqual(seen, [False, False, True, True, True, False, False])
+        self.assertEqual(detector.poll(), [])
+        times, angles, distances = detector.recent()
+        np.testing.assert_allclose(distances, [21.0, 18.0, 22.5, 40.0])
+        self.assertTrue((angles == 12.5).all() and (np.diff(times) >= 0).all())
+        self.assertAlmostEqual(detector.latest()[2], 40.0)
+
+
+class DetectionEventLogTests(TransactionTestCase):
+    """
+    Olaylar ve dönem özetleri yazıcı iş parçacığında partiler halinde yazılır; stop() kuyrukta kalanları da
+    yazar. Isı haritası olayları sayar. Yazıcı kendi bağlantısını kullandığından test bir işleme sarılmaz
+    (TestCase'in açık işlemi bellekteki test veritabanını diğer iş parçacığına kilitlerdi).
+    """
+
+    def test_events_rollups_and_heatmap(self):
+        t0 = timezone.now().timestamp() // 60 * 60 - 600
+        tracker, rollup = DetectionEventTracker(), TelemetryAggregator(period_s=60, bin_deg=5.0)
+        writer = EventLogWriter(batch_size=4, flush_interval_s=0.05)
+        writer.start()
+        samples = [(0, -12.0, 80.0, False), (1, -6.0, 18.0, True), (2, -1.0, 15.0, True), (3, 4.0, 30.0, False),
+                   (70, 4.0, 250.0, False), (71, 9.0, 19.0, True)]
+        for dt, angle, dist, in_range in samples:
+            writer.submit_event(tracker.feed(t0 + dt, angle, dist, in_range))
+            writer.submit_rollups(rollup.add(t0 + dt, angle, dist))
+        writer.submit_event(tracker.close())
+        writer.submit_rollups(rollup.flush())
+        writer.stop()
+        self.assertFalse(writer.is_alive())
+        self.assertEqual((writer.written, writer.dropped, writer.last_error), ({'event': 2, 'rollup': 6}, 0, None))
+        first = DetectionEvent.objects.order_by('start_time').first()
+        self.assertEqual((first.angle_deg, first.min_distance_cm, first.duration_s, first.sample_count),
+                         (-1.0, 15.0, 2.0, 2))
+        cell = TelemetryRollup.objects.get(angle_deg=2.5, period_start__gt=first.start_time)
+        self.assertEqual((cell.sample_count, cell.invalid_count, cell.min_cm), (1, 1, None))
+        since = first.start_time - timedelta(minutes=1)
+        times, angles, counts = detection_heatmap(since, since + timedelta(minutes=4), time_bins=4)
+        np.testing.assert_allclose(angles, [-2.5, 2.5, 7.5])
+        self.assertEqual(counts.tolist(), [[0, 1, 0, 0], [0, 0, 0, 0], [0, 0, 1, 0]])
+        self.assertEqual(len(times), 4)
+
+
+class MedianMadSamplerTests(unittest.TestCase):
+    """Medyan/MAD süzgeci: tutarlı okumalarda erken çıkış, aykırı değer reddi ve kalite skoru."""
+
+    def sample(self, readings, **kwargs):
+        sampler = MedianMadSampler(sample_interval_s=0, **kwargs)
+        result = sampler.sample(iter(readings).__next__)
+        return result, sampler.last_sample_count
+
+    def test_early_exit_when_samples_agree(self):
+        # min_samples=3 okumada MAD toleransın altında: kalan iki okuma alınmaz
+        self.assertEqual(self.sample([100.0, 100.2, 99.9, 150.0, 150.0]), ((100.0, 0.91), 3))
+
+    def test_outlier_rejected(self):
+        # 130 cm medyanı etkilemez; aykırı okuma ve yayılım kaliteyi düşürür
+        (distance, quality), count = self.sample([100.0, 130.0, 101.0, 99.0, 100.5], tolerance_cm=0.5)
+        self.assertEqual((distance, count), (100.5, 5))
+        self.assertAlmostEqual(quality, 0.322)
+
+    def test_invalid_readings(self):
+        # Geçersiz okumalar geçerli okuma oranıyla kaliteyi düşürür; hiç geçerli okuma yoksa kalite 0
+        self.assertEqual(self.sample([0.0, 100.0, 100.5, 100.0]), ((100.0, 0.75), 4))
+        self.assertEqual(self.sample([0.0, 300.0, 0.0, 0.0, 0.0]), ((0.0, 0.0), 5))
+
+
+class FuseDistancesTests(unittest.TestCase):
+    """Her birleştirme dalının mesafesi ve güveni; arşiv katmanı güven 0'ı reddedilmiş okuma sayar."""
+
+    def assertFused(self, dist_1, dist_2, expected_cm, expected_confidence, model=None):
+        fused, confidence = fuse_distances([dist_1], [dist_2], *([model] if model else []))
+        self.assertAlmostEqual(float(fused[0]), expected_cm)
+        self.assertAlmostEqual(float(confidence[0]), expected_confidence)
+
+    def test_agree(self):
+        # Tolerans (5 cm) içinde: eşit ağırlıklı ortalama, güven farkla 1.0'dan 0.5'e düşer
+        self.assertFused(100.0, 102.0, 101.0, 0.8)
+        self.assertFused(100.0, 97.0, 100.0, 1.0, MountingModel(range_offset_cm=3.0))
+
+    def test_disagree(self):
+        # Yakın okuma seçilir, güven 0.3'ün altında
+        self.assertFused(100.0, 120.0, 100.0, 0.075)
+
+    def test_single_valid(self):
+        self.assertFused(100.0, 0.0, 100.0, 0.4)
+        self.assertFused(100.0, float('nan'), 100.0, 0.4)
+        self.assertFused(0.0, 150.0, 150.0, 0.4)
+
+    def test_none_valid(self):
+        self.assertFused(0.0, 0.0, 0.0, 0.0)
+        self.assertFused(260.0, 300.0, 260.0, 0.0)
+
+
+class IncrementalGeometryTests(unittest.TestCase):
+    """Artımlı metrikler vektörel hesapla ve tarama sonundaki eski shoelace/çevre hesabıyla aynıdır."""
+
+    @staticmethod
+    def reference(points):
+        # sensor_script'in eski finalize_scan hesabı: orijinden başlayan kapalı çokgen
+        polygon = [(0.0, 0.0)] + points
+        area = 0.5 * abs(sum(polygon[i][0] * polygon[(i + 1) % len(polygon)][1]
+                             - polygon[(i + 1) % len(polygon)][0] * polygon[i][1] for i in range(len(polygon))))
+        perimeter = math.hypot(*points[0]) + math.hypot(*points[-1]) + sum(
+            math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in zip(points, points[1:]))
+        x, y = [p[0] for p in points], [p[1] for p in points]
+        return {'calculated_area_cm2': area, 'perimeter_cm': perimeter, 'max_width_cm': max(y) - min(y),
+                'max_depth_cm': max(x)}
+
+    def test_matches_batch_and_reference(self):
+        rng = np.random.default_rng(3)
+        angles = np.radians(np.arange(-135.0, 136.0, 5.0))
+        dist = 120.0 + rng.normal(0, 15.0, angles.size)
+        points = list(zip(dist * np.cos(angles), dist * np.sin(angles)))
+        geometry = IncrementalGeometry()
+        self.assertIsNone(geometry.metrics())
+        for x, y in points:
+            geometry.add_point(float(x), float(y))
+        incremental = geometry.metrics()
+        batch = compute_geometry(*zip(*points))
+        expected = self.reference([(float(x), float(y)) for x, y in points])
+        for name, value in expected.items():
+            self.assertAlmostEqual(incremental[name], value, places=6, msg=name)
+            self.assertAlmostEqual(batch[name], value, places=6, msg=name)
+        self.assertIsNone(compute_geometry([1.0, 2.0], [0.0, 1.0]))
+
+
+class JournalTests(TestCase):
+    """Ham ölçüm günlüğünün çökme güvenliği: yarım kayıt, kayıp ilerleme, yarıda kalan ve silinmiş tarama."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.journal_dir = directory.name
+        self.scan = Scan.objects.create(status=Scan.Status.RUNNING)
+
+    def write_journal(self, scan_id, count, finished=False):
+        writer = ScanJournalWriter(self.journal_dir, scan_id)
+        start = timezone.now().timestamp()
+        for i in range(count):
+            writer.append(derece=10.0 * i, mesafe_cm=100.0 + i, x_cm=1.0, y_cm=2.0, z_cm=0.0,
+                          timestamp=start + 0.1 * i)
+        writer.close(finished=finished)
+        return writer.path
+
+    def test_torn_trailing_record_ignored(self):
+        path = self.write_journal(self.scan.id, 3)
+        with open(path, 'ab') as f:
+            f.write(b'\x01' * 20)  # elektrik kesintisinde yarım kalan kayıt
+        self.assertEqual(len(read_records(path)), 3)
+        ingest_journal(path)
+        self.assertEqual(self.scan.points.count(), 3)
+
+    def test_lost_offset_does_not_duplicate(self):
+        path = self.write_journal(self.scan.id, 5)
+        ingest_journal(path)
+        os.remove(path + OFFSET_SUFFIX)
+        ingest_journal(path)
+        self.assertEqual(self.scan.points.count(), 5)
+        self.scan.refresh_from_db()
+        self.assertEqual(self.scan.point_count, 5)
+
+    def test_replay_marks_interrupted(self):
+        path = self.write_journal(self.scan.id, 4)
+        self.assertEqual(replay_pending_journals(self.journal_dir, Scan.Status.INTERRUPTED), {self.scan.id: 4})
+        self.scan.refresh_from_db()
+        self.assertEqual((self.scan.status, self.scan.points.count()), (Scan.Status.INTERRUPTED, 4))
+        self.assertFalse(os.path.exists(path))
+
+    def test_deleted_scan_quarantined(self):
+        orphan = Scan.objects.create(status=Scan.Status.RUNNING)
+        path = self.write_journal(orphan.id, 2, finished=True)
+        orphan.delete()
+        thread = JournalIngestThread(self.journal_dir)
+        thread.ingest_once()
+        self.assertIsNone(thread.last_error)
+        self.assertEqual(pending_journals(self.journal_dir), [])
+        self.assertTrue(os.path.exists(path + '.orphan'))
+        self.assertEqual(replay_pending_journals(self.journal_dir), {})
+
+    def test_header_checked(self):
+        path = self.write_journal(self.scan.id, 2)
+        with open(path, 'rb') as f:
+            self.assertEqual(HEADER_STRUCT.unpack(f.read(HEADER_STRUCT.size))[:3],
+                             (MAGIC, VERSION, RECORD_DTYPE.itemsize))
+        self.assertEqual(os.path.getsize(path), HEADER_STRUCT.size + 2 * RECORD_DTYPE.itemsize)
+        # Sürüm sonradan alan eklediyse eski günlüğün kayıt boyu tutmaz: ayrıştırılmaz
+        with open(path, 'r+b') as f:
+            f.write(HEADER_STRUCT.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize - 8, 12))
+        with self.assertRaises(JournalFormatError):
+            read_records(path)
+        with self.assertRaises(JournalFormatError):
+            ScanJournalWriter(self.journal_dir, self.scan.id)
+        with self.assertRaises(JournalFormatError):
+            ingest_journal(path)
+        self.assertFalse(self.scan.points.exists())
+        self.assertTrue(os.path.exists(path + '.orphan'))
+
+    def test_offset_beyond_records_refused(self):
+        path = self.write_journal(self.scan.id, 2, finished=True)
+        with open(path + OFFSET_SUFFIX, 'w') as f:
+            f.write('5')
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(replay_pending_journals(self.journal_dir), {})
+        self.assertFalse(self.scan.points.exists())
+        self.assertEqual(pending_journals(self.journal_dir), [])
+
+
+class RetentionTests(TestCase):
+    """Saklama kuralları: keep_last en yenileri, çalışan tarama her şeyi korur; kurallar en eskiden birleşir."""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.now = now
+        cls.running = make_scan(Scan.Status.RUNNING, 5, now - timedelta(days=50))
+        cls.a, cls.b, cls.c, cls.d = (make_scan(Scan.Status.COMPLETED, 5, now - timedelta(days=days))
+                                      for days in (40, 20, 10, 1))
+
+    def ids(self, *scans):
+        return [scan.id for scan in scans]
+
+    def test_keep_last(self):
+        self.assertEqual(select_scans_to_prune(keep_last=2), self.ids(self.a, self.b))
+        self.assertEqual(select_scans_to_prune(keep_last=10), [])
+        self.assertEqual(select_scans_to_prune(), [])
+
+    def test_max_age(self):
+        self.assertEqual(select_scans_to_prune(max_age_days=15, now=self.now), self.ids(self.a, self.b))
+        self.assertEqual(select_scans_to_prune(keep_last=3, max_age_days=15, now=self.now), self.ids(self.a))
+
+    def test_age_and_size_oldest_first(self):
+        sizes = {scan.id: 100 for scan in (self.running, self.a, self.b, self.c, self.d)}
+        with mock.patch('scanner.retention.estimate_scan_sizes', return_value=sizes), \
+                mock.patch('scanner.retention.database_space', return_value={'used_bytes': 500}):
+            # Yaş kuralı A'yı seçer (kalan 400); boyut kuralı 250'nin altına inene kadar B ve C'yi ekler
+            self.assertEqual(select_scans_to_prune(max_age_days=30, max_size_bytes=250, now=self.now),
+                             self.ids(self.a, self.b, self.c))
+            self.assertEqual(select_scans_to_prune(keep_last=2, max_age_days=30, max_size_bytes=250, now=self.now),
+                             self.ids(self.a, self.b))
+            self.assertEqual(select_scans_to_prune(max_size_bytes=0), self.ids(self.a, self.b, self.c, self.d))
+
+    def test_delete_in_batches(self):
+        scan = make_scan(Scan.Status.COMPLETED, 25, self.now)
+        with self.assertNumQueries(3 * 2 + 1):  # parti başına seçim + silme, son boş seçim
+            self.assertEqual(delete_in_batches(scan.points.all(), batch_size=10, pause_s=0), 25)
+        self.assertFalse(scan.points.exists())
+        self.assertEqual(delete_scan(self.a.id, batch_size=2, pause_s=0), 5)
+        self.assertFalse(Scan.objects.filter(id=self.a.id).exists())
+        self.assertFalse(ScanPoint.objects.filter(scan_id=self.a.id).exists())
+
+
+class ReanalyzeTests(TestCase):
+    """Yazılan taramalar yeniden çalıştırmada atlanır; biten bir işin hatası partiyi durdurmaz."""
+
+    def test_resume_and_failure(self):
+        now = timezone.now()
+        scans = [make_scan(Scan.Status.COMPLETED, 40, now - timedelta(minutes=i)) for i in range(3)]
+        make_scan(Scan.Status.RUNNING, 40, now)
+        ids = scans_to_reanalyze()
+        self.assertEqual(ids, [scan.id for scan in sorted(scans, key=lambda scan: scan.id)])
+        broken = ids[1]
+
+        def load_job(scan_id, max_valid_cm):
+            job = _load_job(scan_id, max_valid_cm)
+            # Dizisiz iş alt süreçte hata verir
+            return (scan_id, None) + job[2:] if scan_id == broken else job
+
+        seen = []
+        with mock.patch('scanner.analysis._load_job', load_job):
+            ok, failed = reanalyze_scans(ids, workers=1, batch_size=1,
+                                         progress=lambda done, total, scan_id, result: seen.append(scan_id))
+        self.assertEqual((ok, failed), (2, 1))
+        self.assertEqual(sorted(seen), ids)
+        self.assertEqual(scans_to_reanalyze(), [broken])
+        self.assertEqual(reanalyze_scans(scans_to_reanalyze(), workers=1), (1, 0))
+        self.assertEqual(scans_to_reanalyze(), [])
+        self.assertEqual(len(scans_to_reanalyze(force=True)), 3)
+
+
+class LoadTestFeederTests(TransactionTestCase):
+    """Yük testinin canlı taraması özet sütunlarını tarayıcı gibi günceller; anlık değer kartı boş kalmaz."""
+
+    def test_point_count_grows(self):
+        feeder = LiveScanFeeder(rate=200.0, scan_angle=20.0)
+        feeder.start()
+        deadline = time.monotonic() + 10.0
+        while feeder.points_written < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        feeder.stop()
+        self.assertFalse(feeder.is_alive())
+        self.assertGreaterEqual(feeder.points_written, 5)
+        self.assertEqual(feeder.summarized_points(), feeder.points_written)
+        scan = Scan.objects.get(id=feeder.scan_ids[0])
+        self.assertGreater(scan.point_count, 0)
+        self.assertIsNotNone(scan.last_distance_cm)
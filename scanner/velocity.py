@@ -0,0 +1,244 @@
+# scanner/velocity.py
+#
+# Radyal hız tahmini (ScanPoint.hiz_cm_s): aynı açı hücresine (dikey açı, yatay açı; BIN_DEG
+# çözünürlükte) ardışık geçişlerde ya da serbest hareket modunda beklerken gelen ölçümler bir
+# alfa-beta süzgecinden geçirilir. Pozitif hız mesafenin arttığı (nesnenin uzaklaştığı) yöndür.
+#
+# Süzgeç durumu (mesafe, hız, son ölçüm zamanı, ölçüm sayısı) tüm hücreler için önceden ayrılmış
+# NumPy dizilerinde tutulur; update() ölçüm başına O(1)'dir ve tarayıcı bunu her noktada çağırır.
+# update_batch() aynı süzgeci dizilere uygular: noktalar hücre ve zamana göre sıralanır, her
+# hücrenin k. ölçümleri tek bir vektör işleminde güncellenir (döngü sayısı hücre başına en fazla
+# ölçüm sayısıdır). Zaman sıralı girdide iki yol aynı sonucu verir; manage.py estimate_velocities
+# kayıtlı taramaları bu yolla, zaman sırasıyla ve durumu taramalar arasında taşıyarak işler.
+#
+# Bir hücrede ilk ölçümün (ya da MAX_GAP_S'den uzun aradan / GATE_CM'den büyük sıçramadan sonraki
+# ölçümün) hızı bilinmez ve NaN (veritabanında NULL) yazılır. Tek geçişli bir taramada her hücre bir
+# kez ölçüldüğünden tarayıcı süzgeci seed_from_latest_scan ile önceki taramanın noktalarından başlatır.
+
+import numpy as np
+
+from scanner.hardware import SENSOR_MAX_VALID_CM
+
+DEFAULT_BIN_DEG = 1.0
+# Kritik sönümlü alfa-beta: beta = alfa² / (2 - alfa)
+DEFAULT_ALPHA = 0.5
+DEFAULT_BETA = DEFAULT_ALPHA ** 2 / (2 - DEFAULT_ALPHA)
+# Bu süreden uzun ara verilen hücrenin süzgeci sıfırdan başlar
+DEFAULT_MAX_GAP_S = 60.0
+# Tahminden bu kadar sapan ölçüm yeni bir nesne sayılır (hız büyük bir sıçramayla bozulmasın)
+DEFAULT_GATE_CM = 50.0
+# Aynı hücrede bundan kısa aralıklı ölçüm güncelleme yapmaz (aynı zaman damgası)
+MIN_DT_S = 1e-3
+
+VELOCITY_FIELDS = ('derece', 'dikey_aci', 'mesafe_cm', 'mesafe_fused_cm', 'timestamp')
+
+
+class VelocityEstimator:
+    """Açı hücresi başına alfa-beta süzgeci; durum dizileri bir kez ayrılır."""
+
+    def __init__(self, bin_deg=DEFAULT_BIN_DEG, alpha=DEFAULT_ALPHA, beta=None, max_gap_s=DEFAULT_MAX_GAP_S,
+                 gate_cm=DEFAULT_GATE_CM, max_valid_cm=SENSOR_MAX_VALID_CM):
+        self.bin_deg, self.alpha = float(bin_deg), float(alpha)
+        self.beta = float(alpha ** 2 / (2 - alpha) if beta is None else beta)
+        self.max_gap_s, self.gate_cm, self.max_valid_cm = float(max_gap_s), float(gate_cm), float(max_valid_cm)
+        self.angle_bins = max(1, int(round(360.0 / self.bin_deg)))
+        cells = self.angle_bins * self.angle_bins
+        self.range_cm = np.zeros(cells, dtype=np.float64)
+        self.velocity = np.full(cells, np.nan, dtype=np.float64)
+        self.last_time = np.zeros(cells, dtype=np.float64)
+        self.count = np.zeros(cells, dtype=np.int32)
+
+    def reset(self):
+        self.range_cm.fill(0.0)
+        self.velocity.fill(np.nan)
+        self.last_time.fill(0.0)
+        self.count.fill(0)
+
+    def cells(self, pan_deg, tilt_deg):
+        """(yatay, dikey) açılarını hücre indekslerine çevirir; açılar 360° modunda en yakın dilime yuvarlanır."""
+        pan = np.rint(np.asarray(pan_deg, dtype=np.float64) / self.bin_deg).astype(np.int64) % self.angle_bins
+        tilt = np.nan_to_num(np.asarray(tilt_deg, dtype=np.float64), nan=0.0)
+        tilt = np.rint(tilt / self.bin_deg).astype(np.int64) % self.angle_bins
+        return tilt * self.angle_bins + pan
+
+    def update(self, pan_deg, tilt_deg, dist_cm, t):
+        """Tek ölçüm; hücrenin güncel hızını (cm/s) ya da bilinmiyorsa NaN döndürür."""
+        if not 0 < dist_cm < self.max_valid_cm:
+            return float('nan')
+        tilt_deg = 0.0 if tilt_deg is None or tilt_deg != tilt_deg else tilt_deg
+        cell = (int(round(tilt_deg / self.bin_deg)) % self.angle_bins) * self.angle_bins + \
+            int(round(pan_deg / self.bin_deg)) % self.angle_bins
+        count = int(self.count[cell])
+        dt = t - float(self.last_time[cell])
+        if count and 0 <= dt < MIN_DT_S:
+            return float(self.velocity[cell])
+        if count == 0 or dt < 0 or dt > self.max_gap_s:
+            return self._start(cell, dist_cm, t)
+        previous = float(self.range_cm[cell])
+        if count == 1:
+            # İki noktalı başlangıç: ilk hız doğrudan farktan
+            if abs(dist_cm - previous) > self.gate_cm:
+                return self._start(cell, dist_cm, t)
+            velocity = (dist_cm - previous) / dt
+            self.range_cm[cell] = dist_cm
+        else:
+            velocity = float(self.velocity[cell])
+            predicted = previous + velocity * dt
+            residual = dist_cm - predicted
+            if abs(residual) > self.gate_cm:
+                return self._start(cell, dist_cm, t)
+            self.range_cm[cell] = predicted + self.alpha * residual
+            velocity += self.beta * residual / dt
+        self.velocity[cell], self.last_time[cell], self.count[cell] = velocity, t, count + 1
+        return velocity
+
+    def _start(self, cell, dist_cm, t):
+        self.range_cm[cell], self.velocity[cell], self.last_time[cell], self.count[cell] = dist_cm, np.nan, t, 1
+        return float('nan')
+
+    def update_batch(self, pan_deg, tilt_deg, dist_cm, t):
+        """
+        Dizi hâlindeki ölçümleri süzgeçten geçirir ve her ölçümün hızını (ya da NaN) döndürür.
+        Bir hücrenin ölçümleri zaman sırasıyla işlenir; durum sonraki çağrılara taşınır.
+        """
+        dist = np.asarray(dist_cm, dtype=np.float64)
+        t = np.asarray(t, dtype=np.float64)
+        result = np.full(dist.shape, np.nan)
+        valid = np.flatnonzero((dist > 0) & (dist < self.max_valid_cm) & ~np.isnan(t))
+        if valid.size == 0:
+            return result
+        cells = self.cells(np.asarray(pan_deg, dtype=np.float64)[valid],
+                           np.asarray(tilt_deg, dtype=np.float64)[valid] if tilt_deg is not None
+                           else np.zeros(valid.size))
+        order = np.lexsort((t[valid], cells))
+        sorted_cells = cells[order]
+        # Her ölçümün kendi hücresindeki sırası (0, 1, 2, ...)
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_cells)) + 1]
+        rank = np.arange(order.size) - np.repeat(starts, np.diff(np.r_[starts, order.size]))
+        for k in range(int(rank.max()) + 1):
+            step = order[rank == k]
+            result[valid[step]] = self._step(cells[step], dist[valid[step]], t[valid[step]])
+        return result
+
+    def _step(self, cell, dist, t):
+        """update()'in vektör karşılığı; `cell` dizisindeki hücreler birbirinden farklıdır."""
+        count = self.count[cell]
+        previous, velocity, dt = self.range_cm[cell], self.velocity[cell], t - self.last_time[cell]
+        out = np.full(cell.size, np.nan)
+
+        duplicate = (count > 0) & (dt >= 0) & (dt < MIN_DT_S)
+        out[duplicate] = velocity[duplicate]
+        start = ~duplicate & ((count == 0) | (dt < 0) | (dt > self.max_gap_s))
+        second = ~duplicate & ~start & (count == 1)
+        tracking = ~duplicate & ~start & (count > 1)
+        safe_dt = np.where(duplicate | start, 1.0, dt)
+
+        new_range, new_velocity = previous.copy(), velocity.copy()
+        jump = second & (np.abs(dist - previous) > self.gate_cm)
+        second &= ~jump
+        new_velocity[second] = (dist[second] - previous[second]) / safe_dt[second]
+        new_range[second] = dist[second]
+
+        predicted = previous + np.nan_to_num(velocity) * safe_dt
+        residual = dist - predicted
+        jump |= tracking & (np.abs(residual) > self.gate_cm)
+        tracking &= ~jump
+        new_range[tracking] = predicted[tracking] + self.alpha * residual[tracking]
+        new_velocity[tracking] = velocity[tracking] + self.beta * residual[tracking] / safe_dt[tracking]
+
+        start |= jump
+        new_range[start], new_velocity[start] = dist[start], np.nan
+        updated = start | second | tracking
+        self.range_cm[cell[updated]], self.velocity[cell[updated]] = new_range[updated], new_velocity[updated]
+        self.last_time[cell[updated]] = t[updated]
+        self.count[cell[updated]] = np.where(start, 1, count + 1)[updated]
+        out[second | tracking] = new_velocity[second | tracking]
+        return out
+
+
+def measured_distance(arrays):
+    """Hız için kullanılan mesafe: birleşik mesafe varsa o, yoksa ham mesafe."""
+    dist = np.asarray(arrays['mesafe_cm'], dtype=np.float64)
+    fused = np.asarray(arrays.get('mesafe_fused_cm', np.full(dist.size, np.nan)), dtype=np.float64)
+    return np.where(np.isnan(fused), dist, fused)
+
+
+def scans_for_velocity(scan_ids=None, last=None):
+    """Hızı hesaplanacak bitmiş, arşivlenmemiş taramalar; durum taşınabilsin diye eskiden yeniye."""
+    from scanner.models import Scan
+
+    queryset = Scan.objects.exclude(status=Scan.Status.RUNNING).exclude(point_storage=Scan.PointStorage.ARCHIVED)
+    if scan_ids:
+        queryset = queryset.filter(id__in=scan_ids)
+    queryset = queryset.only('id', 'point_storage', 'start_time', 'end_time').order_by('-start_time', '-id')
+    return list(reversed(queryset[:last] if last else queryset))
+
+
+def seed_from_latest_scan(estimator, now=None):
+    """
+    Süzgeci en son bitmiş taramanın noktalarıyla başlatır; böylece yeni taramanın ilk geçişi de aynı
+    açıdaki önceki ölçümle karşılaştırılır. Tarama süzgecin max_gap_s'inden önce bittiyse hiçbir hücre
+    işe yaramayacağından noktalar okunmaz. Süzgeçten geçirilen nokta sayısını döndürür.
+    """
+    from django.utils import timezone
+    from scanner.packed import load_point_arrays
+
+    latest = scans_for_velocity(last=1)
+    if not latest:
+        return 0
+    scan = latest[0]
+    ended = scan.end_time or scan.start_time
+    if ended is None or ((now or timezone.now()) - ended).total_seconds() > estimator.max_gap_s:
+        return 0
+    arrays = load_point_arrays(scan, VELOCITY_FIELDS)
+    if not arrays or not len(arrays['index']):
+        return 0
+    estimator.update_batch(arrays['derece'], arrays['dikey_aci'], measured_distance(arrays), arrays['timestamp'])
+    return len(arrays['index'])
+
+
+def write_scan_velocities(scan, velocity, ids=None, batch_size=500):
+    """
+    Hesaplanan hızları taramanın noktalarına yazar: satır biçiminde `ids` sırasıyla bulk_update,
+    blok biçiminde yalnızca hiz_cm_s sütunu yeniden kodlanır. Özet sütunları yeniden hesaplanır.
+    """
+    from django.db import transaction
+    from scanner.models import Scan, ScanPoint
+    from scanner.packed import rewrite_chunk_field
+    from scanner.summary import rebuild_scan_summary
+
+    values = [None if v != v else float(v) for v in velocity.tolist()]
+    with transaction.atomic():
+        if scan.point_storage == Scan.PointStorage.PACKED:
+            rewrite_chunk_field(scan.id, 'hiz_cm_s', velocity)
+        else:
+            ScanPoint.objects.bulk_update([ScanPoint(id=int(i), hiz_cm_s=v) for i, v in zip(ids, values)],
+                                          ['hiz_cm_s'], batch_size=batch_size)
+    rebuild_scan_summary(scan)
+
+
+def estimate_scan_velocities(scans, estimator=None, progress=None):
+    """
+    Taramaları verilen sırayla (eskiden yeniye) tek bir süzgeç durumuyla işler ve hızları yazar.
+    Her taramadan sonra progress(tarama, hızı bilinen nokta sayısı, nokta sayısı) çağrılır.
+    Toplam (hızı bilinen, toplam) nokta sayısını döndürür.
+    """
+    from scanner.models import Scan
+    from scanner.packed import load_point_arrays
+
+    estimator = estimator or VelocityEstimator()
+    known_total, point_total = 0, 0
+    for scan in scans:
+        fields = VELOCITY_FIELDS + (('id',) if scan.point_storage == Scan.PointStorage.ROWS else ())
+        arrays = load_point_arrays(scan, fields)
+        if not arrays or not len(arrays['index']):
+            continue
+        # Blok biçiminde dizi sırası yazma sırasıdır; zaman sırası süzgeç içinde hücre bazında sağlanır
+        velocity = estimator.update_batch(arrays['derece'], arrays['dikey_aci'], measured_distance(arrays),
+                                          arrays['timestamp'])
+        write_scan_velocities(scan, velocity, arrays.get('id'))
+        known = int(np.count_nonzero(~np.isnan(velocity)))
+        known_total, point_total = known_total + known, point_total + velocity.size
+        if progress:
+            progress(scan, known, velocity.size)
+    return known_total, point_total
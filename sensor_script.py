@@ -7,6 +7,7 @@ import argparse
 import fcntl
 import atexit
 import math
+from datetime import datetime, timezone as dt_timezone
 
 # ==============================================================================
 # --- DJANGO ENTEGRASYONU ---
@@ -19,6 +20,18 @@ try:
     django.setup()
     from django.utils import timezone
     from scanner.models import Scan, ScanPoint
+    from scanner.sampling import MedianMadSampler, DualSensorScheduler
+    from scanner.fusion import MountingModel, fuse_distances
+    from scanner.geometry import IncrementalGeometry
+    from scanner.journal import ScanJournalWriter, JournalIngestThread, default_journal_dir, replay_pending_journals
+    from scanner.sqlite_tuning import checkpoint
+    from scanner.packed import ChunkWriter
+    from scanner.summary import record_points
+    from scanner.heartbeat import DEFAULT_HEARTBEAT_PATH, HeartbeatWriter, planned_points_per_sweep
+    from scanner.live_channel import DEFAULT_CHANNEL_NAME, LiveChannelWriter, SOURCE_SCAN
+    from scanner.velocity import (DEFAULT_BIN_DEG as DEFAULT_VELOCITY_BIN_DEG, DEFAULT_MAX_GAP_S, VelocityEstimator,
+                                  seed_from_latest_scan)
+    from django.db import transaction
 
     print("SensorScript: Django entegrasyonu başarılı.")
 except Exception as e:
@@ -28,8 +41,13 @@ except Exception as e:
 # ==============================================================================
 # --- Donanım ve GPIO Kütüphaneleri ---
 # ==============================================================================
-from gpiozero import DistanceSensor, LED, Buzzer, OutputDevice, Servo
-from RPLCD.i2c import CharLCD
+# SCANNER_HARDWARE_BACKEND=sim ile Raspberry Pi olmadan simüle donanımla çalışır
+from scanner.hardware import SENSOR_MAX_DISTANCE_M, SENSOR_MAX_VALID_CM, load_backend
+
+hardware_backend = load_backend()
+TriggeredDistanceSensor, LED, Buzzer, OutputDevice, Servo, CharLCD = (
+    hardware_backend.TriggeredDistanceSensor, hardware_backend.LED, hardware_backend.Buzzer,
+    hardware_backend.OutputDevice, hardware_backend.Servo, hardware_backend.CharLCD)
 
 # ==============================================================================
 # --- KONTROL DEĞİŞKENİ ---
@@ -61,7 +79,41 @@ DEFAULT_BUZZER_DISTANCE = 10
 DEFAULT_INVERT_MOTOR_DIRECTION = False
 DEFAULT_STEPS_PER_REVOLUTION = 4096
 DEFAULT_SERVO_ANGLE = 90
+# Açı başına çoklu örnekleme (1 = eski tek okuma davranışı)
+DEFAULT_SAMPLES_PER_ANGLE = 1
+DEFAULT_SAMPLE_TOLERANCE_CM = 1.5
+# Tekrarlı tarama (0 = durdurulana kadar sürekli) ve yön değişiminde dişli boşluğu telafisi
+DEFAULT_SCAN_REPEATS = 1
+DEFAULT_SERPENTINE_MODE = False
+DEFAULT_BACKLASH_DEG = 0.0
+# Hacimsel tarama: dikey adım 0 ise tek katman (--servo_angle) taranır
+DEFAULT_TILT_START_ANGLE, DEFAULT_TILT_END_ANGLE, DEFAULT_TILT_STEP_ANGLE = 45.0, 135.0, 0.0
+SERVO_SETTLE_TIME = 0.5
+# İki sensör eşzamanlı okunur; tetiklemeler arasında en az bu kadar süre bırakılır
+# (2.5 m menzilde yankı penceresi ~14.6 ms, daha kısa aralıkta çapraz karışma olur)
+DEFAULT_CONCURRENT_SENSORS = True
+DEFAULT_INTER_TRIGGER_GAP_MS = 15.0
+# İki sensör okumasının birleştirilmesi ve ikinci sensörün montaj modeli (birinci sensöre göre)
+DEFAULT_FUSE_SENSORS = True
+DEFAULT_SENSOR2_RANGE_OFFSET_CM, DEFAULT_SENSOR2_LATERAL_OFFSET_CM, DEFAULT_SENSOR2_ANGLE_OFFSET_DEG = 0.0, 0.0, 0.0
+# Tarama sürerken alan/çevre metriklerinin Scan satırına yazılma aralığı (saniye)
+DEFAULT_LIVE_METRICS_INTERVAL_S = 1.0
+# Ölçümler önce yalnızca-ekleme günlüğüne yazılır, arka planda toplu olarak veritabanına aktarılır
+DEFAULT_USE_JOURNAL = True
+DEFAULT_JOURNAL_INGEST_INTERVAL_S = 1.0
+# 'rows': her nokta bir ScanPoint satırı; 'packed': ScanPointChunk blokları (scanner/packed.py)
+DEFAULT_POINT_STORAGE = 'rows'
+DEFAULT_PACKED_FLUSH_POINTS = 32
+# Panelin veritabanına dokunmadan okuduğu ilerleme dosyası (scanner/heartbeat.py)
+DEFAULT_HEARTBEAT_FILE = DEFAULT_HEARTBEAT_PATH
+# Panelin anlık değer kartının okuduğu paylaşımlı bellek halkası (scanner/live_channel.py); boş ise kapalı
+DEFAULT_LIVE_CHANNEL = DEFAULT_CHANNEL_NAME
+# Aynı açıya ardışık geçişlerdeki ölçümlerden radyal hız (hiz_cm_s) tahmini (scanner/velocity.py).
+# None: DEFAULT_MAX_GAP_S, ama bir hücreye dönüş (tüm katmanlarıyla bir tarama) bundan uzun sürüyorsa
+# iki tarama süresi; yoksa ince adımlı geniş taramalarda hız hiç hesaplanmaz.
+DEFAULT_VELOCITY_MAX_GAP_S = None
 STEP_MOTOR_INTER_STEP_DELAY, STEP_MOTOR_SETTLE_TIME, LOOP_TARGET_INTERVAL_S = 0.0015, 0.05, 0.6
+READ_INDICATOR_LED_TIME_S = 0.05
 
 # ==============================================================================
 # --- Global Değişkenler ---
@@ -79,6 +131,21 @@ step_sequence = [[1, 0, 0, 0], [1, 1, 0, 0], [0, 1, 0, 0], [0, 1, 1, 0], [0, 0,
                  [1, 0, 0, 1]]
 SCAN_DURATION_ANGLE_PARAM, SCAN_STEP_ANGLE, BUZZER_DISTANCE_CM, INVERT_MOTOR_DIRECTION = DEFAULT_SCAN_DURATION_ANGLE, DEFAULT_SCAN_STEP_ANGLE, DEFAULT_BUZZER_DISTANCE, DEFAULT_INVERT_MOTOR_DIRECTION
 SERVO_ANGLE_PARAM = DEFAULT_SERVO_ANGLE
+SAMPLES_PER_ANGLE, SAMPLE_TOLERANCE_CM = DEFAULT_SAMPLES_PER_ANGLE, DEFAULT_SAMPLE_TOLERANCE_CM
+sampler, sampler2 = None, None
+CONCURRENT_SENSORS, INTER_TRIGGER_GAP_MS = DEFAULT_CONCURRENT_SENSORS, DEFAULT_INTER_TRIGGER_GAP_MS
+dual_scheduler = None
+FUSE_SENSORS, mounting_model = DEFAULT_FUSE_SENSORS, MountingModel()
+LIVE_METRICS_INTERVAL_S = DEFAULT_LIVE_METRICS_INTERVAL_S
+USE_JOURNAL, JOURNAL_DIR = DEFAULT_USE_JOURNAL, default_journal_dir()
+journal_writer, journal_ingest_thread = None, None
+POINT_STORAGE, chunk_writer = DEFAULT_POINT_STORAGE, None
+SCAN_REPEATS, SERPENTINE_MODE, BACKLASH_DEG = DEFAULT_SCAN_REPEATS, DEFAULT_SERPENTINE_MODE, DEFAULT_BACKLASH_DEG
+last_physical_direction_positive = None
+HEARTBEAT_FILE, heartbeat = DEFAULT_HEARTBEAT_FILE, None
+LIVE_CHANNEL, live_channel = DEFAULT_LIVE_CHANNEL, None
+velocity_estimator = None
+TILT_START_ANGLE, TILT_END_ANGLE, TILT_STEP_ANGLE = DEFAULT_TILT_START_ANGLE, DEFAULT_TILT_END_ANGLE, DEFAULT_TILT_STEP_ANGLE
 
 
 # ==============================================================================
@@ -109,8 +176,10 @@ def init_hardware():
         else:
             print("[UYARI] Motor bağlı değil. Motor pinleri atlanıyor.")
 
-        sensor = DistanceSensor(echo=ECHO_PIN, trigger=TRIG_PIN, max_distance=2.5, queue_len=2)
-        sensor2 = DistanceSensor(echo=ECHO2_PIN, trigger=TRIG2_PIN, max_distance=2.5, queue_len=2)
+        # Her okuma tek darbe gönderir (scanner/hcsr04.py): iki sensörün ne zaman tetikleneceğini
+        # DualSensorScheduler belirler ve çoklu örneklemenin okumaları birbirinden bağımsızdır
+        sensor = TriggeredDistanceSensor(echo=ECHO_PIN, trigger=TRIG_PIN, max_distance=SENSOR_MAX_DISTANCE_M)
+        sensor2 = TriggeredDistanceSensor(echo=ECHO2_PIN, trigger=TRIG2_PIN, max_distance=SENSOR_MAX_DISTANCE_M)
         servo = Servo(SERVO_PIN)
         servo.value = degree_to_servo_value(0)
 
@@ -154,7 +223,7 @@ def _step_motor_4in(num_steps, direction_positive):
 
 
 def move_motor_to_angle(target_angle_deg):
-    global current_motor_angle_global
+    global current_motor_angle_global, last_physical_direction_positive
     if not MOTOR_BAGLI:
         current_motor_angle_global = target_angle_deg
         return
@@ -169,24 +238,67 @@ def move_motor_to_angle(target_angle_deg):
     if num_steps == 0: return
     logical_dir_positive = (angle_diff > 0)
     physical_dir_positive = not logical_dir_positive if INVERT_MOTOR_DIRECTION else logical_dir_positive
-    _step_motor_4in(num_steps, physical_dir_positive)
+    # Yön değiştiğinde dişli boşluğunu almak için fazladan adım at; bu adımlar açıya eklenmez
+    backlash_steps = 0
+    if last_physical_direction_positive is not None and physical_dir_positive != last_physical_direction_positive:
+        backlash_steps = round(BACKLASH_DEG / DEG_PER_STEP)
+    last_physical_direction_positive = physical_dir_positive
+    _step_motor_4in(num_steps + backlash_steps, physical_dir_positive)
     current_motor_angle_global += (num_steps * DEG_PER_STEP * (1 if logical_dir_positive else -1))
 
 
-def shoelace_formula(points): return 0.5 * abs(sum(
-    points[i][0] * points[(i + 1) % len(points)][1] - points[(i + 1) % len(points)][0] * points[i][1] for i in
-    range(len(points))))
+def set_servo_tilt(angle_deg):
+    servo.value = degree_to_servo_value(angle_deg)
+    time.sleep(SERVO_SETTLE_TIME)
+
+
+def build_tilt_layers():
+    """Hacimsel modda taranacak dikey açıları (uçlar dahil), aksi halde tek --servo_angle katmanını döndürür."""
+    if TILT_STEP_ANGLE <= 0:
+        return [SERVO_ANGLE_PARAM]
+    low, high = sorted((max(0.0, TILT_START_ANGLE), min(180.0, TILT_END_ANGLE)))
+    layer_count = int(math.floor((high - low) / TILT_STEP_ANGLE + 1e-9)) + 1
+    layers = [round(low + i * TILT_STEP_ANGLE, 3) for i in range(layer_count)]
+    if high - layers[-1] > 1e-6: layers.append(high)
+    return layers
+
+
+def init_samplers():
+    global sampler, sampler2, dual_scheduler
+    sampler, sampler2 = None, None
+    if SAMPLES_PER_ANGLE > 1:
+        sampler = MedianMadSampler(max_samples=SAMPLES_PER_ANGLE, tolerance_cm=SAMPLE_TOLERANCE_CM,
+                                   valid_max_cm=SENSOR_MAX_VALID_CM)
+        sampler2 = MedianMadSampler(max_samples=SAMPLES_PER_ANGLE, tolerance_cm=SAMPLE_TOLERANCE_CM,
+                                    valid_max_cm=SENSOR_MAX_VALID_CM)
+    # Her sensör kendi örnekleyicisiyle (ayrı tamponlar) kendi iş parçacığında okunur
+    read_1 = (lambda: sampler.sample(lambda: sensor.distance * 100)) if sampler else (
+        lambda: (sensor.distance * 100, None))
+    read_2 = (lambda: sampler2.sample(lambda: sensor2.distance * 100)) if sampler2 else (
+        lambda: (sensor2.distance * 100, None))
+    dual_scheduler = DualSensorScheduler(read_1, read_2, inter_trigger_gap_s=INTER_TRIGGER_GAP_MS / 1000.0,
+                                         concurrent=CONCURRENT_SENSORS)
+
+
+def read_distances():
+    """
+    İki sensörden (mesafe_cm, mesafe_cm_2, kalite, zaman_1, zaman_2) okur.
+    Tek örnek modunda kalite None döner; zamanlar her sensörün okuma anıdır.
+    """
+    (dist_cm, quality), time_1, (dist_cm_2, _), time_2 = dual_scheduler.sample()
+    return (dist_cm, dist_cm_2, quality, datetime.fromtimestamp(time_1, tz=dt_timezone.utc),
+            datetime.fromtimestamp(time_2, tz=dt_timezone.utc))
 
 
-def calculate_perimeter(points):
-    perimeter = math.hypot(points[0][0], points[0][1])
-    for i in range(len(points) - 1): perimeter += math.hypot(points[i + 1][0] - points[i][0],
-                                                             points[i + 1][1] - points[i][1])
-    perimeter += math.hypot(points[-1][0], points[-1][1])
-    return perimeter
+def fuse_reading(dist_cm, dist_cm_2):
+    """Tek açının iki okumasını birleştirir; birleştirme kapalıysa (mesafe_cm, None) döner."""
+    if not FUSE_SENSORS:
+        return dist_cm, None
+    fused, confidence = fuse_distances(dist_cm, dist_cm_2, mounting_model)
+    return float(fused), float(confidence)
 
 
-def create_scan_entry(start_angle, end_angle, step_angle, buzzer_dist, invert_dir):
+def create_scan_entry(start_angle, end_angle, step_angle, buzzer_dist, invert_dir, tilt_layers):
     global current_scan_object_global
     try:
         Scan.objects.filter(status=Scan.Status.RUNNING).update(status=Scan.Status.ERROR)
@@ -194,14 +306,78 @@ def create_scan_entry(start_angle, end_angle, step_angle, buzzer_dist, invert_di
                                                          step_angle_setting=step_angle,
                                                          buzzer_distance_setting=buzzer_dist,
                                                          invert_motor_direction_setting=invert_dir,
+                                                         tilt_start_angle_setting=tilt_layers[0],
+                                                         tilt_end_angle_setting=tilt_layers[-1],
+                                                         tilt_layer_count=len(tilt_layers),
+                                                         point_storage=(Scan.PointStorage.PACKED
+                                                                        if POINT_STORAGE == 'packed'
+                                                                        else Scan.PointStorage.ROWS),
                                                          status=Scan.Status.RUNNING)
         print(f"Yeni tarama kaydı veritabanında oluşturuldu: ID #{current_scan_object_global.id}")
+        open_scan_journal(current_scan_object_global)
+        open_chunk_writer(current_scan_object_global)
+        if live_channel: live_channel.start_scan(current_scan_object_global.id)
+        if heartbeat:
+            heartbeat.start(current_scan_object_global.id,
+                            len(tilt_layers) * planned_points_per_sweep(end_angle - start_angle, step_angle),
+                            len(tilt_layers))
         return True
     except Exception as e:
         print(f"DB Hatası (create_scan_entry): {e}");
+        if heartbeat: heartbeat.error(f"create_scan_entry: {e}")
         return False
 
 
+def open_scan_journal(scan_obj):
+    """Önceki taramanın günlüğünü kapatır, yeni tarama için günlük dosyası açar."""
+    global journal_writer
+    if not USE_JOURNAL: return
+    if journal_writer: journal_writer.close(finished=True)
+    journal_writer = ScanJournalWriter(JOURNAL_DIR, scan_obj.id)
+
+
+def open_chunk_writer(scan_obj):
+    """Günlük kapalıyken blok biçimindeki tarama için noktaları bellekte toplayıp blok blok yazan yazıcıyı açar."""
+    global chunk_writer
+    if chunk_writer: chunk_writer.close()
+    chunk_writer = None
+    if USE_JOURNAL or scan_obj.point_storage != Scan.PointStorage.PACKED: return
+    chunk_writer = ChunkWriter(scan_obj.id, flush_points=DEFAULT_PACKED_FLUSH_POINTS)
+
+
+def open_live_channel():
+    """Anlık değer kanalını açar; paylaşımlı bellek kullanılamıyorsa tarama kanalsız sürer."""
+    global live_channel
+    if not LIVE_CHANNEL: return
+    try:
+        live_channel = LiveChannelWriter(LIVE_CHANNEL, source=SOURCE_SCAN)
+    except Exception as e:
+        print(f"UYARI: Anlık değer kanalı açılamadı: {e}")
+        live_channel = None
+
+
+def start_journal_ingest():
+    """Yarıda kalmış önceki taramaların günlüklerini aktarır ve arka plan aktarım iş parçacığını başlatır."""
+    global journal_ingest_thread
+    if not USE_JOURNAL: return
+    for scan_id, count in replay_pending_journals(JOURNAL_DIR, Scan.Status.INTERRUPTED).items():
+        print(f"Günlük kurtarıldı: Tarama #{scan_id}, {count} nokta veritabanına aktarıldı.")
+    journal_ingest_thread = JournalIngestThread(JOURNAL_DIR, interval_s=DEFAULT_JOURNAL_INGEST_INTERVAL_S)
+    journal_ingest_thread.start()
+
+
+def save_scan_point(scan_obj, **fields):
+    """Ölçümü günlüğe ekler (veritabanı kilidi beklenmez); günlük kapalıysa doğrudan veritabanına yazar."""
+    if journal_writer and journal_writer.scan_id == scan_obj.id:
+        journal_writer.append(**fields)
+    elif chunk_writer and chunk_writer.scan_id == scan_obj.id:
+        chunk_writer.append(**fields)
+    else:
+        with transaction.atomic():
+            point = ScanPoint.objects.create(scan=scan_obj, **fields)
+            record_points(scan_obj.id, [point.derece], [point.mesafe_cm], [point.hiz_cm_s], point.timestamp, point.id)
+
+
 def acquire_lock_and_pid():
     global lock_file_handle
     try:
@@ -217,18 +393,30 @@ def acquire_lock_and_pid():
 def release_resources_on_exit():
     pid = os.getpid();
     print(f"[{pid}] Kaynaklar serbest bırakılıyor... Durum: {script_exit_status_global}")
+    if journal_writer: journal_writer.close(finished=True)
+    if chunk_writer:
+        try:
+            chunk_writer.flush()
+        except Exception as e:
+            print(f"Bekleyen nokta bloğu yazılamadı: {e}")
+    if journal_ingest_thread:
+        journal_ingest_thread.stop()
+        if journal_ingest_thread.last_error: print(f"Günlük aktarım HATA: {journal_ingest_thread.last_error}")
     if current_scan_object_global:
         try:
             scan_to_update = Scan.objects.get(id=current_scan_object_global.id)
-            if scan_to_update.status == Scan.Status.RUNNING: scan_to_update.status = script_exit_status_global; scan_to_update.save()
+            if scan_to_update.status == Scan.Status.RUNNING: scan_to_update.status = script_exit_status_global; scan_to_update.save(update_fields=['status'])
         except Exception as e:
             print(f"DB çıkış HATA: {e}")
+    if heartbeat and heartbeat.state.get('status') == 'running': heartbeat.finish(script_exit_status_global)
     if MOTOR_BAGLI: _set_step_pins(0, 0, 0, 0)
     if lcd:
         try:
             lcd.clear()
         except Exception as e:
             print(f"LCD temizlenirken hata: {e}")
+    if dual_scheduler: dual_scheduler.close()
+    if live_channel: live_channel.close()
     for dev in [sensor, sensor2, servo, yellow_led, buzzer, in1_dev, in2_dev, in3_dev, in4_dev, lcd]:
         if dev and hasattr(dev, 'close'):
             try:
@@ -249,6 +437,144 @@ def release_resources_on_exit():
     print(f"[{pid}] Temizleme tamamlandı.")
 
 
+def write_live_metrics(scan_obj, geometry):
+    """Tarama sürerken ara metrikleri yalnızca ilgili sütunları güncelleyerek yazar."""
+    metrics = geometry.metrics()
+    if not metrics: return
+    try:
+        Scan.objects.filter(id=scan_obj.id).update(**metrics)
+    except Exception as e:
+        print(f"UYARI: Canlı metrikler yazılamadı: {e}")
+        if heartbeat: heartbeat.error(f"Canlı metrikler: {e}")
+
+
+def perform_sweep(scan_obj, physical_reference_angle, start_logical, end_logical, tilt_angle, geometry=None):
+    """
+    Mantıksal [start_logical -> end_logical] aralığını `tilt_angle` dikey açısında, her iki yönde de tarayabilir.
+    Her açıdaki okumayı `scan_obj`'a yazar. `geometry` verilmişse geçerli (x, y) noktaları ona eklenir ve
+    ara metrikler LIVE_METRICS_INTERVAL_S aralıklarla taramaya yazılır. Geçerli nokta sayısını döndürür.
+    """
+    pid = os.getpid()
+    step = SCAN_STEP_ANGLE if end_logical >= start_logical else -SCAN_STEP_ANGLE
+    valid_point_count, current_logical_angle = 0, start_logical
+
+    while True:
+        target_physical_angle_for_step = physical_reference_angle + current_logical_angle
+        move_motor_to_angle(target_physical_angle_for_step)
+
+        if yellow_led: yellow_led.on(); time.sleep(READ_INDICATOR_LED_TIME_S)
+        dist_cm, dist_cm_2, point_quality, read_time_1, read_time_2 = read_distances()
+        if yellow_led: yellow_led.off()
+
+        quality_info = f" (Q:{point_quality:.2f}, n:{sampler.last_sample_count})" if sampler else ""
+        print(f"  Okuma: Yatay {current_logical_angle:.1f}° -> S1:{dist_cm:.1f} cm, S2:{dist_cm_2:.1f} cm{quality_info}")
+
+        min_dist = min(dist_cm, dist_cm_2)
+        if buzzer: buzzer.on() if min_dist < BUZZER_DISTANCE_CM else buzzer.off()
+
+        if lcd:
+            try:
+                if min_dist < BUZZER_DISTANCE_CM:
+                    lcd.cursor_pos = (0, 0);
+                    lcd.write_string("! YAKIN NESNE !".ljust(LCD_COLS))
+                    lcd.cursor_pos = (1, 0);
+                    lcd.write_string(f"Mesafe: {min_dist:<5.1f}cm".ljust(LCD_COLS))
+                else:
+                    lcd.cursor_pos = (0, 0);
+                    lcd.write_string(f"Aci(Y):{current_logical_angle:<6.1f}".ljust(LCD_COLS))
+                    lcd.cursor_pos = (1, 0);
+                    lcd.write_string(f"Mesafe: {dist_cm:<5.1f}cm".ljust(LCD_COLS))
+            except Exception as e_lcd_loop:
+                print(f"UYARI: Döngü içinde LCD'ye yazılamadı: {e_lcd_loop}")
+
+        fused_cm, fusion_confidence = fuse_reading(dist_cm, dist_cm_2)
+
+        angle_pan_rad = math.radians(current_logical_angle)
+        angle_tilt_rad = math.radians(tilt_angle)
+
+        # Gerçek 3D Koordinatların Hesaplanması (birleştirme açıksa birleşik mesafeden)
+        horizontal_radius = fused_cm * math.cos(angle_tilt_rad)
+        z_cm_val = fused_cm * math.sin(angle_tilt_rad)
+        x_cm_val = horizontal_radius * math.cos(angle_pan_rad)
+        y_cm_val = horizontal_radius * math.sin(angle_pan_rad)
+
+        point_is_valid = 0 < fused_cm < (sensor.max_distance * 100 - 1) and fusion_confidence != 0.0
+        if point_is_valid:
+            valid_point_count += 1
+        # Geçersiz okuma süzgeç durumunu değiştirmez; hız bilinmiyorsa NULL yazılır
+        speed_cm_s = velocity_estimator.update(current_logical_angle, tilt_angle,
+                                               fused_cm if point_is_valid else float('nan'),
+                                               read_time_1.timestamp()) if velocity_estimator else float('nan')
+
+        save_scan_point(
+            scan_obj,
+            derece=current_logical_angle,
+            mesafe_cm=dist_cm,
+            x_cm=x_cm_val,
+            y_cm=y_cm_val,
+            z_cm=z_cm_val,
+            dikey_aci=tilt_angle,
+            mesafe_cm_2=dist_cm_2,
+            quality=point_quality,
+            mesafe_fused_cm=fused_cm if FUSE_SENSORS else None,
+            fusion_confidence=fusion_confidence,
+            hiz_cm_s=None if speed_cm_s != speed_cm_s else speed_cm_s,
+            timestamp=read_time_1,
+            timestamp_2=read_time_2
+        )
+        if live_channel:
+            live_channel.publish(current_logical_angle, dist_cm, tilt_angle, dist_cm_2, speed_cm_s,
+                                 buzzer_distance_cm=BUZZER_DISTANCE_CM, alert=min_dist < BUZZER_DISTANCE_CM,
+                                 timestamp=read_time_1.timestamp())
+        if heartbeat: heartbeat.beat(current_logical_angle, tilt_angle)
+
+        if geometry is not None and point_is_valid:
+            # Alan/çevre hesabı için 2D projeksiyonu kullanıyoruz
+            geometry.add_point(x_cm_val, y_cm_val)
+            if geometry.should_flush(): write_live_metrics(scan_obj, geometry)
+
+        if abs(current_logical_angle - end_logical) < (SCAN_STEP_ANGLE / 20.0) or \
+                (current_logical_angle >= end_logical if step > 0 else current_logical_angle <= end_logical):
+            print(f"[{pid}] Tarama bitti, mantıksal son açıya ({current_logical_angle:.1f}°) ulaşıldı.");
+            break
+
+        current_logical_angle += step
+        current_logical_angle = min(current_logical_angle, end_logical) if step > 0 else max(current_logical_angle,
+                                                                                              end_logical)
+        time.sleep(max(0, LOOP_TARGET_INTERVAL_S - STEP_MOTOR_SETTLE_TIME))
+
+    return valid_point_count
+
+
+def finalize_scan(scan_obj, geometry):
+    """Biriktirilen alan/çevre/genişlik/derinlik değerlerini yazar, taramanın son durumunu kaydedip döndürür."""
+    global chunk_writer
+    if chunk_writer and chunk_writer.scan_id == scan_obj.id:
+        chunk_writer.close()
+        chunk_writer = None
+    metrics = geometry.metrics()
+    if metrics:
+        for field, value in metrics.items(): setattr(scan_obj, field, value)
+        final_status = Scan.Status.COMPLETED
+    else:
+        final_status = Scan.Status.INSUFFICIENT_POINTS
+    scan_obj.status = final_status
+    scan_obj.end_time = timezone.now()
+    # Yalnızca bu alanlar yazılır; nokta özet sütunlarını yazıcılar artımlı güncelliyor (scanner/summary.py)
+    scan_obj.save(update_fields=['status', 'end_time', *(metrics or {})])
+    # Yazıcı artık boşta; tarama boyunca büyüyen WAL dosyasını boşalt (bkz. scanner/sqlite_tuning.py)
+    try:
+        checkpoint()
+    except Exception as e:
+        print(f"WAL kontrol noktası yapılamadı: {e}")
+    return final_status
+
+
+def select_area_tilt(tilt_layers):
+    """Alan/çevre hesabında kullanılan en yatay (dikey açısı 0°'a en yakın) katmanı seçer."""
+    return min(tilt_layers, key=abs)
+
+
 # ==============================================================================
 # --- ANA ÇALIŞMA BLOĞU ---
 # ==============================================================================
@@ -261,6 +587,28 @@ if __name__ == "__main__":
                         default=DEFAULT_INVERT_MOTOR_DIRECTION)
     parser.add_argument("--steps_per_rev", type=int, default=DEFAULT_STEPS_PER_REVOLUTION)
     parser.add_argument("--servo_angle", type=float, default=DEFAULT_SERVO_ANGLE)
+    parser.add_argument("--samples_per_angle", type=int, default=DEFAULT_SAMPLES_PER_ANGLE)
+    parser.add_argument("--sample_tolerance_cm", type=float, default=DEFAULT_SAMPLE_TOLERANCE_CM)
+    parser.add_argument("--scan_repeats", type=int, default=DEFAULT_SCAN_REPEATS)
+    parser.add_argument("--serpentine", type=lambda x: str(x).lower() == 'true', default=DEFAULT_SERPENTINE_MODE)
+    parser.add_argument("--backlash_deg", type=float, default=DEFAULT_BACKLASH_DEG)
+    parser.add_argument("--tilt_start", type=float, default=DEFAULT_TILT_START_ANGLE)
+    parser.add_argument("--tilt_end", type=float, default=DEFAULT_TILT_END_ANGLE)
+    parser.add_argument("--tilt_step", type=float, default=DEFAULT_TILT_STEP_ANGLE)
+    parser.add_argument("--concurrent_sensors", type=lambda x: str(x).lower() == 'true',
+                        default=DEFAULT_CONCURRENT_SENSORS)
+    parser.add_argument("--inter_trigger_gap_ms", type=float, default=DEFAULT_INTER_TRIGGER_GAP_MS)
+    parser.add_argument("--fuse_sensors", type=lambda x: str(x).lower() == 'true', default=DEFAULT_FUSE_SENSORS)
+    parser.add_argument("--sensor2_range_offset_cm", type=float, default=DEFAULT_SENSOR2_RANGE_OFFSET_CM)
+    parser.add_argument("--sensor2_lateral_offset_cm", type=float, default=DEFAULT_SENSOR2_LATERAL_OFFSET_CM)
+    parser.add_argument("--sensor2_angle_offset_deg", type=float, default=DEFAULT_SENSOR2_ANGLE_OFFSET_DEG)
+    parser.add_argument("--live_metrics_interval", type=float, default=DEFAULT_LIVE_METRICS_INTERVAL_S)
+    parser.add_argument("--use_journal", type=lambda x: str(x).lower() == 'true', default=DEFAULT_USE_JOURNAL)
+    parser.add_argument("--journal_dir", type=str, default=JOURNAL_DIR)
+    parser.add_argument("--point_storage", choices=('rows', 'packed'), default=DEFAULT_POINT_STORAGE)
+    parser.add_argument("--heartbeat_file", type=str, default=DEFAULT_HEARTBEAT_FILE)
+    parser.add_argument("--live_channel", type=str, default=DEFAULT_LIVE_CHANNEL)
+    parser.add_argument("--velocity_max_gap_s", type=float, default=DEFAULT_VELOCITY_MAX_GAP_S)
     args = parser.parse_args()
 
     SCAN_DURATION_ANGLE_PARAM = float(args.scan_duration_angle)
@@ -269,12 +617,34 @@ if __name__ == "__main__":
     INVERT_MOTOR_DIRECTION = bool(args.invert_motor_direction)
     STEPS_PER_REVOLUTION_OUTPUT_SHAFT = int(args.steps_per_rev)
     SERVO_ANGLE_PARAM = float(args.servo_angle)
+    SAMPLES_PER_ANGLE = max(1, int(args.samples_per_angle))
+    SAMPLE_TOLERANCE_CM = float(args.sample_tolerance_cm)
+    SCAN_REPEATS = max(0, int(args.scan_repeats))
+    SERPENTINE_MODE = bool(args.serpentine)
+    BACKLASH_DEG = max(0.0, float(args.backlash_deg))
+    TILT_START_ANGLE, TILT_END_ANGLE = float(args.tilt_start), float(args.tilt_end)
+    TILT_STEP_ANGLE = max(0.0, float(args.tilt_step))
+    CONCURRENT_SENSORS = bool(args.concurrent_sensors)
+    INTER_TRIGGER_GAP_MS = max(0.0, float(args.inter_trigger_gap_ms))
+    FUSE_SENSORS = bool(args.fuse_sensors)
+    mounting_model = MountingModel(range_offset_cm=args.sensor2_range_offset_cm,
+                                   lateral_offset_cm=args.sensor2_lateral_offset_cm,
+                                   angle_offset_deg=args.sensor2_angle_offset_deg,
+                                   max_valid_cm=SENSOR_MAX_VALID_CM)
+    LIVE_METRICS_INTERVAL_S = max(0.0, float(args.live_metrics_interval))
+    USE_JOURNAL, JOURNAL_DIR = bool(args.use_journal), args.journal_dir
+    POINT_STORAGE = args.point_storage
+    HEARTBEAT_FILE = args.heartbeat_file
+    LIVE_CHANNEL = args.live_channel
 
     pid = os.getpid()
     atexit.register(release_resources_on_exit)
     if not acquire_lock_and_pid(): print(f"[{pid}] Başka bir betik çalışıyor. Çıkılıyor."); sys.exit(1)
     if not init_hardware(): print(f"[{pid}] Donanım başlatılamadı. Çıkılıyor."); sys.exit(1)
-
+    init_samplers()
+    start_journal_ingest()
+    heartbeat = HeartbeatWriter(HEARTBEAT_FILE, scans_planned=SCAN_REPEATS)
+    open_live_channel()
     DEG_PER_STEP = 360.0 / STEPS_PER_REVOLUTION_OUTPUT_SHAFT
     if SCAN_STEP_ANGLE < DEG_PER_STEP: SCAN_STEP_ANGLE = DEG_PER_STEP
 
@@ -282,17 +652,36 @@ if __name__ == "__main__":
     LOGICAL_SCAN_START_ANGLE = 0.0
     LOGICAL_SCAN_END_ANGLE = SCAN_DURATION_ANGLE_PARAM
 
+    TILT_LAYERS = build_tilt_layers()
+    AREA_TILT = select_area_tilt(TILT_LAYERS)
+
+    revisit_s = planned_points_per_sweep(SCAN_DURATION_ANGLE_PARAM, SCAN_STEP_ANGLE) * len(TILT_LAYERS) * \
+        LOOP_TARGET_INTERVAL_S
+    velocity_max_gap_s = args.velocity_max_gap_s or max(DEFAULT_MAX_GAP_S, 2 * revisit_s)
+    velocity_estimator = VelocityEstimator(bin_deg=DEFAULT_VELOCITY_BIN_DEG, max_gap_s=velocity_max_gap_s,
+                                           max_valid_cm=SENSOR_MAX_VALID_CM)
+    # Tek geçişli taramada her açı bir kez ölçülür; hız önceki taramanın aynı açıdaki ölçümünden gelir
+    try:
+        seeded = seed_from_latest_scan(velocity_estimator)
+        if seeded: print(f"[{pid}] Hız süzgeci önceki taramanın {seeded} noktasıyla başlatıldı.")
+    except Exception as e:
+        print(f"[{pid}] UYARI: Hız süzgeci önceki taramayla başlatılamadı: {e}")
+
     if not create_scan_entry(LOGICAL_SCAN_START_ANGLE, LOGICAL_SCAN_END_ANGLE, SCAN_STEP_ANGLE, BUZZER_DISTANCE_CM,
-                             INVERT_MOTOR_DIRECTION):
+                             INVERT_MOTOR_DIRECTION, TILT_LAYERS):
         print(f"[{pid}] Veritabanı oturumu oluşturulamadı. Çıkılıyor.");
         sys.exit(1)
 
     print(f"[{pid}] Yeni Otomatik Tarama Başlatılıyor (ID: #{current_scan_object_global.id})...")
-    print(f"   Dikey Açı: {SERVO_ANGLE_PARAM}°")
+    if len(TILT_LAYERS) > 1:
+        print(f"   Hacimsel tarama: {len(TILT_LAYERS)} katman, dikey {TILT_LAYERS[0]}° -> {TILT_LAYERS[-1]}°")
+    else:
+        print(f"   Dikey Açı: {TILT_LAYERS[0]}°")
+    if sampler: print(f"   Açı başına en fazla {SAMPLES_PER_ANGLE} örnek (tolerans: {SAMPLE_TOLERANCE_CM} cm)")
 
     try:
-        print(f"[{pid}] ADIM 0: Servo motor dikey açıya ({SERVO_ANGLE_PARAM}°) ayarlanıyor...")
-        servo.value = degree_to_servo_value(SERVO_ANGLE_PARAM)
+        print(f"[{pid}] ADIM 0: Servo motor dikey açıya ({TILT_LAYERS[0]}°) ayarlanıyor...")
+        servo.value = degree_to_servo_value(TILT_LAYERS[0])
         time.sleep(1.0)
 
         initial_turn_amount_deg = SCAN_DURATION_ANGLE_PARAM / 2.0
@@ -303,91 +692,45 @@ if __name__ == "__main__":
         time.sleep(1.0)
 
         physical_scan_reference_angle = current_motor_angle_global
-        print(f"[{pid}] ADIM 2: Tarama başlıyor. Mantıksal [{LOGICAL_SCAN_START_ANGLE}° -> {LOGICAL_SCAN_END_ANGLE}°].")
+        print(f"[{pid}] ADIM 2: Tarama başlıyor. Mantıksal [{LOGICAL_SCAN_START_ANGLE}° -> {LOGICAL_SCAN_END_ANGLE}°], "
+              f"{SCAN_REPEATS or 'sürekli'} geçiş{', serpantin' if SERPENTINE_MODE else ''}.")
         print(f"   (Fiziksel referans açısı: {physical_scan_reference_angle:.1f}°)")
 
-        collected_points, current_logical_angle = [], LOGICAL_SCAN_START_ANGLE
-
+        # sweep_count: yön seçimi için toplam geçiş (katman) sayısı, scan_index: oluşturulan tarama sayısı
+        sweep_count, scan_index = 0, 0
         while True:
-            target_physical_angle_for_step = physical_scan_reference_angle + current_logical_angle
-            move_motor_to_angle(target_physical_angle_for_step)
-
-            if yellow_led: yellow_led.on(); time.sleep(0.05)
-            dist_cm = sensor.distance * 100
-            dist_cm_2 = sensor2.distance * 100
-            if yellow_led: yellow_led.off()
-
-            print(f"  Okuma: Yatay {current_logical_angle:.1f}° -> S1:{dist_cm:.1f} cm, S2:{dist_cm_2:.1f} cm")
-
-            min_dist = min(dist_cm, dist_cm_2)
-            if buzzer: buzzer.on() if min_dist < BUZZER_DISTANCE_CM else buzzer.off()
-
-            if lcd:
-                try:
-                    if min_dist < BUZZER_DISTANCE_CM:
-                        lcd.cursor_pos = (0, 0);
-                        lcd.write_string("! YAKIN NESNE !".ljust(LCD_COLS))
-                        lcd.cursor_pos = (1, 0);
-                        lcd.write_string(f"Mesafe: {min_dist:<5.1f}cm".ljust(LCD_COLS))
-                    else:
-                        lcd.cursor_pos = (0, 0);
-                        lcd.write_string(f"Aci(Y):{current_logical_angle:<6.1f}".ljust(LCD_COLS))
-                        lcd.cursor_pos = (1, 0);
-                        lcd.write_string(f"Mesafe: {dist_cm:<5.1f}cm".ljust(LCD_COLS))
-                except Exception as e_lcd_loop:
-                    print(f"UYARI: Döngü içinde LCD'ye yazılamadı: {e_lcd_loop}")
-
-            angle_pan_rad = math.radians(current_logical_angle)
-            angle_tilt_rad = math.radians(SERVO_ANGLE_PARAM)
-
-            # Gerçek 3D Koordinatların Hesaplanması
-            horizontal_radius = dist_cm * math.cos(angle_tilt_rad)
-            z_cm_val = dist_cm * math.sin(angle_tilt_rad)
-            x_cm_val = horizontal_radius * math.cos(angle_pan_rad)
-            y_cm_val = horizontal_radius * math.sin(angle_pan_rad)
-
-            if 0 < dist_cm < (sensor.max_distance * 100 - 1):
-                # Alan/çevre hesabı için 2D projeksiyonu kullanıyoruz
-                collected_points.append((x_cm_val, y_cm_val))
-
-            ScanPoint.objects.create(
-                scan=current_scan_object_global,
-                derece=current_logical_angle,
-                mesafe_cm=dist_cm,
-                x_cm=x_cm_val,
-                y_cm=y_cm_val,
-                z_cm=z_cm_val,
-                dikey_aci=SERVO_ANGLE_PARAM,
-                mesafe_cm_2=dist_cm_2,
-                timestamp=timezone.now()
-            )
-
-            if abs(current_logical_angle - LOGICAL_SCAN_END_ANGLE) < (
-                    SCAN_STEP_ANGLE / 20.0) or current_logical_angle >= LOGICAL_SCAN_END_ANGLE:
-                print(f"[{pid}] Tarama bitti, mantıksal son açıya ({current_logical_angle:.1f}°) ulaşıldı.");
+            if scan_index > 0:
+                first_forward = not (SERPENTINE_MODE and sweep_count % 2 == 1)
+                if not create_scan_entry(*((LOGICAL_SCAN_START_ANGLE, LOGICAL_SCAN_END_ANGLE) if first_forward else (
+                        LOGICAL_SCAN_END_ANGLE, LOGICAL_SCAN_START_ANGLE)), SCAN_STEP_ANGLE, BUZZER_DISTANCE_CM,
+                                         INVERT_MOTOR_DIRECTION, TILT_LAYERS):
+                    break
+
+            area_geometry = IncrementalGeometry(flush_interval_s=LIVE_METRICS_INTERVAL_S)
+            for tilt_angle in TILT_LAYERS:
+                # Serpantin modda tek numaralı geçişler ters yönde ölçerek geri döner
+                forward_sweep = not (SERPENTINE_MODE and sweep_count % 2 == 1)
+                sweep_start, sweep_end = (LOGICAL_SCAN_START_ANGLE, LOGICAL_SCAN_END_ANGLE) if forward_sweep else (
+                    LOGICAL_SCAN_END_ANGLE, LOGICAL_SCAN_START_ANGLE)
+                if sweep_count > 0:
+                    if not SERPENTINE_MODE:
+                        print(f"[{pid}] Ölçümsüz geri dönüş: mantıksal {LOGICAL_SCAN_START_ANGLE}° konumuna...")
+                        move_motor_to_angle(physical_scan_reference_angle + LOGICAL_SCAN_START_ANGLE)
+                    if len(TILT_LAYERS) > 1: set_servo_tilt(tilt_angle)
+
+                print(f"[{pid}] Tarama #{current_scan_object_global.id} ({sweep_count + 1}. geçiş, dikey {tilt_angle}°): "
+                      f"Mantıksal [{sweep_start}° -> {sweep_end}°].")
+                perform_sweep(current_scan_object_global, physical_scan_reference_angle, sweep_start, sweep_end,
+                              tilt_angle, area_geometry if tilt_angle == AREA_TILT else None)
+                sweep_count += 1
+
+            script_exit_status_global = finalize_scan(current_scan_object_global, area_geometry)
+            if heartbeat: heartbeat.finish(script_exit_status_global)
+
+            scan_index += 1
+            if SCAN_REPEATS and scan_index >= SCAN_REPEATS:
                 break
 
-            current_logical_angle += SCAN_STEP_ANGLE
-            current_logical_angle = min(current_logical_angle, LOGICAL_SCAN_END_ANGLE)
-            time.sleep(max(0, LOOP_TARGET_INTERVAL_S - STEP_MOTOR_SETTLE_TIME))
-
-        if len(collected_points) >= 3:
-            polygon = [(0, 0)] + collected_points
-            area, perimeter = shoelace_formula(polygon), calculate_perimeter(collected_points)
-            x_coords = [p[0] for p in collected_points];
-            y_coords = [p[1] for p in collected_points]
-            width = (max(y_coords) - min(y_coords)) if y_coords else 0.0
-            depth = max(x_coords) if x_coords else 0.0
-            current_scan_object_global.calculated_area_cm2 = area;
-            current_scan_object_global.perimeter_cm = perimeter
-            current_scan_object_global.max_width_cm = width;
-            current_scan_object_global.max_depth_cm = depth
-            script_exit_status_global = Scan.Status.COMPLETED
-        else:
-            script_exit_status_global = Scan.Status.INSUFFICIENT_POINTS
-        current_scan_object_global.status = script_exit_status_global
-        current_scan_object_global.save()
-
     except KeyboardInterrupt:
         script_exit_status_global = Scan.Status.INTERRUPTED
         print(f"\n[{pid}] Ctrl+C ile kesildi.")
@@ -397,6 +740,7 @@ if __name__ == "__main__":
 
         traceback.print_exc()
         print(f"[{pid}] KRİTİK HATA: Ana döngüde: {e}")
+        if heartbeat: heartbeat.error(e)
     finally:
         if script_exit_status_global not in [Scan.Status.ERROR]:
             print(f"[{pid}] ADIM 3: İşlem sonu. Mutlak başlangıç konumuna ({ABSOLUTE_START_POSITION}°)...")
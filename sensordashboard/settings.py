@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -83,9 +84,36 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Yazma işlemleri BEGIN IMMEDIATE ile başlar; okuma->yazma kilit yükseltmesindeki
+            # busy_timeout'u beklemeden düşen "database is locked" hatalarını önler
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Her SQLite bağlantısına uygulanan PRAGMA'lar (scanner/sqlite_tuning.py). Tarayıcı yazarken panel
+# okuyabilsin diye WAL kullanılır.
+SQLITE_TUNING = {
+    # Yeni veritabanlarında geçerli; mevcut dosya için: manage.py prune_scans --enable-incremental-vacuum
+    'auto_vacuum': 'INCREMENTAL',
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout_ms': 5000,
+    'mmap_size': 64 * 1024 * 1024,
+    'cache_size_kb': 8192,
+    'wal_autocheckpoint': 1000,
+    'journal_size_limit': 16 * 1024 * 1024,
+    # Tarama bitince yapılan kontrol noktasının kipi
+    'checkpoint_mode': 'TRUNCATE',
+}
+
+# Arşivlenmiş taramaların tam çözünürlüklü noktalarının .npz dosyaları (scanner/archive.py)
+SCAN_ARCHIVE_DIR = BASE_DIR / 'scan_archive'
+
+# Tarayıcının ham ölçüm günlükleri (scanner/journal.py)
+SCAN_JOURNAL_DIR = BASE_DIR / 'scan_journal'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -163,3 +191,19 @@ STATICFILES_FINDERS = [
     'django_plotly_dash.finders.DashComponentFinder',
     'django_plotly_dash.finders.DashAppDirectoryFinder',
 ]
+
+# Dash geri çağrılarının süre/sorgu/yanıt boyutu ölçümü (dashboard_app/instrumentation.py)
+DASH_CALLBACK_METRICS = {
+    # Geri çağrılar ölçüm için sarılsın mı
+    "enabled": True,
+    # Bu süreye (s) ulaşan çağrılar yavaş sayılıp günlüğe yazılır
+    "slow_callback_s": 1.0,
+    # cProfile altında çalışan çağrıların oranı; profili alınan yavaş çağrılar profiliyle günlüğe yazılır
+    "profile_sample_rate": 0.05,
+    # Profili alınan yavaş çağrıların .prof dosyalarının dizini (None: yalnızca günlük)
+    "profile_dir": None,
+    # Metrik sayfasındaki yüzdeliklerin kayan penceresi (s)
+    "window_s": 300,
+    # Prometheus toplayıcısının /metrics/'e gönderdiği Bearer jetonu (None: yalnızca yönetici oturumları)
+    "metrics_token": os.environ.get('DASH_METRICS_TOKEN'),
+}
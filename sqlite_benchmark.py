@@ -0,0 +1,177 @@
+# sqlite_benchmark.py
+#
+# Tarayıcı yazarken panel okurken SQLite davranışını ölçer: bir yazıcı süreci her noktayı ayrı
+# commit ile ekler (sensor_script gibi), M okuyucu süreci panelin sorgularını belirli aralıklarla
+# çalıştırır. Yazıcının commit gecikmesi (p50/p95/p99/maks), "database is locked" hataları ve
+# okuyucu sorgu süreleri, varsayılan (rollback journal) ayarlarla ve scanner/sqlite_tuning.py
+# ayarlarıyla (WAL) karşılaştırılır. Geçici bir veritabanı kullanır, projenin veritabanına dokunmaz.
+#
+# Kullanım:
+#   python sqlite_benchmark.py --readers 0 2 8 --duration 10
+#   python sqlite_benchmark.py --modes wal --readers 4 --write-interval 0.002 --preload 50000
+
+import argparse
+import multiprocessing as mp
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from scanner.sqlite_tuning import DEFAULTS, apply_pragmas, checkpoint
+
+# Django'nun SQLite için kendi ayarı olmadan açtığı bağlantıya denk: rollback journal, 5 s bekleme
+MODES = {
+    'default': {'journal_mode': 'DELETE', 'synchronous': 'FULL', 'busy_timeout_ms': 5000, 'mmap_size': None,
+                'cache_size_kb': None, 'wal_autocheckpoint': None, 'journal_size_limit': None},
+    'wal': dict(DEFAULTS),
+}
+
+SCHEMA = [
+    "CREATE TABLE scanner_scan (id INTEGER PRIMARY KEY AUTOINCREMENT, start_time TEXT NOT NULL, "
+    "status TEXT NOT NULL, buzzer_distance_setting INTEGER, calculated_area_cm2 REAL)",
+    "CREATE TABLE scanner_scanpoint (id INTEGER PRIMARY KEY AUTOINCREMENT, scan_id INTEGER NOT NULL, "
+    "derece REAL, mesafe_cm REAL, x_cm REAL, y_cm REAL, z_cm REAL, dikey_aci REAL, quality REAL, "
+    "hiz_cm_s REAL, timestamp TEXT NOT NULL)",
+    "CREATE INDEX scanpoint_scan_idx ON scanner_scanpoint (scan_id)",
+    "CREATE INDEX scanpoint_scan_time_idx ON scanner_scanpoint (scan_id, timestamp)",
+    "CREATE INDEX scanpoint_scan_id_idx ON scanner_scanpoint (scan_id, id)",
+    "CREATE INDEX scan_status_start_idx ON scanner_scan (status, start_time)",
+]
+
+# Panel callback'lerinin bir yoklamada çalıştırdığı sorgular (dashboard_app/dash_apps.py). Bunlar
+# ilk sürümün sorgularıdır ve aynen korunur: "en büyük mesafe" kartı o zaman noktalardan
+# `mesafe_cm < 2500` ile hesaplanıyordu (bugün Scan.max_distance_cm özetinden, SENSOR_MAX_VALID_CM ile).
+READER_QUERIES = [
+    "SELECT id FROM scanner_scan WHERE status = 'RUN' ORDER BY start_time DESC LIMIT 1",
+    "SELECT derece, mesafe_cm, hiz_cm_s FROM scanner_scanpoint WHERE scan_id = ? ORDER BY timestamp DESC LIMIT 1",
+    "SELECT MAX(mesafe_cm) FROM scanner_scanpoint WHERE scan_id = ? AND mesafe_cm < 2500 AND mesafe_cm > 0",
+    "SELECT x_cm, y_cm, z_cm, derece, dikey_aci, mesafe_cm, quality, timestamp FROM scanner_scanpoint "
+    "WHERE scan_id = ?",
+]
+
+
+def open_connection(path, config):
+    conn = sqlite3.connect(path, timeout=config['busy_timeout_ms'] / 1000, isolation_level=None)
+    apply_pragmas(conn, config)
+    return conn
+
+
+def create_database(path, config, preload):
+    conn = open_connection(path, config)
+    for statement in SCHEMA: conn.execute(statement)
+    conn.execute("INSERT INTO scanner_scan (start_time, status, buzzer_distance_setting) "
+                 "VALUES (strftime('%Y-%m-%d %H:%M:%f', 'now'), 'RUN', 10)")
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO scanner_scanpoint (scan_id, derece, mesafe_cm, x_cm, y_cm, z_cm, dikey_aci, "
+                     "quality, hiz_cm_s, timestamp) VALUES (1, ?, ?, ?, ?, 0, 0, 1, 0, ?)",
+                     ((i % 270, 100.0 + i % 50, float(i % 97), float(i % 89), f"2026-01-01 00:00:{i:09d}")
+                      for i in range(preload)))
+    conn.execute("COMMIT")
+    conn.close()
+
+
+def writer(path, config, stop, interval_s, results):
+    conn = open_connection(path, config)
+    latencies, errors, i = [], 0, 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            # Django'nun autocommit'te Model.save() ile yaptığı gibi her nokta kendi işleminde
+            conn.execute("INSERT INTO scanner_scanpoint (scan_id, derece, mesafe_cm, x_cm, y_cm, z_cm, dikey_aci, "
+                         "quality, hiz_cm_s, timestamp) VALUES (1, ?, ?, 1, 1, 0, 0, 1, 0, "
+                         "strftime('%Y-%m-%d %H:%M:%f', 'now'))", (i % 270, 100.0 + i % 50))
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+        i += 1
+        time.sleep(interval_s)
+    conn.close()
+    results.put(('writer', latencies, errors))
+
+
+def reader(path, config, stop, interval_s, results):
+    conn = open_connection(path, config)
+    latencies, errors = [], 0
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            row = conn.execute(READER_QUERIES[0]).fetchone()
+            scan_id = row[0] if row else 1
+            for query in READER_QUERIES[1:]:
+                conn.execute(query, (scan_id,)).fetchall()
+            latencies.append(time.perf_counter() - started)
+        except sqlite3.OperationalError:
+            errors += 1
+        time.sleep(interval_s)
+    conn.close()
+    results.put(('reader', latencies, errors))
+
+
+def percentile_ms(values, q):
+    if not values: return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] * 1000
+
+
+def run_case(mode, reader_count, args):
+    config = MODES[mode]
+    workdir = tempfile.mkdtemp(prefix='sqlite_bench_')
+    path = os.path.join(workdir, 'bench.sqlite3')
+    try:
+        create_database(path, config, args.preload)
+        stop, results = mp.Event(), mp.Queue()
+        procs = [mp.Process(target=writer, args=(path, config, stop, args.write_interval, results))]
+        procs += [mp.Process(target=reader, args=(path, config, stop, args.poll_interval, results))
+                  for _ in range(reader_count)]
+        for p in procs: p.start()
+        time.sleep(args.duration)
+        stop.set()
+        collected = [results.get() for _ in procs]
+        for p in procs: p.join()
+
+        writes = next(c for c in collected if c[0] == 'writer')
+        reads = [c for c in collected if c[0] == 'reader']
+        read_latencies = [v for c in reads for v in c[1]]
+        wal_path = path + '-wal'
+        wal_kb = os.path.getsize(wal_path) / 1024 if os.path.exists(wal_path) else 0.0
+        if mode == 'wal':
+            conn = sqlite3.connect(path)
+            checkpoint(conn, mode=config['checkpoint_mode'])
+            conn.close()
+        return {
+            'commits': len(writes[1]), 'commit_p50': percentile_ms(writes[1], 0.5),
+            'commit_p95': percentile_ms(writes[1], 0.95), 'commit_p99': percentile_ms(writes[1], 0.99),
+            'commit_max': max(writes[1]) * 1000 if writes[1] else float('nan'), 'write_errors': writes[2],
+            'polls': len(read_latencies), 'read_p50': percentile_ms(read_latencies, 0.5),
+            'read_p95': percentile_ms(read_latencies, 0.95), 'read_errors': sum(c[2] for c in reads),
+            'wal_kb': wal_kb,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite yazıcı/okuyucu eşzamanlılık karşılaştırması")
+    parser.add_argument("--modes", nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument("--readers", type=int, nargs='+', default=[0, 2, 8], help="Okuyucu süreç sayıları (M)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Her durum için süre (s)")
+    parser.add_argument("--write-interval", type=float, default=0.01, help="Yazıcının noktalar arası beklemesi (s)")
+    parser.add_argument("--poll-interval", type=float, default=0.25, help="Okuyucunun yoklamalar arası beklemesi (s)")
+    parser.add_argument("--preload", type=int, default=20000, help="Taramada önceden bulunan nokta sayısı")
+    args = parser.parse_args()
+
+    print(f"{'kip':<8} {'M':>3} {'commit':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'maks ms':>8} "
+          f"{'y.hata':>6} {'yoklama':>8} {'okuma p50':>10} {'okuma p95':>10} {'o.hata':>6} {'WAL KB':>8}")
+    for reader_count in args.readers:
+        for mode in args.modes:
+            r = run_case(mode, reader_count, args)
+            print(f"{mode:<8} {reader_count:>3} {r['commits']:>7} {r['commit_p50']:>8.2f} {r['commit_p95']:>8.2f} "
+                  f"{r['commit_p99']:>8.2f} {r['commit_max']:>8.1f} {r['write_errors']:>6} {r['polls']:>8} "
+                  f"{r['read_p50']:>10.2f} {r['read_p95']:>10.2f} {r['read_errors']:>6} {r['wal_kb']:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()